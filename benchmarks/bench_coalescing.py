@@ -0,0 +1,111 @@
+"""并发相同读请求的合并效果（single-flight）
+
+在同一份数据集上分别以 TODO_SINGLE_FLIGHT=1 和 0 启动 serve.py，对每个接口反复发送突发请求：
+每轮由 --burst 个线程在同一时刻发出同一个 GET 请求，记录每个请求的延迟和整轮的完成时间，
+并从 /api/admin/single-flight 读取合并比例。整个过程只使用本机回环地址。
+
+用法:
+    python -m benchmarks.bench_coalescing --todos 20000 --burst 32 --rounds 20
+    python -m benchmarks.bench_coalescing --routes /api/todos --json coalescing.json
+"""
+from typing import Any, Dict, List
+import argparse
+import http.client
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_http import SERVER_ENV
+from benchmarks.common import load_report, print_summaries, request_json, save_report, serve, summarize
+from benchmarks.dataset import create_dataset
+
+ROUTES = ("/api/todos", "/api/recycle-bin", "/api/stats")
+
+
+def _bursts(port: int, path: str, burst: int, rounds: int) -> Dict[str, Any]:
+    """每轮 burst 个连接同时发出请求，返回单个请求的延迟分布和每轮平均完成时间"""
+    latencies: List[float] = []
+    round_times: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    connections = [http.client.HTTPConnection("127.0.0.1", port, timeout=60) for _ in range(burst)]
+    barrier = threading.Barrier(burst + 1)
+
+    def _client(conn: http.client.HTTPConnection) -> None:
+        for _ in range(rounds):
+            barrier.wait()
+            start = time.perf_counter()
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if response.status != 200:
+                    errors[0] += 1
+            barrier.wait()
+
+    threads = [threading.Thread(target=_client, args=(conn,)) for conn in connections]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        round_start = time.perf_counter()
+        barrier.wait()  # 放行本轮
+        barrier.wait()  # 等待本轮全部完成
+        round_times.append(time.perf_counter() - round_start)
+    elapsed = time.perf_counter() - started
+    for thread in threads:
+        thread.join()
+    for conn in connections:
+        conn.close()
+
+    stats = summarize(latencies, elapsed, errors[0])
+    stats["round_ms"] = sum(round_times) / len(round_times) * 1000
+    return stats
+
+
+def run(todos: int, routes: List[str], burst: int, rounds: int, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.db")
+        dataset = create_dataset(path, todos, seed=seed)
+        report: Dict[str, Any] = {"dataset": dataset, "burst": burst, "rounds": rounds, "modes": {}}
+        for mode, enabled in (("coalesced", "1"), ("independent", "0")):
+            # 关闭准入控制，让每一轮的请求同时到达接口
+            env = dict(SERVER_ENV, TODO_SINGLE_FLIGHT=enabled, ADMISSION_CONTROL="0")
+            with serve(database_url=dataset["url"], env=env) as port:
+                results = {route: _bursts(port, route, burst, rounds) for route in routes}
+                flight = request_json(port, "GET", "/api/admin/single-flight")
+            report["modes"][mode] = {"results": results, "single_flight": flight}
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="并发相同读请求的合并效果")
+    parser.add_argument("--todos", type=int, default=20000, help="数据集中的待办事项数量")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="逗号分隔的接口路径")
+    parser.add_argument("--burst", type=int, default=32, help="每轮同时发出的请求数")
+    parser.add_argument("--rounds", type=int, default=20, help="突发轮数")
+    parser.add_argument("--seed", type=int, default=42, help="数据集随机种子")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    report = run(args.todos, routes, args.burst, args.rounds, args.seed)
+    baseline = load_report(args.compare) or {}
+    print(f"[{args.todos} 个事项, 每轮 {args.burst} 个并发请求 × {args.rounds} 轮]")
+    for mode, result in report["modes"].items():
+        flight = result["single_flight"]
+        print(f"{mode}: 合并比例 {flight['coalescing_ratio']:.2%}（{flight['calls']} 次调用，实际执行 {flight['executions']} 次）")
+        print_summaries(result["results"], baseline.get("modes", {}).get(mode, {}).get("results"))
+        for route, stats in result["results"].items():
+            print(f"  {route:<16} 每轮完成时间 {stats['round_ms']:.4g}ms")
+
+    if args.json_path:
+        save_report(args.json_path, report)
+
+
+if __name__ == "__main__":
+    main()
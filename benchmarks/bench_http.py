@@ -0,0 +1,99 @@
+"""主要接口的HTTP负载测试
+
+在 benchmarks.dataset 生成的数据集上启动 serve.py，对每个场景以固定并发度持续发送请求，
+输出 RPS 和 p50/p95/p99 延迟。结果可保存为JSON，并在之后的提交上用 --compare 对比。
+整个过程只使用本机回环地址，不需要网络。
+
+用法:
+    python -m benchmarks.bench_http --todos 10000 --concurrency 16 --duration 5
+    python -m benchmarks.bench_http --scenarios list,top,mixed --json before.json
+    python -m benchmarks.bench_http --compare before.json
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+
+from benchmarks.common import RequestSpec, load_report, print_summaries, run_load, save_report, serve
+from benchmarks.dataset import create_dataset
+
+# 压测期间关闭后台维护任务，避免干扰测量
+SERVER_ENV = {"ASSIGNMENT_LOG_RETENTION_INTERVAL_S": "0", "RECYCLE_BIN_PURGE_INTERVAL_S": "0"}
+
+
+def _scenarios(ids: List[int]) -> Dict[str, Callable[[int], RequestSpec]]:
+    """场景名 -> 根据序号生成请求的函数；写场景按序号轮流使用已有事项"""
+    def _id(seq: int) -> int:
+        return ids[seq % len(ids)]
+
+    scenarios: Dict[str, Callable[[int], RequestSpec]] = {
+        "list": lambda seq: ("GET", "/api/todos", None),
+        "top": lambda seq: ("GET", "/api/todos/top?limit=20", None),
+        "quadrants": lambda seq: ("GET", "/api/todos/quadrants?limit=20", None),
+        "stats": lambda seq: ("GET", "/api/stats", None),
+        "quadrant_stats": lambda seq: ("GET", "/api/stats/quadrants", None),
+        "calendar": lambda seq: ("GET", "/api/calendar?from=2026-01-01&to=2026-01-31", None),
+        "history": lambda seq: ("GET", f"/api/todos/{_id(seq)}/history?limit=20", None),
+        "update": lambda seq: ("PATCH", f"/api/todos/{_id(seq)}",
+                               {"future_score": seq % 7 - 3, "urgency_score": (seq // 7) % 7 - 3}),
+        "toggle": lambda seq: ("PATCH", f"/api/todos/{_id(seq)}/toggle", None),
+        "create": lambda seq: ("POST", "/api/todos", {"title": f"load-{seq}", "future_score": 1, "urgency_score": 1}),
+    }
+
+    # 混合负载：约 80% 读（以 Top-N 和统计为主）、20% 写
+    mix = ["top"] * 4 + ["quadrants", "stats", "history", "list"] + ["update", "toggle"]
+
+    def _mixed(seq: int) -> RequestSpec:
+        return scenarios[mix[seq % len(mix)]](seq)
+
+    scenarios["mixed"] = _mixed
+    return scenarios
+
+
+def run(todos: int, names: List[str], concurrency: int, duration: float, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.db")
+        dataset = create_dataset(path, todos, seed=seed)
+        with sqlite3.connect(path) as conn:
+            ids = [row[0] for row in conn.execute("SELECT id FROM todo_items WHERE deleted = 0")]
+        random.Random(seed).shuffle(ids)
+        scenarios = _scenarios(ids)
+
+        results: Dict[str, Any] = {}
+        with serve(database_url=dataset["url"], env=SERVER_ENV) as port:
+            for name in names:
+                results[name] = run_load(port, scenarios[name], concurrency, duration)
+    return {"dataset": dataset, "concurrency": concurrency, "duration": duration, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP接口负载测试")
+    parser.add_argument("--todos", type=int, default=10000, help="数据集中的待办事项数量")
+    parser.add_argument("--scenarios",
+                        default="list,top,quadrants,stats,quadrant_stats,calendar,history,update,toggle,create,mixed",
+                        help="逗号分隔的场景列表")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="每个场景持续秒数")
+    parser.add_argument("--seed", type=int, default=42, help="数据集随机种子")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(_scenarios([0])))
+    if unknown:
+        parser.error(f"未知的场景: {', '.join(unknown)}")
+
+    report = run(args.todos, names, args.concurrency, args.duration, args.seed)
+    baseline = load_report(args.compare) or {}
+    print(f"[{args.todos} 个事项, 并发 {args.concurrency}, 每个场景 {args.duration}s]")
+    print_summaries(report["results"], baseline.get("results"))
+
+    if args.json_path:
+        save_report(args.json_path, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""todo_items 索引设计前后的查询计划与读写耗时
+
+before: 迁移 0006 之前的单列索引（id / completed / deleted / final_priority / title）
+after:  当前模型的索引（部分索引 (final_priority DESC, id) WHERE deleted = 0 等，移除布尔列索引）
+
+对每种索引集合输出热路径查询的 EXPLAIN QUERY PLAN、平均读取耗时以及单事务写入耗时。
+
+用法:
+    python -m benchmarks.bench_indexes --todos 50000 --deleted 0.3
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from database.orm_models import TodoORM
+from utils.priority_calculator import calculate_priority
+
+# 迁移 0006 之前由模型创建的索引
+BEFORE_INDEXES = [
+    "CREATE INDEX ix_todo_items_id ON todo_items (id)",
+    "CREATE INDEX ix_todo_items_completed ON todo_items (completed)",
+    "CREATE INDEX ix_todo_items_deleted ON todo_items (deleted)",
+    "CREATE INDEX ix_todo_items_final_priority ON todo_items (final_priority)",
+]
+AFTER_ONLY_INDEXES = ["ix_todo_items_active_priority"]
+
+# 与存储层生成的SQL形状一致的热路径查询
+READ_QUERIES = {
+    "active_list": "SELECT * FROM todo_items WHERE deleted = 0",
+    "top_20": "SELECT * FROM todo_items WHERE deleted = 0 ORDER BY final_priority DESC, id LIMIT 20",
+    "top_20_q2": ("SELECT * FROM todo_items WHERE deleted = 0 AND future_score > 0 AND urgency_score <= 0 "
+                  "ORDER BY final_priority DESC, id LIMIT 20"),
+    "count_active": "SELECT count(*) FROM todo_items WHERE deleted = 0",
+    "count_completed": "SELECT count(*) FROM todo_items WHERE deleted = 0 AND completed = 1",
+    "score_groups": ("SELECT future_score, urgency_score, completed, count(*) FROM todo_items "
+                     "WHERE deleted = 0 GROUP BY future_score, urgency_score, completed"),
+}
+
+
+def _build(path: str, variant: str, todos: int, deleted_ratio: float) -> sqlite3.Connection:
+    engine = create_engine(f"sqlite:///{path}")
+    TodoORM.__table__.create(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if variant == "before":
+        for index in AFTER_ONLY_INDEXES:
+            conn.execute(f"DROP INDEX {index}")
+        for ddl in BEFORE_INDEXES:
+            conn.execute(ddl)
+
+    rng = random.Random(42)
+    rows = []
+    for i in range(todos):
+        future_score, urgency_score = rng.randint(-3, 3), rng.randint(-3, 3)
+        rows.append((f"todo-{i}", rng.random() < 0.4, future_score, urgency_score,
+                     calculate_priority(future_score, urgency_score), rng.random() < deleted_ratio))
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO todo_items (title, completed, future_score, urgency_score, final_priority, deleted) "
+        "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    return conn
+
+
+def _time(action: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def _write_ops(conn: sqlite3.Connection, todos: int) -> Dict[str, Callable[[], None]]:
+    rng = random.Random(7)
+
+    def _tx(sql: str, params: tuple) -> None:
+        conn.execute("BEGIN")
+        conn.execute(sql, params)
+        conn.execute("COMMIT")
+
+    def insert() -> None:
+        _tx("INSERT INTO todo_items (title, completed, future_score, urgency_score, final_priority, deleted) "
+            "VALUES ('bench', 0, 1, 1, 432, 0)", ())
+
+    def update_scores() -> None:
+        future_score, urgency_score = rng.randint(-3, 3), rng.randint(-3, 3)
+        _tx("UPDATE todo_items SET future_score = ?, urgency_score = ?, final_priority = ? WHERE id = ?",
+            (future_score, urgency_score, calculate_priority(future_score, urgency_score), rng.randint(1, todos)))
+
+    def toggle() -> None:
+        _tx("UPDATE todo_items SET completed = NOT completed WHERE id = ?", (rng.randint(1, todos),))
+
+    def soft_delete() -> None:
+        _tx("UPDATE todo_items SET deleted = NOT deleted WHERE id = ?", (rng.randint(1, todos),))
+
+    return {"insert": insert, "update_scores": update_scores, "toggle": toggle, "soft_delete": soft_delete}
+
+
+def run_variant(variant: str, todos: int, deleted_ratio: float, repeat: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{variant}.db")
+        conn = _build(path, variant, todos, deleted_ratio)
+        plans = {
+            name: " | ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+            for name, sql in READ_QUERIES.items()
+        }
+        reads = {name: _time(lambda sql=sql: conn.execute(sql).fetchall(), repeat)
+                 for name, sql in READ_QUERIES.items()}
+        writes = {name: _time(action, repeat * 10) for name, action in _write_ops(conn, todos).items()}
+        indexes = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'todo_items' ORDER BY name")]
+        conn.close()
+    return {"variant": variant, "indexes": indexes, "plans": plans, "read_ms": reads, "write_ms": writes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="todo_items 索引设计基准测试")
+    parser.add_argument("--todos", type=int, default=50000, help="预置的待办事项数量")
+    parser.add_argument("--deleted", type=float, default=0.3, help="软删除事项的比例")
+    parser.add_argument("--repeat", type=int, default=20, help="每个读取查询的重复次数（写入为其10倍）")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = [run_variant(variant, args.todos, args.deleted, args.repeat)
+                                     for variant in ("before", "after")]
+    for result in results:
+        print(f"== {result['variant']}: {', '.join(result['indexes'])}")
+        for name, plan in result["plans"].items():
+            print(f"  {name:<16} {result['read_ms'][name]:9.3f}ms  {plan}")
+        print("  writes: " + "  ".join(f"{name}={ms:.3f}ms" for name, ms in result["write_ms"].items()))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""SQLite PRAGMA 配置组合对比
+
+对每个配置组合（database/sqlite_profiles.py）生成同一份数据集，在存储层上运行标准的读写负载：
+Top-N、统计、按ID读取、分值变更日志分页，单条写入（创建、修改分值、切换状态）以及多线程并发写入，
+最后输出对比表（每秒操作数和 p95 延迟）。
+
+用法:
+    python -m benchmarks.bench_pragmas --todos 50000
+    python -m benchmarks.bench_pragmas --profiles balanced,throughput --threads 8 --json pragmas.json
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from benchmarks.common import load_report, format_delta, measure_calls, save_report, summarize
+from benchmarks.dataset import generate_dataset
+from database.database import create_database_engine
+from database.db_storage import DatabaseTodoStorage
+from database.sqlite_profiles import SQLITE_PROFILES
+from models.schemas import TodoSchema
+
+READ_WORKLOADS = ("top_20", "stats", "get_by_id", "history")
+WRITE_WORKLOADS = ("create", "update_scores", "toggle", "concurrent_writes")
+
+
+def _concurrent_writes(engine, ids: List[int], threads: int, ops_per_thread: int) -> Dict[str, Any]:
+    """多个线程同时修改分值，各自使用独立的连接，写锁由 busy_timeout 排队"""
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def _worker(worker: int) -> None:
+        rng = random.Random(worker)
+        local: List[float] = []
+        for _ in range(ops_per_thread):
+            with Session(engine) as session:
+                storage = DatabaseTodoStorage(session)
+                start = time.perf_counter()
+                storage.update_todo(rng.choice(ids), future_score=rng.randint(-3, 3), operation_source="api")
+                local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=_worker, args=(worker,)) for worker in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_profile(profile: str, todos: int, repeat: int, threads: int, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_database_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}",
+                                        {"pool_size": threads, "max_overflow": 0}, sqlite_profile=profile)
+        try:
+            dataset = generate_dataset(engine, todos, seed=seed)
+            with engine.connect() as conn:
+                ids = list(conn.exec_driver_sql("SELECT id FROM todo_items WHERE deleted = 0").scalars())
+            rng = random.Random(seed)
+
+            def _op(operation: Callable[[DatabaseTodoStorage], Any]) -> Callable[[], Any]:
+                # 每次操作使用新的会话，与请求处理一致
+                def _run() -> Any:
+                    with Session(engine) as session:
+                        return operation(DatabaseTodoStorage(session))
+                return _run
+
+            results = {
+                "top_20": measure_calls(_op(lambda storage: storage.get_top_todos(20)), repeat),
+                "stats": measure_calls(_op(lambda storage: storage.get_stats()), repeat),
+                "get_by_id": measure_calls(_op(lambda storage: storage.get_todo_by_id(rng.choice(ids))), repeat),
+                "history": measure_calls(_op(lambda storage: storage.get_assignment_logs(limit=50)), repeat),
+                "create": measure_calls(_op(lambda storage: storage.add_todo(
+                    TodoSchema(title="bench", future_score=1, urgency_score=1))), repeat),
+                "update_scores": measure_calls(_op(lambda storage: storage.update_todo(
+                    rng.choice(ids), future_score=rng.randint(-3, 3), urgency_score=rng.randint(-3, 3))), repeat),
+                "toggle": measure_calls(_op(lambda storage: storage.update_todo(
+                    rng.choice(ids), completed=rng.random() < 0.5)), repeat),
+                "concurrent_writes": _concurrent_writes(engine, ids, threads, max(1, repeat // threads)),
+            }
+        finally:
+            engine.dispose()
+    return {"dataset": dataset, "results": results}
+
+
+def _print_table(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    for title, workloads in (("读负载", READ_WORKLOADS), ("写负载", WRITE_WORKLOADS)):
+        print(f"\n{title}（ops/s / p95 ms）")
+        print(f"{'profile':<12}" + "".join(f"{name:>26}" for name in workloads))
+        for profile, result in report.items():
+            cells = []
+            for name in workloads:
+                stats = result["results"][name]
+                base = baseline.get(profile, {}).get("results", {}).get(name, {})
+                cell = f"{stats['rps']:.0f}{format_delta(stats['rps'], base.get('rps'))} / {stats['p95_ms']:.2f}"
+                cells.append(f"{cell:>26}")
+            print(f"{profile:<12}" + "".join(cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite PRAGMA 配置组合对比")
+    parser.add_argument("--profiles", default=",".join(SQLITE_PROFILES), help="逗号分隔的配置组合")
+    parser.add_argument("--todos", type=int, default=20000, help="数据集中的待办事项数量")
+    parser.add_argument("--repeat", type=int, default=200, help="每个负载的操作次数")
+    parser.add_argument("--threads", type=int, default=4, help="并发写入的线程数")
+    parser.add_argument("--seed", type=int, default=42, help="数据集随机种子")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    profiles = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    unknown = sorted(set(profiles) - set(SQLITE_PROFILES))
+    if unknown:
+        parser.error(f"未知的配置组合: {', '.join(unknown)}")
+
+    report = {profile: run_profile(profile, args.todos, args.repeat, args.threads, args.seed) for profile in profiles}
+    _print_table(report, load_report(args.compare) or {})
+    if args.json_path:
+        save_report(args.json_path, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""回收站表结构对存储空间和写入量的影响
+
+对比旧的完整副本回收站表（wide）与精简后的 (original_id, deleted_at) 索引表（thin）：
+预置 N 个待办事项，删除其中一部分到回收站后测量数据库文件大小，
+并通过 WAL 增长的页数统计每次删除/恢复写入的页数。
+
+用法:
+    python -m benchmarks.bench_recycle_bin --todos 20000 --recycled 0.3
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from database.orm_models import Base, TodoORM
+
+# 精简前的回收站表及其索引
+WIDE_DDL = [
+    """CREATE TABLE recycle_bin_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        original_id INTEGER NOT NULL,
+        title VARCHAR(100) NOT NULL,
+        description VARCHAR(500),
+        completed BOOLEAN NOT NULL,
+        future_score INTEGER,
+        urgency_score INTEGER,
+        final_priority INTEGER NOT NULL,
+        start_time VARCHAR(5),
+        end_time VARCHAR(5),
+        created_at DATETIME NOT NULL,
+        deleted_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+    )""",
+    "CREATE INDEX ix_recycle_bin_items_id ON recycle_bin_items (id)",
+    "CREATE UNIQUE INDEX ix_recycle_bin_items_original_id ON recycle_bin_items (original_id)",
+    "CREATE INDEX ix_recycle_bin_items_title ON recycle_bin_items (title)",
+    "CREATE INDEX ix_recycle_bin_items_final_priority ON recycle_bin_items (final_priority)",
+    "CREATE INDEX ix_recycle_bin_items_deleted_at ON recycle_bin_items (deleted_at)",
+]
+
+THIN_DDL = [
+    """CREATE TABLE recycle_bin_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        original_id INTEGER NOT NULL,
+        deleted_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+    )""",
+    "CREATE UNIQUE INDEX ix_recycle_bin_items_original_id ON recycle_bin_items (original_id)",
+    "CREATE INDEX ix_recycle_bin_items_deleted_at ON recycle_bin_items (deleted_at)",
+]
+
+WIDE_INSERT = """
+    INSERT INTO recycle_bin_items (original_id, title, description, completed, future_score, urgency_score,
+                                   final_priority, start_time, end_time, created_at)
+    SELECT id, title, description, completed, future_score, urgency_score,
+           final_priority, start_minute, end_minute, created_at
+    FROM todo_items WHERE id = ?
+"""
+THIN_INSERT = "INSERT INTO recycle_bin_items (original_id) VALUES (?)"
+
+
+def _build(path: str, layout: str, todos: int) -> sqlite3.Connection:
+    engine = create_engine(f"sqlite:///{path}")
+    TodoORM.__table__.create(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for ddl in (WIDE_DDL if layout == "wide" else THIN_DDL):
+        conn.execute(ddl)
+    conn.execute("BEGIN")
+    conn.executemany(
+        "INSERT INTO todo_items (title, description, completed, future_score, urgency_score, final_priority, "
+        "start_minute, end_minute, deleted) VALUES (?, ?, 0, ?, ?, ?, 540, 600, 0)",
+        [(f"todo-{i}", f"benchmark todo number {i} " * 4, i % 7 - 3, (i // 7) % 7 - 3, 100 + i % 400)
+         for i in range(todos)],
+    )
+    conn.execute("COMMIT")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return conn
+
+
+def _wal_pages(conn: sqlite3.Connection, path: str) -> int:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    wal = path + "-wal"
+    return os.path.getsize(wal) // (page_size + 24) if os.path.exists(wal) else 0
+
+
+def _measure(conn: sqlite3.Connection, path: str, statements: List[tuple], ids: List[int]) -> Dict[str, float]:
+    """逐个事务执行操作，返回每次操作平均写入的 WAL 页数和耗时"""
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    started = time.perf_counter()
+    for todo_id in ids:
+        conn.execute("BEGIN")
+        for sql in statements:
+            conn.execute(sql, (todo_id,))
+        conn.execute("COMMIT")
+    elapsed = time.perf_counter() - started
+    pages = _wal_pages(conn, path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return {"pages_per_op": round(pages / len(ids), 2), "ms_per_op": round(elapsed * 1000 / len(ids), 3)}
+
+
+def run_layout(layout: str, todos: int, recycled: float, sample: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{layout}.db")
+        conn = _build(path, layout, todos)
+        insert = WIDE_INSERT if layout == "wide" else THIN_INSERT
+        soft_delete = "UPDATE todo_items SET deleted = 1, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+        restore = "UPDATE todo_items SET deleted = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+        unbin = "DELETE FROM recycle_bin_items WHERE original_id = ?"
+
+        # 先把指定比例的事项放入回收站，测量稳定状态下的文件大小
+        bulk = list(range(1, int(todos * recycled) + 1))
+        conn.execute("BEGIN")
+        for todo_id in bulk:
+            conn.execute(soft_delete, (todo_id,))
+            conn.execute(insert, (todo_id,))
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        size = os.path.getsize(path)
+
+        ids = list(range(todos - sample + 1, todos + 1))
+        delete_cost = _measure(conn, path, [soft_delete, insert], ids)
+        restore_cost = _measure(conn, path, [restore, unbin], ids)
+        conn.close()
+
+    return {
+        "layout": layout,
+        "todos": todos,
+        "recycled": len(bulk),
+        "db_bytes": size,
+        "delete_pages": delete_cost["pages_per_op"],
+        "delete_ms": delete_cost["ms_per_op"],
+        "restore_pages": restore_cost["pages_per_op"],
+        "restore_ms": restore_cost["ms_per_op"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="回收站表结构基准测试")
+    parser.add_argument("--todos", type=int, default=20000, help="预置的待办事项数量")
+    parser.add_argument("--recycled", type=float, default=0.3, help="放入回收站的比例")
+    parser.add_argument("--sample", type=int, default=500, help="测量单次删除/恢复写入量的操作次数")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    results = []
+    for layout in ("wide", "thin"):
+        report = run_layout(layout, args.todos, args.recycled, args.sample)
+        results.append(report)
+        print(f"{layout:<5} db={report['db_bytes'] / 1024:9.1f}KB  "
+              f"delete={report['delete_pages']:5.2f} pages {report['delete_ms']:6.3f}ms  "
+              f"restore={report['restore_pages']:5.2f} pages {report['restore_ms']:6.3f}ms")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""存储层与计算热点的微基准测试
+
+在 benchmarks.dataset 生成的数据集上，直接调用存储层（不经过HTTP）测量：
+calculate_priority、_db_to_pydantic、get_all_todos、get_stats、get_top_todos
+以及回收站批量恢复。每个操作输出 p50/p95/p99 延迟和每秒操作数，
+可保存为JSON并与其他提交的结果对比。
+
+用法:
+    python -m benchmarks.bench_storage --sizes 10000,100000
+    python -m benchmarks.bench_storage --json before.json
+    python -m benchmarks.bench_storage --compare before.json
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from benchmarks.common import load_report, measure_calls, print_summaries, save_report, summarize
+from benchmarks.dataset import generate_dataset
+from database.database import create_database_engine
+from database.db_storage import DatabaseTodoStorage
+from database.orm_models import TodoORM
+from utils.priority_calculator import calculate_priority
+
+
+def _restore_cycle(engine, owner_id: str, batch: int, repeat: int) -> Dict[str, Any]:
+    """批量恢复 batch 个回收站事项并计时，之后用SQL把它们放回回收站（不计时）"""
+    with engine.connect() as conn:
+        ids = list(conn.execute(text(
+            "SELECT original_id FROM recycle_bin_items WHERE owner_id = :owner ORDER BY original_id LIMIT :n"
+        ), {"owner": owner_id, "n": batch}).scalars())
+    latencies: List[float] = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            storage = DatabaseTodoStorage(session, owner_id)
+            start = time.perf_counter()
+            storage.batch_restore_from_recycle_bin(ids)
+            latencies.append(time.perf_counter() - start)
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE todo_items SET deleted = 1 WHERE id IN (SELECT value FROM json_each(:ids))"),
+                         {"ids": str(ids)})
+            conn.execute(text("INSERT INTO recycle_bin_items (owner_id, original_id) "
+                              "SELECT :owner, value FROM json_each(:ids)"), {"owner": owner_id, "ids": str(ids)})
+    stats = summarize(latencies, sum(latencies))
+    stats["batch"] = len(ids)
+    return stats
+
+
+def run_size(todos: int, repeat: int, restore_batch: int, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_database_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}",
+                                        {"pool_size": 1, "max_overflow": 0})
+        try:
+            dataset = generate_dataset(engine, todos, seed=seed)
+            owner_id = "default"
+
+            def _with_storage(operation: Callable[[DatabaseTodoStorage], Any]) -> Callable[[], Any]:
+                # 与请求处理一致：每次操作使用新的会话
+                def _run() -> Any:
+                    with Session(engine) as session:
+                        return operation(DatabaseTodoStorage(session, owner_id))
+                return _run
+
+            scores = [(future, urgency) for future in range(-3, 4) for urgency in range(-3, 4)]
+            with Session(engine) as session:
+                storage = DatabaseTodoStorage(session, owner_id)
+                rows = session.query(TodoORM).limit(1000).all()
+                convert = measure_calls(lambda: [storage._db_to_pydantic(row) for row in rows], repeat, len(rows))
+
+            results = {
+                "calculate_priority": measure_calls(
+                    lambda: [calculate_priority(future, urgency) for future, urgency in scores * 20],
+                    repeat, len(scores) * 20),
+                "db_to_pydantic": convert,
+                "get_all_todos": measure_calls(_with_storage(lambda storage: storage.get_all_todos()),
+                                                max(3, repeat // 10)),
+                "get_stats": measure_calls(_with_storage(lambda storage: storage.get_stats()), repeat),
+                "get_top_todos": measure_calls(_with_storage(lambda storage: storage.get_top_todos(20)), repeat),
+                "batch_restore": _restore_cycle(engine, owner_id, restore_batch, max(3, repeat // 10)),
+            }
+        finally:
+            engine.dispose()
+    return {"dataset": dataset, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="存储层微基准测试")
+    parser.add_argument("--sizes", default="10000,100000", help="数据集大小（逗号分隔）")
+    parser.add_argument("--repeat", type=int, default=50, help="每个操作的重复次数")
+    parser.add_argument("--restore-batch", type=int, default=100, help="每次批量恢复的事项数")
+    parser.add_argument("--seed", type=int, default=42, help="数据集随机种子")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    baseline = load_report(args.compare) or {}
+    report: Dict[str, Any] = {}
+    for size in (int(value) for value in args.sizes.split(",")):
+        result = run_size(size, args.repeat, args.restore_batch, args.seed)
+        report[str(size)] = result
+        dataset = result["dataset"]
+        print(f"[{size} 个事项] 回收站 {dataset['recycled']}, 日志 {dataset['logs']}, 生成耗时 {dataset['elapsed_s']}s")
+        print_summaries(result["results"], baseline.get(str(size), {}).get("results"), unit="ops/s")
+
+    if args.json_path:
+        save_report(args.json_path, report)
+
+
+if __name__ == "__main__":
+    main()
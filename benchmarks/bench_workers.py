@@ -0,0 +1,63 @@
+"""工作进程数对吞吐量的影响
+
+分别以不同的 --workers 启动 serve.py，对读写混合负载测量 RPS 和延迟分位数。
+
+用法:
+    python -m benchmarks.bench_workers --workers 1,2,4 --concurrency 32 --duration 10
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+
+from benchmarks.common import serve, request_json, run_load, RequestSpec
+
+
+def _seed(port: int, count: int) -> List[int]:
+    ids = []
+    for i in range(count):
+        todo = request_json(port, "POST", "/api/todos", {
+            "title": f"bench-{i}", "future_score": i % 7 - 3, "urgency_score": (i // 7) % 7 - 3,
+        })
+        ids.append(todo["id"])
+    return ids
+
+
+def run(workers_list: List[int], concurrency: int, duration: float, seed: int, write_ratio: float) -> List[Dict[str, Any]]:
+    results = []
+    for workers in workers_list:
+        with serve(workers=workers) as port:
+            ids = _seed(port, seed)
+            write_every = max(1, int(round(1 / write_ratio))) if write_ratio > 0 else 0
+
+            def next_request(seq: int) -> RequestSpec:
+                if write_every and seq % write_every == 0:
+                    return "PATCH", f"/api/todos/{ids[seq % len(ids)]}/toggle", None
+                return "GET", "/api/todos", None
+
+            report = run_load(port, next_request, concurrency, duration)
+            report["workers"] = workers
+            results.append(report)
+            print(f"workers={workers:<3} rps={report['rps']:8.1f}  p50={report['p50_ms']:7.2f}ms  "
+                  f"p95={report['p95_ms']:7.2f}ms  p99={report['p99_ms']:7.2f}ms  errors={report['errors']}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="工作进程数基准测试")
+    parser.add_argument("--workers", default="1,2,4", help="逗号分隔的工作进程数列表")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="每组测试持续秒数")
+    parser.add_argument("--seed", type=int, default=200, help="预置的待办事项数量")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="写请求占比")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    workers_list = [int(value) for value in args.workers.split(",") if value.strip()]
+    results = run(workers_list, args.concurrency, args.duration, args.seed, args.write_ratio)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""基准测试公共工具：启动被测服务、并发发送请求、统计延迟"""
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 请求描述: (方法, 路径, JSON请求体)
+RequestSpec = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"服务在 {timeout}s 内未就绪")
+
+
+@contextmanager
+def serve(workers: int = 1, database_url: Optional[str] = None,
+          env: Optional[Dict[str, str]] = None, startup_timeout: float = 30) -> Iterator[int]:
+    """通过 serve.py 启动被测服务，返回监听端口
+
+    Args:
+        workers: 工作进程数
+        database_url: 数据库地址，默认使用临时目录中的新数据库
+        env: 额外的环境变量
+    """
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        process_env = dict(os.environ, **(env or {}))
+        process_env["DATABASE_URL"] = database_url or f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+        process = subprocess.Popen(
+            [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+            cwd=PROJECT_ROOT, env=process_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_healthy(port, startup_timeout)
+            yield port
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+
+
+def request_json(port: int, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Any:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    payload = json.dumps(body) if body is not None else None
+    conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = response.read()
+    return json.loads(data) if data else None
+
+
+def run_load(port: int, next_request: Callable[[int], RequestSpec],
+             concurrency: int, duration: float) -> Dict[str, Any]:
+    """以固定并发度持续发送请求，返回延迟分布和吞吐量
+
+    Args:
+        next_request: 根据序号生成下一个请求的函数
+        concurrency: 并发连接数（每个连接一个线程，启用 keep-alive）
+        duration: 持续时间（秒）
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(10 ** 12))
+    deadline = time.perf_counter() + duration
+
+    def _client() -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local: List[float] = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            with lock:
+                seq = next(counter)
+            method, path, body = next_request(seq)
+            payload = json.dumps(body) if body is not None else None
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, errors[0])
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def measure_calls(action: Callable[[], Any], repeat: int, ops_per_call: int = 1) -> Dict[str, Any]:
+    """重复执行 action 并汇总延迟，每次执行包含 ops_per_call 个操作，延迟按单个操作计"""
+    latencies: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        latencies.append((time.perf_counter() - start) / ops_per_call)
+    # 吞吐量按纯执行时间计算，不含两次执行之间的准备工作
+    stats = summarize(latencies, sum(latencies))
+    stats["requests"] = repeat * ops_per_call
+    return stats
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """将延迟样本（秒）汇总为 p50/p95/p99（毫秒）和 RPS"""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": len(ordered) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+    }
+
+
+def save_report(path: str, report: Dict[str, Any]) -> None:
+    """将结果保存为JSON，供之后的提交用 --compare 对比"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_report(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_delta(current: float, baseline: Optional[float]) -> str:
+    """相对基线的变化百分比，基线缺失时返回空字符串"""
+    if not baseline:
+        return ""
+    return f" ({(current - baseline) / baseline * 100:+.1f}%)"
+
+
+def print_summaries(results: Dict[str, Dict[str, Any]],
+                    baseline: Optional[Dict[str, Dict[str, Any]]] = None, unit: str = "req/s") -> None:
+    """逐行打印各场景的吞吐量与延迟分位数，提供基线时附带变化百分比"""
+    baseline = baseline or {}
+    for name, stats in results.items():
+        base = baseline.get(name, {})
+        print(f"  {name:<16} {stats['rps']:10.1f} {unit}{format_delta(stats['rps'], base.get('rps'))}"
+              f"  p50={stats['p50_ms']:.4g}ms{format_delta(stats['p50_ms'], base.get('p50_ms'))}"
+              f"  p95={stats['p95_ms']:.4g}ms{format_delta(stats['p95_ms'], base.get('p95_ms'))}"
+              f"  p99={stats['p99_ms']:.4g}ms{format_delta(stats['p99_ms'], base.get('p99_ms'))}"
+              f"  errors={stats['errors']}")
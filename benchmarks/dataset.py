@@ -0,0 +1,187 @@
+"""基准测试数据集生成器
+
+按固定随机种子生成可复现的数据集：N 个待办事项（分值分布、完成比例、时间段、截止日期）、
+按比例放入回收站的事项，以及每个事项的分值变更历史。直接批量写入数据库，
+100 万条事项也只需要几十秒，不经过 API。
+
+用法:
+    python -m benchmarks.dataset --todos 100000 --recycled 0.1 --logs-per-todo 2 --out bench.db
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import datetime
+import random
+import time
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+from database.data_version import bump_data_version, todos_version_key
+from database.database import create_database_engine
+from database.init_db import init_db
+from database.manual_order import initial_sort_key
+from database.orm_models import TodoORM, RecycleBinORM, AssignmentLogORM, TenantORM
+from database.tenancy import DEFAULT_TENANT
+from utils.priority_calculator import calculate_priority, get_quadrant
+
+LOG_SOURCES = ("drag", "form", "api")
+
+# 生成的时间戳固定在该时间之前，同一种子在任何时候生成的数据都相同
+EPOCH = datetime.datetime(2026, 1, 1)
+
+
+def _timestamp(value: datetime.datetime) -> str:
+    # 与 CURRENT_TIMESTAMP 写入的格式一致
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _insert_rows(conn, table: str, rows: List[Dict[str, Any]]) -> None:
+    """以 executemany 写入原始值，时间戳按字符串原样保存"""
+    if not rows:
+        return
+    columns = list(rows[0])
+    conn.exec_driver_sql(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [tuple(row[column] for column in columns) for row in rows],
+    )
+
+
+def _scores(rng: random.Random, unassigned: float):
+    if rng.random() < unassigned:
+        return None, None, 100
+    future_score, urgency_score = rng.randint(-3, 3), rng.randint(-3, 3)
+    return future_score, urgency_score, calculate_priority(future_score, urgency_score)
+
+
+def _schedule(rng: random.Random, scheduled: float):
+    """工作时间内以15分钟为粒度的时间段，时长 30 分钟到 3 小时"""
+    if rng.random() >= scheduled:
+        return None, None
+    start_minute = rng.randrange(7 * 60, 21 * 60, 15)
+    return start_minute, start_minute + rng.choice((30, 45, 60, 90, 120, 180))
+
+
+def _dates(rng: random.Random, dated: float, history_days: int):
+    """截止日期分布在 EPOCH 前 history_days 天到之后 60 天内，约一半事项另有不晚于截止日的计划日期"""
+    if rng.random() >= dated:
+        return None, None
+    due = EPOCH.date() + datetime.timedelta(days=rng.randint(-history_days, 60))
+    scheduled = due - datetime.timedelta(days=rng.randint(0, 7)) if rng.random() < 0.5 else None
+    return due.isoformat(), scheduled.isoformat() if scheduled else None
+
+
+def generate_dataset(engine: Engine, todos: int, recycled: float = 0.1, completed: float = 0.3,
+                     unassigned: float = 0.05, scheduled: float = 0.3, dated: float = 0.5, logs_per_todo: float = 2.0,
+                     history_days: int = 30, seed: int = 42, owner_id: str = DEFAULT_TENANT, batch_size: int = 10000) -> Dict[str, Any]:
+    """向数据库写入一个可复现的数据集
+
+    Args:
+        engine: 目标数据库，表结构不存在时自动创建
+        todos: 待办事项数量
+        recycled: 放入回收站（软删除）的比例
+        completed: 已完成的比例
+        unassigned: 未设置分值的比例
+        scheduled: 设置了开始/结束时间的比例
+        dated: 设置了截止日期的比例
+        logs_per_todo: 每个事项平均的分值变更日志条数
+        history_days: 创建时间和日志分布的天数
+        seed: 随机种子
+        owner_id: 数据所属的租户
+
+    Returns:
+        写入的事项、回收站和日志数量以及耗时
+    """
+    init_db(backfills="inline", engine=engine)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    counts = {"todos": 0, "recycled": 0, "logs": 0}
+
+    with engine.begin() as conn:
+        first_id = (conn.execute(select(func.max(TodoORM.id))).scalar() or 0) + 1
+        conn.execute(insert(TenantORM).prefix_with("OR IGNORE").values(owner_id=owner_id))
+
+    for offset in range(0, todos, batch_size):
+        todo_rows: List[Dict[str, Any]] = []
+        recycle_rows: List[Dict[str, Any]] = []
+        log_rows: List[Dict[str, Any]] = []
+        for todo_id in range(first_id + offset, first_id + min(offset + batch_size, todos)):
+            created_at = EPOCH - datetime.timedelta(seconds=rng.randint(0, history_days * 86400))
+            future_score, urgency_score, final_priority = _scores(rng, unassigned)
+            start_minute, end_minute = _schedule(rng, scheduled)
+            due_date, scheduled_date = _dates(rng, dated, history_days)
+            deleted = rng.random() < recycled
+            todo_rows.append({
+                "id": todo_id, "owner_id": owner_id, "title": f"bench-{todo_id}",
+                "description": f"benchmark todo {todo_id}" if rng.random() < 0.5 else None,
+                "completed": rng.random() < completed, "future_score": future_score,
+                "urgency_score": urgency_score, "final_priority": final_priority,
+                "quadrant": get_quadrant(future_score, urgency_score),
+                "sort_key": initial_sort_key(final_priority, todo_id),
+                "start_minute": start_minute, "end_minute": end_minute,
+                "due_date": due_date, "scheduled_date": scheduled_date, "created_at": _timestamp(created_at), "deleted": deleted,
+            })
+            if deleted:
+                deleted_at = created_at + (EPOCH - created_at) * rng.random()
+                recycle_rows.append({"owner_id": owner_id, "original_id": todo_id,
+                                     "deleted_at": _timestamp(deleted_at)})
+
+            # 日志条数在 [0, 2 * logs_per_todo] 内均匀分布，均值为 logs_per_todo
+            logged_at = created_at
+            current = (future_score, urgency_score)
+            for _ in range(rng.randint(0, int(round(2 * logs_per_todo)))):
+                logged_at += (EPOCH - logged_at) * rng.random() * 0.5
+                new = (rng.randint(-3, 3), rng.randint(-3, 3))
+                log_rows.append({
+                    "owner_id": owner_id, "todo_id": todo_id,
+                    "old_future_score": current[0], "old_urgency_score": current[1],
+                    "new_future_score": new[0], "new_urgency_score": new[1],
+                    "source": rng.choice(LOG_SOURCES), "created_at": _timestamp(logged_at),
+                })
+                current = new
+
+        with engine.begin() as conn:
+            _insert_rows(conn, TodoORM.__tablename__, todo_rows)
+            _insert_rows(conn, RecycleBinORM.__tablename__, recycle_rows)
+            _insert_rows(conn, AssignmentLogORM.__tablename__, log_rows)
+        counts["todos"] += len(todo_rows)
+        counts["recycled"] += len(recycle_rows)
+        counts["logs"] += len(log_rows)
+
+    with engine.begin() as conn:
+        # 使已加载的读模型失效
+        bump_data_version(conn, todos_version_key(owner_id))
+        conn.exec_driver_sql("ANALYZE")
+    counts["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return counts
+
+
+def create_dataset(path: str, todos: int, **options: Any) -> Dict[str, Any]:
+    """在指定文件中生成数据集，返回生成结果（含数据库地址）"""
+    url = f"sqlite:///{path}"
+    engine = create_database_engine(url, {"pool_size": 1, "max_overflow": 0})
+    try:
+        return {"url": url, **generate_dataset(engine, todos, **options)}
+    finally:
+        engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="生成基准测试数据集")
+    parser.add_argument("--todos", type=int, default=10000, help="待办事项数量（1万-100万）")
+    parser.add_argument("--recycled", type=float, default=0.1, help="放入回收站的比例")
+    parser.add_argument("--completed", type=float, default=0.3, help="已完成的比例")
+    parser.add_argument("--scheduled", type=float, default=0.3, help="设置了开始/结束时间的比例")
+    parser.add_argument("--dated", type=float, default=0.5, help="设置了截止日期的比例")
+    parser.add_argument("--logs-per-todo", type=float, default=2.0, help="每个事项平均的分值变更日志条数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--out", default="bench.db", help="输出的SQLite数据库文件")
+    args = parser.parse_args(argv)
+
+    result = create_dataset(args.out, args.todos, recycled=args.recycled, completed=args.completed,
+                            scheduled=args.scheduled, dated=args.dated, logs_per_todo=args.logs_per_todo, seed=args.seed)
+    print(f"{result['url']}: {result['todos']} 个事项, {result['recycled']} 个在回收站, "
+          f"{result['logs']} 条日志, 耗时 {result['elapsed_s']}s")
+
+
+if __name__ == "__main__":
+    main()
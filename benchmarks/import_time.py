@@ -0,0 +1,117 @@
+"""导入耗时与冷启动基准测试
+
+基于 ``python -X importtime`` 统计 ``import main`` 的累计耗时及最慢的模块，
+并测量 init_db 在新数据库和结构指纹命中两种情况下的耗时。
+
+用法:
+    python -m benchmarks.import_time --runs 5
+    python -m benchmarks.import_time --json before.json
+    python -m benchmarks.import_time --compare before.json
+"""
+from typing import Dict, List, Any
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INIT_DB_SNIPPET = (
+    "import time; from database.init_db import init_db; "
+    "t = time.perf_counter(); init_db(backfills='skip'); "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def _run_importtime(module: str, env: Dict[str, str]) -> Dict[str, int]:
+    """运行一次 -X importtime，返回 模块名 -> 累计耗时(微秒)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        cumulative[name] = int(cumulative_us)
+    return cumulative
+
+
+def _run_init_db(env: Dict[str, str]) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", INIT_DB_SNIPPET],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(runs: int, module: str, top: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+
+        samples: List[Dict[str, int]] = [_run_importtime(module, env) for _ in range(runs)]
+        medians = {
+            name: statistics.median(sample.get(name, 0) for sample in samples)
+            for name in samples[0]
+        }
+        slowest = sorted(
+            ((name, value) for name, value in medians.items() if name != module),
+            key=lambda item: item[1], reverse=True,
+        )[:top]
+
+        # 第一次在空数据库上建表，之后的运行命中结构指纹
+        fresh_ms = _run_init_db(env)
+        warm_ms = statistics.median(_run_init_db(env) for _ in range(runs))
+
+    return {
+        "module": module,
+        "runs": runs,
+        "import_ms": medians.get(module, 0) / 1000,
+        "slowest_modules": [{"module": name, "cumulative_ms": value / 1000} for name, value in slowest],
+        "init_db_fresh_ms": fresh_ms,
+        "init_db_warm_ms": warm_ms,
+    }
+
+
+def _print_report(report: Dict[str, Any], baseline: Dict[str, Any] = None) -> None:
+    def _delta(key: str) -> str:
+        if not baseline or key not in baseline or not baseline[key]:
+            return ""
+        change = (report[key] - baseline[key]) / baseline[key] * 100
+        return f"  ({change:+.1f}% 对比基线 {baseline[key]:.1f}ms)"
+
+    print(f"import {report['module']}: {report['import_ms']:.1f}ms (中位数, {report['runs']} 次){_delta('import_ms')}")
+    print(f"init_db 新数据库: {report['init_db_fresh_ms']:.1f}ms{_delta('init_db_fresh_ms')}")
+    print(f"init_db 指纹命中: {report['init_db_warm_ms']:.1f}ms{_delta('init_db_warm_ms')}")
+    print("累计耗时最高的模块:")
+    for item in report["slowest_modules"]:
+        print(f"  {item['cumulative_ms']:8.1f}ms  {item['module']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="导入耗时与冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数，取中位数")
+    parser.add_argument("--module", default="main", help="要测量的模块")
+    parser.add_argument("--top", type=int, default=15, help="显示最慢的模块数量")
+    parser.add_argument("--json", dest="json_path", help="将结果保存为JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.runs, args.module, args.top)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    _print_report(report, baseline)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 from .orm_models import Base, TodoORM, RecycleBinORM
-from .database import engine, SessionLocal, get_db
+from .database import get_engine, SessionLocal, get_db
 from .storage import TodoStorage
 
-__all__ = ['Base', 'TodoORM', 'RecycleBinORM', 'Priority', 'engine', 'SessionLocal', 'get_db', 'TodoStorage']
\ No newline at end of file
+__all__ = ['Base', 'TodoORM', 'RecycleBinORM', 'Priority', 'engine', 'get_engine', 'SessionLocal', 'get_db', 'TodoStorage']
+
+
+def __getattr__(name: str):
+    # engine 延迟到首次访问时创建
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
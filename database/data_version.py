@@ -0,0 +1,53 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Union
+from database.orm_models import DataVersionORM
+from database.tenancy import DEFAULT_TENANT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 待办事项及回收站数据的版本键
+TODOS_VERSION_KEY = "todos"
+# 标签归属的版本键，只在事项的标签变化时递增，供标签位图缓存判断是否失效
+TAGS_VERSION_KEY = "tags"
+# 系统设置（界面设置和壁纸）的版本键
+SETTINGS_VERSION_KEY = "settings"
+
+_version_table = DataVersionORM.__table__
+
+
+def todos_version_key(owner_id: str = DEFAULT_TENANT) -> str:
+    """租户的数据版本键，默认租户沿用原有的键"""
+    return TODOS_VERSION_KEY if owner_id == DEFAULT_TENANT else f"{TODOS_VERSION_KEY}:{owner_id}"
+
+
+def tags_version_key(owner_id: str = DEFAULT_TENANT) -> str:
+    """租户标签归属的数据版本键"""
+    return TAGS_VERSION_KEY if owner_id == DEFAULT_TENANT else f"{TAGS_VERSION_KEY}:{owner_id}"
+
+
+def settings_version_key(owner_id: str = DEFAULT_TENANT) -> str:
+    """租户系统设置的数据版本键，与待办事项分开计数，修改设置不会使待办事项的缓存失效"""
+    return SETTINGS_VERSION_KEY if owner_id == DEFAULT_TENANT else f"{SETTINGS_VERSION_KEY}:{owner_id}"
+
+
+def bump_data_version(db: Union[Session, Connection], key: str = TODOS_VERSION_KEY) -> int:
+    """在当前事务中递增数据版本并返回新版本号
+
+    版本号随写事务一起提交，所有工作进程看到的是同一个计数器，
+    进程内缓存可以据此判断其他进程是否修改过数据。
+    """
+    db.execute(
+        insert(_version_table)
+        .values(key=key, version=1)
+        .on_conflict_do_update(index_elements=["key"], set_={"version": _version_table.c.version + 1})
+    )
+    return db.execute(select(_version_table.c.version).where(_version_table.c.key == key)).scalar_one()
+
+
+def get_data_version(db: Union[Session, Connection], key: str = TODOS_VERSION_KEY) -> int:
+    """读取当前已提交的数据版本，从未写入过时为0"""
+    return db.execute(select(_version_table.c.version).where(_version_table.c.key == key)).scalar() or 0
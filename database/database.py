@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine, event
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+from database.slow_query_log import slow_query_recorder
+from database.sqlite_profiles import apply_profile, get_profile
+from typing import Optional
+import threading
 import os
 import logging
 
@@ -19,47 +23,111 @@ POOL_CONFIG = {
     "pool_pre_ping": True,  # 连接健康检查
 }
 
-# 创建数据库引擎 - 优化SQLite性能
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,  # SQLite使用静态池
-        pool_pre_ping=True,
-        echo=False,  # 生产环境关闭SQL日志
-    )
-    
-    # SQLite性能优化事件
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        """设置SQLite优化参数"""
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")  # 使用WAL模式提高并发性能
-        cursor.execute("PRAGMA synchronous=NORMAL")  # 平衡安全性和性能
-        cursor.execute("PRAGMA cache_size=-64000")  # 64MB缓存
-        cursor.execute("PRAGMA temp_store=MEMORY")  # 临时表存储在内存中
-        cursor.execute("PRAGMA mmap_size=30000000000")  # 30GB内存映射
-        cursor.close()
-        logger.debug("SQLite优化参数已设置")
-else:
-    # 其他数据库使用标准连接池
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        **POOL_CONFIG,
-        echo=False,
-    )
-
-# 创建会话工厂 - 优化会话配置
+# 数据库引擎在首次使用时创建，导入本模块不会打开任何连接
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+# 创建会话工厂 - 优化会话配置，引擎创建后再绑定
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine,
     expire_on_commit=False,  # 提高性能，避免不必要的查询
 )
 
+
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """按 SQLITE_PROFILE 指定的配置组合设置SQLite参数（见 database/sqlite_profiles.py）"""
+    apply_profile(dbapi_connection, get_profile())
+    logger.debug("SQLite优化参数已设置")
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def create_database_engine(url: str, pool_config: Optional[dict] = None,
+                           sqlite_profile: Optional[str] = None) -> Engine:
+    """按配置创建数据库引擎
+
+    Args:
+        url: 数据库地址
+        pool_config: 文件数据库的连接池配置，默认使用 POOL_CONFIG
+        sqlite_profile: SQLite PRAGMA 配置组合，默认使用 SQLITE_PROFILE
+    """
+    pool_config = pool_config if pool_config is not None else POOL_CONFIG
+    if "sqlite" in url:
+        if _is_sqlite_memory(url):
+            # 内存数据库只存在于单个连接中，必须使用静态池
+            pool_options = {"poolclass": StaticPool, "pool_pre_ping": True}
+        else:
+            # 文件数据库每个线程使用独立连接，并发事务互不干扰，写入由 busy_timeout 排队
+            pool_options = dict(pool_config)
+        # 创建数据库引擎 - 优化SQLite性能
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            echo=False,  # 生产环境关闭SQL日志
+            **pool_options,
+        )
+        if sqlite_profile is None:
+            event.listen(engine, "connect", set_sqlite_pragma)
+        else:
+            profile = get_profile(sqlite_profile)
+            event.listen(engine, "connect", lambda dbapi_connection, _: apply_profile(dbapi_connection, profile))
+    else:
+        # 其他数据库使用标准连接池
+        engine = create_engine(
+            url,
+            **pool_config,
+            echo=False,
+        )
+
+    # 注册慢查询记录器
+    slow_query_recorder.install(engine)
+    return engine
+
+
+def _create_engine() -> Engine:
+    return create_database_engine(SQLALCHEMY_DATABASE_URL)
+
+
+def get_engine() -> Engine:
+    """获取数据库引擎，首次调用时创建并绑定会话工厂"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+                SessionLocal.configure(bind=_engine)
+                logger.debug("数据库引擎已创建")
+    return _engine
+
+
+def dispose_engine(close: bool = True) -> None:
+    """释放引擎持有的所有连接
+
+    Args:
+        close: fork 后的子进程应传 False，只丢弃继承的连接而不关闭父进程仍在使用的连接
+    """
+    if _engine is not None:
+        _engine.dispose(close=close)
+        logger.debug("数据库引擎连接已释放")
+
+
+def __getattr__(name: str):
+    # 兼容 `from database.database import engine` 的写法，访问时才创建引擎
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # 获取数据库会话的依赖函数 - 添加上下文管理
 def get_db():
     """获取数据库会话 - 上下文管理器"""
+    from database.init_db import ensure_db_initialized
+
+    # 未经 lifespan 启动（如直接使用 TestClient）时，在首个请求中完成初始化
+    ensure_db_initialized()
     db = SessionLocal()
     try:
         yield db
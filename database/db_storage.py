@@ -1,30 +1,128 @@
-from typing import Dict, Optional, List, Any
-from utils.priority_calculator import calculate_priority
+from functools import reduce
+from typing import Callable, Dict, Optional, List, Any, Tuple, TypeVar
+from utils.priority_calculator import calculate_priority, get_quadrant, UNASSIGNED_QUADRANT
+from sqlalchemy import (String, and_, or_, func, select, literal, tuple_, type_coerce, false, true,
+                        delete, update, intersect, union)
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
-from database.orm_models import TodoORM, RecycleBinORM, AssignmentLogORM
-from models.schemas import TodoSchema
-from database.storage import TodoStorage
+from database.orm_models import TodoORM, TodoTagORM, RecycleBinORM, AssignmentLogORM, TenantORM
+from models.schemas import TodoSchema, AssignmentLogSchema, AssignmentLogPageSchema
+from database.storage import TodoStorage, encode_log_cursor, decode_log_cursor, to_log_time
+from database.write_queue import get_group_commit_writer
+from database.data_version import bump_data_version, get_data_version, todos_version_key, tags_version_key
+from database.database import get_engine
+from database.tenancy import DEFAULT_TENANT
+from database.read_model import get_read_model
+from database.recycle_purge import delete_recycle_batch, RECYCLE_BIN_PURGE_BATCH_SIZE
+from database.manual_order import append_key, rebalance_quadrant
+from database.tag_index import TAG_BITMAP_CACHE_ENABLED, get_tag_bitmap_cache
+from utils.fractional_index import key_between
 from utils.exceptions import DatabaseException
+from utils.time_of_day import to_minutes, to_time
+from utils.tags import bitmap_to_ids, normalize_tags
 import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 以字面量 deleted = 0 过滤（而非绑定参数），查询才能命中 WHERE deleted = 0 的部分索引
+_is_active = TodoORM.deleted == false()
+
+_tags = TodoTagORM.__table__
+
+# 按ID批量读取事项时每条 IN 查询的ID数
+_ID_CHUNK_SIZE = 500
+
+# 接口字段 -> 分钟数列
+_TIME_COLUMNS = (("start_time", "start_minute"), ("end_time", "end_minute"))
+
+# 写穿回调: 由写操作结果得到 (新增或修改后的事项, 被移出活跃列表的事项ID)
+WriteThrough = Callable[[Any], Tuple[List[TodoSchema], List[int]]]
+
 
 class DatabaseTodoStorage(TodoStorage):
     """基于SQLAlchemy的待办事项存储实现类
     
-    负责与数据库进行直接交互，执行CRUD操作。
+    负责与数据库进行直接交互，执行CRUD操作。所有读写都限定在 owner_id 指定的租户内。
     """
     
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, owner_id: str = DEFAULT_TENANT) -> None:
         """初始化存储实例
         
         Args:
             db: SQLAlchemy数据库会话对象
+            owner_id: 租户ID
         """
         self.db = db
+        self.owner_id = owner_id
+        self._version_key = todos_version_key(owner_id)
+        self._tags_version_key = tags_version_key(owner_id)
+        self._owned = TodoORM.owner_id == owner_id
+
+    def _get_owned(self, db: Session, todo_id: int) -> Optional[TodoORM]:
+        """按主键获取属于当前租户的事项（含已软删除的）"""
+        todo = db.get(TodoORM, todo_id)
+        return todo if todo is not None and todo.owner_id == self.owner_id else None
+
+    def _run_write(self, operation: Callable[[Session], T], write_through: Optional[WriteThrough] = None) -> T:
+        """执行写操作并提交
+
+        启用组提交时，操作交给写入线程与其他并发写入合并到同一事务中提交；
+        否则在当前会话中执行并立即提交。operation 内部不应自行提交。
+        每个写事务都会递增数据版本，提交后按 write_through 更新进程内读模型，未提供时使读模型失效。
+        """
+        def _apply(db: Session) -> Tuple[T, int]:
+            result = operation(db)
+            return result, bump_data_version(db, self._version_key)
+
+        # 组提交写入器绑定主数据库，按租户分库时其他租户的会话直接提交
+        writer = get_group_commit_writer() if self.db.get_bind() is get_engine() else None
+        if writer is not None:
+            try:
+                result, version = writer.submit(_apply)
+            finally:
+                # 写入发生在其他会话中，丢弃本会话缓存的对象以便后续读取最新数据
+                self.db.expire_all()
+        else:
+            try:
+                result, version = _apply(self.db)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+        read_model = get_read_model(self.owner_id)
+        if read_model is not None:
+            if write_through is None:
+                read_model.invalidate()
+            else:
+                upserts, removals = write_through(result)
+                read_model.apply(version, upserts, removals)
+        return result
+
+    def _current_read_model(self):
+        """获取与数据库版本一致的读模型，未启用时返回None"""
+        read_model = get_read_model(self.owner_id)
+        if read_model is None:
+            return None
+        # 先读版本再加载数据，加载期间的并发写入只会导致下次多加载一次
+        read_model.ensure_current(get_data_version(self.db, self._version_key), self._load_active_todos)
+        return read_model
+
+    def _load_active_todos(self) -> List[TodoSchema]:
+        todos = self.db.query(TodoORM).filter(self._owned, _is_active).all()
+        return [self._db_to_pydantic(todo) for todo in todos]
     
+    def get_data_version(self) -> int:
+        """读取已提交的数据版本（data_versions 表），所有工作进程共享同一个计数器"""
+        try:
+            return get_data_version(self.db, self._version_key)
+        except Exception as e:
+            logger.error(f"读取数据版本失败: {e}", exc_info=True)
+            raise DatabaseException(f"读取数据版本失败: {str(e)}")
+
     def get_all_todos(self) -> Dict[int, TodoSchema]:
         """从数据库中检索所有未删除的待办事项
         
@@ -32,7 +130,10 @@ class DatabaseTodoStorage(TodoStorage):
             Dict[int, TodoSchema]: ID到Todo对象的映射
         """
         try:
-            todos = self.db.query(TodoORM).filter(TodoORM.deleted == False).all()
+            read_model = self._current_read_model()
+            if read_model is not None:
+                return read_model.get_all()
+            todos = self.db.query(TodoORM).filter(self._owned, _is_active).all()
             logger.debug(f"从数据库检索到 {len(todos)} 条未删除的待办事项")
             return {todo.id: self._db_to_pydantic(todo) for todo in todos}
         except Exception as e:
@@ -49,7 +150,10 @@ class DatabaseTodoStorage(TodoStorage):
             Optional[TodoSchema]: 找到的对象或None
         """
         try:
-            todo = self.db.get(TodoORM, todo_id)
+            read_model = self._current_read_model()
+            if read_model is not None:
+                return read_model.get(todo_id)
+            todo = self._get_owned(self.db, todo_id)
             if todo and not todo.deleted:  # type: ignore
                 return self._db_to_pydantic(todo)
             return None
@@ -66,34 +170,48 @@ class DatabaseTodoStorage(TodoStorage):
         Returns:
             TodoSchema: 包含生成ID的持久化对象
         """
-        try:
-            final_priority = 100
-            if todo.future_score is not None and todo.urgency_score is not None:
-                final_priority = calculate_priority(todo.future_score, todo.urgency_score)
+        final_priority = 100
+        if todo.future_score is not None and todo.urgency_score is not None:
+            final_priority = calculate_priority(todo.future_score, todo.urgency_score)
+
+        quadrant = get_quadrant(todo.future_score, todo.urgency_score)
 
+        def _add(db: Session) -> TodoSchema:
+            # 新事项排在所属象限的最后
+            sort_key = append_key(db, self.owner_id, quadrant)
             db_todo = TodoORM(
+                owner_id=self.owner_id,
                 title=todo.title,
                 description=todo.description,
                 completed=todo.completed,
                 future_score=todo.future_score,
                 urgency_score=todo.urgency_score,
                 final_priority=final_priority,
-                start_time=todo.start_time,
-                end_time=todo.end_time
+                start_minute=to_minutes(todo.start_time),
+                end_minute=to_minutes(todo.end_time),
+                due_date=todo.due_date,
+                scheduled_date=todo.scheduled_date,
+                quadrant=quadrant,
+                sort_key=sort_key,
+                tag_rows=[TodoTagORM(owner_id=self.owner_id, tag=tag) for tag in todo.tags]
             )
+            if todo.tags:
+                bump_data_version(db, self._tags_version_key)
 
             if todo.id is not None:
                 db_todo.id = todo.id
 
-            self.db.add(db_todo)
-            self.db.commit()
-            self.db.refresh(db_todo)
+            # 登记租户，供维护任务逐个租户处理数据
+            db.execute(insert(TenantORM).values(owner_id=self.owner_id).on_conflict_do_nothing())
+            db.add(db_todo)
+            db.flush()  # 生成主键
+            return self._db_to_pydantic(db_todo)
 
-            result = self._db_to_pydantic(db_todo)
+        try:
+            result = self._run_write(_add, lambda created: ([created], []))
             logger.info(f"数据库已成功保存新待办事项: {result.title} (ID: {result.id})")
             return result
         except Exception as e:
-            self.db.rollback()
             logger.error(f"数据库添加待办事项失败: {e}", exc_info=True)
             raise DatabaseException(f"创建待办事项失败: {str(e)}")
     
@@ -107,24 +225,39 @@ class DatabaseTodoStorage(TodoStorage):
         Returns:
             bool: 更新是否成功
         """
-        try:
-            todo = self.db.get(TodoORM, todo_id)
+        def _update(db: Session) -> Optional[TodoSchema]:
+            todo = self._get_owned(db, todo_id)
 
             if not todo or todo.deleted:  # type: ignore
                 logger.warning(f"尝试更新不存在或已删除的数据库记录 ID: {todo_id}")
-                return False
+                return None
 
-            operation_source = kwargs.pop('operation_source', None)
+            changes = dict(kwargs)
+            operation_source = changes.pop('operation_source', None)
+            tags = normalize_tags(changes.pop('tags')) if 'tags' in changes else None
+            # 接口中的 "HH:MM" 转换为分钟数列
+            for name, column in _TIME_COLUMNS:
+                if name in changes:
+                    changes[column] = to_minutes(changes.pop(name))
             old_future_score = todo.future_score
             old_urgency_score = todo.urgency_score
 
             updated_fields: List[str] = []
-            for key, value in kwargs.items():
-                if hasattr(todo, key) and key != 'id':
+            for key, value in changes.items():
+                if hasattr(todo, key) and key not in ('id', 'owner_id'):
                     if getattr(todo, key) != value:  # type: ignore
                         setattr(todo, key, value)
                         updated_fields.append(key)
 
+            if tags is not None and tags != sorted(row.tag for row in todo.tag_rows):
+                # 只增删有变化的标签行：同一次 flush 中先删后插同一主键会冲突
+                todo.tag_rows = [row for row in todo.tag_rows if row.tag in tags] + [
+                    TodoTagORM(owner_id=self.owner_id, tag=tag)
+                    for tag in sorted(set(tags) - {row.tag for row in todo.tag_rows})
+                ]
+                updated_fields.append('tags')
+                bump_data_version(db, self._tags_version_key)
+
             score_changed = False
             if 'future_score' in updated_fields or 'urgency_score' in updated_fields:
                 if todo.future_score is not None and todo.urgency_score is not None:
@@ -137,11 +270,18 @@ class DatabaseTodoStorage(TodoStorage):
                         todo.final_priority = 100
                         updated_fields.append('final_priority')
                 score_changed = True
+                quadrant = get_quadrant(todo.future_score, todo.urgency_score)  # type: ignore
+                if todo.quadrant != quadrant:
+                    # 移到其他象限时排在新象限的最后
+                    sort_key = append_key(db, self.owner_id, quadrant)
+                    todo.quadrant, todo.sort_key = quadrant, sort_key  # type: ignore
+                    updated_fields.extend(['quadrant', 'sort_key'])
 
             if updated_fields:
                 todo.updated_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)  # type: ignore
                 if score_changed and todo.id is not None:
                     log_entry = AssignmentLogORM(
+                        owner_id=self.owner_id,
                         todo_id=todo.id,
                         old_future_score=old_future_score,
                         old_urgency_score=old_urgency_score,
@@ -149,20 +289,22 @@ class DatabaseTodoStorage(TodoStorage):
                         new_urgency_score=todo.urgency_score,
                         source=operation_source,
                     )
-                    self.db.add(log_entry)
-                self.db.commit()
+                    db.add(log_entry)
                 logger.info(f"数据库记录 {todo_id} 已更新字段: {updated_fields}")
 
-            return True
+            return self._db_to_pydantic(todo)
+
+        try:
+            updated = self._run_write(_update, lambda todo: ([todo] if todo else [], []))
+            return updated is not None
         except Exception as e:
-            self.db.rollback()
             logger.error(f"数据库更新操作失败 ID: {todo_id}, 错误: {e}", exc_info=True)
             raise DatabaseException(f"更新待办事项失败: {str(e)}")
     
     def remove_todo(self, todo_id: int) -> Optional[TodoSchema]:
         """从待办事项列表中移除指定ID的事项（软删除）"""
-        try:
-            todo = self.db.get(TodoORM, todo_id)
+        def _remove(db: Session) -> Optional[TodoSchema]:
+            todo = self._get_owned(db, todo_id)
             
             if not todo or todo.deleted:  # type: ignore
                 return None
@@ -173,127 +315,133 @@ class DatabaseTodoStorage(TodoStorage):
             # 软删除
             todo.deleted = True  # type: ignore
             todo.updated_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)  # type: ignore
-            self.db.commit()
-            
-            logger.info(f"待办事项 {todo_id} 已软删除")
+            return result
+
+        try:
+            result = self._run_write(_remove, lambda removed: ([], [todo_id] if removed else []))
+            if result is not None:
+                logger.info(f"待办事项 {todo_id} 已软删除")
             return result
         except Exception as e:
-            self.db.rollback()
             logger.error(f"软删除待办事项失败 (ID: {todo_id}): {e}", exc_info=True)
             raise DatabaseException(f"删除待办事项失败: {str(e)}")
     
     def get_recycle_bin(self) -> Dict[int, TodoSchema]:
         """获取回收站中的所有事项"""
         try:
-            recycle_items = self.db.query(RecycleBinORM).all()
-            return {item.original_id: self._recycle_bin_to_pydantic(item) for item in recycle_items}
+            # 回收站表只记录ID，事项内容从主表中的软删除记录读取
+            todos = (
+                self.db.query(TodoORM)
+                .join(RecycleBinORM, RecycleBinORM.original_id == TodoORM.id)
+                .filter(RecycleBinORM.owner_id == self.owner_id, TodoORM.deleted == true())
+                .all()
+            )
+            return {todo.id: self._db_to_pydantic(todo) for todo in todos}
         except Exception as e:
             logger.error(f"获取回收站内容失败: {e}", exc_info=True)
             raise DatabaseException(f"获取回收站失败: {str(e)}")
     
     def add_to_recycle_bin(self, todo: TodoSchema) -> None:
         """将事项添加到回收站"""
-        try:
-            if todo.id is None:
-                return
-            
-            final_priority = todo.final_priority
-            if todo.future_score is not None and todo.urgency_score is not None:
-                final_priority = calculate_priority(todo.future_score, todo.urgency_score)
+        if todo.id is None:
+            return
 
-            recycle_item = RecycleBinORM(
-                original_id=todo.id,
-                title=todo.title,
-                description=todo.description,
-                completed=todo.completed,
-                future_score=todo.future_score,
-                urgency_score=todo.urgency_score,
-                final_priority=final_priority,
-                start_time=todo.start_time,
-                end_time=todo.end_time
-            )
-            self.db.add(recycle_item)
-            self.db.commit()
+        def _add(db: Session) -> None:
+            db.add(RecycleBinORM(owner_id=self.owner_id, original_id=todo.id))
+
+        try:
+            self._run_write(_add, lambda _: ([], []))
             logger.info(f"事项已添加到回收站: {todo.title} (ID: {todo.id})")
         except Exception as e:
-            self.db.rollback()
             logger.error(f"添加到回收站失败 (ID: {todo.id}): {e}", exc_info=True)
             raise DatabaseException(f"添加到回收站失败: {str(e)}")
     
     def remove_from_recycle_bin(self, todo_id: int) -> Optional[TodoSchema]:
         """从回收站中永久删除事项"""
-        try:
-            recycle_item = self.db.query(RecycleBinORM).filter(RecycleBinORM.original_id == todo_id).first()
+        def _remove(db: Session) -> Optional[TodoSchema]:
+            recycle_item = db.query(RecycleBinORM).filter(
+                RecycleBinORM.original_id == todo_id, RecycleBinORM.owner_id == self.owner_id
+            ).first()
             if not recycle_item:
                 return None
-            
-            result = self._recycle_bin_to_pydantic(recycle_item)
-            self.db.delete(recycle_item)
+            db.delete(recycle_item)
             
             # 同时永久删除主表中的记录
-            todo = self.db.get(TodoORM, todo_id)
-            if todo:
-                self.db.delete(todo)
-                
-            self.db.commit()
-            logger.info(f"待办事项 {todo_id} 已从系统中永久删除")
+            todo = db.get(TodoORM, todo_id)
+            if not todo:
+                return None
+            result = self._db_to_pydantic(todo)
+            db.delete(todo)
+            db.execute(delete(AssignmentLogORM).where(
+                AssignmentLogORM.owner_id == self.owner_id, AssignmentLogORM.todo_id == todo_id
+            ))
+            return result
+
+        try:
+            result = self._run_write(_remove, lambda _: ([], [todo_id]))
+            if result is not None:
+                logger.info(f"待办事项 {todo_id} 已从系统中永久删除")
             return result
         except Exception as e:
-            self.db.rollback()
             logger.error(f"永久删除失败 (ID: {todo_id}): {e}", exc_info=True)
             raise DatabaseException(f"永久删除失败: {str(e)}")
     
     def clear_recycle_bin(self) -> None:
-        """清空回收站"""
+        """清空回收站
+
+        按批次在子查询中选取并删除，每批独立提交，内存占用和写锁持有时间与回收站大小无关。
+        """
+        def _clear_batch(db: Session) -> int:
+            deleted, _ = delete_recycle_batch(db, RECYCLE_BIN_PURGE_BATCH_SIZE, owner_id=self.owner_id)
+            return deleted
+
         try:
-            # 获取回收站中所有原始ID
-            recycle_items = self.db.query(RecycleBinORM).all()
-            original_ids = [item.original_id for item in recycle_items]
-            
-            # 删除主表中对应的记录
-            if original_ids:
-                self.db.query(TodoORM).filter(TodoORM.id.in_(original_ids)).delete(synchronize_session=False)
-            
-            # 删除回收站中所有记录
-            self.db.query(RecycleBinORM).delete()
-            self.db.commit()
-            logger.info("回收站已成功清空")
+            cleared = 0
+            while True:
+                deleted = self._run_write(_clear_batch, lambda _: ([], []))
+                cleared += deleted
+                if deleted < RECYCLE_BIN_PURGE_BATCH_SIZE:
+                    break
+            logger.info(f"回收站已成功清空，共删除 {cleared} 项")
         except Exception as e:
-            self.db.rollback()
             logger.error(f"清空回收站操作失败: {e}", exc_info=True)
             raise DatabaseException(f"清空回收站失败: {str(e)}")
     
     def batch_restore_from_recycle_bin(self, todo_ids: List[int]) -> List[TodoSchema]:
         """批量从回收站恢复事项"""
-        try:
+        def _restore(db: Session) -> List[TodoSchema]:
             restored_todos = []
-            for todo_id in todo_ids:
-                recycle_item = self.db.query(RecycleBinORM).filter(RecycleBinORM.original_id == todo_id).first()
+            # 去重：会话不自动刷新，重复的ID会再次查到尚未删除的回收站记录
+            for todo_id in dict.fromkeys(todo_ids):
+                recycle_item = db.query(RecycleBinORM).filter(
+                    RecycleBinORM.original_id == todo_id, RecycleBinORM.owner_id == self.owner_id
+                ).first()
                 if recycle_item:
                     # 更新主表记录
-                    todo = self.db.get(TodoORM, todo_id)
+                    todo = db.get(TodoORM, todo_id)
                     if todo:
                         todo.deleted = False # type: ignore
                         todo.updated_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None) # type: ignore
                         restored_todos.append(self._db_to_pydantic(todo))
                     
                     # 从回收站移除
-                    self.db.delete(recycle_item)
-            
-            self.db.commit()
+                    db.delete(recycle_item)
+            return restored_todos
+
+        try:
+            restored_todos = self._run_write(_restore, lambda restored: (restored, []))
             logger.info(f"成功恢复 {len(restored_todos)} 条记录")
             return restored_todos
         except Exception as e:
-            self.db.rollback()
             logger.error(f"批量恢复失败: {e}", exc_info=True)
             raise DatabaseException(f"批量恢复失败: {str(e)}")
     
     def get_stats(self) -> Dict[str, Any]:
         """获取待办事项统计数据"""
         try:
-            total = self.db.query(TodoORM).filter(TodoORM.deleted == False).count()
-            completed = self.db.query(TodoORM).filter(TodoORM.deleted == False, TodoORM.completed == True).count()
-            in_recycle = self.db.query(RecycleBinORM).count()
+            total = self.db.query(TodoORM).filter(self._owned, _is_active).count()
+            completed = self.db.query(TodoORM).filter(self._owned, _is_active, TodoORM.completed == true()).count()
+            in_recycle = self.db.query(RecycleBinORM).filter(RecycleBinORM.owner_id == self.owner_id).count()
             
             return {
                 "total_active": total,
@@ -306,6 +454,368 @@ class DatabaseTodoStorage(TodoStorage):
             logger.error(f"获取统计数据失败: {e}", exc_info=True)
             raise DatabaseException(f"获取统计数据失败: {str(e)}")
     
+    @staticmethod
+    def _quadrant_condition(quadrant: str):
+        """象限的SQL过滤条件，与 get_quadrant 的划分规则一致"""
+        if quadrant == UNASSIGNED_QUADRANT:
+            return or_(TodoORM.future_score.is_(None), TodoORM.urgency_score.is_(None))
+        important = TodoORM.future_score > 0 if quadrant in ("q1", "q2") else TodoORM.future_score <= 0
+        urgent = TodoORM.urgency_score > 0 if quadrant in ("q1", "q3") else TodoORM.urgency_score <= 0
+        return and_(important, urgent)
+
+    def get_top_todos(self, limit: int, quadrant: Optional[str] = None) -> List[TodoSchema]:
+        """按 (final_priority 降序, id) 获取前 limit 条未删除的事项
+
+        启用读模型时直接从排序索引中截取，否则由数据库排序。
+        """
+        try:
+            read_model = self._current_read_model()
+            if read_model is not None:
+                return read_model.top(limit, quadrant)
+            query = self.db.query(TodoORM).filter(self._owned, _is_active)
+            if quadrant is not None:
+                query = query.filter(self._quadrant_condition(quadrant))
+            todos = query.order_by(TodoORM.final_priority.desc(), TodoORM.id).limit(limit).all()
+            return [self._db_to_pydantic(todo) for todo in todos]
+        except Exception as e:
+            logger.error(f"获取优先级最高的待办事项失败: {e}", exc_info=True)
+            raise DatabaseException(f"获取待办事项失败: {str(e)}")
+
+    def get_quadrant_todos(self, quadrant: str, limit: int) -> List[TodoSchema]:
+        """按手动排序 (sort_key, id) 获取象限中的前 limit 条未删除事项
+
+        顺序扫描 (owner_id, quadrant, sort_key, id) 部分索引，无需排序；启用读模型时直接从手动排序索引中截取。
+        """
+        try:
+            read_model = self._current_read_model()
+            if read_model is not None:
+                return read_model.ordered(quadrant, limit)
+            todos = (
+                self.db.query(TodoORM)
+                .filter(self._owned, _is_active, TodoORM.quadrant == quadrant)
+                .order_by(TodoORM.sort_key, TodoORM.id)
+                .limit(limit)
+                .all()
+            )
+            return [self._db_to_pydantic(todo) for todo in todos]
+        except Exception as e:
+            logger.error(f"按手动排序获取象限事项失败: {e}", exc_info=True)
+            raise DatabaseException(f"获取待办事项失败: {str(e)}")
+
+    def _adjacent_key(self, db: Session, neighbour: TodoORM, todo_id: int, after: bool) -> Optional[str]:
+        """同一象限中紧挨在 neighbour 之后（after=True）或之前的排序键，跳过被移动的事项"""
+        position = tuple_(TodoORM.sort_key, TodoORM.id)
+        current = tuple_(literal(neighbour.sort_key), literal(neighbour.id))
+        query = db.query(TodoORM.sort_key).filter(
+            self._owned, _is_active, TodoORM.quadrant == neighbour.quadrant, TodoORM.id != todo_id,
+            position > current if after else position < current,
+        )
+        if after:
+            query = query.order_by(TodoORM.sort_key, TodoORM.id)
+        else:
+            query = query.order_by(TodoORM.sort_key.desc(), TodoORM.id.desc())
+        row = query.first()
+        return row[0] if row is not None else None
+
+    def move_todo(self, todo_id: int, prev_id: Optional[int] = None,
+                  next_id: Optional[int] = None) -> Optional[TodoSchema]:
+        """把事项移动到同一象限中两个相邻事项之间
+
+        只改写被移动事项这一行的 sort_key，与象限中的事项数量无关。只给出一个相邻事项时，
+        另一侧的键在 (owner_id, quadrant, sort_key, id) 索引上定位一次即可得到。
+        相邻键相同（并发追加）或尚未回填时先在同一事务中重排该象限，此时读模型同步更新整个象限。
+
+        Raises:
+            ValueError: 未指定相邻事项、相邻事项不存在或不在同一象限、前后顺序颠倒
+        """
+        if prev_id is None and next_id is None:
+            raise ValueError("至少需要指定一个相邻事项")
+
+        def _move(db: Session) -> Optional[Tuple[TodoSchema, List[TodoSchema]]]:
+            todo = self._get_owned(db, todo_id)
+            if not todo or todo.deleted:  # type: ignore
+                return None
+            neighbours: List[Optional[TodoORM]] = []
+            for neighbour_id in (prev_id, next_id):
+                neighbour = None
+                if neighbour_id is not None:
+                    neighbour = self._get_owned(db, neighbour_id)
+                    if (neighbour_id == todo_id or neighbour is None or neighbour.deleted
+                            or neighbour.quadrant != todo.quadrant):
+                        raise ValueError(f"相邻事项 {neighbour_id} 不存在或与被移动的事项不在同一象限")
+                neighbours.append(neighbour)
+            prev, following = neighbours
+
+            def _bounds() -> Tuple[Optional[str], Optional[str]]:
+                lower = prev.sort_key if prev is not None else self._adjacent_key(db, following, todo_id, after=False)
+                upper = following.sort_key if following is not None else self._adjacent_key(db, prev, todo_id, after=True)
+                return lower, upper  # type: ignore
+
+            def _position(item: TodoORM) -> Tuple[str, int]:
+                return (item.sort_key or "", item.id)  # type: ignore
+
+            if prev is not None and following is not None and _position(prev) >= _position(following):
+                raise ValueError("前一个相邻事项必须排在后一个相邻事项之前")
+
+            rebalanced: List[TodoSchema] = []
+            lower, upper = _bounds()
+            if (any(item is not None and item.sort_key is None for item in neighbours)
+                    or (lower is not None and upper is not None and lower >= upper)):
+                db.flush()
+                todo_ids = rebalance_quadrant(db, self.owner_id, todo.quadrant)  # type: ignore
+                db.expire_all()
+                lower, upper = _bounds()
+                rebalanced = [self._db_to_pydantic(item) for item in
+                              db.query(TodoORM).filter(TodoORM.id.in_(todo_ids), TodoORM.id != todo_id)]
+
+            todo.sort_key = key_between(lower, upper)  # type: ignore
+            todo.updated_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)  # type: ignore
+            return self._db_to_pydantic(todo), rebalanced
+
+        try:
+            result = self._run_write(_move, lambda moved: ([moved[0], *moved[1]] if moved else [], []))
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"移动待办事项失败 (ID: {todo_id}): {e}", exc_info=True)
+            raise DatabaseException(f"移动待办事项失败: {str(e)}")
+        if result is None:
+            return None
+        logger.info(f"待办事项 {todo_id} 已移动，新的排序键: {result[0].sort_key}")
+        return result[0]
+
+    def get_todos_in_time_range(self, start_minute: int, end_minute: int,
+                                include_completed: bool = True) -> List[TodoSchema]:
+        """获取时间段与 [start_minute, end_minute) 重叠的未删除事项，按 (开始, 结束, id) 排序
+
+        走 (owner_id, start_minute, end_minute, id) 部分索引：按开始时间范围扫描，结束时间在索引中过滤。
+        """
+        try:
+            query = self.db.query(TodoORM).filter(
+                self._owned, _is_active,
+                TodoORM.start_minute < end_minute,
+                TodoORM.end_minute > start_minute,
+                TodoORM.end_minute > TodoORM.start_minute,
+            )
+            if not include_completed:
+                query = query.filter(TodoORM.completed == false())
+            todos = query.order_by(TodoORM.start_minute, TodoORM.end_minute, TodoORM.id).all()
+            return [self._db_to_pydantic(todo) for todo in todos]
+        except Exception as e:
+            logger.error(f"按时间段获取待办事项失败: {e}", exc_info=True)
+            raise DatabaseException(f"获取待办事项失败: {str(e)}")
+
+    def get_todos_in_date_range(self, start_date: datetime.date, end_date: datetime.date,
+                                include_completed: bool = True) -> List[TodoSchema]:
+        """获取截止日期或计划日期落在 [start_date, end_date] 内的未删除事项，按 (final_priority 降序, id) 排序
+
+        两种日期分别在 (owner_id, due_date, id) 和 (owner_id, scheduled_date, id) 部分索引上做一次范围扫描，
+        再按ID合并；写成 OR 条件时 SQLite 不会使用这两个部分索引。
+        """
+        try:
+            todos: Dict[int, TodoORM] = {}
+            for column in (TodoORM.due_date, TodoORM.scheduled_date):
+                query = self.db.query(TodoORM).filter(self._owned, _is_active, column.between(start_date, end_date))
+                if not include_completed:
+                    query = query.filter(TodoORM.completed == false())
+                for todo in query:
+                    todos[todo.id] = todo
+            ordered = sorted(todos.values(), key=lambda todo: (-todo.final_priority, todo.id))
+            return [self._db_to_pydantic(todo) for todo in ordered]
+        except Exception as e:
+            logger.error(f"按日期范围获取待办事项失败: {e}", exc_info=True)
+            raise DatabaseException(f"获取待办事项失败: {str(e)}")
+
+    def _tagged_ids(self, tag: str):
+        """带有 tag 的事项ID，只扫描 (owner_id, tag, todo_id) 索引的一个区间"""
+        return select(_tags.c.todo_id).where(_tags.c.owner_id == self.owner_id, _tags.c.tag == tag)
+
+    def _get_active_by_ids(self, todo_ids: List[int]) -> Dict[int, TodoSchema]:
+        """按ID读取未删除的事项（按ID升序），启用读模型时直接读取内存"""
+        read_model = self._current_read_model()
+        if read_model is not None:
+            todos = (read_model.get(todo_id) for todo_id in todo_ids)
+            return {todo.id: todo for todo in todos if todo is not None}
+        result: Dict[int, TodoSchema] = {}
+        for start in range(0, len(todo_ids), _ID_CHUNK_SIZE):
+            chunk = todo_ids[start:start + _ID_CHUNK_SIZE]
+            query = self.db.query(TodoORM).filter(self._owned, _is_active, TodoORM.id.in_(chunk))
+            for todo in query.order_by(TodoORM.id):
+                result[todo.id] = self._db_to_pydantic(todo)
+        return result
+
+    def _bitmap_filter(self, tags: List[str], match_all: bool) -> Optional[List[int]]:
+        """用缓存的标签位图计算匹配的事项ID，有标签尚未缓存（不够热门）时返回None"""
+        cache = get_tag_bitmap_cache()
+        version = get_data_version(self.db, self._tags_version_key)
+        database = str(self.db.get_bind().url)
+        # 每个标签都要经过缓存，以便统计各自的查询次数
+        bitmaps = [cache.get((database, self.owner_id, tag), version,
+                             lambda tag=tag: self.db.execute(self._tagged_ids(tag)).scalars())
+                   for tag in tags]
+        if any(bitmap is None for bitmap in bitmaps):
+            return None
+        return bitmap_to_ids(reduce(int.__and__ if match_all else int.__or__, bitmaps))
+
+    def get_todos_by_tags(self, tags: List[str], match_all: bool = False) -> Dict[int, TodoSchema]:
+        """获取带有任一（match_all 时为全部）指定标签的未删除事项，按ID升序
+
+        每个标签在倒排索引上取一个ID区间，any 用 UNION、all 用 INTERSECT 在SQL中合并，
+        再按主键回表并过滤已删除的事项。启用位图缓存且所有标签都已缓存时，改为在内存中按位与/或。
+        """
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return {}
+        try:
+            if TAG_BITMAP_CACHE_ENABLED:
+                todo_ids = self._bitmap_filter(tags, match_all)
+                if todo_ids is not None:
+                    return self._get_active_by_ids(todo_ids)
+            selects = [self._tagged_ids(tag) for tag in tags]
+            matched = (selects[0] if len(selects) == 1 else (intersect if match_all else union)(*selects)).subquery()
+            # 以匹配到的ID驱动按主键回表；写成 id IN (...) 时 SQLite 会改为扫描整个租户的事项
+            todos = (self.db.query(TodoORM)
+                     .join(matched, TodoORM.id == matched.c.todo_id)
+                     .filter(self._owned, _is_active)
+                     .order_by(TodoORM.id).all())
+            return {todo.id: self._db_to_pydantic(todo) for todo in todos}
+        except Exception as e:
+            logger.error(f"按标签获取待办事项失败: {e}", exc_info=True)
+            raise DatabaseException(f"获取待办事项失败: {str(e)}")
+
+    def get_tag_counts(self) -> List[Tuple[str, int]]:
+        """按 (owner_id, tag, todo_id) 索引顺序分组，无需额外排序；回表只为排除已删除的事项"""
+        query = (
+            select(_tags.c.tag, func.count())
+            .select_from(_tags.join(TodoORM.__table__, TodoORM.id == _tags.c.todo_id))
+            .where(_tags.c.owner_id == self.owner_id, _is_active)
+            .group_by(_tags.c.tag)
+            .order_by(_tags.c.tag)
+        )
+        try:
+            return [(tag, count) for tag, count in self.db.execute(query)]
+        except Exception as e:
+            logger.error(f"获取标签列表失败: {e}", exc_info=True)
+            raise DatabaseException(f"获取标签列表失败: {str(e)}")
+
+    def _count_tagged(self, db: Session, tag: str) -> int:
+        return db.execute(select(func.count()).select_from(self._tagged_ids(tag).subquery())).scalar_one()
+
+    def rename_tag(self, old: str, new: str) -> int:
+        """已带有新标签的事项上的旧标签直接删除（合并），其余改名"""
+        def _rename(db: Session) -> int:
+            affected = self._count_tagged(db, old)
+            if affected and old != new:
+                owned_old = and_(_tags.c.owner_id == self.owner_id, _tags.c.tag == old)
+                db.execute(update(_tags).where(owned_old).values(tag=new).prefix_with("OR IGNORE"))
+                db.execute(delete(_tags).where(owned_old))
+                bump_data_version(db, self._tags_version_key)
+            return affected
+
+        try:
+            # 涉及的事项可能很多，读模型整体失效而不是逐条写穿
+            affected = self._run_write(_rename)
+        except Exception as e:
+            logger.error(f"重命名标签失败 ({old} -> {new}): {e}", exc_info=True)
+            raise DatabaseException(f"重命名标签失败: {str(e)}")
+        finally:
+            # 标签行由SQL直接修改，丢弃会话中已加载的事项及其标签
+            self.db.expire_all()
+        if affected:
+            logger.info(f"标签 {old} 已重命名为 {new}，涉及 {affected} 个事项")
+        return affected
+
+    def delete_tag(self, tag: str) -> int:
+        def _delete(db: Session) -> int:
+            removed = db.execute(delete(_tags).where(_tags.c.owner_id == self.owner_id, _tags.c.tag == tag)).rowcount
+            if removed:
+                bump_data_version(db, self._tags_version_key)
+            return removed
+
+        try:
+            removed = self._run_write(_delete)
+        except Exception as e:
+            logger.error(f"删除标签失败 ({tag}): {e}", exc_info=True)
+            raise DatabaseException(f"删除标签失败: {str(e)}")
+        finally:
+            self.db.expire_all()
+        if removed:
+            logger.info(f"标签 {tag} 已从 {removed} 个事项上移除")
+        return removed
+
+    def get_assignment_logs(self, todo_id: Optional[int] = None, since: Optional[datetime.datetime] = None,
+                            until: Optional[datetime.datetime] = None, sources: Optional[List[str]] = None,
+                            cursor: Optional[str] = None, limit: int = 50) -> AssignmentLogPageSchema:
+        """按 (created_at, id) 倒序分页获取分值变更日志
+
+        指定 todo_id 时走 (owner_id, todo_id, created_at, id, ...) 覆盖索引，
+        否则走 (owner_id, created_at, id, ...) 覆盖索引。
+        游标记录上一页最后一行的原始时间字符串和ID，翻页时间复杂度与页码无关。
+        """
+        # 直接比较数据库中的原始字符串，避免 DateTime 类型转换带来的格式差异
+        created_at = type_coerce(AssignmentLogORM.created_at, String)
+        conditions = [AssignmentLogORM.owner_id == self.owner_id]
+        if todo_id is not None:
+            conditions.append(AssignmentLogORM.todo_id == todo_id)
+        if since is not None:
+            conditions.append(created_at >= literal(to_log_time(since), String))
+        if until is not None:
+            conditions.append(created_at < literal(to_log_time(until), String))
+        if sources:
+            conditions.append(AssignmentLogORM.source.in_(sources))
+        if cursor:
+            last_created_at, last_id = decode_log_cursor(cursor)
+            last_time = literal(last_created_at, String)
+            conditions.append(created_at <= last_time)
+            conditions.append(or_(created_at < last_time, AssignmentLogORM.id < last_id))
+
+        query = (
+            select(
+                AssignmentLogORM.id,
+                AssignmentLogORM.todo_id,
+                AssignmentLogORM.old_future_score,
+                AssignmentLogORM.old_urgency_score,
+                AssignmentLogORM.new_future_score,
+                AssignmentLogORM.new_urgency_score,
+                AssignmentLogORM.source,
+                created_at.label("created_at"),
+            )
+            .where(*conditions)
+            .order_by(created_at.desc(), AssignmentLogORM.id.desc())
+            .limit(limit + 1)
+        )
+        try:
+            rows = self.db.execute(query).mappings().all()
+        except Exception as e:
+            logger.error(f"查询分值变更日志失败: {e}", exc_info=True)
+            raise DatabaseException(f"查询分值变更日志失败: {str(e)}")
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_log_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return AssignmentLogPageSchema(
+            items=[AssignmentLogSchema(**row) for row in rows],
+            next_cursor=next_cursor,
+        )
+
+    def get_score_counts(self) -> List[Tuple[Optional[int], Optional[int], bool, int]]:
+        """单次 GROUP BY 统计每个分值格子中已完成/未完成的事项数
+
+        只扫描 ix_todo_items_score_cells 部分覆盖索引，无需回表和额外排序。
+        """
+        query = (
+            select(TodoORM.future_score, TodoORM.urgency_score, TodoORM.completed, func.count())
+            .where(self._owned, _is_active)
+            .group_by(TodoORM.future_score, TodoORM.urgency_score, TodoORM.completed)
+        )
+        try:
+            return [(future, urgency, bool(completed), count)
+                    for future, urgency, completed, count in self.db.execute(query)]
+        except Exception as e:
+            logger.error(f"获取分值分布失败: {e}", exc_info=True)
+            raise DatabaseException(f"获取象限统计失败: {str(e)}")
+    
     def _db_to_pydantic(self, db_todo: TodoORM) -> TodoSchema:
         """将数据库模型转换为Pydantic模型"""
         return TodoSchema(
@@ -316,20 +826,10 @@ class DatabaseTodoStorage(TodoStorage):
             future_score=db_todo.future_score,
             urgency_score=db_todo.urgency_score,
             final_priority=db_todo.final_priority,
-            start_time=db_todo.start_time,
-            end_time=db_todo.end_time
-        )
-    
-    def _recycle_bin_to_pydantic(self, recycle_item: RecycleBinORM) -> TodoSchema:
-        """将回收站数据库模型转换为Pydantic模型"""
-        return TodoSchema(
-            id=recycle_item.original_id,
-            title=recycle_item.title,
-            description=recycle_item.description,
-            completed=recycle_item.completed,
-            future_score=recycle_item.future_score,
-            urgency_score=recycle_item.urgency_score,
-            final_priority=recycle_item.final_priority,
-            start_time=recycle_item.start_time,
-            end_time=recycle_item.end_time
+            start_time=to_time(db_todo.start_minute),
+            end_time=to_time(db_todo.end_minute),
+            due_date=db_todo.due_date,
+            scheduled_date=db_todo.scheduled_date,
+            sort_key=db_todo.sort_key,
+            tags=sorted(row.tag for row in db_todo.tag_rows)
         )
@@ -0,0 +1,373 @@
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import bindparam, false, func, insert, or_, select, update
+from sqlalchemy.engine import Connection, Engine
+from zoneinfo import ZoneInfo
+from database.data_version import TODOS_VERSION_KEY, bump_data_version, todos_version_key
+from database.orm_models import AssignmentLogORM, DataVersionORM, TodoORM
+from database.tenancy import DEFAULT_TENANT
+from database.manual_order import append_key
+from utils.fractional_index import key_between
+from utils.priority_calculator import calculate_priority, get_quadrant
+from utils.time_of_day import MINUTES_PER_DAY
+import datetime
+import heapq
+import itertools
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def parse_steps(value: str) -> Tuple[Tuple[float, int], ...]:
+    """
+    解析升级阶梯 "剩余小时:最低紧急性,..."
+
+    返回:
+        按剩余小时从大到小排列的 (小时, 紧急性) 元组，剩余时间越少要求的紧急性不能越低
+    """
+    steps = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        hours, urgency = item.split(":")
+        steps.append((float(hours), int(urgency)))
+    steps.sort(key=lambda step: -step[0])
+    for hours, urgency in steps:
+        if not -3 <= urgency <= 3:
+            raise ValueError(f"升级阶梯中的紧急性必须在[-3, 3]范围内: {hours}:{urgency}")
+    if any(later[1] < earlier[1] for earlier, later in zip(steps, steps[1:])):
+        raise ValueError("升级阶梯中剩余时间越少，紧急性不能越低")
+    return tuple(steps)
+
+
+# 是否根据截止时间自动提高紧急性，默认关闭
+ESCALATION_ENABLED = os.getenv("TODO_AUTO_ESCALATION", "0") == "1"
+# 调度器检查到期升级和数据变化的间隔（秒）
+ESCALATION_TICK_S = float(os.getenv("ESCALATION_TICK_S", "30"))
+ESCALATION_BATCH_SIZE = int(os.getenv("ESCALATION_BATCH_SIZE", "200"))
+ESCALATION_PAUSE_MS = float(os.getenv("ESCALATION_PAUSE_MS", "10"))
+# 截止日期和结束时间按该时区的本地时间解释
+ESCALATION_TIMEZONE = os.getenv("ESCALATION_TIMEZONE", "UTC")
+# 距截止时间不足若干小时后紧急性至少为某个值；已逾期的事项按最后一级处理
+ESCALATION_STEPS = parse_steps(os.getenv("ESCALATION_STEPS", "168:0,72:1,24:2,4:3"))
+# 增量同步时水位线回退的秒数：写事务取 updated_at 到提交之间（含等待写锁）可能有延迟，重复读取的事项只会被重新调度
+ESCALATION_SYNC_OVERLAP_S = float(os.getenv("ESCALATION_SYNC_OVERLAP_S", "60"))
+
+JOB_NAME = "deadline-escalation"
+# 自动升级写入分值变更日志时的来源
+ESCALATION_SOURCE = "auto_escalation"
+
+_todos = TodoORM.__table__
+_logs = AssignmentLogORM.__table__
+_versions = DataVersionORM.__table__
+
+
+def deadline_of(due_date: datetime.date, end_minute: Optional[int], tz: datetime.tzinfo) -> datetime.datetime:
+    """截止时间：截止日期当天的结束时间，未设置结束时间时为当天结束（次日 00:00）"""
+    minute = end_minute if end_minute is not None else MINUTES_PER_DAY
+    return datetime.datetime.combine(due_date, datetime.time(), tzinfo=tz) + datetime.timedelta(minutes=minute)
+
+
+def target_urgency(deadline: datetime.datetime, now: datetime.datetime,
+                   steps: Sequence[Tuple[float, int]] = ESCALATION_STEPS) -> Optional[int]:
+    """当前时刻按阶梯应达到的最低紧急性，尚未进入任何一级时返回None"""
+    remaining = deadline - now
+    level = None
+    for hours, urgency in steps:
+        if remaining <= datetime.timedelta(hours=hours):
+            level = urgency
+    return level
+
+
+def next_escalation_at(deadline: datetime.datetime, urgency: int,
+                       steps: Sequence[Tuple[float, int]] = ESCALATION_STEPS) -> Optional[datetime.datetime]:
+    """紧急性为 urgency 的事项下一次需要升级的时刻，已达到最高一级时返回None"""
+    for hours, level in steps:
+        if level > urgency:
+            return deadline - datetime.timedelta(hours=hours)
+    return None
+
+
+def _owner_of(version_key: str) -> str:
+    return DEFAULT_TENANT if version_key == TODOS_VERSION_KEY else version_key[len(TODOS_VERSION_KEY) + 1:]
+
+
+class DeadlineEscalator:
+    """按截止时间自动提高紧急性的调度器
+
+    每个候选事项（未完成、未删除、有截止日期且已评分）在最小堆中有一个条目，
+    键为它下一次跨过升级阶梯的时刻。每轮只弹出已到期的条目，按ID分批重新读取并升级，
+    不会周期性地扫描整张表：
+    - 首次见到租户时加载其全部候选事项（走 (owner_id, due_date, id) 部分索引）
+    - 之后通过 data_versions 发现哪些租户的数据变化过，只读取该租户在水位线之后修改（updated_at）
+      或新建（ID 大于上次同步时的最大ID）的事项，重新调度或移出这些事项；被替换的旧条目按事项作废
+    - 升级在短事务中批量 UPDATE，同时写入来源为 auto_escalation 的分值变更日志并递增数据版本
+    - 紧急性只升不降：用户手动调高或调低后，从新的分值继续按阶梯升级
+
+    堆保存在进程内，只应在一个进程中运行（由主工作进程的后台任务驱动）。
+    """
+
+    def __init__(self, engine: Engine,
+                 steps: Sequence[Tuple[float, int]] = ESCALATION_STEPS,
+                 timezone: str = ESCALATION_TIMEZONE,
+                 batch_size: int = ESCALATION_BATCH_SIZE,
+                 batch_pause_ms: float = ESCALATION_PAUSE_MS) -> None:
+        self.engine = engine
+        self.steps = tuple(steps)
+        self.timezone = ZoneInfo(timezone)
+        self.batch_size = batch_size
+        self.batch_pause_ms = batch_pause_ms
+        # (到期时间戳, 序号, 租户, 事项ID)，序号与 _tokens 中记录的一致时条目有效
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        self._tokens: Dict[Tuple[str, int], int] = {}
+        self._known_versions: Dict[str, int] = {}
+        # 各租户上次同步的 (开始时间, 当时的最大事项ID)
+        self._watermarks: Dict[str, Tuple[datetime.datetime, int]] = {}
+        # 后台任务和管理接口可能同时触发一轮
+        self._lock = threading.Lock()
+        self.escalated_total = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def max_level(self) -> Optional[int]:
+        return self.steps[-1][1] if self.steps else None
+
+    def _schedule(self, owner_id: str, todo_id: int, due_date: datetime.date,
+                  end_minute: Optional[int], urgency: int) -> None:
+        at = next_escalation_at(deadline_of(due_date, end_minute, self.timezone), urgency, self.steps)
+        if at is None:
+            self._tokens.pop((owner_id, todo_id), None)
+            return
+        seq = next(self._seq)
+        self._tokens[(owner_id, todo_id)] = seq
+        heapq.heappush(self._heap, (at.timestamp(), seq, owner_id, todo_id))
+
+    def _is_current(self, entry: Tuple[float, int, str, int]) -> bool:
+        return self._tokens.get((entry[2], entry[3])) == entry[1]
+
+    def _candidate_conditions(self, owner_id: str) -> list:
+        return [
+            _todos.c.owner_id == owner_id,
+            _todos.c.deleted == false(),
+            _todos.c.due_date.isnot(None),
+            _todos.c.completed == false(),
+            _todos.c.future_score.isnot(None),
+            _todos.c.urgency_score.isnot(None),
+        ]
+
+    def _sync_tenant(self, conn: Connection, owner_id: str, started: datetime.datetime) -> int:
+        """
+        同步租户的候选事项：首次全量加载，之后只读取水位线之后修改或新建的事项
+
+        返回:
+            读取的事项数
+        """
+        last_id = conn.execute(select(func.max(_todos.c.id))).scalar() or 0
+        watermark = self._watermarks.get(owner_id)
+        # 先记录水位线再读取数据：两者之间发生的写入只会在下一轮被重复读取
+        self._watermarks[owner_id] = (started, last_id)
+        if self.max_level is None:
+            return 0
+        if watermark is None:
+            rows = conn.execute(
+                select(_todos.c.id, _todos.c.due_date, _todos.c.end_minute, _todos.c.urgency_score)
+                .where(*self._candidate_conditions(owner_id), _todos.c.urgency_score < self.max_level)
+            ).all()
+            for row in rows:
+                self._schedule(owner_id, row.id, row.due_date, row.end_minute, row.urgency_score)
+            return len(rows)
+
+        since, since_id = watermark
+        columns = (_todos.c.id, _todos.c.due_date, _todos.c.end_minute, _todos.c.urgency_score,
+                   _todos.c.future_score, _todos.c.completed, _todos.c.deleted)
+        # 两个范围查询分别走 (owner_id, updated_at) 部分索引和主键，合在一个 OR 里时 SQLite 会扫描租户的整段索引
+        changed = conn.execute(
+            select(*columns).where(
+                _todos.c.owner_id == owner_id,
+                _todos.c.updated_at >= since - datetime.timedelta(seconds=ESCALATION_SYNC_OVERLAP_S),
+            )
+        ).all()
+        created = conn.execute(select(*columns).where(_todos.c.id > since_id, _todos.c.owner_id == owner_id)).all()
+        rows = list({row.id: row for row in (*changed, *created)}.values())
+        for row in rows:
+            if (not row.deleted and not row.completed and row.due_date is not None
+                    and row.future_score is not None and row.urgency_score is not None
+                    and row.urgency_score < self.max_level):
+                self._schedule(owner_id, row.id, row.due_date, row.end_minute, row.urgency_score)
+            else:
+                # 已完成、删除、清除截止日期或被调到最高一级的事项移出调度
+                self._tokens.pop((owner_id, row.id), None)
+        return len(rows)
+
+    def _sync_tenants(self) -> Tuple[int, int]:
+        """对比各租户的数据版本，同步自上次以来被修改过的租户，返回 (同步的租户数, 读取的事项数)"""
+        synced = rows = 0
+        started = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        with self.engine.connect() as conn:
+            versions = conn.execute(
+                select(_versions.c.key, _versions.c.version)
+                .where(or_(_versions.c.key == TODOS_VERSION_KEY, _versions.c.key.like(f"{TODOS_VERSION_KEY}:%")))
+            ).all()
+            for key, version in versions:
+                owner_id = _owner_of(key)
+                if self._known_versions.get(owner_id) == version:
+                    continue
+                self._known_versions[owner_id] = version
+                rows += self._sync_tenant(conn, owner_id, started)
+                synced += 1
+        if synced:
+            self._compact()
+        return synced, rows
+
+    def _compact(self) -> None:
+        """重建堆，丢弃已作废的条目，避免频繁修改的事项使堆无限增长"""
+        stale = sum(1 for entry in self._heap if not self._is_current(entry))
+        if stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: datetime.datetime) -> Dict[str, List[int]]:
+        """弹出所有已到期的有效条目，按租户分组"""
+        due: Dict[str, Set[int]] = {}
+        deadline = now.timestamp()
+        while self._heap and self._heap[0][0] <= deadline:
+            entry = heapq.heappop(self._heap)
+            if self._is_current(entry):
+                # 弹出后由 _escalate_batch 按重新读取的结果再调度
+                del self._tokens[(entry[2], entry[3])]
+                due.setdefault(entry[2], set()).add(entry[3])
+        return {owner_id: sorted(ids) for owner_id, ids in due.items()}
+
+    def _escalate_batch(self, owner_id: str, todo_ids: List[int], now: datetime.datetime) -> int:
+        """在一个短事务中重新读取一批到期事项并升级紧急性，返回实际升级的数量"""
+        updated_at = now.astimezone(datetime.UTC).replace(tzinfo=None)
+        updates: List[Dict[str, Any]] = []
+        logs: List[Dict[str, Any]] = []
+        reschedule: List[Tuple[int, datetime.date, Optional[int], int]] = []
+        # 升级后进入其他象限的事项依次排在新象限的最后
+        last_keys: Dict[str, str] = {}
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(_todos.c.id, _todos.c.due_date, _todos.c.end_minute, _todos.c.future_score,
+                       _todos.c.urgency_score, _todos.c.quadrant, _todos.c.sort_key)
+                .where(*self._candidate_conditions(owner_id), _todos.c.id.in_(todo_ids))
+            ).all()
+            for row in rows:
+                urgency = row.urgency_score
+                level = target_urgency(deadline_of(row.due_date, row.end_minute, self.timezone), now, self.steps)
+                if level is not None and level > urgency:
+                    quadrant, sort_key = get_quadrant(row.future_score, level), row.sort_key
+                    if quadrant != row.quadrant:
+                        last = last_keys.get(quadrant)
+                        sort_key = key_between(last, None) if last else append_key(conn, owner_id, quadrant)
+                        last_keys[quadrant] = sort_key
+                    updates.append({
+                        "todo_id": row.id,
+                        "owner": owner_id,
+                        "urgency": level,
+                        "priority": calculate_priority(row.future_score, level),
+                        "target_quadrant": quadrant,
+                        "position": sort_key,
+                        "now": updated_at,
+                    })
+                    logs.append({
+                        "owner_id": owner_id,
+                        "todo_id": row.id,
+                        "old_future_score": row.future_score,
+                        "old_urgency_score": urgency,
+                        "new_future_score": row.future_score,
+                        "new_urgency_score": level,
+                        "source": ESCALATION_SOURCE,
+                    })
+                    urgency = level
+                reschedule.append((row.id, row.due_date, row.end_minute, urgency))
+
+            if updates:
+                conn.execute(
+                    update(_todos)
+                    .where(_todos.c.id == bindparam("todo_id"), _todos.c.owner_id == bindparam("owner"))
+                    .values(urgency_score=bindparam("urgency"), final_priority=bindparam("priority"),
+                            quadrant=bindparam("target_quadrant"), sort_key=bindparam("position"),
+                            updated_at=bindparam("now")),
+                    updates,
+                )
+                conn.execute(insert(_logs), logs)
+                version = bump_data_version(conn, todos_version_key(owner_id))
+                # 期间没有其他写入时，自身的写入不需要触发该租户的同步（新的紧急性已在下面重新调度）
+                if self._known_versions.get(owner_id) == version - 1:
+                    self._known_versions[owner_id] = version
+
+        for todo_id, due_date, end_minute, urgency in reschedule:
+            self._schedule(owner_id, todo_id, due_date, end_minute, urgency)
+        return len(updates)
+
+    def run_once(self, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+        """执行一轮：增量同步被修改过的租户，升级所有已到期的事项"""
+        now = now or datetime.datetime.now(datetime.UTC)
+        with self._lock:
+            synced_tenants, synced_todos = self._sync_tenants()
+            due = self._pop_due(now)
+            escalated = batches = 0
+            for owner_id, todo_ids in due.items():
+                for start in range(0, len(todo_ids), self.batch_size):
+                    if batches and self.batch_pause_ms > 0:
+                        time.sleep(self.batch_pause_ms / 1000)
+                    escalated += self._escalate_batch(owner_id, todo_ids[start:start + self.batch_size], now)
+                    batches += 1
+            self.escalated_total += escalated
+            self.last_run = {
+                "synced_tenants": synced_tenants,
+                "synced_todos": synced_todos,
+                "due": sum(len(todo_ids) for todo_ids in due.values()),
+                "escalated": escalated,
+                "batches": batches,
+                "scheduled": len(self._tokens),
+            }
+        if escalated:
+            logger.info(f"已根据截止时间提高 {escalated} 个事项的紧急性（{batches} 批）")
+        return self.last_run
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            while self._heap and not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+            next_at = self._heap[0][0] if self._heap else None
+            return {
+                "enabled": ESCALATION_ENABLED,
+                "tick_seconds": ESCALATION_TICK_S,
+                "timezone": str(self.timezone),
+                "steps": [{"hours": hours, "urgency": urgency} for hours, urgency in self.steps],
+                "tracked_tenants": len(self._known_versions),
+                "scheduled": len(self._tokens),
+                "next_due_at": (
+                    datetime.datetime.fromtimestamp(next_at, datetime.UTC).isoformat() if next_at is not None else None
+                ),
+                "escalated_total": self.escalated_total,
+                "last_run": self.last_run,
+            }
+
+
+_escalator: Optional[DeadlineEscalator] = None
+
+
+def get_escalator() -> DeadlineEscalator:
+    """主数据库的升级调度器，后台任务和管理接口共用同一个堆"""
+    global _escalator
+    from database.database import get_engine
+
+    engine = get_engine()
+    if _escalator is None or _escalator.engine is not engine:
+        _escalator = DeadlineEscalator(engine)
+    return _escalator
+
+
+def create_escalation_job():
+    """创建截止时间自动升级的后台任务，未启用或间隔为0时返回None"""
+    from utils.background import PeriodicJob
+
+    if not ESCALATION_ENABLED or ESCALATION_TICK_S <= 0:
+        return None
+    return PeriodicJob(JOB_NAME, ESCALATION_TICK_S, get_escalator().run_once)
@@ -1,10 +1,101 @@
-from database.database import engine
-from database.orm_models import Base
+from typing import Optional
+from sqlalchemy import inspect, select, delete, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from database.database import get_engine
+from database.orm_models import Base, TodoORM, SchemaMetaORM
+from database.migrations import MigrationRunner, MIGRATIONS
+import hashlib
+import threading
+import logging
 
-def init_db():
-    """初始化数据库，创建所有表"""
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_KEY = "schema_fingerprint"
+
+_meta_table = SchemaMetaORM.__table__
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def schema_fingerprint() -> str:
+    """根据ORM模型定义和迁移版本计算表结构指纹"""
+    parts = [f"head:{max((migration.version for migration in MIGRATIONS), default=0)}"]
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"table:{table.name}")
+        for column in table.columns:
+            parts.append(f"column:{column.name}:{column.type}:{column.nullable}:{column.primary_key}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            where = index.dialect_options["sqlite"].get("where")
+            expressions = ",".join(str(expression) for expression in index.expressions)
+            parts.append(f"index:{index.name}:{expressions}:{index.unique}:{where}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def _stored_fingerprint(engine: Engine) -> Optional[str]:
+    """读取数据库中保存的结构指纹，表不存在时返回None"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(_meta_table.c.value).where(_meta_table.c.key == FINGERPRINT_KEY)
+            ).scalar()
+    except DBAPIError:
+        return None
+
+
+def _store_fingerprint(engine: Engine, fingerprint: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(delete(_meta_table).where(_meta_table.c.key == FINGERPRINT_KEY))
+        conn.execute(insert(_meta_table).values(key=FINGERPRINT_KEY, value=fingerprint))
+
+
+def init_db(backfills: str = "background", engine: Optional[Engine] = None) -> MigrationRunner:
+    """初始化数据库，创建所有表并应用待执行的迁移
+
+    结构指纹与当前模型一致时跳过 create_all 反射和迁移检查，
+    只恢复未完成的回填。
+
+    Args:
+        backfills: 回填执行方式，"background" 在后台线程分批执行，"inline" 同步执行
+        engine: 要初始化的引擎，默认为主数据库（按租户分库时用于初始化租户数据库）
+    """
+    global _initialized
+    is_default = engine is None
+    engine = engine or get_engine()
+    runner = MigrationRunner(engine)
+    fingerprint = schema_fingerprint()
+
+    if _stored_fingerprint(engine) == fingerprint:
+        logger.info("数据库结构指纹未变化，跳过表结构检查")
+        runner.resume_backfills(backfills)
+        _initialized = _initialized or is_default
+        return runner
+
+    is_fresh = not inspect(engine).has_table(TodoORM.__tablename__)
     Base.metadata.create_all(bind=engine)
-    print("数据库表创建成功！")
+
+    if is_fresh:
+        # create_all 已按最新模型建表，无需逐个执行迁移
+        runner.stamp_head()
+    else:
+        runner.upgrade(backfills=backfills)
+
+    # 仍有待离线执行的迁移时不保存指纹，下次启动重新检查
+    if not runner.pending():
+        _store_fingerprint(engine, fingerprint)
+    _initialized = _initialized or is_default
+    logger.info("数据库表创建成功！")
+    return runner
+
+
+def ensure_db_initialized() -> None:
+    """确保当前进程已完成数据库初始化（只执行一次）"""
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            init_db()
+
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db(backfills="inline")
@@ -0,0 +1,297 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, Connection
+import datetime
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 分值变更日志保留策略，默认 0 不限制（删除的历史无法恢复，由运维按需开启）
+ASSIGNMENT_LOG_MAX_AGE_DAYS = int(os.getenv("ASSIGNMENT_LOG_MAX_AGE_DAYS", "0"))
+ASSIGNMENT_LOG_MAX_PER_TODO = int(os.getenv("ASSIGNMENT_LOG_MAX_PER_TODO", "0"))
+# 同一事项相邻两次移动间隔不超过该秒数时视为连续移动，合并为一次净变更；默认 0 不压缩
+ASSIGNMENT_LOG_COMPACT_GAP_SECONDS = int(os.getenv("ASSIGNMENT_LOG_COMPACT_GAP_SECONDS", "0"))
+ASSIGNMENT_LOG_BATCH_SIZE = int(os.getenv("ASSIGNMENT_LOG_BATCH_SIZE", "500"))
+ASSIGNMENT_LOG_BATCH_PAUSE_MS = float(os.getenv("ASSIGNMENT_LOG_BATCH_PAUSE_MS", "10"))
+# 后台任务执行间隔，0 表示不启动后台任务
+ASSIGNMENT_LOG_RETENTION_INTERVAL_S = float(os.getenv("ASSIGNMENT_LOG_RETENTION_INTERVAL_S", "3600"))
+
+# schema_meta 中的进度水位：该日期（不含）之前的日志已汇总/已压缩
+ROLLUP_WATERMARK_KEY = "assignment_log_rolled_up_until"
+COMPACT_WATERMARK_KEY = "assignment_log_compacted_until"
+
+JOB_NAME = "assignment-log-retention"
+
+# 日志索引以 owner_id 开头，跨租户的时间范围查询用 IN 列表逐个租户定位索引区间
+_ALL_TENANTS = "owner_id IN (SELECT owner_id FROM tenants)"
+
+# (id, old_future, old_urgency, new_future, new_urgency, created_at)
+_LogRow = Tuple[int, Optional[int], Optional[int], Optional[int], Optional[int], Any]
+
+
+def _parse_time(value: Any) -> datetime.datetime:
+    return value if isinstance(value, datetime.datetime) else datetime.datetime.fromisoformat(str(value))
+
+
+def _next_day(day: str) -> str:
+    return (datetime.date.fromisoformat(day) + datetime.timedelta(days=1)).isoformat()
+
+
+class AssignmentLogRetention:
+    """分值变更日志的汇总、压缩与清理
+
+    每轮依次执行：
+    1. 汇总：把已结束的自然日（UTC）按租户和来源汇总到 assignment_log_daily，每天一个事务
+    2. 压缩（配置了连续移动间隔时）：同一事项的连续移动合并为一条净变更，净变更为零的整段删除
+    3. 清理：删除超过保留天数、超出每个事项保留条数（均需配置）以及所属事项已不存在的日志
+
+    压缩和按条数清理只处理已汇总的日期，保证每日汇总统计的是原始移动次数。
+    所有删除都按批次在短事务中执行，批次之间让出写锁。
+    日志按租户分区，维护按 tenants 表中登记的租户逐个进行。
+    """
+
+    def __init__(self, engine: Engine,
+                 max_age_days: int = ASSIGNMENT_LOG_MAX_AGE_DAYS,
+                 max_per_todo: int = ASSIGNMENT_LOG_MAX_PER_TODO,
+                 compact_gap_seconds: int = ASSIGNMENT_LOG_COMPACT_GAP_SECONDS,
+                 batch_size: int = ASSIGNMENT_LOG_BATCH_SIZE,
+                 batch_pause_ms: float = ASSIGNMENT_LOG_BATCH_PAUSE_MS) -> None:
+        self.engine = engine
+        self.max_age_days = max_age_days
+        self.max_per_todo = max_per_todo
+        self.compact_gap = datetime.timedelta(seconds=max(0, compact_gap_seconds))
+        self.batch_size = batch_size
+        self.batch_pause_ms = batch_pause_ms
+
+    def _pause(self) -> None:
+        if self.batch_pause_ms > 0:
+            time.sleep(self.batch_pause_ms / 1000)
+
+    def _get_watermark(self, conn: Connection, key: str) -> Optional[str]:
+        return conn.execute(text("SELECT value FROM schema_meta WHERE key = :key"), {"key": key}).scalar()
+
+    def _set_watermark(self, conn: Connection, key: str, value: str) -> None:
+        conn.execute(text("DELETE FROM schema_meta WHERE key = :key"), {"key": key})
+        conn.execute(text("INSERT INTO schema_meta (key, value) VALUES (:key, :value)"), {"key": key, "value": value})
+
+    def _tenants(self) -> List[str]:
+        with self.engine.connect() as conn:
+            return list(conn.execute(text("SELECT owner_id FROM tenants ORDER BY owner_id")).scalars())
+
+    def rollup(self, today: Optional[datetime.date] = None) -> int:
+        """汇总已结束自然日的移动次数，返回本轮汇总的天数"""
+        until = (today or datetime.datetime.now(datetime.UTC).date()).isoformat()
+        with self.engine.connect() as conn:
+            day = self._get_watermark(conn, ROLLUP_WATERMARK_KEY)
+            first = conn.execute(
+                text(f"SELECT MIN(created_at) FROM assignment_logs WHERE {_ALL_TENANTS} AND created_at >= :day"),
+                {"day": day or ""}
+            ).scalar()
+        if first is None:
+            return 0
+
+        days = 0
+        day = _parse_time(first).date().isoformat()
+        while day < until:
+            next_day = _next_day(day)
+            with self.engine.begin() as conn:
+                conn.execute(text("DELETE FROM assignment_log_daily WHERE day = :day"), {"day": day})
+                conn.execute(text(
+                    "INSERT INTO assignment_log_daily (owner_id, day, source, moves, todos) "
+                    "SELECT owner_id, :day, COALESCE(source, ''), COUNT(*), COUNT(DISTINCT todo_id) "
+                    f"FROM assignment_logs WHERE {_ALL_TENANTS} AND created_at >= :day AND created_at < :next_day "
+                    "GROUP BY owner_id, COALESCE(source, '')"
+                ), {"day": day, "next_day": next_day})
+                self._set_watermark(conn, ROLLUP_WATERMARK_KEY, next_day)
+                # 跳过没有日志的日期
+                following = conn.execute(
+                    text(f"SELECT MIN(created_at) FROM assignment_logs WHERE {_ALL_TENANTS} AND created_at >= :next_day"),
+                    {"next_day": next_day}
+                ).scalar()
+            days += 1
+            if following is None:
+                break
+            day = max(next_day, _parse_time(following).date().isoformat())
+            self._pause()
+        return days
+
+    def _merge_runs(self, rows: Sequence[_LogRow]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """把按时间排序的日志切分为连续移动段，返回需要改写的行和需要删除的ID"""
+        updates: List[Dict[str, Any]] = []
+        deletes: List[int] = []
+        run: List[_LogRow] = []
+
+        def _flush() -> None:
+            if len(run) < 2:
+                return
+            first, last = run[0], run[-1]
+            if (first[1], first[2]) == (last[3], last[4]):
+                # 移回原位，净变更为零
+                deletes.extend(row[0] for row in run)
+                return
+            updates.append({"id": last[0], "old_future_score": first[1], "old_urgency_score": first[2]})
+            deletes.extend(row[0] for row in run[:-1])
+
+        for row in rows:
+            if run and _parse_time(row[5]) - _parse_time(run[-1][5]) > self.compact_gap:
+                _flush()
+                run = []
+            run.append(row)
+        _flush()
+        return updates, deletes
+
+    def compact(self) -> int:
+        """合并已汇总日期内的连续移动，返回删除的日志条数；未配置连续移动间隔时不压缩"""
+        if not self.compact_gap:
+            return 0
+        with self.engine.connect() as conn:
+            lower = self._get_watermark(conn, COMPACT_WATERMARK_KEY) or ""
+            upper = self._get_watermark(conn, ROLLUP_WATERMARK_KEY)
+        if upper is None or lower >= upper:
+            return 0
+
+        removed = 0
+        for owner_id in self._tenants():
+            removed += self._compact_tenant(owner_id, lower, upper)
+        with self.engine.begin() as conn:
+            self._set_watermark(conn, COMPACT_WATERMARK_KEY, upper)
+        return removed
+
+    def _compact_tenant(self, owner_id: str, lower: str, upper: str) -> int:
+        removed = 0
+        cursor = -1
+        window = {"owner_id": owner_id, "lower": lower, "upper": upper}
+        while True:
+            with self.engine.begin() as conn:
+                todo_ids = conn.execute(text(
+                    "SELECT todo_id FROM assignment_logs "
+                    "WHERE owner_id = :owner_id AND todo_id > :cursor AND created_at >= :lower AND created_at < :upper "
+                    "GROUP BY todo_id HAVING COUNT(*) > 1 ORDER BY todo_id LIMIT :limit"
+                ), {**window, "cursor": cursor, "limit": self.batch_size}).scalars().all()
+                for todo_id in todo_ids:
+                    rows = conn.execute(text(
+                        "SELECT id, old_future_score, old_urgency_score, new_future_score, new_urgency_score, created_at "
+                        "FROM assignment_logs WHERE owner_id = :owner_id AND todo_id = :todo_id "
+                        "AND created_at >= :lower AND created_at < :upper ORDER BY id"
+                    ), {**window, "todo_id": todo_id}).all()
+                    updates, deletes = self._merge_runs([tuple(row) for row in rows])
+                    if updates:
+                        conn.execute(text(
+                            "UPDATE assignment_logs SET old_future_score = :old_future_score, "
+                            "old_urgency_score = :old_urgency_score WHERE id = :id"
+                        ), updates)
+                    if deletes:
+                        conn.execute(text("DELETE FROM assignment_logs WHERE id = :id"), [{"id": i} for i in deletes])
+                        removed += len(deletes)
+            if not todo_ids:
+                return removed
+            cursor = todo_ids[-1]
+            self._pause()
+
+    def _delete_batches(self, select_ids_sql: str, params: Dict[str, Any]) -> int:
+        """按批次删除子查询选出的日志，返回删除总数"""
+        removed = 0
+        while True:
+            with self.engine.begin() as conn:
+                deleted = conn.execute(
+                    text(f"DELETE FROM assignment_logs WHERE id IN ({select_ids_sql} LIMIT :limit)"),
+                    {**params, "limit": self.batch_size}
+                ).rowcount
+            removed += deleted
+            if deleted < self.batch_size:
+                return removed
+            self._pause()
+
+    def prune_by_age(self, now: Optional[datetime.datetime] = None) -> int:
+        if self.max_age_days <= 0:
+            return 0
+        now = now or datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        cutoff = (now - datetime.timedelta(days=self.max_age_days)).isoformat(sep=" ")
+        # 每个租户的索引区间内按创建时间排列，最旧的日志在最前面
+        return self._delete_batches(
+            f"SELECT id FROM assignment_logs WHERE {_ALL_TENANTS} AND created_at < :cutoff", {"cutoff": cutoff}
+        )
+
+    def prune_by_count(self) -> int:
+        """每个事项只保留最近 max_per_todo 条日志（仅限已汇总的日期）"""
+        if self.max_per_todo <= 0:
+            return 0
+        with self.engine.connect() as conn:
+            upper = self._get_watermark(conn, ROLLUP_WATERMARK_KEY)
+        if upper is None:
+            return 0
+
+        return sum(self._prune_tenant_by_count(owner_id, upper) for owner_id in self._tenants())
+
+    def _prune_tenant_by_count(self, owner_id: str, upper: str) -> int:
+        removed = 0
+        cursor = -1
+        while True:
+            with self.engine.begin() as conn:
+                todo_ids = conn.execute(text(
+                    "SELECT todo_id FROM assignment_logs WHERE owner_id = :owner_id AND todo_id > :cursor "
+                    "GROUP BY todo_id HAVING COUNT(*) > :keep ORDER BY todo_id LIMIT :limit"
+                ), {"owner_id": owner_id, "cursor": cursor, "keep": self.max_per_todo,
+                    "limit": self.batch_size}).scalars().all()
+                for todo_id in todo_ids:
+                    removed += conn.execute(text(
+                        "DELETE FROM assignment_logs WHERE owner_id = :owner_id AND todo_id = :todo_id "
+                        "AND created_at < :upper AND id < ("
+                        "SELECT id FROM assignment_logs WHERE owner_id = :owner_id AND todo_id = :todo_id "
+                        "ORDER BY id DESC LIMIT 1 OFFSET :offset)"
+                    ), {"owner_id": owner_id, "todo_id": todo_id, "upper": upper,
+                        "offset": self.max_per_todo - 1}).rowcount
+            if not todo_ids:
+                return removed
+            cursor = todo_ids[-1]
+            self._pause()
+
+    def prune_orphans(self) -> int:
+        """删除所属事项已不存在的日志
+
+        永久删除事项时会在同一事务中删除其日志，这里只清理此前遗留的数据。
+        按日志主键游标分批扫描，每个事务只检查 batch_size 条日志。
+        """
+        removed = 0
+        cursor = 0
+        while True:
+            with self.engine.begin() as conn:
+                rows = conn.execute(text(
+                    "SELECT l.id, t.id IS NULL FROM ("
+                    "SELECT id, todo_id FROM assignment_logs WHERE id > :cursor ORDER BY id LIMIT :limit"
+                    ") l LEFT JOIN todo_items t ON t.id = l.todo_id"
+                ), {"cursor": cursor, "limit": self.batch_size}).all()
+                orphans = [{"id": log_id} for log_id, is_orphan in rows if is_orphan]
+                if orphans:
+                    conn.execute(text("DELETE FROM assignment_logs WHERE id = :id"), orphans)
+            removed += len(orphans)
+            if len(rows) < self.batch_size:
+                return removed
+            cursor = max(log_id for log_id, _ in rows)
+            self._pause()
+
+    def run_once(self) -> Dict[str, int]:
+        """执行一轮汇总、压缩和清理，返回各步骤处理的数量"""
+        result = {
+            "rolled_up_days": self.rollup(),
+            "compacted": self.compact(),
+            "pruned_by_age": self.prune_by_age(),
+            "pruned_by_count": self.prune_by_count(),
+            "pruned_orphans": self.prune_orphans(),
+        }
+        if any(result.values()):
+            logger.info(f"分值变更日志维护完成: {result}")
+        return result
+
+
+def create_retention_job():
+    """创建分值变更日志维护的后台任务，间隔为0时返回None"""
+    from database.database import get_engine
+    from utils.background import PeriodicJob
+
+    if ASSIGNMENT_LOG_RETENTION_INTERVAL_S <= 0:
+        return None
+    retention = AssignmentLogRetention(get_engine())
+    return PeriodicJob(JOB_NAME, ASSIGNMENT_LOG_RETENTION_INTERVAL_S, retention.run_once, initial_delay=60)
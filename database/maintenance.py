@@ -0,0 +1,220 @@
+from typing import Any, Dict, Optional
+from sqlalchemy.engine import Engine
+from database.sqlite_profiles import SQLITE_PROFILE, read_pragmas
+import datetime
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 维护任务的执行间隔（秒），0 表示不启动
+SQLITE_MAINTENANCE_INTERVAL_S = float(os.getenv("SQLITE_MAINTENANCE_INTERVAL_S", "60"))
+# WAL 中未检查点的页数超过该值时执行 PASSIVE 检查点（不等待读者，不阻塞写入）
+SQLITE_CHECKPOINT_PASSIVE_PAGES = int(os.getenv("SQLITE_CHECKPOINT_PASSIVE_PAGES", "1000"))
+# WAL 文件超过该大小时执行 TRUNCATE 检查点，把文件截断为0字节
+SQLITE_CHECKPOINT_TRUNCATE_BYTES = int(os.getenv("SQLITE_CHECKPOINT_TRUNCATE_BYTES", str(64 * 1024 * 1024)))
+# 两次 PRAGMA optimize 之间的最短间隔（秒），0 表示不执行
+SQLITE_OPTIMIZE_INTERVAL_S = float(os.getenv("SQLITE_OPTIMIZE_INTERVAL_S", "3600"))
+# 空闲页超过该数量时执行 incremental_vacuum，每轮最多释放 SQLITE_VACUUM_PAGES_PER_RUN 页
+SQLITE_VACUUM_FREE_PAGES = int(os.getenv("SQLITE_VACUUM_FREE_PAGES", "256"))
+SQLITE_VACUUM_PAGES_PER_RUN = int(os.getenv("SQLITE_VACUUM_PAGES_PER_RUN", "2000"))
+
+JOB_NAME = "sqlite-maintenance"
+
+# WAL 文件头 32 字节，每帧 24 字节帧头加一页数据
+_WAL_HEADER_BYTES = 32
+_WAL_FRAME_HEADER_BYTES = 24
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def is_sqlite_file(engine: Engine) -> bool:
+    return engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:")
+
+
+class SQLiteMaintenance:
+    """SQLite 文件数据库的例行维护
+
+    每轮依次执行：
+    - WAL 检查点：WAL 超过 truncate_bytes 时执行 TRUNCATE（截断文件），
+      未检查点的页数超过 passive_pages 时执行 PASSIVE（有长读事务时只推进到读者之前）
+    - 按 optimize_interval 执行 PRAGMA optimize，只重新分析统计信息过期的表
+    - auto_vacuum=INCREMENTAL 时，空闲页超过 vacuum_free_pages 则分批归还给文件系统
+
+    PRAGMA 在自动提交模式下执行，不持有长事务。
+    """
+
+    def __init__(self, engine: Engine,
+                 passive_pages: int = SQLITE_CHECKPOINT_PASSIVE_PAGES,
+                 truncate_bytes: int = SQLITE_CHECKPOINT_TRUNCATE_BYTES,
+                 optimize_interval: float = SQLITE_OPTIMIZE_INTERVAL_S,
+                 vacuum_free_pages: int = SQLITE_VACUUM_FREE_PAGES,
+                 vacuum_pages_per_run: int = SQLITE_VACUUM_PAGES_PER_RUN) -> None:
+        self.engine = engine
+        self.passive_pages = passive_pages
+        self.truncate_bytes = truncate_bytes
+        self.optimize_interval = optimize_interval
+        self.vacuum_free_pages = vacuum_free_pages
+        self.vacuum_pages_per_run = vacuum_pages_per_run
+        self.last_checkpoint: Optional[Dict[str, Any]] = None
+        self.last_optimize_at: Optional[float] = None
+        self.last_optimize_time: Optional[str] = None
+
+    @property
+    def wal_path(self) -> str:
+        return f"{self.engine.url.database}-wal"
+
+    def _connect(self):
+        return self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+    def _wal_bytes(self) -> int:
+        try:
+            return os.path.getsize(self.wal_path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _pragma(conn, name: str) -> Any:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+    def _wal_frames(self, page_size: int) -> int:
+        """根据 WAL 文件大小估算其中的帧数（TRUNCATE 之前文件不会缩小，只是其中的帧可被覆盖）"""
+        size = self._wal_bytes()
+        return max(0, (size - _WAL_HEADER_BYTES) // (page_size + _WAL_FRAME_HEADER_BYTES)) if size else 0
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Dict[str, Any]:
+        """执行一次 WAL 检查点
+
+        Returns:
+            busy: 是否因读者或写者未能完成；wal_frames: WAL 中的帧数；checkpointed: 已写回数据库的帧数；
+            lag: 尚未写回的帧数
+        """
+        with self._connect() as conn:
+            busy, log_frames, checkpointed = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").one()
+        result = {
+            "mode": mode,
+            "busy": bool(busy),
+            "wal_frames": log_frames,
+            "checkpointed": checkpointed,
+            "lag": max(0, log_frames - checkpointed),
+            "at": datetime.datetime.now(datetime.UTC).isoformat(),
+        }
+        self.last_checkpoint = result
+        if busy or result["lag"]:
+            logger.warning(f"WAL检查点未完成 ({mode})：仍有 {result['lag']} 帧未写回，可能存在长时间的读事务")
+        return result
+
+    def optimize(self) -> None:
+        with self._connect() as conn:
+            # 限制每个索引的采样行数，大表上也只需要毫秒级
+            conn.exec_driver_sql("PRAGMA analysis_limit=1000")
+            conn.exec_driver_sql("PRAGMA optimize")
+        self.last_optimize_at = time.monotonic()
+        self.last_optimize_time = datetime.datetime.now(datetime.UTC).isoformat()
+
+    def incremental_vacuum(self, pages: int) -> int:
+        """释放最多 pages 个空闲页，返回实际释放的页数（非 INCREMENTAL 模式下为0）"""
+        with self._connect() as conn:
+            if self._pragma(conn, "auto_vacuum") != 2:
+                return 0
+            before = self._pragma(conn, "freelist_count")
+            # execute() 只执行一步（释放一页），executescript() 会把语句执行到结束
+            conn.connection.dbapi_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+            return before - self._pragma(conn, "freelist_count")
+
+    def full_vacuum(self) -> Dict[str, Any]:
+        """执行 VACUUM 重建数据库文件，并把已有数据库切换为 auto_vacuum=INCREMENTAL
+
+        VACUUM 期间持有写锁且需要与数据库等量的临时空间，只应在维护窗口中手动执行。
+        """
+        before = self.get_status()
+        with self._connect() as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        self.checkpoint("TRUNCATE")
+        after = self.get_status()
+        logger.info(f"VACUUM 完成: {before['file_bytes']} -> {after['file_bytes']} 字节")
+        return {"before": before, "after": after}
+
+    def run_once(self) -> Dict[str, Any]:
+        """执行一轮维护，返回本轮执行的操作"""
+        result: Dict[str, Any] = {"checkpoint": None, "optimized": False, "vacuumed_pages": 0}
+
+        with self._connect() as conn:
+            page_size = self._pragma(conn, "page_size")
+            freelist = self._pragma(conn, "freelist_count")
+
+        wal_bytes = self._wal_bytes()
+        if wal_bytes > self.truncate_bytes:
+            result["checkpoint"] = self.checkpoint("TRUNCATE")
+        elif self._wal_frames(page_size) > self.passive_pages:
+            result["checkpoint"] = self.checkpoint("PASSIVE")
+
+        due = self.last_optimize_at is None or time.monotonic() - self.last_optimize_at >= self.optimize_interval
+        if self.optimize_interval > 0 and due:
+            self.optimize()
+            result["optimized"] = True
+
+        if freelist > self.vacuum_free_pages:
+            result["vacuumed_pages"] = self.incremental_vacuum(self.vacuum_pages_per_run)
+            if result["vacuumed_pages"]:
+                logger.info(f"incremental_vacuum 已释放 {result['vacuumed_pages']} 个空闲页")
+        return result
+
+    def get_status(self) -> Dict[str, Any]:
+        """WAL 大小、页数、空闲页和最近一次检查点的滞后帧数"""
+        with self._connect() as conn:
+            page_size = self._pragma(conn, "page_size")
+            page_count = self._pragma(conn, "page_count")
+            freelist = self._pragma(conn, "freelist_count")
+            auto_vacuum = self._pragma(conn, "auto_vacuum")
+            journal_mode = self._pragma(conn, "journal_mode")
+            pragmas = read_pragmas(conn)
+        return {
+            "database": self.engine.url.database,
+            "journal_mode": journal_mode,
+            "auto_vacuum": _AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist,
+            "file_bytes": page_size * page_count,
+            "profile": SQLITE_PROFILE,
+            "pragmas": pragmas,
+            "wal_bytes": self._wal_bytes(),
+            "wal_frames": self._wal_frames(page_size),
+            "last_checkpoint": self.last_checkpoint,
+            "checkpoint_lag": self.last_checkpoint["lag"] if self.last_checkpoint else None,
+            "last_optimize_at": self.last_optimize_time,
+            "thresholds": {
+                "passive_pages": self.passive_pages,
+                "truncate_bytes": self.truncate_bytes,
+                "optimize_interval_s": self.optimize_interval,
+                "vacuum_free_pages": self.vacuum_free_pages,
+            },
+        }
+
+
+_maintenance: Optional[SQLiteMaintenance] = None
+
+
+def get_maintenance() -> Optional[SQLiteMaintenance]:
+    """主数据库的维护器，非 SQLite 文件数据库时返回None"""
+    global _maintenance
+    from database.database import get_engine
+
+    engine = get_engine()
+    if _maintenance is None or _maintenance.engine is not engine:
+        _maintenance = SQLiteMaintenance(engine) if is_sqlite_file(engine) else None
+    return _maintenance
+
+
+def create_maintenance_job():
+    """创建 SQLite 例行维护的后台任务，间隔为0或不是 SQLite 文件数据库时返回None"""
+    from utils.background import PeriodicJob
+
+    if SQLITE_MAINTENANCE_INTERVAL_S <= 0:
+        return None
+    maintenance = get_maintenance()
+    if maintenance is None:
+        return None
+    return PeriodicJob(JOB_NAME, SQLITE_MAINTENANCE_INTERVAL_S, maintenance.run_once)
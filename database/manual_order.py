@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Union
+from sqlalchemy import func, select, text, false
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from database.data_version import bump_data_version, todos_version_key
+from database.orm_models import TodoORM
+from utils.fractional_index import BASE, integer_key, key_between, spread_keys
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 重排任务的执行间隔（秒），0 表示不启动
+SORT_KEY_REBALANCE_INTERVAL_S = float(os.getenv("SORT_KEY_REBALANCE_INTERVAL_S", "3600"))
+# 象限中最长的排序键超过该长度时重排整个象限
+SORT_KEY_MAX_LENGTH = int(os.getenv("SORT_KEY_MAX_LENGTH", "12"))
+SORT_KEY_REBALANCE_PAUSE_MS = float(os.getenv("SORT_KEY_REBALANCE_PAUSE_MS", "10"))
+
+JOB_NAME = "sort-key-rebalance"
+
+_todos = TodoORM.__table__
+
+
+def initial_sort_key(final_priority: int, todo_id: int) -> str:
+    """由优先级和ID生成的排序键，顺序与 (final_priority 降序, id) 一致，只依赖本行数据
+
+    用于为已有数据批量生成初始顺序：整数部分为 优先级补数 * BASE^6 + ID 的 8 位定长编码，
+    之后追加的键整数部分更大，排在这些事项之后。
+    """
+    return integer_key(min(max(999 - final_priority, 0), 999) * BASE ** 6 + todo_id, 8)
+
+
+def append_key(db: Union[Session, Connection], owner_id: str, quadrant: str) -> str:
+    """象限末尾的新排序键（最大键的整数部分加一），MAX 在 (owner_id, quadrant, sort_key) 索引上只需一次定位"""
+    last = db.execute(
+        select(func.max(_todos.c.sort_key))
+        .where(_todos.c.owner_id == owner_id, _todos.c.deleted == false(), _todos.c.quadrant == quadrant)
+    ).scalar()
+    return key_between(last, None)
+
+
+def rebalance_quadrant(db: Union[Session, Connection], owner_id: str, quadrant: str) -> List[int]:
+    """在当前事务中按现有顺序为象限内的事项重新分配均匀分布的短排序键，返回涉及的事项ID
+
+    尚未回填排序键（NULL）的事项排在最前，键相同的按ID排序。
+    """
+    todo_ids = list(db.execute(
+        select(_todos.c.id)
+        .where(_todos.c.owner_id == owner_id, _todos.c.deleted == false(), _todos.c.quadrant == quadrant)
+        .order_by(_todos.c.sort_key, _todos.c.id)
+    ).scalars())
+    if todo_ids:
+        db.execute(
+            text("UPDATE todo_items SET sort_key = :sort_key WHERE id = :id"),
+            [{"id": todo_id, "sort_key": key} for todo_id, key in zip(todo_ids, spread_keys(len(todo_ids)))],
+        )
+    return todo_ids
+
+
+class SortKeyRebalancer:
+    """定期缩短过长的手动排序键
+
+    追加只使整数部分按对数增长，反复在同一位置插入则会使小数部分逐渐变长。每轮找出最长键超过 max_length 的 (租户, 象限)，
+    逐个在短事务中按现有顺序重新分配短键并递增该租户的数据版本，事项的相对顺序不变。
+    """
+
+    def __init__(self, engine: Engine, max_length: int = SORT_KEY_MAX_LENGTH,
+                 batch_pause_ms: float = SORT_KEY_REBALANCE_PAUSE_MS) -> None:
+        self.engine = engine
+        self.max_length = max_length
+        self.batch_pause_ms = batch_pause_ms
+
+    def run_once(self) -> Dict[str, Any]:
+        with self.engine.connect() as conn:
+            groups = conn.execute(
+                select(_todos.c.owner_id, _todos.c.quadrant)
+                .where(_todos.c.deleted == false())
+                .group_by(_todos.c.owner_id, _todos.c.quadrant)
+                .having(func.max(func.length(_todos.c.sort_key)) > self.max_length)
+            ).all()
+
+        rebalanced = 0
+        for index, (owner_id, quadrant) in enumerate(groups):
+            if index and self.batch_pause_ms > 0:
+                time.sleep(self.batch_pause_ms / 1000)
+            with self.engine.begin() as conn:
+                rebalanced += len(rebalance_quadrant(conn, owner_id, quadrant))
+                bump_data_version(conn, todos_version_key(owner_id))
+
+        if groups:
+            logger.info(f"已重排 {len(groups)} 个象限的手动排序键（{rebalanced} 个事项）")
+        return {"quadrants": len(groups), "rebalanced": rebalanced}
+
+
+def create_rebalance_job():
+    """创建手动排序键重排的后台任务，间隔为0时返回None"""
+    from database.database import get_engine
+    from utils.background import PeriodicJob
+
+    if SORT_KEY_REBALANCE_INTERVAL_S <= 0:
+        return None
+    return PeriodicJob(JOB_NAME, SORT_KEY_REBALANCE_INTERVAL_S, SortKeyRebalancer(get_engine()).run_once)
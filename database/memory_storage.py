@@ -0,0 +1,503 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, List, Optional, Set, Tuple
+from models.schemas import TodoSchema, AssignmentLogSchema, AssignmentLogPageSchema
+from database.storage import TodoStorage, encode_log_cursor, decode_log_cursor, to_log_time
+from database.read_model import TodoRecord
+from database.tenancy import DEFAULT_TENANT
+from utils.priority_calculator import calculate_priority, get_quadrant, QUADRANTS, UNASSIGNED_QUADRANT
+from utils.fractional_index import key_between, spread_keys
+from utils.exceptions import DatabaseException
+from utils.time_of_day import parse_time
+from utils.tags import normalize_tags
+import datetime
+import threading
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 待办事项存储后端: database（默认）或 memory（进程内存储，不读写数据库，重启后数据丢失）
+STORAGE_BACKEND = os.getenv("TODO_STORAGE_BACKEND", "database")
+
+# 排序键: (-final_priority, id)，与读模型一致
+_SortKey = Tuple[int, int]
+# 手动排序键: (sort_key, id)
+_ManualKey = Tuple[str, int]
+
+# update_todo 可修改的字段，排序键只能通过 move_todo 修改
+_UPDATABLE_FIELDS = frozenset(TodoRecord.__slots__) - {"id", "quadrant", "sort_key"}
+
+
+def _now() -> str:
+    # 与数据库 CURRENT_TIMESTAMP 的格式一致，日志时间可直接按字符串比较
+    return datetime.datetime.now(datetime.UTC).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class _TenantData:
+    """单个租户的全部数据"""
+
+    def __init__(self) -> None:
+        self.records: Dict[int, TodoRecord] = {}  # 含已软删除的事项
+        self.deleted: Set[int] = set()
+        self.order: List[_SortKey] = []  # 未删除事项的全局优先级索引
+        self.buckets: Dict[str, List[_SortKey]] = {quadrant: [] for quadrant in (*QUADRANTS, UNASSIGNED_QUADRANT)}
+        self.manual: Dict[str, List[_ManualKey]] = {quadrant: [] for quadrant in (*QUADRANTS, UNASSIGNED_QUADRANT)}
+        self.tags: Dict[str, Set[int]] = {}  # 标签 -> 未删除事项ID（倒排索引）
+        self.recycle_bin: Dict[int, str] = {}  # 原事项ID -> 进入回收站的时间
+        self.logs: List[AssignmentLogSchema] = []  # 按ID（即写入顺序）递增
+        self.version = 0  # 每次写入后递增，与数据库存储的数据版本含义相同
+
+
+class InMemoryStore:
+    """进程内的待办事项数据，按租户分区
+
+    与数据库一样，事项ID和日志ID在所有租户之间全局递增且不重复使用。
+    所有读写都持有同一把锁，单个操作是原子的。
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.tenants: Dict[str, _TenantData] = {}
+        self.last_todo_id = 0
+        self.last_log_id = 0
+
+    def tenant(self, owner_id: str) -> _TenantData:
+        data = self.tenants.get(owner_id)
+        if data is None:
+            data = self.tenants[owner_id] = _TenantData()
+        return data
+
+
+_store = InMemoryStore()
+
+
+def get_memory_store() -> InMemoryStore:
+    """获取进程级的内存数据（TODO_STORAGE_BACKEND=memory 时供所有请求共享）"""
+    return _store
+
+
+class InMemoryTodoStorage(TodoStorage):
+    """基于内存的待办事项存储实现类
+
+    行为与 DatabaseTodoStorage 一致（软删除、回收站、优先级计算和分值变更日志），不进行任何I/O，
+    用于测试、演示模式以及脱离数据库测量服务层性能。
+    按ID保存事项，并维护按 (final_priority 降序, id) 排序的全局索引和每个象限的索引，
+    Top-N 的复杂度为 O(log n + k)。
+    """
+
+    def __init__(self, store: Optional[InMemoryStore] = None, owner_id: str = DEFAULT_TENANT) -> None:
+        """初始化存储实例
+
+        Args:
+            store: 数据所在的内存存储，为空时创建一个独立的新存储
+            owner_id: 租户ID
+        """
+        self.store = store if store is not None else InMemoryStore()
+        self.owner_id = owner_id
+
+    @property
+    def _data(self) -> _TenantData:
+        return self.store.tenant(self.owner_id)
+
+    @staticmethod
+    def _index(data: _TenantData, record: TodoRecord) -> None:
+        insort(data.order, record.priority_key)
+        insort(data.buckets[record.quadrant], record.priority_key)
+        insort(data.manual[record.quadrant], record.manual_key)
+        for tag in record.tags:
+            data.tags.setdefault(tag, set()).add(record.id)
+
+    @staticmethod
+    def _unindex(data: _TenantData, record: TodoRecord) -> None:
+        for index, key in ((data.order, record.priority_key), (data.buckets[record.quadrant], record.priority_key),
+                           (data.manual[record.quadrant], record.manual_key)):
+            position = bisect_left(index, key)
+            if position < len(index) and index[position] == key:
+                del index[position]
+        for tag in record.tags:
+            todo_ids = data.tags.get(tag)
+            if todo_ids is not None:
+                todo_ids.discard(record.id)
+                if not todo_ids:
+                    del data.tags[tag]
+
+    @staticmethod
+    def _append_key(data: _TenantData, quadrant: str) -> str:
+        manual = data.manual[quadrant]
+        return key_between(manual[-1][0] if manual and manual[-1][0] else None, None)
+
+    def _active(self, data: _TenantData, todo_id: int) -> Optional[TodoRecord]:
+        record = data.records.get(todo_id)
+        return record if record is not None and todo_id not in data.deleted else None
+
+    def get_all_todos(self) -> Dict[int, TodoSchema]:
+        with self.store.lock:
+            data = self._data
+            return {todo_id: record.to_schema() for todo_id, record in data.records.items()
+                    if todo_id not in data.deleted}
+
+    def get_data_version(self) -> int:
+        with self.store.lock:
+            return self._data.version
+
+    def get_todo_by_id(self, todo_id: int) -> Optional[TodoSchema]:
+        with self.store.lock:
+            record = self._active(self._data, todo_id)
+            return record.to_schema() if record is not None else None
+
+    def add_todo(self, todo: TodoSchema) -> TodoSchema:
+        final_priority = 100
+        if todo.future_score is not None and todo.urgency_score is not None:
+            final_priority = calculate_priority(todo.future_score, todo.urgency_score)
+
+        with self.store.lock:
+            if todo.id is not None and any(todo.id in data.records for data in self.store.tenants.values()):
+                raise DatabaseException(f"创建待办事项失败: ID {todo.id} 已存在")
+            todo_id = todo.id if todo.id is not None else self.store.last_todo_id + 1
+            self.store.last_todo_id = max(self.store.last_todo_id, todo_id)
+            data = self._data
+            sort_key = self._append_key(data, get_quadrant(todo.future_score, todo.urgency_score))
+            record = TodoRecord(todo.model_copy(update={"id": todo_id, "final_priority": final_priority,
+                                                        "sort_key": sort_key}))
+            data.records[todo_id] = record
+            self._index(data, record)
+            data.version += 1
+        logger.info(f"内存存储已保存新待办事项: {record.title} (ID: {todo_id})")
+        return record.to_schema()
+
+    def update_todo(self, todo_id: int, **kwargs: Any) -> bool:
+        changes = dict(kwargs)
+        operation_source = changes.pop('operation_source', None)
+        if 'tags' in changes:
+            # 记录中的标签是元组，规范化后才能与新值比较
+            changes['tags'] = tuple(normalize_tags(changes['tags']))
+        with self.store.lock:
+            data = self._data
+            old = self._active(data, todo_id)
+            if old is None:
+                logger.warning(f"尝试更新不存在或已删除的记录 ID: {todo_id}")
+                return False
+
+            updated_fields = [key for key, value in changes.items()
+                              if key in _UPDATABLE_FIELDS and getattr(old, key) != value]
+            if not updated_fields:
+                return True
+
+            todo = old.to_schema()
+            for key in updated_fields:
+                setattr(todo, key, changes[key])
+            score_changed = 'future_score' in updated_fields or 'urgency_score' in updated_fields
+            if score_changed:
+                todo.final_priority = (calculate_priority(todo.future_score, todo.urgency_score)
+                                       if todo.future_score is not None and todo.urgency_score is not None else 100)
+
+            if score_changed and get_quadrant(todo.future_score, todo.urgency_score) != old.quadrant:
+                # 移到其他象限时排在新象限的最后
+                todo.sort_key = self._append_key(data, get_quadrant(todo.future_score, todo.urgency_score))
+
+            record = TodoRecord(todo)
+            self._unindex(data, old)
+            data.records[todo_id] = record
+            self._index(data, record)
+            data.version += 1
+
+            if score_changed:
+                self.store.last_log_id += 1
+                data.logs.append(AssignmentLogSchema(
+                    id=self.store.last_log_id,
+                    todo_id=todo_id,
+                    old_future_score=old.future_score,
+                    old_urgency_score=old.urgency_score,
+                    new_future_score=record.future_score,
+                    new_urgency_score=record.urgency_score,
+                    source=operation_source,
+                    created_at=_now(),
+                ))
+        logger.info(f"内存记录 {todo_id} 已更新字段: {updated_fields}")
+        return True
+
+    def remove_todo(self, todo_id: int) -> Optional[TodoSchema]:
+        """软删除：事项保留在存储中，只从优先级索引中移除"""
+        with self.store.lock:
+            data = self._data
+            record = self._active(data, todo_id)
+            if record is None:
+                return None
+            self._unindex(data, record)
+            data.deleted.add(todo_id)
+            data.version += 1
+        logger.info(f"待办事项 {todo_id} 已软删除")
+        return record.to_schema()
+
+    def get_recycle_bin(self) -> Dict[int, TodoSchema]:
+        with self.store.lock:
+            data = self._data
+            return {todo_id: data.records[todo_id].to_schema() for todo_id in data.recycle_bin
+                    if todo_id in data.deleted}
+
+    def add_to_recycle_bin(self, todo: TodoSchema) -> None:
+        if todo.id is None:
+            return
+        with self.store.lock:
+            data = self._data
+            if todo.id in data.recycle_bin:
+                raise DatabaseException(f"添加到回收站失败: ID {todo.id} 已在回收站中")
+            data.recycle_bin[todo.id] = _now()
+            data.version += 1
+        logger.info(f"事项已添加到回收站: {todo.title} (ID: {todo.id})")
+
+    def remove_from_recycle_bin(self, todo_id: int) -> Optional[TodoSchema]:
+        """从回收站中永久删除事项"""
+        with self.store.lock:
+            data = self._data
+            if data.recycle_bin.pop(todo_id, None) is None:
+                return None
+            record = data.records.pop(todo_id, None)
+            if record is None:
+                return None
+            if todo_id in data.deleted:
+                data.deleted.discard(todo_id)
+            else:
+                self._unindex(data, record)
+            data.logs = [log for log in data.logs if log.todo_id != todo_id]
+            data.version += 1
+        logger.info(f"待办事项 {todo_id} 已从系统中永久删除")
+        return record.to_schema()
+
+    def batch_restore_from_recycle_bin(self, todo_ids: List[int]) -> List[TodoSchema]:
+        restored: List[TodoSchema] = []
+        with self.store.lock:
+            data = self._data
+            for todo_id in todo_ids:
+                if data.recycle_bin.pop(todo_id, None) is None:
+                    continue
+                record = data.records.get(todo_id)
+                if record is None:
+                    continue
+                if todo_id in data.deleted:
+                    data.deleted.discard(todo_id)
+                    self._index(data, record)
+                restored.append(record.to_schema())
+            if restored:
+                data.version += 1
+        logger.info(f"成功恢复 {len(restored)} 条记录")
+        return restored
+
+    def clear_recycle_bin(self) -> None:
+        with self.store.lock:
+            data = self._data
+            purged = set()
+            for todo_id in data.recycle_bin:
+                if todo_id in data.deleted:
+                    data.deleted.discard(todo_id)
+                    data.records.pop(todo_id, None)
+                    purged.add(todo_id)
+            if purged:
+                data.logs = [log for log in data.logs if log.todo_id not in purged]
+            cleared = len(data.recycle_bin)
+            data.recycle_bin.clear()
+            data.version += 1
+        logger.info(f"回收站已成功清空，共删除 {cleared} 项")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.store.lock:
+            data = self._data
+            total = len(data.order)
+            completed = sum(1 for _, todo_id in data.order if data.records[todo_id].completed)
+            in_recycle = len(data.recycle_bin)
+        return {
+            "total_active": total,
+            "completed": completed,
+            "pending": total - completed,
+            "in_recycle_bin": in_recycle,
+            "timestamp": datetime.datetime.now(datetime.UTC).isoformat()
+        }
+
+    def get_score_counts(self) -> List[Tuple[Optional[int], Optional[int], bool, int]]:
+        counts: Dict[Tuple[Optional[int], Optional[int], bool], int] = {}
+        with self.store.lock:
+            data = self._data
+            for _, todo_id in data.order:
+                record = data.records[todo_id]
+                cell = (record.future_score, record.urgency_score, record.completed)
+                counts[cell] = counts.get(cell, 0) + 1
+        return [(future, urgency, completed, count) for (future, urgency, completed), count in counts.items()]
+
+    def get_top_todos(self, limit: int, quadrant: Optional[str] = None) -> List[TodoSchema]:
+        with self.store.lock:
+            data = self._data
+            index = data.order if quadrant is None else data.buckets[quadrant]
+            return [data.records[todo_id].to_schema() for _, todo_id in index[:limit]]
+
+    def get_quadrant_todos(self, quadrant: str, limit: int) -> List[TodoSchema]:
+        with self.store.lock:
+            data = self._data
+            return [data.records[todo_id].to_schema() for _, todo_id in data.manual[quadrant][:limit]]
+
+    def _rebalance(self, data: _TenantData, quadrant: str) -> None:
+        manual = data.manual[quadrant]
+        for (_, todo_id), key in zip(manual, spread_keys(len(manual))):
+            data.records[todo_id].sort_key = key
+        data.manual[quadrant] = [data.records[todo_id].manual_key for _, todo_id in manual]
+
+    def move_todo(self, todo_id: int, prev_id: Optional[int] = None,
+                  next_id: Optional[int] = None) -> Optional[TodoSchema]:
+        """只修改被移动事项的排序键；相邻键相同时先重排该象限"""
+        if prev_id is None and next_id is None:
+            raise ValueError("至少需要指定一个相邻事项")
+        with self.store.lock:
+            data = self._data
+            record = self._active(data, todo_id)
+            if record is None:
+                return None
+            neighbours: List[Optional[TodoRecord]] = []
+            for neighbour_id in (prev_id, next_id):
+                neighbour = None
+                if neighbour_id is not None:
+                    neighbour = self._active(data, neighbour_id)
+                    if neighbour_id == todo_id or neighbour is None or neighbour.quadrant != record.quadrant:
+                        raise ValueError(f"相邻事项 {neighbour_id} 不存在或与被移动的事项不在同一象限")
+                neighbours.append(neighbour)
+            prev, following = neighbours
+
+            def _bounds() -> Tuple[Optional[str], Optional[str]]:
+                # 排除被移动的事项本身后，只给出一侧时取该事项另一侧的相邻键
+                index = [key for key in data.manual[record.quadrant] if key[1] != todo_id]
+                if following is None:
+                    position = bisect_right(index, prev.manual_key)
+                    return prev.sort_key, index[position][0] if position < len(index) else None
+                if prev is None:
+                    position = bisect_left(index, following.manual_key)
+                    return index[position - 1][0] if position > 0 else None, following.sort_key
+                return prev.sort_key, following.sort_key
+
+            if prev is not None and following is not None and prev.manual_key >= following.manual_key:
+                raise ValueError("前一个相邻事项必须排在后一个相邻事项之前")
+            lower, upper = _bounds()
+            if lower is not None and upper is not None and lower >= upper:
+                self._rebalance(data, record.quadrant)
+                lower, upper = _bounds()
+
+            todo = record.to_schema()
+            todo.sort_key = key_between(lower, upper)
+            moved = TodoRecord(todo)
+            self._unindex(data, data.records[todo_id])
+            data.records[todo_id] = moved
+            self._index(data, moved)
+            data.version += 1
+        logger.info(f"待办事项 {todo_id} 已移动，新的排序键: {moved.sort_key}")
+        return moved.to_schema()
+
+    def get_todos_by_tags(self, tags: List[str], match_all: bool = False) -> Dict[int, TodoSchema]:
+        """倒排索引中各标签的ID集合求交集（all）或并集（any）"""
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return {}
+        with self.store.lock:
+            data = self._data
+            matched = [data.tags.get(tag, set()) for tag in tags]
+            todo_ids = set.intersection(*matched) if match_all else set().union(*matched)
+            return {todo_id: data.records[todo_id].to_schema() for todo_id in sorted(todo_ids)}
+
+    def get_tag_counts(self) -> List[Tuple[str, int]]:
+        with self.store.lock:
+            return sorted((tag, len(todo_ids)) for tag, todo_ids in self._data.tags.items())
+
+    def _retag(self, data: _TenantData, todo_id: int, tags: List[str]) -> None:
+        old = data.records[todo_id]
+        todo = old.to_schema()
+        todo.tags = tags
+        record = TodoRecord(todo)
+        active = todo_id not in data.deleted
+        if active:
+            self._unindex(data, old)
+        data.records[todo_id] = record
+        if active:
+            self._index(data, record)
+
+    def rename_tag(self, old: str, new: str) -> int:
+        with self.store.lock:
+            data = self._data
+            affected = [todo_id for todo_id, record in data.records.items() if old in record.tags]
+            if affected and old != new:
+                for todo_id in affected:
+                    self._retag(data, todo_id, sorted((set(data.records[todo_id].tags) - {old}) | {new}))
+                data.version += 1
+        if affected:
+            logger.info(f"标签 {old} 已重命名为 {new}，涉及 {len(affected)} 个事项")
+        return len(affected)
+
+    def delete_tag(self, tag: str) -> int:
+        with self.store.lock:
+            data = self._data
+            affected = [todo_id for todo_id, record in data.records.items() if tag in record.tags]
+            for todo_id in affected:
+                self._retag(data, todo_id, [other for other in data.records[todo_id].tags if other != tag])
+            if affected:
+                data.version += 1
+        if affected:
+            logger.info(f"标签 {tag} 已从 {len(affected)} 个事项上移除")
+        return len(affected)
+
+    def get_todos_in_time_range(self, start_minute: int, end_minute: int,
+                                include_completed: bool = True) -> List[TodoSchema]:
+        """线性扫描未删除的事项，排序规则与数据库存储相同"""
+        matched: List[Tuple[int, int, int, TodoRecord]] = []
+        with self.store.lock:
+            data = self._data
+            for _, todo_id in data.order:
+                record = data.records[todo_id]
+                if not record.start_time or not record.end_time or (record.completed and not include_completed):
+                    continue
+                start, end = parse_time(record.start_time), parse_time(record.end_time)
+                if start < end_minute and end > start_minute and end > start:
+                    matched.append((start, end, todo_id, record))
+        matched.sort(key=lambda item: item[:3])
+        return [record.to_schema() for *_, record in matched]
+
+    def get_todos_in_date_range(self, start_date: datetime.date, end_date: datetime.date,
+                                include_completed: bool = True) -> List[TodoSchema]:
+        """线性扫描优先级索引，结果自然按 (final_priority 降序, id) 排序"""
+        def _in_range(value: Optional[datetime.date]) -> bool:
+            return value is not None and start_date <= value <= end_date
+
+        with self.store.lock:
+            data = self._data
+            return [
+                record.to_schema() for record in (data.records[todo_id] for _, todo_id in data.order)
+                if (_in_range(record.due_date) or _in_range(record.scheduled_date))
+                and (include_completed or not record.completed)
+            ]
+
+    def get_assignment_logs(self, todo_id: Optional[int] = None, since: Optional[datetime.datetime] = None,
+                            until: Optional[datetime.datetime] = None, sources: Optional[List[str]] = None,
+                            cursor: Optional[str] = None, limit: int = 50) -> AssignmentLogPageSchema:
+        """按 (created_at, id) 倒序分页获取分值变更日志，游标格式与数据库存储相同"""
+        since_time = to_log_time(since) if since is not None else None
+        until_time = to_log_time(until) if until is not None else None
+        last = decode_log_cursor(cursor) if cursor else None
+
+        items: List[AssignmentLogSchema] = []
+        with self.store.lock:
+            # 日志按写入顺序追加，ID 和时间都递增，倒序遍历即 (created_at, id) 倒序
+            logs = list(reversed(self._data.logs))
+        for log in logs:
+            if todo_id is not None and log.todo_id != todo_id:
+                continue
+            if since_time is not None and log.created_at < since_time:
+                continue
+            if until_time is not None and log.created_at >= until_time:
+                continue
+            if sources and log.source not in sources:
+                continue
+            if last is not None and (log.created_at, log.id) >= last:
+                continue
+            items.append(log.model_copy())
+            if len(items) > limit:
+                break
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_log_cursor(items[-1].created_at, items[-1].id)
+        return AssignmentLogPageSchema(items=items, next_cursor=next_cursor)
@@ -0,0 +1,779 @@
+from typing import Callable, Dict, Iterable, List, Optional, Any
+from sqlalchemy import inspect, select, insert, update, text
+from sqlalchemy.engine import Engine, Connection
+from sqlalchemy.exc import IntegrityError
+from database.data_version import bump_data_version, todos_version_key
+from database.orm_models import SchemaMigrationORM
+from database.manual_order import initial_sort_key
+from database.tenancy import DEFAULT_TENANT
+from utils.priority_calculator import calculate_priority, get_quadrant
+from utils.time_of_day import parse_time
+import datetime
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 回填批次配置：每批一个短事务，批次之间让出写锁
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+MIGRATION_BATCH_PAUSE_MS = float(os.getenv("MIGRATION_BATCH_PAUSE_MS", "10"))
+
+# 进度回调参数: (版本号, 迁移名称, 已处理到的ID, 目标最大ID)
+ProgressCallback = Callable[[int, str, int, int], None]
+
+_migration_table = SchemaMigrationORM.__table__
+
+# 当前进程中的后台回填线程
+_backfill_thread: Optional[threading.Thread] = None
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+
+
+def _columns(conn: Connection, table: str) -> Dict[str, Dict[str, Any]]:
+    """获取表的列信息，表不存在时返回空字典"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        return {}
+    return {column["name"]: column for column in inspector.get_columns(table)}
+
+
+def add_column_if_missing(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """以原地 ALTER TABLE 的方式添加列（幂等）"""
+    columns = _columns(conn, table)
+    if not columns or column in columns:
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    logger.info(f"已为表 {table} 添加列 {column}")
+    return True
+
+
+def bump_todo_versions(conn: Connection, owners: Iterable[str]) -> None:
+    """回填改写事项后在同一事务中递增涉及租户的数据版本，使各工作进程的读模型和缓存失效"""
+    owners = set(owners)
+    if owners and _columns(conn, "data_versions"):
+        for owner_id in sorted(owners):
+            bump_data_version(conn, todos_version_key(owner_id))
+
+
+class Backfill:
+    """分批回填任务
+
+    按主键区间推进，每个批次在独立的短事务中执行并持久化游标，
+    进程中断后从上次的游标继续，不会长时间占用写锁。
+    """
+
+    def __init__(self, table: str, apply_batch: Callable[[Connection, int, int], None]) -> None:
+        """
+        Args:
+            table: 按 id 推进的表名
+            apply_batch: 处理 (lower, upper] 区间的函数
+        """
+        self.table = table
+        self.apply_batch = apply_batch
+
+
+class Migration:
+    """单个版本化迁移
+
+    upgrade 只做原地的增量变更（加列、建索引），数据修正交给 backfill。
+    offline_check 不为空表示这是无法在线完成的重建类迁移，
+    仅当检查结果为 True 时才需要通过命令行离线执行。
+    """
+
+    def __init__(self, version: int, name: str,
+                 upgrade: Optional[Callable[[Connection], None]] = None,
+                 backfill: Optional[Backfill] = None,
+                 offline_check: Optional[Callable[[Connection], bool]] = None) -> None:
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+        self.backfill = backfill
+        self.offline_check = offline_check
+
+    def __repr__(self):
+        return f"<Migration(version={self.version}, name='{self.name}')>"
+
+
+# ---------------------------------------------------------------------------
+# 0001: 旧版本表结构重建（离线）
+# ---------------------------------------------------------------------------
+
+_LEGACY_TABLES = {
+    "todo_items": ("""
+        CREATE TABLE todo_items_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            completed INTEGER NOT NULL DEFAULT 0,
+            future_score INTEGER,
+            urgency_score INTEGER,
+            final_priority INTEGER NOT NULL DEFAULT 100,
+            start_time TEXT,
+            end_time TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+    """, ["id", "title", "description", "completed", "start_time", "end_time",
+          "created_at", "updated_at", "deleted"]),
+    "recycle_bin_items": ("""
+        CREATE TABLE recycle_bin_items_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_id INTEGER NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            description TEXT,
+            completed INTEGER NOT NULL DEFAULT 0,
+            future_score INTEGER,
+            urgency_score INTEGER,
+            final_priority INTEGER NOT NULL DEFAULT 100,
+            start_time TEXT,
+            end_time TEXT,
+            created_at TIMESTAMP,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """, ["id", "original_id", "title", "description", "completed", "start_time", "end_time",
+          "created_at", "deleted_at"]),
+}
+
+
+def _legacy_table_needs_rebuild(conn: Connection, table: str) -> bool:
+    """旧 priority 列或 NOT NULL 分值列无法通过 ALTER TABLE 在原地修正"""
+    columns = _columns(conn, table)
+    if not columns:
+        return False
+    if "priority" in columns:
+        return True
+    return any(name in columns and not columns[name]["nullable"]
+               for name in ("future_score", "urgency_score"))
+
+
+def _needs_legacy_rebuild(conn: Connection) -> bool:
+    return any(_legacy_table_needs_rebuild(conn, table) for table in _LEGACY_TABLES)
+
+
+def _rebuild_legacy_tables(conn: Connection) -> None:
+    """重建旧版本表：移除 priority 字段并放宽分值字段约束"""
+    for table, (ddl, keep_columns) in _LEGACY_TABLES.items():
+        if not _legacy_table_needs_rebuild(conn, table):
+            continue
+        columns = _columns(conn, table)
+        if "future_score" in columns and "urgency_score" in columns:
+            zero = "future_score = 0 AND urgency_score = 0"
+            final = "final_priority" if "final_priority" in columns else "100"
+            score_exprs = [
+                f"CASE WHEN {zero} THEN NULL ELSE future_score END",
+                f"CASE WHEN {zero} THEN NULL ELSE urgency_score END",
+                f"CASE WHEN {zero} THEN 100 ELSE {final} END",
+            ]
+        else:
+            score_exprs = ["NULL", "NULL", "100"]
+
+        copied = [name for name in keep_columns if name in columns]
+        target = ", ".join(copied + ["future_score", "urgency_score", "final_priority"])
+        source = ", ".join(copied + score_exprs)
+
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table}_new")
+        conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(f"INSERT INTO {table}_new ({target}) SELECT {source} FROM {table}")
+        conn.exec_driver_sql(f"DROP TABLE {table}")
+        conn.exec_driver_sql(f"ALTER TABLE {table}_new RENAME TO {table}")
+        logger.info(f"旧版本表 {table} 已重建")
+
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_todo_items_deleted ON todo_items(deleted)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_todo_items_completed ON todo_items(completed)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_todo_items_final_priority ON todo_items(final_priority)")
+    if _columns(conn, "recycle_bin_items"):
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_recycle_bin_original_id ON recycle_bin_items(original_id)")
+
+
+# ---------------------------------------------------------------------------
+# 0002: 分值与最终优先级字段
+# ---------------------------------------------------------------------------
+
+def _add_score_columns(conn: Connection) -> None:
+    for table in ("todo_items", "recycle_bin_items"):
+        add_column_if_missing(conn, table, "future_score", "INTEGER")
+        add_column_if_missing(conn, table, "urgency_score", "INTEGER")
+        add_column_if_missing(conn, table, "final_priority", "INTEGER NOT NULL DEFAULT 100")
+
+
+def _backfill_final_priority(conn: Connection, lower: int, upper: int) -> None:
+    rows = conn.execute(
+        text(
+            "SELECT id, future_score, urgency_score, final_priority FROM todo_items "
+            "WHERE id > :lower AND id <= :upper "
+            "AND future_score IS NOT NULL AND urgency_score IS NOT NULL"
+        ),
+        {"lower": lower, "upper": upper},
+    ).all()
+
+    updates = []
+    for todo_id, future_score, urgency_score, final_priority in rows:
+        try:
+            new_priority = calculate_priority(future_score, urgency_score)
+        except ValueError as e:
+            logger.warning(f"更新待办事项 {todo_id} 优先级失败: {e}")
+            continue
+        if new_priority != final_priority:
+            updates.append({"id": todo_id, "final_priority": new_priority})
+
+    if updates:
+        conn.execute(text("UPDATE todo_items SET final_priority = :final_priority WHERE id = :id"), updates)
+
+
+# ---------------------------------------------------------------------------
+# 0003: 分值变更日志的覆盖索引
+# ---------------------------------------------------------------------------
+
+_ASSIGNMENT_LOG_INDEX_COLUMNS = "old_future_score, old_urgency_score, new_future_score, new_urgency_score"
+
+
+def _add_assignment_log_indexes(conn: Connection) -> None:
+    if not _columns(conn, "assignment_logs"):
+        return
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_assignment_logs_todo_history "
+        f"ON assignment_logs (todo_id, created_at, id, source, {_ASSIGNMENT_LOG_INDEX_COLUMNS})"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_assignment_logs_feed "
+        f"ON assignment_logs (created_at, id, source, todo_id, {_ASSIGNMENT_LOG_INDEX_COLUMNS})"
+    )
+    # todo_id 单列索引是新索引的前缀，不再需要
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_assignment_logs_todo_id")
+
+
+# ---------------------------------------------------------------------------
+# 0004: 象限统计的部分索引
+# ---------------------------------------------------------------------------
+
+def _add_score_cell_index(conn: Connection) -> None:
+    if not _columns(conn, "todo_items"):
+        return
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_todo_items_score_cells "
+        "ON todo_items (future_score, urgency_score, completed, deleted) WHERE deleted = 0"
+    )
+
+
+# ---------------------------------------------------------------------------
+# 0005: 精简回收站表，只保留 (original_id, deleted_at)
+# ---------------------------------------------------------------------------
+
+def _thin_recycle_bin(conn: Connection) -> None:
+    columns = _columns(conn, "recycle_bin_items")
+    if not columns or "title" not in columns:
+        return
+    # 只复制两列，且主表中仍有对应软删除记录的行，表重建耗时与回收站条目数成正比
+    conn.exec_driver_sql("DROP TABLE IF EXISTS recycle_bin_items_new")
+    conn.exec_driver_sql("""
+        CREATE TABLE recycle_bin_items_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_id INTEGER NOT NULL,
+            deleted_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL
+        )
+    """)
+    conn.exec_driver_sql("""
+        INSERT INTO recycle_bin_items_new (id, original_id, deleted_at)
+        SELECT r.id, r.original_id, COALESCE(r.deleted_at, CURRENT_TIMESTAMP)
+        FROM recycle_bin_items r
+        WHERE EXISTS (SELECT 1 FROM todo_items t WHERE t.id = r.original_id AND t.deleted = 1)
+    """)
+    conn.exec_driver_sql("DROP TABLE recycle_bin_items")
+    conn.exec_driver_sql("ALTER TABLE recycle_bin_items_new RENAME TO recycle_bin_items")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_recycle_bin_items_original_id ON recycle_bin_items (original_id)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_recycle_bin_items_deleted_at ON recycle_bin_items (deleted_at)"
+    )
+    logger.info("回收站表已精简为 (original_id, deleted_at)")
+
+
+# ---------------------------------------------------------------------------
+# 0006: 活跃事项的部分索引，移除低区分度的单列索引
+# ---------------------------------------------------------------------------
+
+# 布尔列索引（含旧版本的 idx_ 前缀索引）只增加写入开销；id 索引与主键重复；
+# final_priority 单列索引由部分索引取代
+_REDUNDANT_TODO_INDEXES = (
+    "ix_todo_items_deleted", "ix_todo_items_completed", "ix_todo_items_id", "ix_todo_items_final_priority",
+    "idx_todo_items_deleted", "idx_todo_items_completed", "idx_todo_items_final_priority",
+)
+
+
+def _add_active_todo_indexes(conn: Connection) -> None:
+    if not _columns(conn, "todo_items"):
+        return
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_todo_items_active_priority "
+        "ON todo_items (final_priority DESC, id) WHERE deleted = 0"
+    )
+    for index in _REDUNDANT_TODO_INDEXES:
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+
+
+# ---------------------------------------------------------------------------
+# 0007: 租户隔离，owner_id 列及以其开头的复合索引
+# ---------------------------------------------------------------------------
+
+_TENANT_INDEXES = (
+    ("ix_todo_items_active_priority",
+     "todo_items (owner_id, final_priority DESC, id) WHERE deleted = 0"),
+    ("ix_todo_items_score_cells",
+     "todo_items (owner_id, future_score, urgency_score, completed, deleted) WHERE deleted = 0"),
+    ("ix_assignment_logs_todo_history",
+     f"assignment_logs (owner_id, todo_id, created_at, id, source, {_ASSIGNMENT_LOG_INDEX_COLUMNS})"),
+    ("ix_assignment_logs_feed",
+     f"assignment_logs (owner_id, created_at, id, source, todo_id, {_ASSIGNMENT_LOG_INDEX_COLUMNS})"),
+    ("ix_recycle_bin_items_owner_deleted_at", "recycle_bin_items (owner_id, deleted_at)"),
+)
+
+
+def _add_tenant_columns(conn: Connection) -> None:
+    # 已有数据全部归属默认租户，ADD COLUMN 带默认值不需要回填
+    owner_ddl = f"VARCHAR(64) DEFAULT '{DEFAULT_TENANT}' NOT NULL"
+    for table in ("todo_items", "recycle_bin_items", "assignment_logs"):
+        add_column_if_missing(conn, table, "owner_id", owner_ddl)
+
+    for index, definition in _TENANT_INDEXES:
+        if not _columns(conn, definition.split(" ", 1)[0]):
+            continue
+        # 旧索引不以 owner_id 开头，按新定义重建
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+        conn.exec_driver_sql(f"CREATE INDEX {index} ON {definition}")
+
+    if _columns(conn, "tenants") and _columns(conn, "todo_items"):
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO tenants (owner_id) SELECT DISTINCT owner_id FROM todo_items"
+        )
+
+    # 设置表的主键改为 (owner_id, key)，只能重建；该表只有少量行
+    settings = _columns(conn, "system_settings")
+    if settings and "owner_id" not in settings:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS system_settings_new")
+        conn.exec_driver_sql(f"""
+            CREATE TABLE system_settings_new (
+                owner_id VARCHAR(64) DEFAULT '{DEFAULT_TENANT}' NOT NULL,
+                key VARCHAR(50) NOT NULL,
+                value VARCHAR(500),
+                blob_value BLOB,
+                content_type VARCHAR(100),
+                updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+                PRIMARY KEY (owner_id, key)
+            )
+        """)
+        conn.exec_driver_sql("""
+            INSERT INTO system_settings_new (key, value, blob_value, content_type, updated_at)
+            SELECT key, value, blob_value, content_type, updated_at FROM system_settings
+        """)
+        conn.exec_driver_sql("DROP TABLE system_settings")
+        conn.exec_driver_sql("ALTER TABLE system_settings_new RENAME TO system_settings")
+        logger.info("系统设置表已按 (owner_id, key) 重建")
+
+
+# ---------------------------------------------------------------------------
+# 0008: 开始/结束时间改为当天分钟数的整数列，及时间段部分索引
+# ---------------------------------------------------------------------------
+
+def _add_time_minute_columns(conn: Connection) -> None:
+    if not _columns(conn, "todo_items"):
+        return
+    add_column_if_missing(conn, "todo_items", "start_minute", "INTEGER")
+    add_column_if_missing(conn, "todo_items", "end_minute", "INTEGER")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_todo_items_active_schedule "
+        "ON todo_items (owner_id, start_minute, end_minute, id) WHERE deleted = 0 AND start_minute IS NOT NULL"
+    )
+
+
+def _backfill_time_minutes(conn: Connection, lower: int, upper: int) -> None:
+    """把旧的 "HH:MM" 字符串列转换为分钟数，转换后清空旧列，已写入分钟数的行不覆盖
+
+    每批递增涉及租户的数据版本，已加载读模型的工作进程随之重新加载，不会继续返回旧的时间。
+    """
+    columns = _columns(conn, "todo_items")
+    if "start_time" not in columns or "end_time" not in columns:
+        return
+    rows = conn.execute(
+        text(
+            "SELECT id, owner_id, start_time, end_time, start_minute, end_minute FROM todo_items "
+            "WHERE id > :lower AND id <= :upper AND (start_time IS NOT NULL OR end_time IS NOT NULL)"
+        ),
+        {"lower": lower, "upper": upper},
+    ).all()
+
+    def _convert(value: Optional[str], current: Optional[int], todo_id: int) -> Optional[int]:
+        if current is not None or not value:
+            return current
+        try:
+            return parse_time(value)
+        except ValueError:
+            logger.warning(f"待办事项 {todo_id} 的时间 {value!r} 无效，已丢弃")
+            return None
+
+    updates = [
+        {"id": todo_id,
+         "start_minute": _convert(start_time, start_minute, todo_id),
+         "end_minute": _convert(end_time, end_minute, todo_id)}
+        for todo_id, _, start_time, end_time, start_minute, end_minute in rows
+    ]
+    if updates:
+        conn.execute(text(
+            "UPDATE todo_items SET start_minute = :start_minute, end_minute = :end_minute, "
+            "start_time = NULL, end_time = NULL WHERE id = :id"
+        ), updates)
+        bump_todo_versions(conn, (owner_id for _, owner_id, *_ in rows))
+
+
+# ---------------------------------------------------------------------------
+# 0009: 截止日期与计划日期列，及日历视图的部分索引
+# ---------------------------------------------------------------------------
+
+def _add_date_columns(conn: Connection) -> None:
+    if not _columns(conn, "todo_items"):
+        return
+    add_column_if_missing(conn, "todo_items", "due_date", "DATE")
+    add_column_if_missing(conn, "todo_items", "scheduled_date", "DATE")
+    for index, column in (("ix_todo_items_active_due", "due_date"),
+                          ("ix_todo_items_active_scheduled", "scheduled_date")):
+        conn.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS {index} "
+            f"ON todo_items (owner_id, {column}, id) WHERE deleted = 0 AND {column} IS NOT NULL"
+        )
+
+
+# ---------------------------------------------------------------------------
+# 0010: 象限列与象限内的手动排序键
+# ---------------------------------------------------------------------------
+
+def _add_manual_order_columns(conn: Connection) -> None:
+    if not _columns(conn, "todo_items"):
+        return
+    add_column_if_missing(conn, "todo_items", "quadrant", "VARCHAR(10) NOT NULL DEFAULT 'unassigned'")
+    add_column_if_missing(conn, "todo_items", "sort_key", "VARCHAR(64)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_todo_items_active_manual_order "
+        "ON todo_items (owner_id, quadrant, sort_key, id) WHERE deleted = 0"
+    )
+
+
+def _backfill_manual_order(conn: Connection, lower: int, upper: int) -> None:
+    """按分值写入象限，并生成与原有顺序 (final_priority 降序, id) 一致的排序键
+
+    键只依赖本行数据，可以按ID区间分批回填；已有排序键的行（新代码写入的）不覆盖。
+    """
+    rows = conn.execute(
+        text(
+            "SELECT id, owner_id, future_score, urgency_score, final_priority FROM todo_items "
+            "WHERE id > :lower AND id <= :upper AND sort_key IS NULL"
+        ),
+        {"lower": lower, "upper": upper},
+    ).all()
+    updates = [
+        {"id": todo_id,
+         "quadrant": get_quadrant(future_score, urgency_score),
+         "sort_key": initial_sort_key(final_priority, todo_id)}
+        for todo_id, _, future_score, urgency_score, final_priority in rows
+    ]
+    if updates:
+        conn.execute(text("UPDATE todo_items SET quadrant = :quadrant, sort_key = :sort_key WHERE id = :id"), updates)
+        # 象限顺序和并发读合并的键都依赖数据版本，每批递增涉及租户的版本
+        bump_todo_versions(conn, (owner_id for _, owner_id, *_ in rows))
+
+
+# ---------------------------------------------------------------------------
+# 0011: 分值变更日志的每日汇总按租户区分
+# ---------------------------------------------------------------------------
+
+def _add_log_rollup_owner(conn: Connection) -> None:
+    # 主键改为 (owner_id, day, source)，只能重建；汇总表每天只有少量行。
+    # 旧汇总已无法按租户拆分，全部归属默认租户
+    daily = _columns(conn, "assignment_log_daily")
+    if not daily or "owner_id" in daily:
+        return
+    conn.exec_driver_sql("DROP TABLE IF EXISTS assignment_log_daily_new")
+    conn.exec_driver_sql(f"""
+        CREATE TABLE assignment_log_daily_new (
+            owner_id VARCHAR(64) DEFAULT '{DEFAULT_TENANT}' NOT NULL,
+            day VARCHAR(10) NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            moves INTEGER NOT NULL,
+            todos INTEGER NOT NULL,
+            PRIMARY KEY (owner_id, day, source)
+        )
+    """)
+    conn.exec_driver_sql("""
+        INSERT INTO assignment_log_daily_new (day, source, moves, todos)
+        SELECT day, source, moves, todos FROM assignment_log_daily
+    """)
+    conn.exec_driver_sql("DROP TABLE assignment_log_daily")
+    conn.exec_driver_sql("ALTER TABLE assignment_log_daily_new RENAME TO assignment_log_daily")
+    logger.info("分值变更日志汇总表已按 (owner_id, day, source) 重建")
+
+
+# ---------------------------------------------------------------------------
+# 0012: 排序键改为 整数部分 + 小数部分 的格式
+# ---------------------------------------------------------------------------
+
+def _add_sort_key_heads(conn: Connection) -> None:
+    """旧排序键是纯小数，加上整数部分 "a0"（即 0）后相对顺序不变，之后追加的键整数部分递增
+
+    必须一次完成：新旧格式混在同一象限中无法比较，按批次转换时也无法区分已转换的行。
+    """
+    if "sort_key" not in _columns(conn, "todo_items"):
+        return
+    owners = conn.execute(text("SELECT DISTINCT owner_id FROM todo_items WHERE sort_key IS NOT NULL")).scalars().all()
+    converted = conn.execute(text("UPDATE todo_items SET sort_key = 'a0' || sort_key WHERE sort_key IS NOT NULL")).rowcount
+    bump_todo_versions(conn, owners)
+    if converted:
+        logger.info(f"已转换 {converted} 个排序键")
+
+
+# ---------------------------------------------------------------------------
+# 0013: 截止时间自动升级按 updated_at 增量同步的索引
+# ---------------------------------------------------------------------------
+
+def _add_updated_index(conn: Connection) -> None:
+    if not _columns(conn, "todo_items"):
+        return
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_todo_items_updated ON todo_items (owner_id, updated_at) "
+                         "WHERE updated_at IS NOT NULL")
+
+
+# 迁移列表，版本号必须单调递增
+MIGRATIONS: List[Migration] = [
+    Migration(1, "rebuild_legacy_tables", upgrade=_rebuild_legacy_tables,
+              offline_check=_needs_legacy_rebuild),
+    Migration(2, "score_columns", upgrade=_add_score_columns,
+              backfill=Backfill("todo_items", _backfill_final_priority)),
+    Migration(3, "assignment_log_indexes", upgrade=_add_assignment_log_indexes),
+    Migration(4, "score_cell_index", upgrade=_add_score_cell_index),
+    Migration(5, "thin_recycle_bin", upgrade=_thin_recycle_bin),
+    Migration(6, "active_todo_indexes", upgrade=_add_active_todo_indexes),
+    Migration(7, "tenant_partitioning", upgrade=_add_tenant_columns),
+    Migration(8, "time_minute_columns", upgrade=_add_time_minute_columns,
+              backfill=Backfill("todo_items", _backfill_time_minutes)),
+    Migration(9, "date_columns", upgrade=_add_date_columns),
+    Migration(10, "manual_order", upgrade=_add_manual_order_columns,
+              backfill=Backfill("todo_items", _backfill_manual_order)),
+    Migration(11, "log_rollup_owner", upgrade=_add_log_rollup_owner),
+    Migration(12, "sort_key_heads", upgrade=_add_sort_key_heads),
+    Migration(13, "updated_index", upgrade=_add_updated_index),
+]
+
+
+def _log_progress(version: int, name: str, done: int, total: int) -> None:
+    percent = 100.0 if total <= 0 else min(done, total) * 100.0 / total
+    logger.info(f"迁移 {version:04d}_{name} 回填进度: {min(done, total)}/{total} ({percent:.1f}%)")
+
+
+class MigrationRunner:
+    """版本化迁移执行器
+
+    在 schema_migrations 表中记录已应用的版本。结构变更以原地增量方式同步执行，
+    回填按批次在短事务中执行，可以在后台线程中运行，不阻塞API写入。
+    """
+
+    def __init__(self, engine: Engine, migrations: Optional[List[Migration]] = None,
+                 batch_size: int = MIGRATION_BATCH_SIZE, batch_pause_ms: float = MIGRATION_BATCH_PAUSE_MS,
+                 progress: Optional[ProgressCallback] = None) -> None:
+        self.engine = engine
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS,
+                                 key=lambda migration: migration.version)
+        self.batch_size = batch_size
+        self.batch_pause_ms = batch_pause_ms
+        self.progress = progress or _log_progress
+
+    @property
+    def head(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def _ensure_table(self) -> None:
+        _migration_table.create(self.engine, checkfirst=True)
+
+    def applied(self) -> Dict[int, Dict[str, Any]]:
+        """获取已应用的迁移记录"""
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(_migration_table)).mappings().all()
+        return {row["version"]: dict(row) for row in rows}
+
+    def _record(self, conn: Connection, migration: Migration, backfill_done: bool) -> None:
+        """在当前事务中记录迁移版本"""
+        conn.execute(insert(_migration_table).values(
+            version=migration.version,
+            name=migration.name,
+            applied_at=_utcnow(),
+            backfill_cursor=None if migration.backfill else 0,
+            backfill_completed_at=None if (migration.backfill and not backfill_done) else _utcnow(),
+        ))
+
+    def stamp_head(self) -> None:
+        """将所有迁移标记为已应用（用于 create_all 新建的数据库）"""
+        applied = self.applied()
+        for migration in self.migrations:
+            if migration.version in applied:
+                continue
+            try:
+                with self.engine.begin() as conn:
+                    self._record(conn, migration, backfill_done=True)
+            except IntegrityError:
+                logger.info(f"迁移 {migration.version:04d}_{migration.name} 已由其他进程记录")
+        logger.info(f"新数据库已标记为最新迁移版本 {self.head}")
+
+    def upgrade(self, allow_offline: bool = False, backfills: str = "inline") -> List[int]:
+        """应用所有待执行的迁移
+
+        Args:
+            allow_offline: 是否执行需要离线重建的迁移
+            backfills: "inline" 同步执行回填，"background" 在后台线程执行，"skip" 不执行
+
+        Returns:
+            List[int]: 本次应用的迁移版本号
+        """
+        applied = self.applied()
+        newly_applied: List[int] = []
+
+        for migration in self.migrations:
+            if migration.version in applied:
+                continue
+
+            try:
+                with self.engine.begin() as conn:
+                    if migration.offline_check is not None and migration.offline_check(conn):
+                        if not allow_offline:
+                            logger.warning(
+                                f"迁移 {migration.version:04d}_{migration.name} 需要离线执行，"
+                                f"请停止服务后运行 python -m database.migrate_db --offline"
+                            )
+                            break
+                        logger.info(f"正在离线执行迁移 {migration.version:04d}_{migration.name}")
+                        if migration.upgrade:
+                            migration.upgrade(conn)
+                    elif migration.offline_check is None and migration.upgrade:
+                        migration.upgrade(conn)
+                    self._record(conn, migration, backfill_done=False)
+            except IntegrityError:
+                # 多个进程同时启动时，版本可能已被其他进程记录；结构变更本身是幂等的
+                logger.info(f"迁移 {migration.version:04d}_{migration.name} 已由其他进程应用")
+                continue
+
+            newly_applied.append(migration.version)
+            logger.info(f"迁移 {migration.version:04d}_{migration.name} 已应用")
+
+        self.resume_backfills(backfills)
+        return newly_applied
+
+    def pending(self) -> List[Migration]:
+        """获取尚未应用的迁移"""
+        applied = self.applied()
+        return [migration for migration in self.migrations if migration.version not in applied]
+
+    def resume_backfills(self, backfills: str = "background") -> None:
+        """恢复未完成的回填，执行方式同 upgrade 的 backfills 参数"""
+        if backfills == "inline":
+            self.run_backfills()
+        elif backfills == "background":
+            self.start_background_backfills()
+
+    def _pending_backfills(self) -> List[Migration]:
+        applied = self.applied()
+        return [
+            migration for migration in self.migrations
+            if migration.backfill is not None
+            and migration.version in applied
+            and applied[migration.version]["backfill_completed_at"] is None
+        ]
+
+    def run_backfills(self) -> None:
+        """按批次执行所有未完成的回填，可中断后恢复"""
+        for migration in self._pending_backfills():
+            self._run_backfill(migration)
+
+    def _run_backfill(self, migration: Migration) -> None:
+        backfill = migration.backfill
+        assert backfill is not None
+
+        with self.engine.connect() as conn:
+            cursor = conn.execute(
+                select(_migration_table.c.backfill_cursor).where(_migration_table.c.version == migration.version)
+            ).scalar() or 0
+            max_id = conn.execute(text(f"SELECT MAX(id) FROM {backfill.table}")).scalar() or 0
+
+        logger.info(f"开始回填迁移 {migration.version:04d}_{migration.name}，起始游标: {cursor}")
+        while cursor < max_id:
+            upper = cursor + self.batch_size
+            with self.engine.begin() as conn:
+                backfill.apply_batch(conn, cursor, upper)
+                conn.execute(
+                    update(_migration_table)
+                    .where(_migration_table.c.version == migration.version)
+                    .values(backfill_cursor=upper)
+                )
+            cursor = upper
+            self.progress(migration.version, migration.name, cursor, max_id)
+            if self.batch_pause_ms > 0:
+                time.sleep(self.batch_pause_ms / 1000)
+
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(_migration_table)
+                .where(_migration_table.c.version == migration.version)
+                .values(backfill_cursor=max(cursor, max_id), backfill_completed_at=_utcnow())
+            )
+        logger.info(f"迁移 {migration.version:04d}_{migration.name} 回填完成")
+
+    def start_background_backfills(self) -> Optional[threading.Thread]:
+        """在后台守护线程中执行回填"""
+        global _backfill_thread
+        if _backfill_thread and _backfill_thread.is_alive():
+            return _backfill_thread
+        if not self._pending_backfills():
+            return None
+
+        def _worker() -> None:
+            try:
+                self.run_backfills()
+            except Exception as e:
+                logger.error(f"后台回填失败，将在下次启动时从游标处继续: {e}", exc_info=True)
+
+        _backfill_thread = threading.Thread(target=_worker, name="migration-backfill", daemon=True)
+        _backfill_thread.start()
+        return _backfill_thread
+
+    def status(self) -> Dict[str, Any]:
+        """获取迁移状态及回填进度"""
+        applied = self.applied()
+        items = []
+        with self.engine.connect() as conn:
+            for migration in self.migrations:
+                record = applied.get(migration.version)
+                item: Dict[str, Any] = {
+                    "version": migration.version,
+                    "name": migration.name,
+                    "offline": migration.offline_check is not None,
+                    "applied": record is not None,
+                    "applied_at": record["applied_at"].isoformat() if record and record["applied_at"] else None,
+                }
+                if migration.backfill is not None:
+                    total = conn.execute(text(f"SELECT MAX(id) FROM {migration.backfill.table}")).scalar() or 0
+                    done = bool(record and record["backfill_completed_at"])
+                    cursor = (record["backfill_cursor"] or 0) if record else 0
+                    item["backfill"] = {
+                        "completed": done,
+                        "cursor": cursor,
+                        "total": total,
+                        "percent": 100.0 if done or total == 0 else round(min(cursor, total) * 100.0 / total, 1),
+                    }
+                items.append(item)
+        return {
+            "head": self.head,
+            "current": max(applied) if applied else 0,
+            "backfill_running": bool(_backfill_thread and _backfill_thread.is_alive()),
+            "migrations": items,
+        }
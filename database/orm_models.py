@@ -1,6 +1,10 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum, LargeBinary
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Enum as SQLEnum, LargeBinary, Index, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func, text
+from database.tenancy import DEFAULT_TENANT
+from utils.priority_calculator import UNASSIGNED_QUADRANT
+from utils.time_of_day import to_time
 from enum import Enum
 
 Base = declarative_base()
@@ -9,20 +13,52 @@ Base = declarative_base()
 class TodoORM(Base):
     __tablename__ = "todo_items"
 
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    owner_id = Column(String(64), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
     title = Column(String(100), nullable=False, index=True)
     description = Column(String(500), nullable=True)
-    completed = Column(Boolean, default=False, nullable=False, index=True)
+    completed = Column(Boolean, default=False, nullable=False)
     future_score = Column(Integer, nullable=True)
     urgency_score = Column(Integer, nullable=True)
-    final_priority = Column(Integer, default=100, nullable=False, index=True)
-    start_time = Column(String(5), nullable=True)
-    end_time = Column(String(5), nullable=True)
+    final_priority = Column(Integer, default=100, nullable=False)
+    # 预计开始/结束时间，保存为当天的分钟数（0-1439），接口中仍以 "HH:MM" 表示
+    start_minute = Column(Integer, nullable=True)
+    end_minute = Column(Integer, nullable=True)
+    # 截止日期与计划日期，日历视图按日期范围查询
+    due_date = Column(Date, nullable=True)
+    scheduled_date = Column(Date, nullable=True)
+    # 所在象限（由两项分值决定，写入时维护）与象限内的手动排序键（分数索引，见 utils/fractional_index.py）
+    quadrant = Column(String(10), nullable=False, default=UNASSIGNED_QUADRANT, server_default=UNASSIGNED_QUADRANT)
+    sort_key = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
-    deleted = Column(Boolean, default=False, nullable=False, index=True)
+    deleted = Column(Boolean, default=False, nullable=False)
+    # 标签按 todo_id 批量加载（每批一次主键上的 IN 查询）
+    tag_rows = relationship("TodoTagORM", lazy="selectin", cascade="all, delete-orphan")
 
+    # 布尔列区分度低，不单独建索引；热路径只涉及未删除的事项，使用部分索引。
+    # 所有查询都限定在一个租户内，复合索引以 owner_id 开头，查询只扫描该租户的索引区间
     __table_args__ = (
+        # 按优先级排序/Top-N
+        Index("ix_todo_items_active_priority", "owner_id", final_priority.desc(), "id",
+              sqlite_where=text("deleted = 0")),
+        # 象限统计的分组列，部分索引只包含未删除的事项，GROUP BY 只扫描索引
+        Index("ix_todo_items_score_cells", "owner_id", "future_score", "urgency_score", "completed", "deleted",
+              sqlite_where=text("deleted = 0")),
+        # 时间段查询与冲突检测：按开始时间范围扫描，结束时间在索引中过滤
+        Index("ix_todo_items_active_schedule", "owner_id", "start_minute", "end_minute", "id",
+              sqlite_where=text("deleted = 0 AND start_minute IS NOT NULL")),
+        # 日历视图：按日期范围扫描，两种日期各一个部分索引
+        Index("ix_todo_items_active_due", "owner_id", "due_date", "id",
+              sqlite_where=text("deleted = 0 AND due_date IS NOT NULL")),
+        Index("ix_todo_items_active_scheduled", "owner_id", "scheduled_date", "id",
+              sqlite_where=text("deleted = 0 AND scheduled_date IS NOT NULL")),
+        # 象限视图的手动排序：按 (quadrant, sort_key) 顺序扫描，移动和追加只需定位相邻的键
+        Index("ix_todo_items_active_manual_order", "owner_id", "quadrant", "sort_key", "id",
+              sqlite_where=text("deleted = 0")),
+        # 截止时间自动升级的增量同步：按 updated_at 水位线读取上次同步后修改过的事项（新建的事项按ID读取）
+        # 部分索引只被带 updated_at 条件的查询使用，不影响热路径查询的索引选择
+        Index("ix_todo_items_updated", "owner_id", "updated_at", sqlite_where=text("updated_at IS NOT NULL")),
         {'sqlite_autoincrement': True},
     )
 
@@ -32,55 +68,73 @@ class TodoORM(Base):
     def to_dict(self) -> dict:
         return {
             'id': self.id,
+            'owner_id': self.owner_id,
             'title': self.title,
             'description': self.description,
             'completed': self.completed,
             'future_score': self.future_score,
             'urgency_score': self.urgency_score,
-            'start_time': self.start_time,
-            'end_time': self.end_time,
+            'start_time': to_time(self.start_minute),  # type: ignore
+            'end_time': to_time(self.end_minute),  # type: ignore
+            'due_date': self.due_date.isoformat() if self.due_date else None,  # type: ignore
+            'scheduled_date': self.scheduled_date.isoformat() if self.scheduled_date else None,  # type: ignore
+            'quadrant': self.quadrant,
+            'sort_key': self.sort_key,
+            'tags': [row.tag for row in self.tag_rows],
             'created_at': self.created_at.isoformat() if self.created_at else None,  # type: ignore
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,  # type: ignore
             'deleted': self.deleted  # type: ignore
         }
 
 
+class TodoTagORM(Base):
+    """事项与标签的关联表
+
+    主键 (todo_id, tag) 用于读取单个事项的标签，(owner_id, tag, todo_id) 是标签的倒排索引：
+    按标签过滤时每个标签一次索引区间扫描，多个标签的 any/all 在SQL中做 UNION/INTERSECT。
+    """
+    __tablename__ = "todo_tags"
+
+    todo_id = Column(Integer, ForeignKey("todo_items.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String(30), primary_key=True)
+    owner_id = Column(String(64), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
+
+    __table_args__ = (
+        Index("ix_todo_tags_owner_tag", "owner_id", "tag", "todo_id"),
+    )
+
+    def __repr__(self):
+        return f"<TodoTagORM(todo_id={self.todo_id}, tag='{self.tag}')>"
+
+
 class RecycleBinORM(Base):
+    """回收站索引表
+
+    只记录哪些事项在回收站中以及进入回收站的时间，事项内容保留在 todo_items 中（deleted=True），
+    不再复制一份完整数据。
+    """
     __tablename__ = "recycle_bin_items"
 
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    owner_id = Column(String(64), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
     original_id = Column(Integer, nullable=False, index=True, unique=True)
-    title = Column(String(100), nullable=False, index=True)
-    description = Column(String(500), nullable=True)
-    completed = Column(Boolean, default=False, nullable=False)
-    future_score = Column(Integer, nullable=True)
-    urgency_score = Column(Integer, nullable=True)
-    final_priority = Column(Integer, default=100, nullable=False, index=True)
-    start_time = Column(String(5), nullable=True)
-    end_time = Column(String(5), nullable=True)
-    created_at = Column(DateTime(timezone=True), nullable=False)
+    # 单列 deleted_at 索引供跨租户的过期清理使用
     deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
 
     __table_args__ = (
+        # 按租户查看/清空回收站
+        Index("ix_recycle_bin_items_owner_deleted_at", "owner_id", "deleted_at"),
         {'sqlite_autoincrement': True},
     )
 
     def __repr__(self):
-        return f"<RecycleBinORM(id={self.id}, original_id={self.original_id}, title='{self.title}', deleted_at={self.deleted_at})>"
+        return f"<RecycleBinORM(id={self.id}, original_id={self.original_id}, deleted_at={self.deleted_at})>"
 
     def to_dict(self) -> dict:
         return {
             'id': self.id,
+            'owner_id': self.owner_id,
             'original_id': self.original_id,
-            'title': self.title,
-            'description': self.description,
-            'completed': self.completed,
-            'future_score': self.future_score,
-            'urgency_score': self.urgency_score,
-            'final_priority': self.final_priority,
-            'start_time': self.start_time,
-            'end_time': self.end_time,
-            'created_at': self.created_at.isoformat() if self.created_at else None,  # type: ignore
             'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None  # type: ignore
         }
 
@@ -89,7 +143,8 @@ class AssignmentLogORM(Base):
     __tablename__ = "assignment_logs"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    todo_id = Column(Integer, nullable=False, index=True)
+    owner_id = Column(String(64), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
+    todo_id = Column(Integer, nullable=False)
     old_future_score = Column(Integer, nullable=True)
     old_urgency_score = Column(Integer, nullable=True)
     new_future_score = Column(Integer, nullable=True)
@@ -97,15 +152,86 @@ class AssignmentLogORM(Base):
     source = Column(String(20), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # 覆盖索引：历史查询按 (created_at, id) 倒序分页，只读索引不回表
+    __table_args__ = (
+        Index("ix_assignment_logs_todo_history", "owner_id", "todo_id", "created_at", "id", "source",
+              "old_future_score", "old_urgency_score", "new_future_score", "new_urgency_score"),
+        Index("ix_assignment_logs_feed", "owner_id", "created_at", "id", "source", "todo_id",
+              "old_future_score", "old_urgency_score", "new_future_score", "new_urgency_score"),
+    )
+
+
+class AssignmentLogDailyORM(Base):
+    __tablename__ = "assignment_log_daily"
+
+    owner_id = Column(String(64), primary_key=True, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
+    day = Column(String(10), primary_key=True)  # YYYY-MM-DD (UTC)
+    source = Column(String(20), primary_key=True)  # 未记录来源时为空字符串
+    moves = Column(Integer, nullable=False, default=0)
+    todos = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<AssignmentLogDailyORM(owner_id='{self.owner_id}', day='{self.day}', "
+                f"source='{self.source}', moves={self.moves})>")
+
 
 class SystemSettingORM(Base):
     __tablename__ = "system_settings"
 
-    key = Column(String(50), primary_key=True, index=True)
+    owner_id = Column(String(64), primary_key=True, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
+    key = Column(String(50), primary_key=True)
     value = Column(String(500), nullable=True)
     blob_value = Column(LargeBinary, nullable=True)
     content_type = Column(String(100), nullable=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
     def __repr__(self):
-        return f"<SystemSettingORM(key='{self.key}', updated_at={self.updated_at})>"
+        return f"<SystemSettingORM(owner_id='{self.owner_id}', key='{self.key}', updated_at={self.updated_at})>"
+
+
+class TenantORM(Base):
+    """已写入过数据的租户
+
+    维护任务通过该表逐个租户处理数据，以便使用 owner_id 开头的索引。
+    """
+    __tablename__ = "tenants"
+
+    owner_id = Column(String(64), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<TenantORM(owner_id='{self.owner_id}')>"
+
+
+class DataVersionORM(Base):
+    __tablename__ = "data_versions"
+
+    key = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DataVersionORM(key='{self.key}', version={self.version})>"
+
+
+class SchemaMigrationORM(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    backfill_cursor = Column(Integer, nullable=True)
+    backfill_completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<SchemaMigrationORM(version={self.version}, name='{self.name}')>"
+
+
+class SchemaMetaORM(Base):
+    __tablename__ = "schema_meta"
+
+    key = Column(String(50), primary_key=True)
+    value = Column(String(200), nullable=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+    def __repr__(self):
+        return f"<SchemaMetaORM(key='{self.key}', value='{self.value}')>"
@@ -0,0 +1,232 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from models.schemas import TodoSchema
+from database.tenancy import DEFAULT_TENANT
+from utils.priority_calculator import QUADRANTS, UNASSIGNED_QUADRANT, get_quadrant
+import threading
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 是否启用进程内读模型
+READ_MODEL_ENABLED = os.getenv("TODO_READ_MODEL", "0") == "1"
+# 每个租户一个读模型，超过该数量时丢弃最久未使用的租户的读模型
+READ_MODEL_MAX_TENANTS = int(os.getenv("TODO_READ_MODEL_MAX_TENANTS", "64"))
+
+# 排序键: (-final_priority, id)，升序即优先级从高到低、同优先级按ID
+_SortKey = Tuple[int, int]
+# 手动排序键: (sort_key, id)，象限视图按此顺序排列
+_ManualKey = Tuple[str, int]
+
+
+class TodoRecord:
+    """读模型中的单条待办事项，使用 __slots__ 降低内存占用"""
+
+    __slots__ = ("id", "title", "description", "completed", "future_score", "urgency_score",
+                 "final_priority", "start_time", "end_time", "due_date", "scheduled_date", "sort_key", "tags",
+                 "quadrant")
+
+    def __init__(self, todo: TodoSchema) -> None:
+        self.id = todo.id
+        self.title = todo.title
+        self.description = todo.description
+        self.completed = todo.completed
+        self.future_score = todo.future_score
+        self.urgency_score = todo.urgency_score
+        self.final_priority = todo.final_priority
+        self.start_time = todo.start_time
+        self.end_time = todo.end_time
+        self.due_date = todo.due_date
+        self.scheduled_date = todo.scheduled_date
+        self.sort_key = todo.sort_key
+        self.tags = tuple(todo.tags)
+        self.quadrant = get_quadrant(todo.future_score, todo.urgency_score)
+
+    @property
+    def priority_key(self) -> _SortKey:
+        return (-self.final_priority, self.id)
+
+    @property
+    def manual_key(self) -> _ManualKey:
+        return (self.sort_key or "", self.id)
+
+    def to_schema(self) -> TodoSchema:
+        # 数据在写入时已校验，跳过校验直接构造
+        return TodoSchema.model_construct(
+            id=self.id,
+            title=self.title,
+            description=self.description,
+            completed=self.completed,
+            future_score=self.future_score,
+            urgency_score=self.urgency_score,
+            final_priority=self.final_priority,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            due_date=self.due_date,
+            scheduled_date=self.scheduled_date,
+            sort_key=self.sort_key,
+            tags=list(self.tags),
+        )
+
+
+class TodoReadModel:
+    """进程内的待办事项读模型
+
+    按ID保存未删除的事项，并维护按 (final_priority 降序, id) 排序的全局索引和每个象限的索引，
+    以及每个象限按手动排序键 (sort_key, id) 排序的索引，Top-N 与按象限读取的复杂度为 O(log n + k)。
+
+    一致性依赖 data_versions 表中的数据版本：本进程的写操作提交后按新版本号写穿更新，
+    版本号不连续（其他进程写入过）或读取时数据库版本与本地不一致时整体失效，下次读取时重新加载。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._records: Dict[int, TodoRecord] = {}
+        self._order: List[_SortKey] = []
+        self._buckets: Dict[str, List[_SortKey]] = {}
+        self._manual: Dict[str, List[_ManualKey]] = {}
+        self.version: Optional[int] = None  # None 表示未加载或已失效
+        self.loads = 0
+        self.invalidations = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def load(self, version: int, todos: Iterable[TodoSchema]) -> None:
+        """用完整数据集重建读模型
+
+        调用方应在读取数据之前读取版本号，这样加载期间发生的写入只会导致下一次多加载一次。
+        """
+        records = {todo.id: TodoRecord(todo) for todo in todos if todo.id is not None}
+        order = sorted(record.priority_key for record in records.values())
+        buckets: Dict[str, List[_SortKey]] = {quadrant: [] for quadrant in (*QUADRANTS, UNASSIGNED_QUADRANT)}
+        manual: Dict[str, List[_ManualKey]] = {quadrant: [] for quadrant in (*QUADRANTS, UNASSIGNED_QUADRANT)}
+        for key in order:
+            buckets[records[key[1]].quadrant].append(key)
+        for record in records.values():
+            manual[record.quadrant].append(record.manual_key)
+        for keys in manual.values():
+            keys.sort()
+        with self._lock:
+            self._records, self._order, self._buckets, self._manual = records, order, buckets, manual
+            self.version = version
+            self.loads += 1
+        logger.debug(f"读模型已加载 {len(records)} 条待办事项，数据版本: {version}")
+
+    def invalidate(self) -> None:
+        with self._lock:
+            if self.version is not None:
+                self.invalidations += 1
+            self._records, self._order, self._buckets, self._manual = {}, [], {}, {}
+            self.version = None
+
+    def ensure_current(self, current_version: int, loader: Callable[[], Iterable[TodoSchema]]) -> None:
+        """数据库版本与本地不一致时重新加载"""
+        with self._lock:
+            if self.version == current_version:
+                return
+            self.load(current_version, loader())
+
+    @staticmethod
+    def _remove_key(index: List[Any], key: Any) -> None:
+        position = bisect_left(index, key)
+        if position < len(index) and index[position] == key:
+            del index[position]
+
+    def _discard(self, todo_id: int) -> None:
+        record = self._records.pop(todo_id, None)
+        if record is not None:
+            self._remove_key(self._order, record.priority_key)
+            self._remove_key(self._buckets[record.quadrant], record.priority_key)
+            self._remove_key(self._manual[record.quadrant], record.manual_key)
+
+    def apply(self, version: int, upserts: Iterable[TodoSchema] = (), removals: Iterable[int] = ()) -> None:
+        """写穿：应用本进程刚提交的变更
+
+        Args:
+            version: 该写事务提交后的数据版本
+            upserts: 新增或修改后的事项
+            removals: 已删除（含软删除）的事项ID
+        """
+        with self._lock:
+            if self.version is None:
+                return
+            if version != self.version + 1:
+                # 中间有其他进程（或同批次的其他操作）的写入，无法增量更新
+                self.invalidate()
+                return
+            for todo_id in removals:
+                self._discard(todo_id)
+            for todo in upserts:
+                if todo.id is None:
+                    continue
+                self._discard(todo.id)
+                record = TodoRecord(todo)
+                self._records[record.id] = record
+                insort(self._order, record.priority_key)
+                insort(self._buckets[record.quadrant], record.priority_key)
+                insort(self._manual[record.quadrant], record.manual_key)
+            self.version = version
+
+    def get_all(self) -> Dict[int, TodoSchema]:
+        with self._lock:
+            return {todo_id: record.to_schema() for todo_id, record in self._records.items()}
+
+    def get(self, todo_id: int) -> Optional[TodoSchema]:
+        with self._lock:
+            record = self._records.get(todo_id)
+            return record.to_schema() if record is not None else None
+
+    def top(self, limit: int, quadrant: Optional[str] = None) -> List[TodoSchema]:
+        """按优先级从高到低返回前 limit 条，可限定象限"""
+        with self._lock:
+            index = self._order if quadrant is None else self._buckets.get(quadrant, [])
+            return [self._records[todo_id].to_schema() for _, todo_id in index[:limit]]
+
+    def ordered(self, quadrant: str, limit: int) -> List[TodoSchema]:
+        """按手动排序返回象限中的前 limit 条"""
+        with self._lock:
+            return [self._records[todo_id].to_schema() for _, todo_id in self._manual.get(quadrant, [])[:limit]]
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": True,
+                "loaded": self.loaded,
+                "version": self.version,
+                "size": len(self._records),
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+                "quadrants": {quadrant: len(keys) for quadrant, keys in self._buckets.items()},
+            }
+
+
+_read_models: "OrderedDict[str, TodoReadModel]" = OrderedDict()
+_read_model_lock = threading.Lock()
+
+
+def get_read_model(owner_id: str = DEFAULT_TENANT) -> Optional[TodoReadModel]:
+    """获取租户的进程内读模型，未启用时返回None"""
+    if not READ_MODEL_ENABLED:
+        return None
+    with _read_model_lock:
+        read_model = _read_models.get(owner_id)
+        if read_model is None:
+            read_model = _read_models[owner_id] = TodoReadModel()
+            while len(_read_models) > max(1, READ_MODEL_MAX_TENANTS):
+                _read_models.popitem(last=False)
+        else:
+            _read_models.move_to_end(owner_id)
+        return read_model
+
+
+def get_read_model_stats() -> Dict[str, object]:
+    """各租户读模型的状态"""
+    if not READ_MODEL_ENABLED:
+        return {"enabled": False}
+    with _read_model_lock:
+        models = list(_read_models.items())
+    return {"enabled": True, "tenants": {owner_id: model.get_stats() for owner_id, model in models}}
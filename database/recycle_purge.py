@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, Connection
+from sqlalchemy.orm import Session
+from database.data_version import bump_data_version, todos_version_key
+import datetime
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 回收站中的事项保留天数，默认 0 不自动清理（永久删除不可恢复，需显式开启）
+RECYCLE_BIN_TTL_DAYS = float(os.getenv("RECYCLE_BIN_TTL_DAYS", "0"))
+RECYCLE_BIN_PURGE_INTERVAL_S = float(os.getenv("RECYCLE_BIN_PURGE_INTERVAL_S", "3600"))
+RECYCLE_BIN_PURGE_BATCH_SIZE = int(os.getenv("RECYCLE_BIN_PURGE_BATCH_SIZE", "500"))
+RECYCLE_BIN_PURGE_PAUSE_MS = float(os.getenv("RECYCLE_BIN_PURGE_PAUSE_MS", "10"))
+
+JOB_NAME = "recycle-bin-purge"
+
+# 按删除时间选出一批回收站记录，各语句使用同一子查询，在同一事务中选中的是同一批行。
+# 指定租户时走 (owner_id, deleted_at) 索引，跨租户清理时走 deleted_at 索引
+_BATCH_SUBQUERY = (
+    "SELECT {column} FROM recycle_bin_items WHERE {owner}deleted_at < :cutoff "
+    "ORDER BY deleted_at, id LIMIT :limit"
+)
+
+
+def _batch_subquery(column: str, owner_id: Optional[str]) -> str:
+    return _BATCH_SUBQUERY.format(column=column, owner="owner_id = :owner_id AND " if owner_id is not None else "")
+
+
+def delete_recycle_batch(db: Union[Session, Connection], limit: int,
+                         cutoff: Optional[datetime.datetime] = None,
+                         owner_id: Optional[str] = None) -> Tuple[int, List[str]]:
+    """在当前事务中永久删除一批回收站事项（含主表中的软删除记录、标签和分值变更日志）
+
+    使用子查询选取要删除的行，不把ID列表加载到 Python 中。
+
+    Args:
+        db: 会话或连接，由调用方提交
+        limit: 本批最多删除的条数
+        cutoff: 只删除早于该时间（UTC）进入回收站的事项，为空时不限
+        owner_id: 只删除该租户的事项，为空时不限租户
+
+    Returns:
+        本批删除的回收站记录数，以及涉及的租户
+    """
+    # 不限时间时用一个晚于所有时间戳的时间作为上界（纯数字字符串会按数值亲和性比较，必须是完整时间格式）
+    params = {"cutoff": (cutoff or datetime.datetime.max).isoformat(sep=" "), "limit": limit, "owner_id": owner_id}
+    owners = [owner_id] if owner_id is not None else list(db.execute(text(
+        "SELECT DISTINCT owner_id FROM recycle_bin_items WHERE id IN (" + _batch_subquery("id", owner_id) + ")"
+    ), params).scalars())
+    # 日志索引以 owner_id 开头，按本批涉及的租户逐个定位索引区间
+    for log_owner in owners:
+        db.execute(text(
+            "DELETE FROM assignment_logs WHERE owner_id = :log_owner AND todo_id IN ("
+            "SELECT id FROM todo_items WHERE deleted = 1 AND id IN (" + _batch_subquery("original_id", owner_id) + "))"
+        ), {**params, "log_owner": log_owner})
+    db.execute(text(
+        "DELETE FROM todo_tags WHERE todo_id IN (SELECT id FROM todo_items WHERE deleted = 1 AND id IN ("
+        + _batch_subquery("original_id", owner_id) + "))"
+    ), params)
+    db.execute(text(
+        "DELETE FROM todo_items WHERE deleted = 1 AND id IN (" + _batch_subquery("original_id", owner_id) + ")"
+    ), params)
+    deleted = db.execute(text(
+        "DELETE FROM recycle_bin_items WHERE id IN (" + _batch_subquery("id", owner_id) + ")"
+    ), params).rowcount
+    return deleted, owners
+
+
+class RecycleBinPurger:
+    """按 deleted_at 自动清理过期的回收站事项
+
+    每批一个短事务，批次之间暂停让出写锁，清理大量数据时不会长时间阻塞API写入。
+    """
+
+    def __init__(self, engine: Engine, ttl_days: float = RECYCLE_BIN_TTL_DAYS,
+                 batch_size: int = RECYCLE_BIN_PURGE_BATCH_SIZE,
+                 batch_pause_ms: float = RECYCLE_BIN_PURGE_PAUSE_MS) -> None:
+        self.engine = engine
+        self.ttl_days = ttl_days
+        self.batch_size = batch_size
+        self.batch_pause_ms = batch_pause_ms
+
+    def purge_expired(self, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+        """删除所有超过保留期的回收站事项，返回删除数量和批次数"""
+        if self.ttl_days <= 0:
+            return {"purged": 0, "batches": 0}
+        now = now or datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        cutoff = now - datetime.timedelta(days=self.ttl_days)
+
+        purged = batches = 0
+        while True:
+            with self.engine.begin() as conn:
+                deleted, owners = delete_recycle_batch(conn, self.batch_size, cutoff)
+                if deleted:
+                    for owner_id in owners:
+                        bump_data_version(conn, todos_version_key(owner_id))
+            purged += deleted
+            batches += 1
+            if deleted < self.batch_size:
+                break
+            if self.batch_pause_ms > 0:
+                time.sleep(self.batch_pause_ms / 1000)
+
+        if purged:
+            logger.info(f"已自动清理 {purged} 个超过 {self.ttl_days} 天的回收站事项（{batches} 批）")
+        return {"purged": purged, "batches": batches}
+
+
+def create_purge_job():
+    """创建回收站自动清理的后台任务，未配置保留期或间隔为0时返回None"""
+    from database.database import get_engine
+    from utils.background import PeriodicJob
+
+    if RECYCLE_BIN_TTL_DAYS <= 0 or RECYCLE_BIN_PURGE_INTERVAL_S <= 0:
+        return None
+    purger = RecycleBinPurger(get_engine())
+    return PeriodicJob(JOB_NAME, RECYCLE_BIN_PURGE_INTERVAL_S, purger.purge_expired, initial_delay=60)
@@ -0,0 +1,160 @@
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import datetime
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 慢查询日志配置
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") != "0"
+
+# 只对这些语句执行 EXPLAIN QUERY PLAN
+_EXPLAINABLE_PREFIXES = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+
+def _describe_parameters(parameters: Any) -> Any:
+    """只记录绑定参数的类型形状，不记录参数值"""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            # executemany：只描述第一组参数并记录批量大小
+            return {"batch": len(parameters), "shape": _describe_parameters(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _is_full_scan(plan: List[str]) -> bool:
+    """查询计划中出现未使用索引的 SCAN 即视为全表扫描"""
+    return any(
+        detail.startswith("SCAN ") and "INDEX" not in detail and "CONSTANT ROW" not in detail
+        for detail in plan
+    )
+
+
+class SlowQueryRecorder:
+    """引擎级慢查询记录器
+
+    通过 SQLAlchemy 的游标事件统计每条语句的耗时，超过阈值的语句连同
+    参数形状、耗时以及 EXPLAIN QUERY PLAN 结果写入固定容量的环形缓冲区。
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+                 capacity: int = SLOW_QUERY_LOG_SIZE, explain: bool = SLOW_QUERY_EXPLAIN) -> None:
+        """初始化记录器
+
+        Args:
+            threshold_ms: 慢查询阈值（毫秒）
+            capacity: 环形缓冲区容量
+            explain: 是否为慢查询捕获执行计划
+        """
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._total_recorded = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._entries.maxlen or 0
+
+    def install(self, engine: Engine) -> None:
+        """在引擎上注册计时事件"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        logger.debug(f"慢查询记录器已安装，阈值: {self.threshold_ms}ms")
+
+    def uninstall(self, engine: Engine) -> None:
+        """移除引擎上的计时事件"""
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # 开始时间记在本次执行的上下文上，语句出错时随上下文一起丢弃，不会残留在池化连接中
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_slow_query_start", None)
+        if start is None:
+            return
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        plan: Optional[List[str]] = None
+        if self.explain and not executemany and conn.dialect.name == "sqlite":
+            plan = self._explain(cursor, statement, parameters)
+
+        entry = {
+            "sql": statement,
+            "parameters": _describe_parameters(parameters),
+            "executemany": executemany,
+            "duration_ms": round(duration_ms, 3),
+            "plan": plan,
+            "full_scan": _is_full_scan(plan) if plan else None,
+            "recorded_at": datetime.datetime.now(datetime.UTC).isoformat(),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self._total_recorded += 1
+
+        if entry["full_scan"]:
+            logger.warning(f"慢查询全表扫描 ({duration_ms:.2f}ms): {statement}")
+        else:
+            logger.info(f"检测到慢查询 ({duration_ms:.2f}ms): {statement}")
+
+    def _explain(self, cursor: Any, statement: str, parameters: Any) -> Optional[List[str]]:
+        """在同一DBAPI连接上执行 EXPLAIN QUERY PLAN"""
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE_PREFIXES):
+            return None
+        explain_cursor = None
+        try:
+            explain_cursor = cursor.connection.cursor()
+            explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            # 结果行为 (id, parent, notused, detail)
+            return [row[3] for row in explain_cursor.fetchall()]
+        except Exception as e:
+            logger.debug(f"获取执行计划失败: {e}")
+            return None
+        finally:
+            if explain_cursor is not None:
+                explain_cursor.close()
+
+    def get_entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按时间倒序返回记录的慢查询"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        """清空环形缓冲区"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_summary(self) -> Dict[str, Any]:
+        """获取记录器配置和计数"""
+        with self._lock:
+            buffered = len(self._entries)
+            full_scans = sum(1 for entry in self._entries if entry["full_scan"])
+        return {
+            "threshold_ms": self.threshold_ms,
+            "capacity": self.capacity,
+            "explain": self.explain,
+            "buffered": buffered,
+            "buffered_full_scans": full_scans,
+            "total_recorded": self._total_recorded,
+        }
+
+
+# 全局慢查询记录器
+slow_query_recorder = SlowQueryRecorder()
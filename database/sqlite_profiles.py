@@ -0,0 +1,97 @@
+from typing import Any, Dict, Optional
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 连接时使用的 PRAGMA 配置组合，见 SQLITE_PROFILES
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "balanced")
+
+# 设置后覆盖配置组合中的 busy_timeout
+_BUSY_TIMEOUT_OVERRIDE = os.getenv("SQLITE_BUSY_TIMEOUT_MS")
+
+# 按顺序执行：page_size 和 auto_vacuum 只对尚未建表的新数据库生效，必须在其他语句之前设置
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # 每次提交都同步 WAL，掉电也不丢失已提交的事务；缓存较小，不使用内存映射
+    "durable": {
+        "page_size": 4096,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 10000,
+        "cache_size": -16000,  # 16MB
+        "cache_spill": 1,
+        "temp_store": "DEFAULT",
+        "mmap_size": 0,
+        "wal_autocheckpoint": 1000,
+    },
+    # 默认：WAL + synchronous=NORMAL（掉电可能丢失最近的事务，但不会损坏数据库）
+    "balanced": {
+        "page_size": 4096,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,  # 64MB
+        "cache_spill": 1,
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,  # 256MB
+        "wal_autocheckpoint": 1000,
+    },
+    # 内存充足的服务器：大缓存、大页和大内存映射，事务提交前不把脏页溢出到数据库，检查点间隔更长
+    "throughput": {
+        "page_size": 8192,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -262144,  # 256MB
+        "cache_spill": 0,
+        "temp_store": "MEMORY",
+        "mmap_size": 30000000000,  # 30GB
+        "wal_autocheckpoint": 4000,
+    },
+    # 内存受限的设备：小缓存，不使用内存映射，临时表写文件，WAL 更早检查点
+    "memory": {
+        "page_size": 4096,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -2000,  # 2MB
+        "cache_spill": 1,
+        "temp_store": "FILE",
+        "mmap_size": 0,
+        "wal_autocheckpoint": 500,
+    },
+}
+
+
+def get_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """获取配置组合，未指定时使用 SQLITE_PROFILE
+
+    Raises:
+        ValueError: 未知的配置组合名称
+    """
+    name = name or SQLITE_PROFILE
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"未知的SQLite配置组合: {name}，可选: {', '.join(SQLITE_PROFILES)}")
+    profile = dict(SQLITE_PROFILES[name])
+    if _BUSY_TIMEOUT_OVERRIDE:
+        profile["busy_timeout"] = int(_BUSY_TIMEOUT_OVERRIDE)
+    return profile
+
+
+def apply_profile(dbapi_connection, profile: Dict[str, Any]) -> None:
+    """在新建的连接上依次执行配置组合中的 PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in profile.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def read_pragmas(conn) -> Dict[str, Any]:
+    """读取连接上实际生效的 PRAGMA 值"""
+    return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in SQLITE_PROFILES["balanced"]}
@@ -1,9 +1,39 @@
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 from abc import ABC, abstractmethod
-from models.schemas import TodoSchema
+from datetime import date, datetime, UTC
+from models.schemas import TodoSchema, AssignmentLogPageSchema
+from database.tenancy import DEFAULT_TENANT
+from utils.exceptions import ValidationException
+import base64
+
+
+def encode_log_cursor(created_at: str, log_id: int) -> str:
+    """分值变更日志的分页游标：上一页最后一行的原始时间字符串和ID"""
+    return base64.urlsafe_b64encode(f"{created_at}|{log_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_log_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        created_at, log_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return created_at, int(log_id)
+    except Exception:
+        raise ValidationException("无效的分页游标")
+
+
+def to_log_time(value: datetime) -> str:
+    """转换为与日志 created_at（UTC, YYYY-MM-DD HH:MM:SS）可直接按字符串比较的形式"""
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value.isoformat(sep=" ")
+
 
 class TodoStorage(ABC):
-    """待办事项存储抽象基类，定义存储接口"""
+    """待办事项存储抽象基类，定义存储接口
+
+    每个存储实例只访问一个租户（owner_id）的数据，所有方法的读写范围都限定在该租户内。
+    """
+
+    owner_id: str = DEFAULT_TENANT
     
     @abstractmethod
     def get_all_todos(self) -> Dict[int, TodoSchema]:
@@ -58,4 +88,69 @@ class TodoStorage(ABC):
     @abstractmethod
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    def get_score_counts(self) -> List[Tuple[Optional[int], Optional[int], bool, int]]:
+        """按 (future_score, urgency_score, completed) 分组统计未删除事项的数量"""
+        pass
+    
+    @abstractmethod
+    def get_top_todos(self, limit: int, quadrant: Optional[str] = None) -> List[TodoSchema]:
+        """按优先级从高到低获取前 limit 条未删除的事项，可限定象限"""
+        pass
+    
+    @abstractmethod
+    def get_quadrant_todos(self, quadrant: str, limit: int) -> List[TodoSchema]:
+        """按手动排序 (sort_key, id) 获取象限中的前 limit 条未删除事项"""
+        pass
+    
+    @abstractmethod
+    def move_todo(self, todo_id: int, prev_id: Optional[int] = None,
+                  next_id: Optional[int] = None) -> Optional[TodoSchema]:
+        """把事项移动到同一象限中 prev_id 与 next_id 之间，只修改该事项的排序键；事项不存在时返回None"""
+        pass
+    
+    @abstractmethod
+    def get_todos_in_time_range(self, start_minute: int, end_minute: int,
+                                include_completed: bool = True) -> List[TodoSchema]:
+        """获取时间段与 [start_minute, end_minute) 重叠的未删除事项，按开始时间排序"""
+        pass
+    
+    @abstractmethod
+    def get_todos_in_date_range(self, start_date: date, end_date: date,
+                                include_completed: bool = True) -> List[TodoSchema]:
+        """获取截止日期或计划日期落在 [start_date, end_date] 内的未删除事项，按优先级从高到低排序"""
+        pass
+    
+    @abstractmethod
+    def get_todos_by_tags(self, tags: List[str], match_all: bool = False) -> Dict[int, TodoSchema]:
+        """获取带有任一（match_all 时为全部）指定标签的未删除事项"""
+        pass
+    
+    @abstractmethod
+    def get_tag_counts(self) -> List[Tuple[str, int]]:
+        """按标签名排序返回每个标签及带有该标签的未删除事项数"""
+        pass
+    
+    @abstractmethod
+    def rename_tag(self, old: str, new: str) -> int:
+        """重命名标签（新名称已存在时合并），返回涉及的事项数（含回收站中的事项）"""
+        pass
+    
+    @abstractmethod
+    def delete_tag(self, tag: str) -> int:
+        """从所有事项上移除标签，返回涉及的事项数（含回收站中的事项）"""
+        pass
+    
+    @abstractmethod
+    def get_assignment_logs(self, todo_id: Optional[int] = None, since: Optional[datetime] = None,
+                            until: Optional[datetime] = None, sources: Optional[List[str]] = None,
+                            cursor: Optional[str] = None, limit: int = 50) -> AssignmentLogPageSchema:
+        """按时间倒序分页获取分值变更日志"""
+        pass
+    
+    @abstractmethod
+    def get_data_version(self) -> int:
+        """获取当前租户待办事项及回收站数据的版本号，每次写入后递增"""
+        pass
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+from utils.tags import ids_to_bitmap
+import threading
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 是否为热门标签缓存 标签 -> 事项ID 位图
+TAG_BITMAP_CACHE_ENABLED = os.getenv("TODO_TAG_BITMAP_CACHE", "0") == "1"
+# 缓存的位图数量上限，超出时淘汰最久未使用的
+TAG_BITMAP_CACHE_SIZE = int(os.getenv("TODO_TAG_BITMAP_CACHE_SIZE", "64"))
+# 标签被查询达到该次数后才生成位图，只查过一两次的标签直接走索引
+TAG_BITMAP_MIN_REQUESTS = int(os.getenv("TODO_TAG_BITMAP_MIN_REQUESTS", "2"))
+
+
+class TagBitmapCache:
+    """热门标签的进程内位图缓存
+
+    键为 (数据库, 租户, 标签)，值为带有标签版本号的位图（第 id 位为1表示该事项带有此标签）。
+    位图只反映标签归属，不区分事项是否已删除，查询结果仍按未删除过滤；
+    标签版本（data_versions 中的 tags / tags:<租户>）只在标签归属变化时递增，
+    修改标题、完成状态等写入不会使位图失效。多个标签的 any/all 过滤即位图的按位或/与。
+    """
+
+    def __init__(self, max_entries: int = TAG_BITMAP_CACHE_SIZE,
+                 min_requests: int = TAG_BITMAP_MIN_REQUESTS) -> None:
+        self.max_entries = max(1, max_entries)
+        self.min_requests = max(1, min_requests)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[int, int]]" = OrderedDict()
+        self._requests: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: int, loader: Callable[[], Iterable[int]]) -> Any:
+        """返回 key 在 version 下的位图；标签尚不够热门时返回None，由调用方直接查询索引"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            requests = self._requests.get(key, 0) + 1
+            if requests < self.min_requests and entry is None:
+                # 计数表只用于挑出热门标签，过大时整体重置
+                if len(self._requests) >= self.max_entries * 8:
+                    self._requests.clear()
+                self._requests[key] = requests
+                return None
+            self._requests.pop(key, None)
+
+        bitmap = ids_to_bitmap(loader())
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current[0] <= version:
+                self._entries[key] = (version, bitmap)
+                self._entries.move_to_end(key)
+                self.builds += 1
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return bitmap
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._requests.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": TAG_BITMAP_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "min_requests": self.min_requests,
+                "bitmap_bytes": sum((bitmap.bit_length() + 7) // 8 for _, bitmap in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "builds": self.builds,
+                "evictions": self.evictions,
+            }
+
+
+_tag_bitmap_cache = TagBitmapCache()
+
+
+def get_tag_bitmap_cache() -> TagBitmapCache:
+    """获取进程内的标签位图缓存"""
+    return _tag_bitmap_cache
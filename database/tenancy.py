@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+from fastapi import Depends, Header
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from database.database import create_database_engine, get_db
+from utils.exceptions import ValidationException
+import re
+import threading
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 未携带租户标识的请求归属的租户，单用户部署中所有数据都属于该租户
+DEFAULT_TENANT = "default"
+TENANT_HEADER = "X-Tenant-ID"
+
+# 租户隔离方式: shared 所有租户共用一个数据库，按 owner_id 区分；database 每个租户一个SQLite文件
+TENANT_MODE = os.getenv("TENANT_MODE", "shared")
+TENANT_DATABASE_DIR = os.getenv("TENANT_DATABASE_DIR", "./tenants")
+# 同时保持打开的租户数据库引擎数量，超出时关闭最久未使用的引擎
+TENANT_ENGINE_CACHE_SIZE = int(os.getenv("TENANT_ENGINE_CACHE_SIZE", "32"))
+# 租户数据库的连接池较小，避免大量租户同时打开时占用过多文件句柄
+TENANT_POOL_CONFIG = {
+    "pool_size": int(os.getenv("TENANT_POOL_SIZE", "2")),
+    "max_overflow": int(os.getenv("TENANT_POOL_MAX_OVERFLOW", "8")),
+    "pool_timeout": 30,
+    "pool_recycle": 3600,
+    "pool_pre_ping": True,
+}
+
+# 租户ID同时用作数据库文件名，只允许安全字符
+_TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_tenant_id(tenant_id: str) -> str:
+    """校验租户ID，不合法时抛出 ValidationException"""
+    if not _TENANT_ID_PATTERN.match(tenant_id):
+        raise ValidationException("无效的租户ID，只能包含字母、数字、下划线和连字符，长度1-64")
+    return tenant_id
+
+
+def is_database_per_tenant() -> bool:
+    return TENANT_MODE == "database"
+
+
+class TenantEngineCache:
+    """按租户分库时的数据库引擎 LRU 缓存
+
+    每个租户的数据保存在 TENANT_DATABASE_DIR 下独立的 SQLite 文件中，
+    首次访问时创建引擎并初始化表结构。打开的引擎数超过上限时释放最久未使用的引擎，
+    打开的文件句柄和连接数与活跃租户数相关，而不是租户总数。
+    """
+
+    def __init__(self, max_engines: int = TENANT_ENGINE_CACHE_SIZE,
+                 database_dir: str = TENANT_DATABASE_DIR) -> None:
+        self.max_engines = max(1, max_engines)
+        self.database_dir = database_dir
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Engine, sessionmaker]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def url_for(self, tenant_id: str) -> str:
+        return f"sqlite:///{os.path.join(self.database_dir, f'{tenant_id}.db')}"
+
+    def _open(self, tenant_id: str) -> Tuple[Engine, sessionmaker]:
+        from database.init_db import init_db
+
+        os.makedirs(self.database_dir, exist_ok=True)
+        engine = create_database_engine(self.url_for(tenant_id), TENANT_POOL_CONFIG)
+        # 已初始化过的租户数据库只比较结构指纹；回填同步执行，避免为每个租户启动后台线程
+        init_db(backfills="inline", engine=engine)
+        factory = sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+        logger.info(f"已打开租户 {tenant_id} 的数据库")
+        return engine, factory
+
+    def get_sessionmaker(self, tenant_id: str) -> sessionmaker:
+        """获取租户数据库的会话工厂，未打开时创建引擎"""
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry is not None:
+                self._entries.move_to_end(tenant_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # 创建引擎和检查表结构在锁外进行，不阻塞其他租户的请求
+        engine, factory = self._open(tenant_id)
+        evicted = []
+        with self._lock:
+            existing = self._entries.get(tenant_id)
+            if existing is not None:
+                # 其他线程已先打开同一租户
+                evicted.append(engine)
+                factory = existing[1]
+                self._entries.move_to_end(tenant_id)
+            else:
+                self._entries[tenant_id] = (engine, factory)
+                while len(self._entries) > self.max_engines:
+                    evicted_tenant, (evicted_engine, _) = self._entries.popitem(last=False)
+                    evicted.append(evicted_engine)
+                    self.evictions += 1
+                    logger.debug(f"租户 {evicted_tenant} 的数据库引擎已被淘汰")
+        for stale in evicted:
+            # 正在使用中的连接归还后才会关闭
+            stale.dispose()
+        return factory
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for engine, _ in entries:
+            engine.dispose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_engines": self.max_engines,
+                "open": len(self._entries),
+                "tenants": list(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_tenant_engines: Optional[TenantEngineCache] = None
+_tenant_engines_lock = threading.Lock()
+
+
+def get_tenant_engines() -> TenantEngineCache:
+    global _tenant_engines
+    if _tenant_engines is None:
+        with _tenant_engines_lock:
+            if _tenant_engines is None:
+                _tenant_engines = TenantEngineCache()
+    return _tenant_engines
+
+
+def dispose_tenant_engines() -> None:
+    """释放所有租户数据库引擎（应用关闭时调用）"""
+    if _tenant_engines is not None:
+        _tenant_engines.dispose_all()
+
+
+def get_tenant_id(x_tenant_id: Optional[str] = Header(None, alias=TENANT_HEADER)) -> str:
+    """从请求头中获取租户ID，未携带时为默认租户"""
+    if not x_tenant_id:
+        return DEFAULT_TENANT
+    return validate_tenant_id(x_tenant_id)
+
+
+def get_tenant_db(tenant_id: str = Depends(get_tenant_id)) -> Iterator[Session]:
+    """获取当前租户的数据库会话
+
+    共享数据库模式以及默认租户使用主数据库；按租户分库时其他租户使用各自的数据库文件。
+    """
+    if not is_database_per_tenant() or tenant_id == DEFAULT_TENANT:
+        yield from get_db()
+        return
+
+    db = get_tenant_engines().get_sessionmaker(tenant_id)()
+    try:
+        yield db
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"租户 {tenant_id} 数据库会话错误: {e}")
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,171 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from sqlalchemy.orm import Session
+import queue
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 组提交配置
+GROUP_COMMIT_ENABLED = os.getenv("TODO_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "2"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "128"))
+
+# 队列中的写操作: (操作函数, 调用方等待的Future)
+_Job = Tuple[Callable[[Session], Any], "Future[Any]"]
+
+
+class GroupCommitWriter:
+    """SQLite 组提交写入器
+
+    所有写操作进入同一个队列，由单个写入线程在短时间窗口内收集等待中的操作，
+    在一个事务中依次执行并只提交一次，然后把各自的结果或异常交还给调用方。
+    若批次中某个操作失败，整批回滚后逐个重新执行，失败只影响对应的调用方。
+    """
+
+    def __init__(self, session_factory: Callable[[], Session],
+                 window_ms: float = GROUP_COMMIT_WINDOW_MS,
+                 max_batch: int = GROUP_COMMIT_MAX_BATCH) -> None:
+        """
+        Args:
+            session_factory: 写入线程使用的会话工厂
+            window_ms: 收到第一个操作后继续等待合并的时间（毫秒）
+            max_batch: 单个事务中最多合并的操作数
+        """
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # 统计由写入线程更新、管理接口读取，单独加锁避免丢失计数
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "operations": 0, "max_batch_size": 0, "fallbacks": 0, "errors": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="group-commit-writer", daemon=True)
+            self._thread.start()
+            logger.info(f"组提交写入线程已启动，合并窗口: {self.window * 1000:.1f}ms，最大批次: {self.max_batch}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """处理完队列中剩余的操作后停止写入线程"""
+        thread = self._thread
+        if thread and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+        self._thread = None
+
+    def submit(self, operation: Callable[[Session], T]) -> T:
+        """提交写操作并阻塞等待其所在批次提交完成
+
+        Args:
+            operation: 在写入线程的会话中执行的函数，不应自行提交
+
+        Returns:
+            operation 的返回值；operation 抛出的异常会在此处重新抛出
+        """
+        self.start()
+        future: "Future[T]" = Future()
+        self._queue.put((operation, future))
+        return future.result()
+
+    def _collect(self, first: _Job) -> Tuple[List[_Job], bool]:
+        """在合并窗口内收集更多操作，返回批次以及是否收到停止信号"""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._commit_batch(batch)
+            if stopping:
+                return
+
+    def _commit_batch(self, batch: List[_Job]) -> None:
+        session = self.session_factory()
+        results: List[Any] = []
+        try:
+            for operation, _ in batch:
+                results.append(operation(session))
+                session.flush()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) == 1:
+                self._record(1, errors=1)
+                batch[0][1].set_exception(e)
+                return
+            # 整批回滚后逐个执行，定位失败的操作
+            logger.warning(f"组提交批次失败，逐个重试 {len(batch)} 个操作: {e}")
+            with self._stats_lock:
+                self._stats["fallbacks"] += 1
+            for job in batch:
+                self._commit_batch([job])
+            return
+        finally:
+            session.close()
+
+        self._record(len(batch))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _record(self, size: int, errors: int = 0) -> None:
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["operations"] += size
+            self._stats["errors"] += errors
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], size)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取批次统计，avg_batch_size 越大说明合并效果越好"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_batch_size"] = round(stats["operations"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        stats["window_ms"] = self.window * 1000
+        stats["max_batch"] = self.max_batch
+        return stats
+
+
+_writer: Optional[GroupCommitWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_group_commit_writer() -> Optional[GroupCommitWriter]:
+    """获取全局组提交写入器，未启用时返回None"""
+    global _writer
+    if not GROUP_COMMIT_ENABLED:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from database.database import SessionLocal, get_engine
+                get_engine()
+                _writer = GroupCommitWriter(SessionLocal)
+    return _writer
+
+
+def stop_group_commit_writer() -> None:
+    if _writer is not None:
+        _writer.stop()
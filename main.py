@@ -1,33 +1,71 @@
-import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routers.todos import router as todos_router
 from routers.settings import router as settings_router
-from database.init_db import init_db
-from utils.logging_config import setup_logging
+from routers.admin import router as admin_router
 from utils.exceptions import TodoAppException
+from utils.admission import AdmissionControlMiddleware
 import logging
 import time
 
-# 配置详细日志
-setup_logging()
 logger = logging.getLogger(__name__)
 
-# 初始化数据库
-try:
-    init_db()
-    logger.info("数据库初始化成功")
-except Exception as e:
-    logger.critical(f"数据库初始化失败，程序无法启动: {e}", exc_info=True)
-    raise
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时配置日志并初始化数据库，关闭时释放连接"""
+    from utils.logging_config import setup_logging
+    from database.init_db import init_db
+    from database.database import dispose_engine
+    from database.tenancy import dispose_tenant_engines
+    from database.write_queue import stop_group_commit_writer
+    from database.log_retention import create_retention_job
+    from database.recycle_purge import create_purge_job
+    from database.maintenance import create_maintenance_job
+    from database.escalation import create_escalation_job
+    from database.manual_order import create_rebalance_job
+    from utils.background import register_job, start_jobs, stop_jobs
+    from utils.worker import start_primary_election, stop_primary_election
+
+    # 配置详细日志
+    setup_logging()
+
+    # 初始化数据库，回填留给主工作进程执行
+    try:
+        runner = init_db(backfills="skip")
+        logger.info("数据库初始化成功")
+    except Exception as e:
+        logger.critical(f"数据库初始化失败，程序无法启动: {e}", exc_info=True)
+        raise
+
+    def start_primary_tasks():
+        # 回填和日志维护等后台任务只在主工作进程中运行；滚动重启时新进程等旧的主进程退出后才接管
+        runner.resume_backfills("background")
+        for job in (create_retention_job(), create_purge_job(), create_maintenance_job(),
+                    create_escalation_job(), create_rebalance_job()):
+            if job is not None:
+                register_job(job)
+        start_jobs()
+
+    start_primary_election(start_primary_tasks, stop_jobs)
+
+    yield
+
+    # 先停止后台任务再释放主工作进程锁
+    stop_primary_election()
+    # 先提交写入队列中剩余的操作，再释放连接
+    stop_group_commit_writer()
+    dispose_tenant_engines()
+    dispose_engine()
 
 app = FastAPI(
     title="待办事项API",
     description="一个高性能、功能丰富的待办事项管理系统API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # 自定义应用异常处理器
@@ -65,6 +103,9 @@ async def add_process_time_header(request: Request, call_next):
     
     return response
 
+# 准入控制：按路由类别限制并发，过载时返回 503（CORS 在外层，拒绝响应同样带跨域头）
+app.add_middleware(AdmissionControlMiddleware)
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -76,6 +117,7 @@ app.add_middleware(
 
 app.include_router(todos_router, prefix="/api", tags=["代办事项"])
 app.include_router(settings_router, prefix="/api", tags=["系统设置"])
+app.include_router(admin_router, prefix="/api", tags=["系统管理"])
 
 @app.get("/", tags=["根目录"])
 async def read_root():
@@ -92,4 +134,6 @@ async def health_check():
     return {"status": "healthy", "service": "todo-api"}
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,6 +1,9 @@
+from datetime import date
 from enum import Enum
 from pydantic import BaseModel, field_validator, Field, ConfigDict
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
+from utils.time_of_day import parse_time
+from utils.tags import normalize_tag, normalize_tags
 
 
 class TodoSchema(BaseModel):
@@ -13,6 +16,10 @@ class TodoSchema(BaseModel):
     final_priority: int = Field(100, description="最终优先级分数，由系统自动计算")
     start_time: Optional[str] = Field(None, description="预计开始时间 (格式: HH:MM)")
     end_time: Optional[str] = Field(None, description="预计结束时间 (格式: HH:MM)")
+    due_date: Optional[date] = Field(None, description="截止日期 (格式: YYYY-MM-DD)")
+    scheduled_date: Optional[date] = Field(None, description="计划执行日期 (格式: YYYY-MM-DD)")
+    sort_key: Optional[str] = Field(None, description="象限内的手动排序键，由系统维护，通过移动接口修改")
+    tags: List[str] = Field(default_factory=list, description="标签，最多20个，每个不超过30个字符")
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -23,7 +30,10 @@ class TodoSchema(BaseModel):
                 "urgency_score": 2,
                 "final_priority": 432,
                 "start_time": "09:00",
-                "end_time": "11:00"
+                "end_time": "11:00",
+                "due_date": "2026-01-31",
+                "scheduled_date": "2026-01-30",
+                "tags": ["工作", "学习"]
             }
         }
     )
@@ -36,6 +46,10 @@ class TodoSchema(BaseModel):
             raise ValueError('标题长度不能超过100个字符')
         return v.strip()
 
+    @field_validator('tags')
+    def validate_tags(cls, v: List[str]) -> List[str]:
+        return normalize_tags(v)
+
     @field_validator('future_score', 'urgency_score')
     def validate_scores(cls, v: Optional[int]) -> Optional[int]:
         if v is None:
@@ -52,14 +66,7 @@ class TodoSchema(BaseModel):
             return None
         if not isinstance(v, str):
             raise ValueError('时间必须是字符串格式')
-        if len(v) != 5 or v[2] != ':':
-            raise ValueError('时间格式必须是HH:MM')
-        try:
-            hour, minute = map(int, v.split(':'))
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                raise ValueError('时间值无效')
-        except ValueError:
-            raise ValueError('时间格式无效')
+        parse_time(v)
         return v
 
     def model_dump(self, **kwargs: Any) -> Dict[str, Any]:
@@ -77,6 +84,9 @@ class TodoUpdateSchema(BaseModel):
     urgency_score: Optional[int] = Field(None, description="更新紧急性分值 (-3 到 3)")
     start_time: Optional[str] = Field(None, description="更新开始时间 (格式: HH:MM)")
     end_time: Optional[str] = Field(None, description="更新结束时间 (格式: HH:MM)")
+    due_date: Optional[date] = Field(None, description="更新截止日期 (格式: YYYY-MM-DD)")
+    scheduled_date: Optional[date] = Field(None, description="更新计划执行日期 (格式: YYYY-MM-DD)")
+    tags: Optional[List[str]] = Field(None, description="更新后的完整标签列表，替换原有标签")
     operation_source: Optional[str] = Field(None, description="操作来源，用于日志记录")
 
     model_config = ConfigDict(
@@ -89,6 +99,10 @@ class TodoUpdateSchema(BaseModel):
         }
     )
 
+    @field_validator('tags')
+    def validate_tags(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        return normalize_tags(v) if v is not None else v
+
     @field_validator('future_score', 'urgency_score')
     def validate_scores(cls, v: Optional[int]) -> Optional[int]:
         if v is None:
@@ -105,12 +119,107 @@ class TodoUpdateSchema(BaseModel):
             return None
         if not isinstance(v, str):
             raise ValueError('时间必须是字符串格式')
-        if len(v) != 5 or v[2] != ':':
-            raise ValueError('时间格式必须是HH:MM')
-        try:
-            hour, minute = map(int, v.split(':'))
-            if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                raise ValueError('时间值无效')
-        except ValueError:
-            raise ValueError('时间格式无效')
+        parse_time(v)
         return v
+
+
+class TodoMoveSchema(BaseModel):
+    """至少提供一个相邻事项；只提供一个时，事项紧挨着放在它的前面或后面"""
+    prev_id: Optional[int] = Field(None, description="移动后紧挨在前面的事项ID")
+    next_id: Optional[int] = Field(None, description="移动后紧挨在后面的事项ID")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "prev_id": 12,
+                "next_id": 7
+            }
+        }
+    )
+
+
+class AssignmentLogSchema(BaseModel):
+    id: int = Field(..., description="日志ID")
+    todo_id: int = Field(..., description="待办事项ID")
+    old_future_score: Optional[int] = Field(None, description="变更前的重要性分值")
+    old_urgency_score: Optional[int] = Field(None, description="变更前的紧急性分值")
+    new_future_score: Optional[int] = Field(None, description="变更后的重要性分值")
+    new_urgency_score: Optional[int] = Field(None, description="变更后的紧急性分值")
+    source: Optional[str] = Field(None, description="操作来源")
+    created_at: str = Field(..., description="变更时间 (UTC)")
+
+
+class AssignmentLogPageSchema(BaseModel):
+    items: List[AssignmentLogSchema] = Field(default_factory=list, description="按时间倒序排列的日志")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多数据时为空")
+
+
+class TimeConflictSchema(BaseModel):
+    first: TodoSchema = Field(..., description="先开始的事项")
+    second: TodoSchema = Field(..., description="后开始的事项")
+    overlap_start: str = Field(..., description="重叠开始时间 (HH:MM)")
+    overlap_end: str = Field(..., description="重叠结束时间 (HH:MM，不包含)")
+
+
+class TimeConflictReportSchema(BaseModel):
+    scheduled: int = Field(..., description="参与检测的已排期事项数")
+    conflicts: List[TimeConflictSchema] = Field(default_factory=list, description="相互重叠的事项对")
+
+
+class CalendarDaySchema(BaseModel):
+    day: date = Field(..., description="日期")
+    due: List[TodoSchema] = Field(default_factory=list, description="当天截止的事项，按优先级从高到低排列")
+    scheduled: List[TodoSchema] = Field(default_factory=list, description="计划在当天执行的事项，按优先级从高到低排列")
+
+
+class CalendarSchema(BaseModel):
+    from_date: date = Field(..., description="起始日期（包含）")
+    to_date: date = Field(..., description="结束日期（包含）")
+    days: List[CalendarDaySchema] = Field(default_factory=list, description="范围内每一天的事项，按日期升序")
+
+
+ThemeName = Literal["light", "dark"]
+SpotlightType = Literal["glow", "flow", "focus", "none"]
+
+
+class AppSettingsSchema(BaseModel):
+    """界面设置，未保存过的项返回默认值"""
+    theme: Optional[ThemeName] = Field(None, description="主题，未设置时跟随系统")
+    bg_opacity: float = Field(0.8, ge=0, le=1, description="背景遮罩不透明度 (0 到 1)")
+    bg_blur: int = Field(20, ge=0, le=100, description="背景模糊程度 (0 到 100)")
+    spotlight_type: SpotlightType = Field("glow", description="鼠标聚光效果")
+    auto_trash: bool = Field(False, description="完成后是否自动移入回收站")
+    has_wallpaper: bool = Field(False, description="是否已上传自定义壁纸（只读）")
+
+
+class AppSettingsUpdateSchema(BaseModel):
+    """只写入请求中出现的项；值为 null 时恢复默认值"""
+    theme: Optional[ThemeName] = Field(None, description="主题")
+    bg_opacity: Optional[float] = Field(None, ge=0, le=1, description="背景遮罩不透明度 (0 到 1)")
+    bg_blur: Optional[int] = Field(None, ge=0, le=100, description="背景模糊程度 (0 到 100)")
+    spotlight_type: Optional[SpotlightType] = Field(None, description="鼠标聚光效果")
+    auto_trash: Optional[bool] = Field(None, description="完成后是否自动移入回收站")
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={
+            "example": {
+                "theme": "dark",
+                "bg_blur": 30
+            }
+        }
+    )
+
+
+class TagSchema(BaseModel):
+    name: str = Field(..., description="标签名")
+    count: int = Field(..., description="带有该标签的未删除事项数")
+
+
+class TagRenameSchema(BaseModel):
+    """新名称已存在时两个标签合并"""
+    name: str = Field(..., min_length=1, max_length=30, description="新的标签名")
+
+    @field_validator('name')
+    def validate_name(cls, v: str) -> str:
+        return normalize_tag(v)
@@ -0,0 +1,217 @@
+from fastapi import APIRouter, Query
+from typing import Dict, Any, Optional
+from database.slow_query_log import slow_query_recorder
+from database.database import get_engine
+from database.migrations import MigrationRunner
+from database.write_queue import get_group_commit_writer
+from database.log_retention import AssignmentLogRetention
+from database.read_model import get_read_model_stats
+from database.recycle_purge import RecycleBinPurger
+from database.maintenance import get_maintenance
+from database.escalation import get_escalator
+from database.manual_order import SortKeyRebalancer
+from database.tag_index import get_tag_bitmap_cache
+from database.tenancy import TENANT_MODE, DEFAULT_TENANT, is_database_per_tenant, get_tenant_engines
+from utils.background import get_jobs
+from utils.admission import get_admission_controller
+from utils.single_flight import get_single_flight
+from services.setting_service import get_settings_cache
+from utils.exceptions import ValidationException
+from sqlalchemy import text
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get(
+    "/admin/slow-queries",
+    summary="查看慢查询日志",
+    description="返回环形缓冲区中记录的慢查询，包括SQL、参数形状、耗时及执行计划",
+    response_description="返回记录器配置和慢查询列表（按时间倒序）"
+)
+def get_slow_queries(
+    limit: Optional[int] = Query(None, ge=1, description="最多返回的记录数"),
+    full_scan_only: bool = Query(False, description="仅返回包含全表扫描的记录")
+) -> Dict[str, Any]:
+    entries = slow_query_recorder.get_entries()
+    if full_scan_only:
+        entries = [entry for entry in entries if entry["full_scan"]]
+    if limit is not None:
+        entries = entries[:limit]
+    return {**slow_query_recorder.get_summary(), "entries": entries}
+
+@router.delete(
+    "/admin/slow-queries",
+    summary="清空慢查询日志",
+    description="清空慢查询环形缓冲区",
+    response_description="返回操作成功信息"
+)
+def clear_slow_queries() -> Dict[str, str]:
+    slow_query_recorder.clear()
+    logger.info("慢查询日志已清空")
+    return {"message": "慢查询日志已清空"}
+
+@router.get(
+    "/admin/migrations",
+    summary="查看迁移状态",
+    description="返回已应用的数据库迁移版本以及分批回填的进度",
+    response_description="返回当前版本、最新版本和每个迁移的状态"
+)
+def get_migration_status() -> Dict[str, Any]:
+    return MigrationRunner(get_engine()).status()
+
+@router.get(
+    "/admin/group-commit",
+    summary="查看组提交统计",
+    description="返回组提交写入器的批次数、合并的操作数、平均批次大小和当前队列深度",
+    response_description="返回是否启用组提交以及写入器统计"
+)
+def get_group_commit_stats() -> Dict[str, Any]:
+    writer = get_group_commit_writer()
+    if writer is None:
+        return {"enabled": False}
+    return {"enabled": True, **writer.get_stats()}
+
+@router.get(
+    "/admin/read-model",
+    summary="查看进程内读模型",
+    description="返回当前工作进程中各租户读模型的数据版本、条目数、加载与失效次数（TODO_READ_MODEL=1 时启用）",
+    response_description="返回按租户划分的读模型状态"
+)
+def get_read_model_status() -> Dict[str, Any]:
+    return get_read_model_stats()
+
+@router.get(
+    "/admin/tenants",
+    summary="查看租户隔离状态",
+    description="返回租户隔离方式、主数据库中登记的租户，以及按租户分库时当前工作进程打开的租户数据库引擎",
+    response_description="返回租户模式、租户列表和引擎缓存统计"
+)
+def get_tenants() -> Dict[str, Any]:
+    with get_engine().connect() as conn:
+        tenants = list(conn.execute(text("SELECT owner_id FROM tenants ORDER BY owner_id")).scalars())
+    return {
+        "mode": TENANT_MODE,
+        "default_tenant": DEFAULT_TENANT,
+        "tenants": tenants,
+        "engines": get_tenant_engines().get_stats() if is_database_per_tenant() else None,
+    }
+
+@router.get(
+    "/admin/jobs",
+    summary="查看后台任务",
+    description="返回当前工作进程中注册的后台任务及最近一次执行结果（后台任务只在主工作进程中运行）",
+    response_description="返回后台任务状态列表"
+)
+def get_background_jobs() -> Dict[str, Any]:
+    return {"jobs": [job.get_status() for job in get_jobs()]}
+
+@router.post(
+    "/admin/assignment-logs/maintenance",
+    summary="执行分值变更日志维护",
+    description="立即执行一轮每日汇总、连续移动压缩和过期日志清理",
+    response_description="返回各步骤处理的数量"
+)
+def run_assignment_log_maintenance() -> Dict[str, int]:
+    return AssignmentLogRetention(get_engine()).run_once()
+
+@router.post(
+    "/admin/recycle-bin/purge",
+    summary="清理过期的回收站事项",
+    description="立即按保留期（RECYCLE_BIN_TTL_DAYS）分批永久删除过期的回收站事项，未配置保留期时不删除",
+    response_description="返回删除的数量和批次数"
+)
+def purge_recycle_bin() -> Dict[str, Any]:
+    return RecycleBinPurger(get_engine()).purge_expired()
+
+@router.post(
+    "/admin/sort-keys/rebalance",
+    summary="重排手动排序键",
+    description="立即为最长排序键超过 SORT_KEY_MAX_LENGTH 的象限按现有顺序重新分配短键，事项的相对顺序不变",
+    response_description="返回重排的象限数和事项数"
+)
+def rebalance_sort_keys() -> Dict[str, Any]:
+    return SortKeyRebalancer(get_engine()).run_once()
+
+def _require_maintenance():
+    maintenance = get_maintenance()
+    if maintenance is None:
+        raise ValidationException("当前数据库不是SQLite文件数据库，不支持该操作")
+    return maintenance
+
+@router.get(
+    "/admin/database",
+    summary="查看SQLite存储状态",
+    description="返回WAL文件大小与帧数、页数、空闲页、auto_vacuum模式、最近一次检查点的滞后帧数及最近一次 PRAGMA optimize 时间",
+    response_description="返回数据库文件和WAL的状态"
+)
+def get_database_status() -> Dict[str, Any]:
+    return _require_maintenance().get_status()
+
+@router.post(
+    "/admin/database/maintenance",
+    summary="执行SQLite维护",
+    description="立即执行一轮维护（按阈值执行WAL检查点、PRAGMA optimize、incremental_vacuum）；"
+                "full_vacuum=true 时改为执行 VACUUM 重建数据库文件，并将已有数据库切换为 auto_vacuum=INCREMENTAL（期间阻塞写入）",
+    response_description="返回本轮执行的操作"
+)
+def run_database_maintenance(
+    full_vacuum: bool = Query(False, description="执行 VACUUM 重建数据库文件")
+) -> Dict[str, Any]:
+    maintenance = _require_maintenance()
+    return maintenance.full_vacuum() if full_vacuum else maintenance.run_once()
+
+@router.get(
+    "/admin/admission",
+    summary="查看准入控制状态",
+    description="返回各路由类别（write/read/bulk/upload）的并发上限、当前并发、排队数，以及累计放行、排队、因队列已满或排队超时被拒绝的请求数",
+    response_description="返回当前工作进程的准入控制统计"
+)
+def get_admission_stats() -> Dict[str, Any]:
+    return get_admission_controller().get_stats()
+
+@router.get(
+    "/admin/single-flight",
+    summary="查看请求合并统计",
+    description="返回 GET /todos、/recycle-bin、/stats 的并发请求合并情况：总调用数、实际执行次数、共享结果的调用数及合并比例",
+    response_description="返回当前工作进程的请求合并统计"
+)
+def get_single_flight_stats() -> Dict[str, Any]:
+    return get_single_flight().get_stats()
+
+@router.get(
+    "/admin/escalation",
+    summary="查看截止时间自动升级状态",
+    description="返回升级阶梯、时区、调度堆中的条目数、最早的到期时间、累计升级数量及最近一轮的执行结果"
+                "（自动升级由 TODO_AUTO_ESCALATION=1 开启，只在主工作进程中运行）",
+    response_description="返回当前工作进程的升级调度器状态"
+)
+def get_escalation_status() -> Dict[str, Any]:
+    return get_escalator().get_status()
+
+@router.post(
+    "/admin/escalation/run",
+    summary="执行一轮截止时间自动升级",
+    description="立即同步被修改过的租户并提高所有已到期事项的紧急性，写入来源为 auto_escalation 的分值变更日志",
+    response_description="返回重新加载的租户数、到期和实际升级的事项数及批次数"
+)
+def run_escalation() -> Dict[str, Any]:
+    return get_escalator().run_once()
+
+@router.get(
+    "/admin/settings-cache",
+    summary="查看界面设置缓存统计",
+    description="返回进程内界面设置缓存的条目数、命中与未命中次数、命中率和淘汰次数（TODO_SETTINGS_CACHE=0 时关闭缓存）",
+    response_description="返回当前工作进程的界面设置缓存统计"
+)
+def get_settings_cache_stats() -> Dict[str, Any]:
+    return get_settings_cache().get_stats()
+
+@router.get(
+    "/admin/tag-bitmaps",
+    summary="查看标签位图缓存统计",
+    description="返回热门标签位图缓存的条目数、占用字节数、命中率、生成与淘汰次数（TODO_TAG_BITMAP_CACHE=1 时启用）",
+    response_description="返回当前工作进程的标签位图缓存统计"
+)
+def get_tag_bitmap_stats() -> Dict[str, Any]:
+    return get_tag_bitmap_cache().get_stats()
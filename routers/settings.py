@@ -1,14 +1,62 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Response
+from fastapi import APIRouter, Depends, UploadFile, File, Header, HTTPException, Response, status
+from typing import Optional
 from sqlalchemy.orm import Session
-from database.database import get_db
-from services.setting_service import SettingService
+from database.tenancy import TENANT_HEADER, get_tenant_db, get_tenant_id
+from models.schemas import AppSettingsSchema, AppSettingsUpdateSchema
+from services.setting_service import CachedSettings, SettingService, etag_matches
+from utils.exceptions import ValidationException
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-def get_setting_service(db: Session = Depends(get_db)) -> SettingService:
-    return SettingService(db)
+def get_setting_service(db: Session = Depends(get_tenant_db),
+                        tenant_id: str = Depends(get_tenant_id)) -> SettingService:
+    return SettingService(db, tenant_id)
+
+def _settings_response(entry: CachedSettings) -> Response:
+    # no-cache：浏览器可以缓存，但每次使用前都要用 If-None-Match 重新验证
+    return Response(content=entry.body, media_type="application/json",
+                    headers={"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": TENANT_HEADER})
+
+@router.get(
+    "/settings",
+    response_model=AppSettingsSchema,
+    summary="获取全部界面设置",
+    description="一次返回主题、背景不透明度、模糊程度、聚光效果、自动清理等全部界面设置（未保存过的项为默认值）以及是否已上传壁纸。"
+                "响应带有 ETag，请求头 If-None-Match 与之一致时返回 304",
+    response_description="返回界面设置，或 304 Not Modified",
+    responses={304: {"description": "设置未变化"}}
+)
+def get_settings(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    service: SettingService = Depends(get_setting_service)
+):
+    entry = service.get_cached()
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": TENANT_HEADER})
+    return _settings_response(entry)
+
+@router.put(
+    "/settings",
+    response_model=AppSettingsSchema,
+    summary="批量更新界面设置",
+    description="在一个事务中写入请求体中出现的设置项，值为 null 的项恢复默认值，未出现的项保持不变。"
+                "携带 If-Match 时只有设置未被其他请求修改过才会写入，否则返回 412",
+    response_description="返回更新后的全部界面设置及新的 ETag",
+    responses={412: {"description": "设置已被修改（If-Match 不一致）"}}
+)
+def update_settings(
+    payload: AppSettingsUpdateSchema,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    service: SettingService = Depends(get_setting_service)
+):
+    try:
+        entry = service.update_settings(payload.model_dump(exclude_unset=True), expected_etag=if_match)
+    except ValueError as e:
+        raise ValidationException(str(e))
+    return _settings_response(entry)
 
 @router.post("/settings/wallpaper", summary="上传自定义壁纸", description="接收并存储用户上传的背景壁纸图片")
 async def upload_wallpaper(
@@ -37,8 +85,16 @@ async def upload_wallpaper(
     finally:
         await file.close()
 
-@router.get("/settings/wallpaper", summary="获取当前壁纸", description="检索当前设置的背景壁纸图片数据")
-async def get_wallpaper(service: SettingService = Depends(get_setting_service)):
+@router.get("/settings/wallpaper", summary="获取当前壁纸",
+            description="检索当前设置的背景壁纸图片数据。响应带有 ETag，请求头 If-None-Match 与之一致时返回 304，不读取图片数据")
+def get_wallpaper(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    service: SettingService = Depends(get_setting_service)
+):
+    etag = service.get_cached().wallpaper_etag
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": TENANT_HEADER})
     result = service.get_wallpaper()
     if not result:
         raise HTTPException(status_code=404, detail="未设置壁纸")
@@ -52,9 +108,9 @@ async def get_wallpaper(service: SettingService = Depends(get_setting_service)):
         content=data, 
         media_type=content_type, 
         headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0"
+            "Cache-Control": "no-cache",
+            "Vary": TENANT_HEADER,
+            **({"ETag": etag} if etag else {})
         }
     )
 
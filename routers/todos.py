@@ -1,27 +1,53 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import Dict, List, Any
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from typing import Callable, Dict, Hashable, List, Any, Optional
+from datetime import date, datetime
 import logging
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from sqlalchemy.orm import Session
-from models.schemas import TodoSchema, TodoUpdateSchema
+from models.schemas import (TodoSchema, TodoUpdateSchema, TodoMoveSchema, AssignmentLogPageSchema,
+                            TimeConflictReportSchema, CalendarSchema, TagSchema, TagRenameSchema)
 from services.todo_service import TodoService
 from database.db_storage import DatabaseTodoStorage
-from database.database import get_db
+from database.memory_storage import InMemoryTodoStorage, get_memory_store, STORAGE_BACKEND
+from database.storage import TodoStorage
+from database.tenancy import get_tenant_db, get_tenant_id
 from utils.exceptions import EntityNotFoundException, ValidationException
+from utils.single_flight import SINGLE_FLIGHT_ENABLED, get_single_flight
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # 使用依赖注入而不是全局单例，避免数据库会话问题
-def get_storage(db: Session = Depends(get_db)) -> DatabaseTodoStorage:
-    """获取数据库存储实例"""
-    return DatabaseTodoStorage(db)
+def get_storage(db: Session = Depends(get_tenant_db),
+                tenant_id: str = Depends(get_tenant_id)) -> TodoStorage:
+    """获取当前租户（请求头 X-Tenant-ID）的存储实例
 
-def get_service(storage: DatabaseTodoStorage = Depends(get_storage)) -> TodoService:
+    TODO_STORAGE_BACKEND=memory 时使用进程内存储（会话不会被使用，也不会打开数据库连接）
+    """
+    if STORAGE_BACKEND == "memory":
+        return InMemoryTodoStorage(get_memory_store(), tenant_id)
+    return DatabaseTodoStorage(db, tenant_id)
+
+def get_service(storage: TodoStorage = Depends(get_storage)) -> TodoService:
     """获取TodoService实例"""
     return TodoService(storage)
 
+_todo_map_adapter = TypeAdapter(Dict[int, TodoSchema])
+_dict_adapter = TypeAdapter(Dict[str, Any])
+
+def _coalesced(service: TodoService, route: Hashable, compute: Callable[[], Any], adapter: TypeAdapter) -> Any:
+    """合并相同的并发读请求
+
+    键为 (接口, 租户, 数据版本)：同一版本上同时到达的请求只查询和序列化一次，
+    所有请求返回同一份JSON字节；版本变化（有写入）后到达的请求会重新计算。
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return compute()
+    key = (route, service.storage.owner_id, service.get_data_version())
+    body, _ = get_single_flight().do(key, lambda: adapter.dump_json(compute()))
+    return Response(content=body, media_type="application/json")
+
 def _handle_not_found(result: Any, message: str = "未找到请求的资源") -> Any:
     """统一处理未找到的情况"""
     if not result:
@@ -32,11 +58,108 @@ def _handle_not_found(result: Any, message: str = "未找到请求的资源") ->
     "/todos", 
     response_model=Dict[int, TodoSchema],
     summary="获取所有待办事项（经典视图数据）",
-    description="从数据库中检索所有未被软删除的待办事项列表，用于经典视图展示",
+    description="从数据库中检索所有未被软删除的待办事项列表，用于经典视图展示；"
+                "指定 tags 时只返回带有任一（tag_match=all 时为全部）指定标签的事项，过滤在服务端的标签索引上完成",
     response_description="返回ID到待办事项对象的映射字典"
 )
-def get_todos(service: TodoService = Depends(get_service)) -> Dict[int, TodoSchema]:
-    return service.get_all_todos()
+def get_todos(
+    tags: Optional[List[str]] = Query(None, description="按标签过滤，可重复传入多个"),
+    tag_match: str = Query("any", description="any: 带有任一标签；all: 带有全部标签"),
+    service: TodoService = Depends(get_service)
+) -> Dict[int, TodoSchema]:
+    if not tags:
+        return _coalesced(service, "todos", service.get_all_todos, _todo_map_adapter)
+    try:
+        route = ("todos", tag_match, tuple(sorted(set(tags))))
+        return _coalesced(service, route, lambda: service.get_todos_by_tags(tags, tag_match), _todo_map_adapter)
+    except ValueError as e:
+        raise ValidationException(str(e))
+
+@router.get(
+    "/todos/top",
+    response_model=List[TodoSchema],
+    summary="获取优先级最高的待办事项",
+    description="按最终优先级从高到低返回前N条未删除的待办事项，可限定象限（q1-q4 或 unassigned）",
+    response_description="返回按优先级排序的待办事项列表"
+)
+def get_top_todos(
+    limit: int = Query(10, ge=1, le=1000, description="返回条数"),
+    quadrant: Optional[str] = Query(None, description="象限: q1, q2, q3, q4 或 unassigned"),
+    service: TodoService = Depends(get_service)
+) -> List[TodoSchema]:
+    try:
+        return service.get_top_todos(limit, quadrant)
+    except ValueError as e:
+        raise ValidationException(str(e))
+
+@router.get(
+    "/todos/quadrants",
+    response_model=Dict[str, List[TodoSchema]],
+    summary="按象限分组获取待办事项（象限视图数据）",
+    description="返回每个象限中按手动排序排列的待办事项；新事项和换到该象限的事项排在最后，可通过 POST /todos/{id}/move 调整",
+    response_description="返回象限键到待办事项列表的映射"
+)
+def get_todos_by_quadrant(
+    limit: int = Query(1000, ge=1, le=10000, description="每个象限最多返回的条数"),
+    service: TodoService = Depends(get_service)
+) -> Dict[str, List[TodoSchema]]:
+    return service.get_todos_by_quadrant(limit)
+
+@router.get(
+    "/todos/timeline",
+    response_model=List[TodoSchema],
+    summary="按时间段获取待办事项",
+    description="返回预计时间段与窗口 [start, end) 重叠的未删除事项，按开始时间排序；"
+                "未设置开始或结束时间的事项不在时间轴上",
+    response_description="返回按开始时间、结束时间排列的待办事项列表"
+)
+def get_timeline(
+    start: Optional[str] = Query(None, description="窗口开始时间 (HH:MM)，默认 00:00"),
+    end: Optional[str] = Query(None, description="窗口结束时间 (HH:MM，不包含)，默认到当天结束"),
+    include_completed: bool = Query(True, description="是否包含已完成的事项"),
+    service: TodoService = Depends(get_service)
+) -> List[TodoSchema]:
+    try:
+        return service.get_timeline(start, end, include_completed)
+    except ValueError as e:
+        raise ValidationException(str(e))
+
+@router.get(
+    "/todos/conflicts",
+    response_model=TimeConflictReportSchema,
+    summary="检测时间冲突",
+    description="用扫描线算法找出窗口内时间段相互重叠的所有事项对（首尾相接不算冲突），默认不包含已完成的事项",
+    response_description="返回参与检测的事项数及所有重叠的事项对"
+)
+def get_time_conflicts(
+    start: Optional[str] = Query(None, description="窗口开始时间 (HH:MM)，默认 00:00"),
+    end: Optional[str] = Query(None, description="窗口结束时间 (HH:MM，不包含)，默认到当天结束"),
+    include_completed: bool = Query(False, description="已完成的事项是否参与检测"),
+    service: TodoService = Depends(get_service)
+) -> TimeConflictReportSchema:
+    try:
+        return service.find_time_conflicts(start, end, include_completed)
+    except ValueError as e:
+        raise ValidationException(str(e))
+
+@router.get(
+    "/calendar",
+    response_model=CalendarSchema,
+    summary="日历视图",
+    description="返回 [from, to] 内每一天截止和计划执行的未删除事项（各自按优先级排序），"
+                "在日期索引上一次范围查询完成，范围最多366天",
+    response_description="返回按日期升序排列的每日分组"
+)
+def get_calendar(
+    date_from: date = Query(..., alias="from", description="起始日期 (YYYY-MM-DD，包含)"),
+    date_to: date = Query(..., alias="to", description="结束日期 (YYYY-MM-DD，包含)"),
+    include_completed: bool = Query(True, description="是否包含已完成的事项"),
+    service: TodoService = Depends(get_service)
+) -> CalendarSchema:
+    try:
+        return service.get_calendar(date_from, date_to, include_completed)
+    except ValueError as e:
+        raise ValidationException(str(e))
 
 @router.post(
     "/todos", 
@@ -72,6 +195,47 @@ def update_todo(
     except ValueError as e:
         raise ValidationException(str(e))
 
+@router.get(
+    "/todos/{todo_id}/history",
+    response_model=AssignmentLogPageSchema,
+    summary="获取待办事项的分值变更历史",
+    description="按时间倒序返回指定待办事项的分值变更记录，支持时间范围、来源过滤和游标分页",
+    response_description="返回一页日志及下一页游标"
+)
+def get_todo_history(
+    todo_id: int,
+    since: Optional[datetime] = Query(None, description="起始时间（包含）"),
+    until: Optional[datetime] = Query(None, description="截止时间（不包含）"),
+    source: Optional[List[str]] = Query(None, description="操作来源，可重复指定"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="每页条数"),
+    service: TodoService = Depends(get_service)
+) -> AssignmentLogPageSchema:
+    try:
+        return service.get_assignment_history(todo_id, since, until, source, cursor, limit)
+    except ValueError as e:
+        raise ValidationException(str(e))
+
+@router.get(
+    "/assignment-logs",
+    response_model=AssignmentLogPageSchema,
+    summary="获取全局分值变更日志",
+    description="按时间倒序返回所有待办事项的分值变更记录，支持时间范围、来源过滤和游标分页",
+    response_description="返回一页日志及下一页游标"
+)
+def get_assignment_logs(
+    since: Optional[datetime] = Query(None, description="起始时间（包含）"),
+    until: Optional[datetime] = Query(None, description="截止时间（不包含）"),
+    source: Optional[List[str]] = Query(None, description="操作来源，可重复指定"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="每页条数"),
+    service: TodoService = Depends(get_service)
+) -> AssignmentLogPageSchema:
+    try:
+        return service.get_assignment_history(None, since, until, source, cursor, limit)
+    except ValueError as e:
+        raise ValidationException(str(e))
+
 @router.patch(
     "/todos/{todo_id}/toggle", 
     response_model=TodoSchema,
@@ -85,6 +249,21 @@ def toggle_todo_status(todo_id: int, service: TodoService = Depends(get_service)
         f"ID为 {todo_id} 的待办事项不存在"
     )
 
+@router.post(
+    "/todos/{todo_id}/move",
+    response_model=TodoSchema,
+    summary="调整象限内的位置",
+    description="把待办事项移动到同一象限中两个相邻事项之间（拖拽排序），至少提供一个相邻事项ID；"
+                "只修改被移动事项的排序键，与象限中的事项数量无关",
+    response_description="返回移动后的待办事项对象"
+)
+def move_todo(todo_id: int, move: TodoMoveSchema, service: TodoService = Depends(get_service)) -> TodoSchema:
+    try:
+        moved = service.move_todo(todo_id, move.prev_id, move.next_id)
+    except ValueError as e:
+        raise ValidationException(str(e))
+    return _handle_not_found(moved, f"ID为 {todo_id} 的待办事项不存在")
+
 @router.delete(
     "/todos/{todo_id}",
     summary="删除待办事项",
@@ -106,7 +285,7 @@ def delete_todo(todo_id: int, service: TodoService = Depends(get_service)) -> Di
     response_description="返回垃圾桶中ID到待办事项对象的映射"
 )
 def get_recycle_bin(service: TodoService = Depends(get_service)) -> Dict[int, TodoSchema]:
-    return service.get_recycle_bin()
+    return _coalesced(service, "recycle-bin", service.get_recycle_bin, _todo_map_adapter)
 
 @router.post(
     "/recycle-bin/{todo_id}/restore", 
@@ -170,4 +349,51 @@ def batch_restore_todos(
     response_description="返回各项统计指标的字典"
 )
 def get_stats(service: TodoService = Depends(get_service)) -> Dict[str, Any]:
-    return service.get_todo_stats()
+    return _coalesced(service, "stats", service.get_todo_stats, _dict_adapter)
+
+@router.get(
+    "/stats/quadrants",
+    summary="获取象限分布统计",
+    description="在数据库中一次分组统计，返回每个象限及 7×7 分值格子的数量、完成率和分值直方图",
+    response_description="返回总体、各象限及各分值格子的统计"
+)
+def get_quadrant_stats(service: TodoService = Depends(get_service)) -> Dict[str, Any]:
+    return service.get_quadrant_stats()
+
+@router.get(
+    "/tags",
+    response_model=List[TagSchema],
+    summary="获取标签列表",
+    description="返回当前租户使用过的所有标签及带有该标签的未删除事项数，按标签名排序",
+    response_description="返回标签及事项数列表"
+)
+def get_tags(service: TodoService = Depends(get_service)) -> List[TagSchema]:
+    return service.get_tags()
+
+@router.patch(
+    "/tags/{tag}",
+    summary="重命名标签",
+    description="把所有事项（含回收站中的事项）上的标签改为新名称；新名称已存在时两个标签合并",
+    response_description="返回新的标签名及涉及的事项数"
+)
+def rename_tag(tag: str, request: TagRenameSchema, service: TodoService = Depends(get_service)) -> Dict[str, Any]:
+    try:
+        name, affected = service.rename_tag(tag, request.name)
+    except ValueError as e:
+        raise ValidationException(str(e))
+    _handle_not_found(affected, f"标签 {tag} 不存在")
+    return {"message": "标签已重命名", "name": name, "affected": affected}
+
+@router.delete(
+    "/tags/{tag}",
+    summary="删除标签",
+    description="从所有事项（含回收站中的事项）上移除该标签，事项本身不受影响",
+    response_description="返回操作成功信息及涉及的事项数"
+)
+def delete_tag(tag: str, service: TodoService = Depends(get_service)) -> Dict[str, Any]:
+    try:
+        affected = service.delete_tag(tag)
+    except ValueError as e:
+        raise ValidationException(str(e))
+    _handle_not_found(affected, f"标签 {tag} 不存在")
+    return {"message": "标签已删除", "affected": affected}
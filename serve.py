@@ -0,0 +1,244 @@
+"""生产环境多进程启动器
+
+主进程预加载应用并完成数据库初始化，然后 fork 出 N 个工作进程共享同一个监听套接字。
+每个工作进程在 fork 后重新初始化数据库引擎，不与其他进程共享 SQLite 连接。
+
+后台任务只在持有主工作进程锁（见 utils/worker.py）的进程中运行，
+滚动重启时新的进程在旧的主进程退出、释放锁之后才接管这些任务。
+
+信号:
+    SIGHUP          逐个滚动重启工作进程（新进程就绪后再优雅停止旧进程）
+    SIGTERM/SIGINT  优雅停止所有工作进程后退出
+
+用法:
+    python serve.py --workers 4 --port 8000
+"""
+from typing import Dict, List, Optional
+import argparse
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from database.memory_storage import STORAGE_BACKEND
+from utils.logging_config import setup_logging
+from utils.worker import WORKER_ID_ENV
+
+logger = logging.getLogger("serve")
+
+
+def default_workers() -> int:
+    """默认工作进程数：环境变量 TODO_WORKERS，否则为CPU核心数（内存存储时为1）"""
+    configured = os.getenv("TODO_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    if STORAGE_BACKEND == "memory":
+        return 1
+    return os.cpu_count() or 1
+
+
+def _load_app():
+    from main import app
+    return app
+
+
+def _init_database() -> None:
+    """在主进程中完成建表和迁移，工作进程启动时只需校验结构指纹"""
+    from database.init_db import init_db
+    from database.database import dispose_engine
+
+    init_db(backfills="skip")
+    # fork 前关闭主进程的连接，避免子进程继承打开的 SQLite 句柄
+    dispose_engine()
+
+
+class _WorkerServer(uvicorn.Server):
+    """启动完成后通过管道通知主进程的 uvicorn 服务"""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int) -> None:
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+
+class Supervisor:
+    """预加载 + fork 的工作进程管理器"""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.app = None
+        self.sock: Optional[socket.socket] = None
+        self.workers: Dict[int, int] = {}  # pid -> worker_id
+        self._shutting_down = False
+        self._reload_requested = False
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.args.host, self.args.port))
+        sock.listen(self.args.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def spawn(self, worker_id: int) -> Optional[int]:
+        """fork 一个工作进程并等待其就绪"""
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._run_worker(worker_id, ready_w)
+            os._exit(0)
+
+        os.close(ready_w)
+        self.workers[pid] = worker_id
+        readable, _, _ = select.select([ready_r], [], [], self.args.ready_timeout)
+        ready = bool(readable) and os.read(ready_r, 1) == b"1"
+        os.close(ready_r)
+        if ready:
+            logger.info(f"工作进程 {worker_id} 已就绪 (PID: {pid})")
+            return pid
+        logger.error(f"工作进程 {worker_id} 启动失败或超时 (PID: {pid})")
+        self._stop(pid)
+        return None
+
+    def _run_worker(self, worker_id: int, ready_fd: int) -> None:
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        os.environ[WORKER_ID_ENV] = str(worker_id)
+
+        # 丢弃可能从主进程继承的连接池状态，本进程在首次使用时建立自己的连接
+        from database.database import dispose_engine
+        dispose_engine(close=False)
+
+        app = self.app if self.app is not None else _load_app()
+        config = uvicorn.Config(
+            app,
+            lifespan="on",
+            log_config=None,
+            timeout_graceful_shutdown=self.args.graceful_timeout,
+        )
+        server = _WorkerServer(config, ready_fd)
+        server.run(sockets=[self.sock])
+
+    def _stop(self, pid: int) -> None:
+        """优雅停止工作进程，超时后强制结束"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+            return
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while time.monotonic() < deadline:
+            try:
+                finished, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if finished:
+                break
+            time.sleep(0.1)
+        else:
+            logger.warning(f"工作进程 {pid} 未能按时退出，强制结束")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+
+    def rolling_restart(self) -> None:
+        """逐个替换工作进程，任意时刻至少有 N 个进程在接收请求"""
+        logger.info("开始滚动重启工作进程")
+        for pid, worker_id in list(self.workers.items()):
+            if self._shutting_down:
+                return
+            if self.spawn(worker_id) is None:
+                logger.error(f"替换工作进程 {worker_id} 失败，保留旧进程 (PID: {pid})")
+                continue
+            self._stop(pid)
+        logger.info("滚动重启完成")
+
+    def _reap(self) -> None:
+        """回收意外退出的工作进程并重新拉起"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker_id = self.workers.pop(pid, None)
+            if worker_id is not None and not self._shutting_down:
+                logger.warning(f"工作进程 {worker_id} 意外退出 (PID: {pid}, 状态: {status})，正在重启")
+                self.spawn(worker_id)
+
+    def _handle_reload(self, signum, frame) -> None:
+        self._reload_requested = True
+
+    def _handle_shutdown(self, signum, frame) -> None:
+        self._shutting_down = True
+
+    def run(self) -> None:
+        if self.args.preload:
+            self.app = _load_app()
+        _init_database()
+        self.sock = self._bind()
+        logger.info(f"主进程 {os.getpid()} 监听 {self.args.host}:{self.args.port}，工作进程数: {self.args.workers}")
+
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+
+        for worker_id in range(self.args.workers):
+            self.spawn(worker_id)
+
+        while not self._shutting_down:
+            if self._reload_requested:
+                self._reload_requested = False
+                self.rolling_restart()
+            self._reap()
+            time.sleep(0.5)
+
+        logger.info("正在停止所有工作进程")
+        for pid in list(self.workers):
+            self._stop(pid)
+        self.sock.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="待办事项API生产环境启动器")
+    parser.add_argument("--host", default=os.getenv("TODO_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("TODO_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers(), help="工作进程数，默认CPU核心数")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", help="工作进程各自导入应用")
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="优雅停止的最长等待秒数")
+    parser.add_argument("--ready-timeout", type=float, default=30, help="等待工作进程就绪的秒数")
+    parser.add_argument("--backlog", type=int, default=2048)
+    args = parser.parse_args(argv)
+    if STORAGE_BACKEND == "memory" and args.workers > 1:
+        # 内存存储的数据保存在各自进程中，多个工作进程会返回不同的数据
+        parser.error("TODO_STORAGE_BACKEND=memory 时数据只保存在单个进程中，--workers 只能为1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    setup_logging()
+
+    if not hasattr(os, "fork"):
+        # Windows 不支持 fork，退化为单进程运行
+        logger.warning("当前平台不支持 fork，以单进程模式运行")
+        uvicorn.run(_load_app(), host=args.host, port=args.port, log_config=None)
+        return
+
+    Supervisor(args).run()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
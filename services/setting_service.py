@@ -1,32 +1,249 @@
+from collections import OrderedDict
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from database.data_version import bump_data_version, get_data_version, settings_version_key
 from database.orm_models import SystemSettingORM
-from typing import Optional, Tuple
+from database.tenancy import DEFAULT_TENANT
+from models.schemas import AppSettingsSchema, AppSettingsUpdateSchema
+from utils.exceptions import PreconditionFailedException
+from typing import Any, Dict, Hashable, Optional, Tuple
+import hashlib
+import json
+import threading
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 是否在进程内缓存界面设置
+SETTINGS_CACHE_ENABLED = os.getenv("TODO_SETTINGS_CACHE", "1") == "1"
+# 缓存的租户数量上限，超出时淘汰最久未使用的租户
+SETTINGS_CACHE_SIZE = int(os.getenv("TODO_SETTINGS_CACHE_SIZE", "256"))
+
+WALLPAPER_KEY = "wallpaper"
+# 以键值形式保存在 system_settings 中的界面设置（值为JSON），has_wallpaper 由壁纸行推导
+SETTING_KEYS = tuple(AppSettingsUpdateSchema.model_fields)
+
+_settings = SystemSettingORM.__table__
+
+
+class CachedSettings:
+    """某个数据版本下的界面设置，以及序列化好的响应体和 ETag"""
+    __slots__ = ("version", "settings", "body", "etag", "wallpaper_etag")
+
+    def __init__(self, version: int, settings: AppSettingsSchema, wallpaper_tag: Optional[str]) -> None:
+        self.version = version
+        self.settings = settings
+        self.body = settings.model_dump_json().encode()
+        self.etag = f'"{version}-{hashlib.sha1(self.body).hexdigest()[:12]}"'
+        self.wallpaper_etag = f'"wallpaper-{wallpaper_tag}"' if wallpaper_tag else None
+
+
+class SettingsCache:
+    """按 (数据库, 租户) 缓存的界面设置
+
+    条目带有加载时的设置版本号（data_versions 表），读取时与数据库中的版本比较（一次主键查询），
+    任何工作进程修改过设置后版本号都会变化，旧条目随之失效，不需要进程间通知。
+    """
+
+    def __init__(self, max_entries: int = SETTINGS_CACHE_SIZE) -> None:
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedSettings]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedSettings]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: CachedSettings) -> None:
+        with self._lock:
+            current = self._entries.get(key)
+            # 并发加载时不要用旧版本覆盖新版本
+            if current is not None and current.version > entry.version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": SETTINGS_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+_settings_cache = SettingsCache()
+
+
+def get_settings_cache() -> SettingsCache:
+    """获取进程内的界面设置缓存"""
+    return _settings_cache
+
+
+def etag_matches(header: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match / If-Match 请求头是否包含 etag（支持逗号分隔的多个值、弱校验前缀和 *）"""
+    if not header or not etag:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def etag_version_matches(header: str, version: int) -> bool:
+    """If-Match 请求头中是否有与 version 对应的 ETag（ETag 形如 "版本-摘要"）"""
+    for candidate in header.split(","):
+        candidate = candidate.strip().removeprefix("W/").strip('"')
+        if candidate == "*" or candidate.split("-", 1)[0] == str(version):
+            return True
+    return False
+
+
+def _parse_settings(rows: Dict[str, str]) -> AppSettingsSchema:
+    """把数据库中的JSON值解析为界面设置，无法解析或不合法的项按默认值处理"""
+    values: Dict[str, Any] = {}
+    for key, raw in rows.items():
+        try:
+            values[key] = json.loads(raw)
+        except (TypeError, ValueError):
+            logger.warning(f"忽略无法解析的设置项 {key}: {raw!r}")
+    try:
+        return AppSettingsSchema.model_validate(values)
+    except ValidationError as e:
+        invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+        logger.warning(f"忽略不合法的设置项: {sorted(invalid)}")
+        return AppSettingsSchema.model_validate({k: v for k, v in values.items() if k not in invalid})
+
 
 class SettingService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, owner_id: str = DEFAULT_TENANT):
         self.db = db
+        self.owner_id = owner_id
+        self._version_key = settings_version_key(owner_id)
+
+    def _get_setting(self, key: str) -> Optional[SystemSettingORM]:
+        return self.db.get(SystemSettingORM, (self.owner_id, key))
+
+    def _cache_key(self) -> Hashable:
+        # 同一个租户在不同数据库（测试、按租户分库）中的设置互不影响
+        return str(self.db.get_bind().url), self.owner_id
+
+    def _load(self, version: int) -> CachedSettings:
+        """一次查询读取租户的所有设置项，壁纸只读取是否存在和修订号，不读取图片数据"""
+        rows = self.db.execute(
+            select(_settings.c.key, _settings.c.value, _settings.c.blob_value.isnot(None))
+            .where(_settings.c.owner_id == self.owner_id)
+        ).all()
+        values = {key: value for key, value, _ in rows if key in SETTING_KEYS and value is not None}
+        settings = _parse_settings(values)
+        wallpaper_tag = None
+        for key, value, has_blob in rows:
+            if key == WALLPAPER_KEY and has_blob:
+                settings.has_wallpaper = True
+                # 早期上传的壁纸没有修订号，以设置版本代替
+                wallpaper_tag = value or f"v{version}"
+        return CachedSettings(version, settings, wallpaper_tag)
+
+    def get_cached(self) -> CachedSettings:
+        """当前版本的界面设置，版本未变化时直接使用进程内缓存"""
+        version = get_data_version(self.db, self._version_key)
+        if not SETTINGS_CACHE_ENABLED:
+            return self._load(version)
+        cache = get_settings_cache()
+        entry = cache.get(self._cache_key(), version)
+        if entry is None:
+            entry = self._load(version)
+            cache.put(self._cache_key(), entry)
+        return entry
+
+    def get_settings(self) -> AppSettingsSchema:
+        return self.get_cached().settings
+
+    def update_settings(self, changes: Dict[str, Any], expected_etag: Optional[str] = None) -> CachedSettings:
+        """
+        批量写入界面设置（一个事务）
+
+        参数:
+            changes: 要修改的项，值为None时删除该项（恢复默认值）
+            expected_etag: 请求头 If-Match，写入前的版本与其不一致时抛出 PreconditionFailedException
+
+        返回:
+            写入后的界面设置
+        """
+        unknown = set(changes) - set(SETTING_KEYS)
+        if unknown:
+            raise ValueError(f"未知的设置项: {sorted(unknown)}")
+        try:
+            # 先递增版本取得写锁，之后其他工作进程无法在检查与提交之间写入
+            version = bump_data_version(self.db, self._version_key)
+            if expected_etag is not None and not etag_version_matches(expected_etag, version - 1):
+                raise PreconditionFailedException()
+            for key, value in changes.items():
+                setting = self._get_setting(key)
+                if value is None:
+                    if setting:
+                        self.db.delete(setting)
+                    continue
+                if not setting:
+                    setting = SystemSettingORM(owner_id=self.owner_id, key=key)
+                    self.db.add(setting)
+                setting.value = json.dumps(value)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        logger.info(f"租户 {self.owner_id} 更新了界面设置: {sorted(changes)}（版本 {version}）")
+        return self.get_cached()
 
     def save_wallpaper(self, image_data: bytes, content_type: str):
-        setting = self.db.query(SystemSettingORM).filter(SystemSettingORM.key == "wallpaper").first()
+        setting = self._get_setting(WALLPAPER_KEY)
         if not setting:
-            setting = SystemSettingORM(key="wallpaper")
+            setting = SystemSettingORM(owner_id=self.owner_id, key=WALLPAPER_KEY)
             self.db.add(setting)
-        
+
         setting.blob_value = image_data
         setting.content_type = content_type
+        # 壁纸修订号记录在 value 中，用作壁纸的 ETag
+        setting.value = str(bump_data_version(self.db, self._version_key))
         self.db.commit()
         return True
 
     def get_wallpaper(self) -> Optional[Tuple[bytes, str]]:
-        setting = self.db.query(SystemSettingORM).filter(SystemSettingORM.key == "wallpaper").first()
+        setting = self._get_setting(WALLPAPER_KEY)
         if setting and setting.blob_value:
             return setting.blob_value, setting.content_type or "image/jpeg"
         return None
 
     def delete_wallpaper(self):
-        setting = self.db.query(SystemSettingORM).filter(SystemSettingORM.key == "wallpaper").first()
+        setting = self._get_setting(WALLPAPER_KEY)
         if setting:
             setting.blob_value = None
             setting.content_type = None
+            setting.value = None
+            bump_data_version(self.db, self._version_key)
             self.db.commit()
         return True
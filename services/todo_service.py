@@ -1,10 +1,20 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import date, datetime, timedelta, UTC
 import logging
-from models.schemas import TodoSchema
+from models.schemas import (TodoSchema, AssignmentLogPageSchema, TimeConflictSchema, TimeConflictReportSchema,
+                            CalendarDaySchema, CalendarSchema, TagSchema)
+from utils.priority_calculator import QUADRANTS, UNASSIGNED_QUADRANT, calculate_priority, get_quadrant
+from utils.time_of_day import MINUTES_PER_DAY, find_overlaps, format_time, parse_time
+from utils.tags import MAX_TAGS_PER_TODO, normalize_tag
 from database.storage import TodoStorage
 
 logger = logging.getLogger(__name__)
 
+# 日历查询一次最多覆盖的天数
+CALENDAR_MAX_DAYS = 366
+# 标签过滤的匹配方式: any 带有任一标签，all 带有全部标签
+TAG_MATCH_MODES = ("any", "all")
+
 class TodoService:
     """待办事项业务逻辑服务类，负责处理所有业务逻辑
     
@@ -29,6 +39,176 @@ class TodoService:
         logger.debug("正在请求获取所有待办事项")
         return self.storage.get_all_todos()
     
+    def get_top_todos(self, limit: int, quadrant: Optional[str] = None) -> List[TodoSchema]:
+        """获取优先级最高的待办事项
+        
+        Args:
+            limit: 返回条数
+            quadrant: 限定象限 (q1-q4 或 unassigned)，为空时不限
+            
+        Returns:
+            List[TodoSchema]: 按优先级从高到低排列的事项
+        """
+        if quadrant is not None and quadrant not in (*QUADRANTS, UNASSIGNED_QUADRANT):
+            raise ValueError(f"无效的象限: {quadrant}")
+        return self.storage.get_top_todos(limit, quadrant)
+    
+    def get_todos_by_quadrant(self, limit: int) -> Dict[str, List[TodoSchema]]:
+        """按象限分组获取待办事项，每组按手动排序排列（新事项和换到该象限的事项排在最后）
+        
+        Args:
+            limit: 每个象限最多返回的条数
+            
+        Returns:
+            Dict[str, List[TodoSchema]]: 象限键到事项列表的映射
+        """
+        return {
+            quadrant: self.storage.get_quadrant_todos(quadrant, limit)
+            for quadrant in (*QUADRANTS, UNASSIGNED_QUADRANT)
+        }
+    
+    def get_todos_by_tags(self, tags: List[str], match: str = "any") -> Dict[int, TodoSchema]:
+        """按标签过滤未删除的待办事项
+        
+        Args:
+            tags: 标签列表
+            match: any 返回带有任一标签的事项，all 返回带有全部标签的事项
+            
+        Returns:
+            Dict[int, TodoSchema]: ID到TodoSchema对象的映射
+            
+        Raises:
+            ValueError: 标签或匹配方式无效
+        """
+        if match not in TAG_MATCH_MODES:
+            raise ValueError(f"无效的标签匹配方式: {match}，可选 any 或 all")
+        tags = list(dict.fromkeys(normalize_tag(tag) for tag in tags))
+        if not tags:
+            raise ValueError("至少需要指定一个标签")
+        if len(tags) > MAX_TAGS_PER_TODO:
+            raise ValueError(f"一次最多按{MAX_TAGS_PER_TODO}个标签过滤")
+        return self.storage.get_todos_by_tags(tags, match_all=match == "all")
+    
+    def get_tags(self) -> List[TagSchema]:
+        """获取所有标签及带有该标签的未删除事项数，按标签名排序"""
+        return [TagSchema(name=tag, count=count) for tag, count in self.storage.get_tag_counts()]
+    
+    def rename_tag(self, old: str, new: str) -> Tuple[str, int]:
+        """重命名标签，新名称已存在时合并
+
+        Returns:
+            Tuple[str, int]: 规范化后实际保存的新标签名，以及涉及的事项数（为0表示标签不存在）
+        """
+        logger.info(f"正在重命名标签: {old} -> {new}")
+        name = normalize_tag(new)
+        return name, self.storage.rename_tag(normalize_tag(old), name)
+    
+    def delete_tag(self, tag: str) -> int:
+        """从所有事项上移除标签，返回涉及的事项数（为0表示标签不存在）"""
+        logger.info(f"正在删除标签: {tag}")
+        return self.storage.delete_tag(normalize_tag(tag))
+    
+    def move_todo(self, todo_id: int, prev_id: Optional[int] = None,
+                  next_id: Optional[int] = None) -> Optional[TodoSchema]:
+        """在象限内手动调整事项的位置
+        
+        Args:
+            todo_id: 被移动的事项ID
+            prev_id: 移动后紧挨在前面的事项ID
+            next_id: 移动后紧挨在后面的事项ID
+            
+        Returns:
+            Optional[TodoSchema]: 移动后的事项，事项不存在时返回None
+            
+        Raises:
+            ValueError: 相邻事项无效
+        """
+        logger.info(f"正在移动待办事项 ID: {todo_id}, prev_id={prev_id}, next_id={next_id}")
+        return self.storage.move_todo(todo_id, prev_id, next_id)
+    
+    @staticmethod
+    def _time_window(start: Optional[str], end: Optional[str]) -> Tuple[int, int]:
+        """将 "HH:MM" 时间窗口转换为分钟区间，缺省为全天"""
+        start_minute = parse_time(start) if start else 0
+        end_minute = parse_time(end) if end else MINUTES_PER_DAY
+        if start_minute >= end_minute:
+            raise ValueError("开始时间必须早于结束时间")
+        return start_minute, end_minute
+    
+    def get_timeline(self, start: Optional[str] = None, end: Optional[str] = None,
+                     include_completed: bool = True) -> List[TodoSchema]:
+        """获取时间段与窗口 [start, end) 重叠的事项
+        
+        Args:
+            start: 窗口开始时间 (HH:MM)，为空时从 00:00 开始
+            end: 窗口结束时间 (HH:MM，不包含)，为空时到当天结束
+            include_completed: 是否包含已完成的事项
+            
+        Returns:
+            List[TodoSchema]: 按开始时间、结束时间排列的事项
+        """
+        start_minute, end_minute = self._time_window(start, end)
+        return self.storage.get_todos_in_time_range(start_minute, end_minute, include_completed)
+    
+    def find_time_conflicts(self, start: Optional[str] = None, end: Optional[str] = None,
+                            include_completed: bool = False) -> TimeConflictReportSchema:
+        """检测窗口内时间段相互重叠的事项
+        
+        从索引中按开始时间取出窗口内的事项，再用扫描线算法一次找出所有重叠对，
+        复杂度 O(n log n + k)。首尾相接的时间段不算冲突。
+        
+        Args:
+            start: 窗口开始时间 (HH:MM)，为空时从 00:00 开始
+            end: 窗口结束时间 (HH:MM，不包含)，为空时到当天结束
+            include_completed: 已完成的事项是否参与检测
+            
+        Returns:
+            TimeConflictReportSchema: 参与检测的事项数和所有重叠对
+        """
+        scheduled = self.get_timeline(start, end, include_completed)
+        overlaps = find_overlaps(
+            (parse_time(todo.start_time), parse_time(todo.end_time), todo)  # type: ignore[arg-type]
+            for todo in scheduled
+        )
+        return TimeConflictReportSchema(
+            scheduled=len(scheduled),
+            conflicts=[
+                TimeConflictSchema(first=first, second=second,
+                                   overlap_start=format_time(overlap_start), overlap_end=format_time(overlap_end))
+                for first, second, overlap_start, overlap_end in overlaps
+            ],
+        )
+    
+    def get_calendar(self, date_from: date, date_to: date, include_completed: bool = True) -> CalendarSchema:
+        """按天分组获取日期范围内截止或计划执行的事项
+        
+        存储层在日期索引上做一次范围查询，再按天分桶；同时设置了两种日期的事项
+        会分别出现在截止日和计划日的分组中。
+        
+        Args:
+            date_from: 起始日期（包含）
+            date_to: 结束日期（包含）
+            include_completed: 是否包含已完成的事项
+            
+        Returns:
+            CalendarSchema: 范围内每一天（含没有事项的日期）的分组
+        """
+        if date_from > date_to:
+            raise ValueError("起始日期不能晚于结束日期")
+        span = (date_to - date_from).days + 1
+        if span > CALENDAR_MAX_DAYS:
+            raise ValueError(f"日期范围不能超过 {CALENDAR_MAX_DAYS} 天")
+
+        days = {date_from + timedelta(days=offset): CalendarDaySchema(day=date_from + timedelta(days=offset))
+                for offset in range(span)}
+        # 存储层已按优先级排序，按顺序追加后每个分组内同样有序
+        for todo in self.storage.get_todos_in_date_range(date_from, date_to, include_completed):
+            if todo.due_date in days:
+                days[todo.due_date].due.append(todo)
+            if todo.scheduled_date in days:
+                days[todo.scheduled_date].scheduled.append(todo)
+        return CalendarSchema(from_date=date_from, to_date=date_to, days=list(days.values()))
+    
     def get_todo_by_id(self, todo_id: int) -> Optional[TodoSchema]:
         """根据ID获取特定待办事项
         
@@ -212,6 +392,10 @@ class TodoService:
             logger.error(f"批量恢复待办事项失败: {e}")
             raise
     
+    def get_data_version(self) -> int:
+        """获取当前数据版本，用于判断两次读取之间数据是否发生过变化"""
+        return self.storage.get_data_version()
+    
     def get_todo_stats(self) -> Dict[str, Any]:
         """获取待办事项的汇总统计数据
         
@@ -224,3 +408,83 @@ class TodoService:
         except Exception as e:
             logger.error(f"获取统计数据失败: {e}")
             raise
+    
+    def get_assignment_history(self, todo_id: Optional[int] = None, since: Optional[datetime] = None,
+                               until: Optional[datetime] = None, sources: Optional[List[str]] = None,
+                               cursor: Optional[str] = None, limit: int = 50) -> AssignmentLogPageSchema:
+        """分页获取分值变更历史
+        
+        Args:
+            todo_id: 仅返回指定事项的历史，为空时返回全局日志
+            since: 起始时间（包含）
+            until: 截止时间（不包含）
+            sources: 仅返回这些操作来源的日志
+            cursor: 上一页返回的游标
+            limit: 每页条数
+            
+        Returns:
+            AssignmentLogPageSchema: 按时间倒序排列的日志及下一页游标
+        """
+        if since is not None and until is not None and since >= until:
+            raise ValueError("起始时间必须早于截止时间")
+        logger.debug(f"正在查询分值变更历史 todo_id={todo_id}, cursor={cursor}")
+        return self.storage.get_assignment_logs(
+            todo_id=todo_id, since=since, until=until, sources=sources, cursor=cursor, limit=limit
+        )
+    
+    def get_quadrant_stats(self) -> Dict[str, Any]:
+        """获取象限分布统计
+        
+        基于存储层一次分组统计的结果，汇总每个象限和 7×7 分值格子的数量、完成率及分值直方图。
+        
+        Returns:
+            Dict[str, Any]: 包含 quadrants、grid 及总体完成率的字典
+        """
+        logger.debug("正在请求获取象限统计")
+        scores = range(-3, 4)
+
+        def _bucket() -> Dict[str, Any]:
+            return {"total": 0, "completed": 0}
+
+        def _finish(bucket: Dict[str, Any]) -> Dict[str, Any]:
+            bucket["pending"] = bucket["total"] - bucket["completed"]
+            bucket["completion_ratio"] = round(bucket["completed"] / bucket["total"], 4) if bucket["total"] else 0.0
+            return bucket
+
+        quadrants: Dict[str, Dict[str, Any]] = {}
+        for quadrant in (*QUADRANTS, UNASSIGNED_QUADRANT):
+            quadrants[quadrant] = _bucket()
+            if quadrant != UNASSIGNED_QUADRANT:
+                quadrants[quadrant]["future_score_histogram"] = {score: 0 for score in scores}
+                quadrants[quadrant]["urgency_score_histogram"] = {score: 0 for score in scores}
+        cells = {(future, urgency): _bucket() for future in scores for urgency in scores}
+        overall = _bucket()
+
+        for future_score, urgency_score, completed, count in self.storage.get_score_counts():
+            quadrant = get_quadrant(future_score, urgency_score)
+            targets = [overall, quadrants[quadrant]]
+            if quadrant != UNASSIGNED_QUADRANT:
+                targets.append(cells[(future_score, urgency_score)])
+                quadrants[quadrant]["future_score_histogram"][future_score] += count
+                quadrants[quadrant]["urgency_score_histogram"][urgency_score] += count
+            for bucket in targets:
+                bucket["total"] += count
+                if completed:
+                    bucket["completed"] += count
+
+        grid = []
+        for (future_score, urgency_score), bucket in cells.items():
+            grid.append({
+                "future_score": future_score,
+                "urgency_score": urgency_score,
+                "quadrant": get_quadrant(future_score, urgency_score),
+                "final_priority": calculate_priority(future_score, urgency_score),
+                **_finish(bucket),
+            })
+
+        return {
+            **_finish(overall),
+            "quadrants": {quadrant: _finish(bucket) for quadrant, bucket in quadrants.items()},
+            "grid": grid,
+            "timestamp": datetime.now(UTC).isoformat(),
+        }
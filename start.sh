@@ -4,9 +4,9 @@ echo "=========================================="
 echo "  TodoGravita - 启动项目"
 echo "=========================================="
 
-# 启动后端服务
+# 启动后端服务（多进程，工作进程数由 TODO_WORKERS 指定，默认CPU核心数）
 echo "正在启动后端服务 (FastAPI)..."
-python main.py &
+python serve.py &
 BACKEND_PID=$!
 
 # 启动前端应用
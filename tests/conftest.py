@@ -0,0 +1,11 @@
+"""测试使用独立的临时数据库，不读写项目根目录下的 todos.db
+
+可通过 TEST_DATABASE_URL 指定其他数据库。必须在导入 main / database 之前设置。
+"""
+import os
+import tempfile
+
+_test_dir = tempfile.mkdtemp(prefix="todo-tests-")
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(_test_dir, 'test.db')}"
+)
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils.admission import AdmissionControlMiddleware, AdmissionController, AdmissionRejected
+
+def test_routes_are_classified():
+    controller = AdmissionController()
+    assert controller.classify("PATCH", "/api/todos/7/toggle") == "write"
+    assert controller.classify("GET", "/api/todos") == "bulk"
+    assert controller.classify("GET", "/api/todos/top") == "read"
+    assert controller.classify("POST", "/api/settings/wallpaper") == "upload"
+    assert controller.classify("GET", "/api/settings/wallpaper") == "download"
+    assert controller.classify("DELETE", "/api/settings/wallpaper") == "write"
+    assert controller.classify("GET", "/health") is None
+    assert controller.classify("GET", "/api/admin/admission") is None
+
+def test_full_queue_is_rejected_and_writes_are_admitted_first():
+    async def scenario():
+        # 总并发 1：bulk 和 write 竞争同一个名额
+        controller = AdmissionController({"write": (3, 1, 1, 1000), "bulk": (1, 1, 1, 1000)}, max_concurrency=1)
+        await controller.acquire("bulk")
+        bulk_waiter = asyncio.create_task(controller.acquire("bulk"))
+        write_waiter = asyncio.create_task(controller.acquire("write"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("bulk")
+        assert rejected.value.reason == "queue_full" and rejected.value.retry_after == 1
+
+        controller.release("bulk")
+        await write_waiter
+        assert not bulk_waiter.done()
+        controller.release("write")
+        await bulk_waiter
+        controller.release("bulk")
+        return controller.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 0
+    assert stats["lanes"]["bulk"]["rejected_queue_full"] == 1
+    assert stats["lanes"]["write"]["admitted"] == 1
+
+def test_queue_timeout_returns_503_with_retry_after():
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/api/todos")
+    async def slow_list():
+        await release.wait()
+        return []
+
+    controller = AdmissionController({"bulk": (1, 1, 1, 50)})
+    app.add_middleware(AdmissionControlMiddleware, controller=controller)
+
+    async def scenario():
+        import httpx
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/api/todos"))
+            await asyncio.sleep(0.01)
+            second = await client.get("/api/todos")
+            release.set()
+            return (await first).status_code, second
+
+    first_status, second = asyncio.run(scenario())
+    assert first_status == 200
+    assert second.status_code == 503
+    assert second.headers["retry-after"] == "1"
+    assert second.json()["reason"] == "queue_timeout"
+
+def test_admission_stats_endpoint():
+    from main import app
+    client = TestClient(app)
+    client.get("/api/todos")
+    data = client.get("/api/admin/admission").json()
+    assert set(data["lanes"]) == {"write", "read", "bulk", "download", "upload"}
+    assert data["lanes"]["bulk"]["admitted"] >= 1
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from database.database import get_engine
+from main import app
+
+client = TestClient(app)
+
+def _create_with_moves():
+    todo = client.post("/api/todos", json={"title": "History Test", "future_score": 0, "urgency_score": 0}).json()
+    for score, source in ((1, "drag"), (2, "form"), (3, "drag")):
+        client.patch(f"/api/todos/{todo['id']}", json={"future_score": score, "operation_source": source})
+    return todo["id"]
+
+def test_todo_history_keyset_pagination():
+    todo_id = _create_with_moves()
+
+    first = client.get(f"/api/todos/{todo_id}/history", params={"limit": 2}).json()
+    assert [item["new_future_score"] for item in first["items"]] == [3, 2]
+    assert first["next_cursor"]
+
+    second = client.get(f"/api/todos/{todo_id}/history", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [item["new_future_score"] for item in second["items"]] == [1]
+    assert second["next_cursor"] is None
+
+    dragged = client.get(f"/api/todos/{todo_id}/history", params={"source": "drag"}).json()
+    assert [item["new_future_score"] for item in dragged["items"]] == [3, 1]
+    client.delete(f"/api/todos/{todo_id}")
+
+def test_global_feed_filters_and_invalid_cursor():
+    todo_id = _create_with_moves()
+    feed = client.get("/api/assignment-logs", params={"source": "form", "since": "2000-01-01T00:00:00"}).json()
+    assert feed["items"] and all(item["source"] == "form" for item in feed["items"])
+    assert any(item["todo_id"] == todo_id for item in feed["items"])
+
+    assert client.get("/api/assignment-logs", params={"since": "2030-01-01T00:00:00"}).json()["items"] == []
+    assert client.get("/api/assignment-logs", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/assignment-logs", params={"since": "2030-01-02", "until": "2030-01-01"}).status_code == 400
+    client.delete(f"/api/todos/{todo_id}")
+
+def test_history_queries_are_index_only():
+    with get_engine().connect() as conn:
+        for sql in (
+            "SELECT id, todo_id, source, old_future_score, new_urgency_score, created_at FROM assignment_logs "
+            "WHERE owner_id = 'default' AND todo_id = 1 AND created_at >= '2026-01-01' ORDER BY created_at DESC, id DESC LIMIT 51",
+            "SELECT id, todo_id, source, old_future_score, new_urgency_score, created_at FROM assignment_logs "
+            "WHERE owner_id = 'default' AND created_at >= '2026-01-01' AND source IN ('drag') ORDER BY created_at DESC, id DESC LIMIT 51",
+        ):
+            plan = " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+            assert "COVERING INDEX" in plan
+            assert "TEMP B-TREE" not in plan
@@ -0,0 +1,26 @@
+from sqlalchemy import text
+from benchmarks.dataset import generate_dataset
+from database.database import create_database_engine
+
+def _snapshot(engine):
+    with engine.connect() as conn:
+        return [
+            conn.execute(text("SELECT id, future_score, urgency_score, final_priority, completed, deleted, created_at "
+                              "FROM todo_items ORDER BY id")).all(),
+            conn.execute(text("SELECT original_id, deleted_at FROM recycle_bin_items ORDER BY original_id")).all(),
+            conn.execute(text("SELECT count(*) FROM assignment_logs")).scalar(),
+        ]
+
+def test_dataset_is_reproducible(tmp_path):
+    snapshots = []
+    for name in ("a.db", "b.db"):
+        engine = create_database_engine(f"sqlite:///{tmp_path / name}")
+        counts = generate_dataset(engine, 500, recycled=0.2, logs_per_todo=1.5, seed=7, batch_size=128)
+        snapshots.append(_snapshot(engine))
+        engine.dispose()
+
+    todos, recycled, logs = snapshots[0]
+    assert snapshots[0] == snapshots[1]
+    assert len(todos) == counts["todos"] == 500
+    assert len(recycled) == counts["recycled"] == sum(1 for row in todos if row.deleted)
+    assert logs == counts["logs"] > 0
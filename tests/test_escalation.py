@@ -0,0 +1,98 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.db_storage import DatabaseTodoStorage
+from database.escalation import DeadlineEscalator, deadline_of, next_escalation_at, parse_steps, target_urgency
+from database.orm_models import Base
+from models.schemas import TodoSchema
+
+UTC = datetime.UTC
+NOW = datetime.datetime(2026, 3, 10, 12, 0, tzinfo=UTC)
+STEPS = parse_steps("168:0,72:1,24:2,4:3")
+OWNER = "escalation-tests"
+
+def test_steps_and_deadlines():
+    deadline = deadline_of(datetime.date(2026, 3, 11), None, UTC)
+    assert deadline == datetime.datetime(2026, 3, 12, 0, 0, tzinfo=UTC)
+    assert target_urgency(deadline, NOW, STEPS) == 1
+    assert target_urgency(deadline, deadline + datetime.timedelta(hours=1), STEPS) == 3
+    assert target_urgency(deadline, deadline - datetime.timedelta(days=30), STEPS) is None
+    assert next_escalation_at(deadline, 1, STEPS) == deadline - datetime.timedelta(hours=24)
+    assert next_escalation_at(deadline, 3, STEPS) is None
+    with pytest.raises(ValueError):
+        parse_steps("24:3,4:1")
+
+@pytest.fixture
+def storage(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'escalation.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        yield DatabaseTodoStorage(session, OWNER)
+    engine.dispose()
+
+def _add(storage, title, due, end_time=None, urgency=-1, **fields):
+    return storage.add_todo(TodoSchema(title=title, future_score=2, urgency_score=urgency,
+                                       due_date=due, end_time=end_time, **fields)).id
+
+def _urgency(storage, todo_id):
+    return storage.db.execute(text("SELECT urgency_score FROM todo_items WHERE id = :id"), {"id": todo_id}).scalar()
+
+def test_due_todos_escalate_once_with_log(storage):
+    engine = storage.db.get_bind()
+    soon = _add(storage, "明早截止", datetime.date(2026, 3, 11), end_time="09:00")
+    later = _add(storage, "下周截止", datetime.date(2026, 3, 20))
+    done = _add(storage, "已完成", datetime.date(2026, 3, 10), completed=True)
+    high = _add(storage, "已很紧急", datetime.date(2026, 3, 10), urgency=3)
+
+    escalator = DeadlineEscalator(engine, steps=STEPS, timezone="UTC", batch_pause_ms=0)
+    result = escalator.run_once(NOW)
+    assert result["synced_tenants"] == 1
+    assert result["escalated"] == 1
+    assert _urgency(storage, soon) == 2
+    assert storage.get_quadrant_todos("q1", 10)[-1].id == soon
+    assert [_urgency(storage, todo_id) for todo_id in (later, done, high)] == [-1, -1, 3]
+
+    todo = storage.get_todo_by_id(soon)
+    assert todo.final_priority == 464
+    logs = storage.get_assignment_logs(todo_id=soon).items
+    assert [(log.source, log.old_urgency_score, log.new_urgency_score) for log in logs] == [("auto_escalation", -1, 2)]
+
+    # 自身的写入不会触发重新加载，未到下一级时不再改写
+    again = escalator.run_once(NOW + datetime.timedelta(minutes=1))
+    assert again["synced_tenants"] == 0 and again["escalated"] == 0
+
+    # 距截止不足4小时升到最高一级，"下周截止" 进入第一级
+    result = escalator.run_once(datetime.datetime(2026, 3, 14, 6, 0, tzinfo=UTC))
+    assert result["escalated"] == 2
+    assert _urgency(storage, soon) == 3 and _urgency(storage, later) == 0
+
+def test_user_changes_are_picked_up(storage):
+    engine = storage.db.get_bind()
+    todo_id = _add(storage, "无截止日期", None)
+    escalator = DeadlineEscalator(engine, steps=STEPS, timezone="UTC", batch_pause_ms=0)
+    assert escalator.run_once(NOW)["escalated"] == 0
+
+    storage.update_todo(todo_id, due_date=datetime.date(2026, 3, 10))
+    result = escalator.run_once(NOW + datetime.timedelta(seconds=30))
+    assert result["synced_tenants"] == 1 and result["escalated"] == 1
+    assert _urgency(storage, todo_id) == 2
+
+def test_sync_reads_only_changed_todos(storage):
+    engine = storage.db.get_bind()
+    ids = [_add(storage, f"下周截止{index}", datetime.date(2026, 3, 20)) for index in range(5)]
+    escalator = DeadlineEscalator(engine, steps=STEPS, timezone="UTC", batch_pause_ms=0)
+    assert escalator.run_once(NOW)["synced_todos"] == 5
+
+    # 无关的写入只读取被修改和新建的事项，不重新加载整个租户
+    storage.update_todo(ids[0], title="改名")
+    new_id = _add(storage, "新事项", datetime.date(2026, 3, 11))
+    result = escalator.run_once(NOW + datetime.timedelta(seconds=30))
+    assert result["synced_tenants"] == 1 and result["synced_todos"] == 2
+    assert result["escalated"] == 1 and result["scheduled"] == 6
+
+    # 完成的事项移出调度，不再升级；水位线回退的时间内上一轮修改过的事项会被重复读取
+    storage.update_todo(ids[1], completed=True)
+    result = escalator.run_once(datetime.datetime(2026, 3, 14, 6, 0, tzinfo=UTC))
+    assert result["synced_todos"] == 2 and result["escalated"] == 5
+    assert _urgency(storage, ids[1]) == -1 and _urgency(storage, new_id) == 3
@@ -0,0 +1,63 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.write_queue import GroupCommitWriter
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'group_commit.db'}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)"))
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+def _insert(name):
+    def operation(session):
+        session.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": name})
+        return name
+    return operation
+
+def _count(session_factory):
+    with session_factory() as session:
+        return session.execute(text("SELECT count(*) FROM items")).scalar()
+
+def test_concurrent_writes_share_commits(session_factory):
+    writer = GroupCommitWriter(session_factory, window_ms=20, max_batch=64)
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(writer.submit(_insert(f"item-{i}"))))
+               for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.stop()
+
+    stats = writer.get_stats()
+    assert sorted(results) == sorted(f"item-{i}" for i in range(20))
+    assert _count(session_factory) == 20
+    assert stats["operations"] == 20
+    assert stats["batches"] < 20
+    assert stats["max_batch_size"] > 1
+
+def test_failing_operation_only_fails_its_caller(session_factory):
+    writer = GroupCommitWriter(session_factory, window_ms=50, max_batch=64)
+    writer.submit(_insert("duplicate"))
+    errors, results = [], []
+
+    def submit(name):
+        try:
+            results.append(writer.submit(_insert(name)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit, args=(name,)) for name in ("a", "duplicate", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.stop()
+
+    assert len(errors) == 1
+    assert sorted(results) == ["a", "b"]
+    assert _count(session_factory) == 3
@@ -0,0 +1,88 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine, text
+from database.orm_models import Base
+from database.log_retention import AssignmentLogRetention, ROLLUP_WATERMARK_KEY
+
+NOW = datetime.datetime(2026, 3, 10, 12, 0, 0)
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'retention.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO todo_items (id, title, completed, final_priority, deleted) VALUES "
+                          "(1, 'a', 0, 100, 0), (2, 'b', 0, 100, 0)"))
+        conn.execute(text("INSERT INTO tenants (owner_id) VALUES ('default'), ('alice')"))
+    yield engine
+    engine.dispose()
+
+def _log(conn, todo_id, old, new, created_at, source="drag", owner_id="default"):
+    conn.execute(text(
+        "INSERT INTO assignment_logs (owner_id, todo_id, old_future_score, old_urgency_score, new_future_score, "
+        "new_urgency_score, source, created_at) VALUES (:owner_id, :todo_id, :of, :ou, :nf, :nu, :source, :created_at)"
+    ), {"owner_id": owner_id, "todo_id": todo_id, "of": old[0], "ou": old[1], "nf": new[0], "nu": new[1],
+        "source": source, "created_at": created_at})
+
+def _logs(engine):
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT todo_id, old_future_score, old_urgency_score, new_future_score, new_urgency_score "
+            "FROM assignment_logs ORDER BY id")).all()
+
+def test_rollup_then_compact_consecutive_moves(engine):
+    with engine.begin() as conn:
+        # 事项1连续拖动三次，净变更为 (0,0) -> (3,3)
+        _log(conn, 1, (0, 0), (1, 1), "2026-03-08 09:00:00")
+        _log(conn, 1, (1, 1), (2, 2), "2026-03-08 09:01:00")
+        _log(conn, 1, (2, 2), (3, 3), "2026-03-08 09:02:00", source="form")
+        # 事项2拖出又拖回，净变更为零
+        _log(conn, 2, (0, 0), (1, 0), "2026-03-08 10:00:00")
+        _log(conn, 2, (1, 0), (0, 0), "2026-03-08 10:00:30")
+        # 其他租户同一天的移动单独汇总，不参与本租户的压缩
+        _log(conn, 3, (0, 0), (2, 2), "2026-03-08 11:00:00", owner_id="alice")
+        # 今天的日志尚未汇总，不参与压缩
+        _log(conn, 1, (3, 3), (2, 2), "2026-03-10 08:00:00")
+        _log(conn, 1, (2, 2), (1, 1), "2026-03-10 08:00:10")
+
+    retention = AssignmentLogRetention(engine, max_age_days=0, max_per_todo=0, compact_gap_seconds=600,
+                                       batch_size=1, batch_pause_ms=0)
+    assert retention.rollup(today=NOW.date()) == 1
+    with engine.connect() as conn:
+        rollups = conn.execute(text("SELECT owner_id, day, source, moves, todos FROM assignment_log_daily "
+                                    "ORDER BY owner_id, source")).all()
+        assert conn.execute(text("SELECT value FROM schema_meta WHERE key = :key"),
+                            {"key": ROLLUP_WATERMARK_KEY}).scalar() == "2026-03-09"
+    assert [tuple(row) for row in rollups] == [("alice", "2026-03-08", "drag", 1, 1),
+                                               ("default", "2026-03-08", "drag", 4, 2),
+                                               ("default", "2026-03-08", "form", 1, 1)]
+
+    assert retention.compact() == 4
+    assert [tuple(row) for row in _logs(engine)] == [(1, 0, 0, 3, 3), (3, 0, 0, 2, 2), (1, 3, 3, 2, 2), (1, 2, 2, 1, 1)]
+    # 再次执行不会重复处理
+    assert retention.rollup(today=NOW.date()) == 0
+    assert retention.compact() == 0
+
+def test_retention_is_disabled_by_default(engine):
+    with engine.begin() as conn:
+        _log(conn, 1, (0, 0), (1, 1), "2020-01-01 00:00:00")
+        _log(conn, 1, (1, 1), (2, 2), "2020-01-01 00:00:10")
+
+    result = AssignmentLogRetention(engine, batch_pause_ms=0).run_once()
+    assert result["rolled_up_days"] == 1
+    assert result["compacted"] == result["pruned_by_age"] == result["pruned_by_count"] == 0
+    assert len(_logs(engine)) == 2
+
+def test_prune_by_age_count_and_orphans(engine):
+    with engine.begin() as conn:
+        _log(conn, 1, (0, 0), (1, 1), "2025-01-01 00:00:00")
+        for minute in range(5):
+            _log(conn, 2, (0, minute), (0, minute + 1), f"2026-03-01 0{minute}:00:00")
+        _log(conn, 99, (0, 0), (1, 1), "2026-03-01 00:00:00")
+
+    retention = AssignmentLogRetention(engine, max_age_days=30, max_per_todo=2, batch_size=2, batch_pause_ms=0)
+    retention.rollup(today=NOW.date())
+    assert retention.prune_by_age(now=NOW) == 1
+    assert retention.prune_by_count() == 3
+    assert retention.prune_orphans() == 1
+    assert [tuple(row) for row in _logs(engine)] == [(2, 0, 3, 0, 4), (2, 0, 4, 0, 5)]
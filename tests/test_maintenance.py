@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from database.database import create_database_engine
+from database.init_db import init_db
+from database.maintenance import SQLiteMaintenance
+from main import app
+
+client = TestClient(app)
+
+def test_checkpoint_optimize_and_incremental_vacuum(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'maintenance.db'}")
+    init_db(backfills="inline", engine=engine)
+    with engine.begin() as conn:
+        conn.execute(text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3000) "
+                          "INSERT INTO todo_items (title, description, completed, final_priority, deleted) "
+                          "SELECT 'todo ' || i, printf('%.400c', 'x'), 0, 100, 0 FROM n"))
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM todo_items"))
+
+    maintenance = SQLiteMaintenance(engine, passive_pages=10, truncate_bytes=1, optimize_interval=3600,
+                                    vacuum_free_pages=10, vacuum_pages_per_run=100000)
+    status = maintenance.get_status()
+    assert status["auto_vacuum"] == "incremental" and status["journal_mode"] == "wal"
+    assert status["wal_bytes"] > 0 and status["freelist_count"] > 10
+
+    result = maintenance.run_once()
+    assert result["checkpoint"]["mode"] == "TRUNCATE" and result["checkpoint"]["lag"] == 0
+    assert result["optimized"] and result["vacuumed_pages"] >= status["freelist_count"]
+
+    after = maintenance.get_status()
+    assert after["freelist_count"] == 0 and after["page_count"] < status["page_count"]
+    assert after["checkpoint_lag"] == 0
+    # 优化间隔未到时不再执行
+    assert not maintenance.run_once()["optimized"]
+    engine.dispose()
+
+def test_database_admin_endpoints():
+    status = client.get("/api/admin/database").json()
+    assert {"wal_bytes", "page_count", "freelist_count", "checkpoint_lag"} <= set(status)
+    result = client.post("/api/admin/database/maintenance").json()
+    assert {"checkpoint", "optimized", "vacuumed_pages"} <= set(result)
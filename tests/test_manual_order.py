@@ -0,0 +1,91 @@
+import random
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.db_storage import DatabaseTodoStorage
+from database.manual_order import SortKeyRebalancer
+from database.orm_models import Base
+from main import app
+from models.schemas import TodoSchema
+from utils.fractional_index import key_between, spread_keys
+
+client = TestClient(app)
+# 独立租户，不受其他测试数据影响
+HEADERS = {"X-Tenant-ID": "manual-order-tests"}
+
+def test_key_between_keeps_order_under_random_inserts():
+    rng = random.Random(3)
+    keys = [key_between(None, None)]
+    for _ in range(2000):
+        position = rng.randrange(len(keys) + 1)
+        before = keys[position - 1] if position else None
+        after = keys[position] if position < len(keys) else None
+        key = key_between(before, after)
+        assert (before is None or before < key) and (after is None or key < after)
+        keys.insert(position, key)
+    assert keys == sorted(keys)
+    spread = spread_keys(5000)
+    assert spread == sorted(spread) and len(set(spread)) == 5000 and max(map(len, spread)) == 4
+    with pytest.raises(ValueError):
+        key_between("b", "a")
+
+def test_appended_keys_stay_short():
+    keys = [key_between(None, None)]
+    for _ in range(100_000):
+        keys.append(key_between(keys[-1], None))
+    assert keys == sorted(keys)
+    assert len(keys[600]) == 3 and max(map(len, keys)) == 4
+
+@pytest.fixture
+def storage(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'manual.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        yield DatabaseTodoStorage(session, "manual-order-storage")
+    engine.dispose()
+
+def _keys(storage):
+    return storage.db.execute(text("SELECT id, sort_key FROM todo_items WHERE deleted = 0 "
+                                   "ORDER BY quadrant, sort_key, id")).all()
+
+def test_equal_keys_and_long_keys_are_rebalanced(storage):
+    todos = [storage.add_todo(TodoSchema(title=f"t{index}", future_score=1, urgency_score=1)) for index in range(4)]
+    # 模拟并发追加得到相同的键
+    storage.db.execute(text("UPDATE todo_items SET sort_key = 'a0'"))
+    storage.db.commit()
+    moved = storage.move_todo(todos[0].id, prev_id=todos[2].id, next_id=todos[3].id)
+    assert [todo.id for todo in storage.get_quadrant_todos("q1", 10)] == [todos[1].id, todos[2].id, todos[0].id, todos[3].id]
+    assert len({key for _, key in _keys(storage)}) == 4 and moved.sort_key
+
+    # 反复插入到同一事项之后，小数部分逐渐变长
+    for _ in range(30):
+        storage.move_todo(todos[3].id, prev_id=todos[1].id)
+        storage.move_todo(todos[0].id, prev_id=todos[1].id)
+    order = [todo_id for todo_id, _ in _keys(storage)]
+    assert max(len(key) for _, key in _keys(storage)) > 4
+
+    rebalancer = SortKeyRebalancer(storage.db.get_bind(), max_length=4, batch_pause_ms=0)
+    assert rebalancer.run_once() == {"quadrants": 1, "rebalanced": 4}
+    storage.db.expire_all()
+    assert [todo_id for todo_id, _ in _keys(storage)] == order
+    assert max(len(key) for _, key in _keys(storage)) == 2
+    assert rebalancer.run_once() == {"quadrants": 0, "rebalanced": 0}
+
+def test_appends_to_a_quadrant_keep_keys_bounded(storage):
+    for index in range(300):
+        storage.add_todo(TodoSchema(title=f"t{index}", future_score=1, urgency_score=1))
+    keys = [key for _, key in _keys(storage)]
+    assert [todo.title for todo in storage.get_quadrant_todos("q1", 300)] == [f"t{index}" for index in range(300)]
+    assert keys == sorted(keys) and max(map(len, keys)) <= 3
+
+def test_move_endpoint():
+    ids = [client.post("/api/todos", headers=HEADERS, json={"title": title, "future_score": 2, "urgency_score": -2}).json()["id"]
+           for title in ("甲", "乙", "丙")]
+    response = client.post(f"/api/todos/{ids[2]}/move", headers=HEADERS, json={"next_id": ids[0]})
+    assert response.status_code == 200 and response.json()["sort_key"]
+    quadrant = client.get("/api/todos/quadrants", headers=HEADERS).json()["q2"]
+    assert [todo["title"] for todo in quadrant] == ["丙", "甲", "乙"]
+
+    assert client.post(f"/api/todos/{ids[0]}/move", headers=HEADERS, json={}).status_code == 400
+    assert client.post("/api/todos/999999/move", headers=HEADERS, json={"prev_id": ids[0]}).status_code == 404
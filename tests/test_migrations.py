@@ -0,0 +1,219 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from database import init_db as init_db_module
+from database.migrations import MigrationRunner, MIGRATIONS
+from database.orm_models import Base
+from utils.fractional_index import key_between
+from utils.priority_calculator import calculate_priority
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """缺少分值字段的旧版数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE todo_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT,
+                completed INTEGER NOT NULL DEFAULT 0,
+                start_time TEXT,
+                end_time TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+        """))
+        conn.execute(text("INSERT INTO todo_items (title) VALUES ('a'), ('b'), ('c'), ('d'), ('e')"))
+    yield engine
+    engine.dispose()
+
+def _todos_version(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version FROM data_versions WHERE key = 'todos'")).scalar()
+
+def test_additive_upgrade_and_batched_backfill(legacy_engine):
+    progress = []
+    runner = MigrationRunner(legacy_engine, batch_size=2, batch_pause_ms=0,
+                             progress=lambda version, name, done, total: progress.append((version, done, total)))
+    applied = runner.upgrade(backfills="skip")
+    assert applied == [migration.version for migration in MIGRATIONS]
+
+    columns = {column["name"] for column in inspect(legacy_engine).get_columns("todo_items")}
+    assert {"future_score", "urgency_score", "final_priority"} <= columns
+
+    with legacy_engine.begin() as conn:
+        conn.execute(text("UPDATE todo_items SET future_score = 2, urgency_score = 1"))
+    runner.run_backfills()
+
+    assert [done for version, done, total in progress if version == 2] == [2, 4, 6]
+    with legacy_engine.connect() as conn:
+        priorities = conn.execute(text("SELECT DISTINCT final_priority FROM todo_items")).scalars().all()
+    assert priorities == [calculate_priority(2, 1)]
+
+    status = runner.status()
+    assert status["current"] == status["head"]
+    assert all(item["applied"] for item in status["migrations"])
+
+def test_backfill_resumes_from_cursor(legacy_engine):
+    calls = []
+
+    def interrupt(version, name, done, total):
+        calls.append((version, done))
+        if len(calls) == 1:
+            raise RuntimeError("模拟中断")
+
+    runner = MigrationRunner(legacy_engine, batch_size=2, batch_pause_ms=0, progress=interrupt)
+    with pytest.raises(RuntimeError):
+        runner.upgrade(backfills="inline")
+
+    runner.run_backfills()
+    assert [done for version, done in calls if version == 2] == [2, 4, 6]
+    assert runner.upgrade() == []
+
+def test_legacy_rebuild_requires_offline(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE todo_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT,
+                completed INTEGER NOT NULL DEFAULT 0,
+                priority TEXT NOT NULL,
+                start_time TEXT,
+                end_time TEXT,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+        """))
+        conn.execute(text("INSERT INTO todo_items (title, priority) VALUES ('legacy', 'high')"))
+
+    runner = MigrationRunner(engine, batch_pause_ms=0)
+    assert runner.upgrade() == []
+    assert runner.upgrade(allow_offline=True) == [migration.version for migration in MIGRATIONS]
+
+    columns = {column["name"] for column in inspect(engine).get_columns("todo_items")}
+    assert "priority" not in columns
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT title, final_priority FROM todo_items")).one() == ("legacy", 100)
+    engine.dispose()
+
+def test_init_db_skips_create_all_when_fingerprint_matches(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    monkeypatch.setattr(init_db_module, "get_engine", lambda: engine)
+    monkeypatch.setattr(init_db_module, "_initialized", False)
+
+    init_db_module.init_db(backfills="skip")
+    assert init_db_module._stored_fingerprint(engine) == init_db_module.schema_fingerprint()
+
+    calls = []
+    monkeypatch.setattr(Base.metadata, "create_all", lambda *args, **kwargs: calls.append(kwargs))
+    init_db_module.init_db(backfills="skip")
+    assert calls == []
+    engine.dispose()
+
+def test_thin_recycle_bin_keeps_only_soft_deleted_entries(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("UPDATE todo_items SET deleted = 1 WHERE title IN ('a', 'b')"))
+        conn.execute(text("""
+            CREATE TABLE recycle_bin_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                original_id INTEGER NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP,
+                deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        # 第三条对应的主表记录不存在，精简时丢弃
+        conn.execute(text("INSERT INTO recycle_bin_items (original_id, title, deleted_at) VALUES "
+                          "(1, 'a', '2026-01-01 00:00:00'), (2, 'b', '2026-01-02 00:00:00'), (99, 'x', NULL)"))
+
+    MigrationRunner(legacy_engine, batch_pause_ms=0).upgrade(backfills="skip")
+
+    columns = [column["name"] for column in inspect(legacy_engine).get_columns("recycle_bin_items")]
+    assert columns == ["id", "original_id", "deleted_at", "owner_id"]  # owner_id 由迁移 0007 添加
+    with legacy_engine.connect() as conn:
+        rows = conn.execute(text("SELECT original_id, deleted_at FROM recycle_bin_items ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, "2026-01-01 00:00:00"), (2, "2026-01-02 00:00:00")]
+
+def test_tenant_partitioning_assigns_existing_rows_to_default_tenant(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE system_settings (key VARCHAR(50) PRIMARY KEY, value VARCHAR(500), "
+                          "blob_value BLOB, content_type VARCHAR(100), updated_at DATETIME)"))
+        conn.execute(text("INSERT INTO system_settings (key, content_type) VALUES ('wallpaper', 'image/png')"))
+        conn.execute(text("CREATE TABLE tenants (owner_id VARCHAR(64) PRIMARY KEY, created_at DATETIME)"))
+
+    MigrationRunner(legacy_engine, batch_pause_ms=0).upgrade(backfills="skip")
+
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT DISTINCT owner_id FROM todo_items")).scalars().all() == ["default"]
+        assert conn.execute(text("SELECT owner_id FROM tenants")).scalars().all() == ["default"]
+        assert tuple(conn.execute(text("SELECT owner_id, key, content_type FROM system_settings")).one()) == \
+            ("default", "wallpaper", "image/png")
+    assert inspect(legacy_engine).get_pk_constraint("system_settings")["constrained_columns"] == ["owner_id", "key"]
+    indexes = {index["name"]: index["column_names"] for index in inspect(legacy_engine).get_indexes("todo_items")}
+    assert indexes["ix_todo_items_active_priority"][0] == "owner_id"
+
+def test_time_columns_are_backfilled_as_minutes(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("UPDATE todo_items SET start_time = '09:30', end_time = '11:00' WHERE title = 'a'"))
+        conn.execute(text("UPDATE todo_items SET start_time = '25:00' WHERE title = 'b'"))
+    Base.metadata.tables["data_versions"].create(legacy_engine)
+
+    MigrationRunner(legacy_engine, batch_size=2, batch_pause_ms=0).upgrade(backfills="inline")
+
+    with legacy_engine.connect() as conn:
+        rows = conn.execute(text("SELECT title, start_minute, end_minute, start_time, end_time FROM todo_items "
+                                 "WHERE title IN ('a', 'b') ORDER BY title")).all()
+    assert [tuple(row) for row in rows] == [("a", 570, 660, None, None), ("b", None, None, None, None)]
+    # 时间回填改写的两行在同一批中（1 次），手动排序回填 5 行分 3 批（3 次）
+    assert _todos_version(legacy_engine) == 4
+    indexes = {index["name"] for index in inspect(legacy_engine).get_indexes("todo_items")}
+    assert "ix_todo_items_active_schedule" in indexes
+
+def test_manual_order_backfill_follows_priority(legacy_engine):
+    Base.metadata.tables["data_versions"].create(legacy_engine)
+    MigrationRunner(legacy_engine, batch_size=2, batch_pause_ms=0).upgrade(backfills="skip")
+    with legacy_engine.begin() as conn:
+        conn.execute(text("UPDATE todo_items SET future_score = 2, urgency_score = 1 WHERE title IN ('a', 'c')"))
+        conn.execute(text("UPDATE todo_items SET future_score = 3, urgency_score = 3 WHERE title = 'd'"))
+    MigrationRunner(legacy_engine, batch_size=2, batch_pause_ms=0).run_backfills()
+
+    with legacy_engine.connect() as conn:
+        rows = conn.execute(text("SELECT quadrant, title FROM todo_items ORDER BY quadrant, sort_key, id")).all()
+    assert [tuple(row) for row in rows] == [("q1", "d"), ("q1", "a"), ("q1", "c"), ("unassigned", "b"), ("unassigned", "e")]
+    # 5 行分 3 批回填，每批递增一次
+    assert _todos_version(legacy_engine) == 3
+
+def test_log_rollup_is_rebuilt_with_owner(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE assignment_log_daily (day VARCHAR(10) NOT NULL, source VARCHAR(20) NOT NULL, "
+                          "moves INTEGER NOT NULL, todos INTEGER NOT NULL, PRIMARY KEY (day, source))"))
+        conn.execute(text("INSERT INTO assignment_log_daily VALUES ('2026-03-01', 'drag', 3, 2)"))
+
+    MigrationRunner(legacy_engine, batch_pause_ms=0).upgrade(backfills="skip")
+
+    with legacy_engine.connect() as conn:
+        assert tuple(conn.execute(text("SELECT owner_id, day, source, moves, todos FROM assignment_log_daily")).one()) == \
+            ("default", "2026-03-01", "drag", 3, 2)
+    assert inspect(legacy_engine).get_pk_constraint("assignment_log_daily")["constrained_columns"] == \
+        ["owner_id", "day", "source"]
+
+def test_old_sort_keys_get_an_integer_head(legacy_engine):
+    runner = MigrationRunner(legacy_engine, batch_pause_ms=0)
+    runner.upgrade(backfills="skip")
+    with legacy_engine.begin() as conn:
+        # 旧格式的纯小数键
+        conn.execute(text("UPDATE todo_items SET quadrant = 'q1', sort_key = CASE title "
+                          "WHEN 'a' THEN 'k' WHEN 'b' THEN 'V' WHEN 'c' THEN 'zzV' ELSE NULL END"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 12"))
+    runner.upgrade(backfills="skip")
+
+    with legacy_engine.connect() as conn:
+        rows = conn.execute(text("SELECT title, sort_key FROM todo_items WHERE sort_key IS NOT NULL "
+                                 "ORDER BY sort_key")).all()
+    assert [tuple(row) for row in rows] == [("b", "a0V"), ("a", "a0k"), ("c", "a0zzV")]
+    assert key_between(rows[-1][1], None) == "a1"
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from database.database import get_engine
+from main import app
+
+client = TestClient(app)
+
+def _cell(stats, future_score, urgency_score):
+    return next(cell for cell in stats["grid"]
+                if cell["future_score"] == future_score and cell["urgency_score"] == urgency_score)
+
+def test_quadrant_stats_counts_cells_and_histograms():
+    before = client.get("/api/stats/quadrants").json()
+    created = [
+        client.post("/api/todos", json={"title": "Q1 done", "future_score": 3, "urgency_score": 2, "completed": True}).json(),
+        client.post("/api/todos", json={"title": "Q1 open", "future_score": 3, "urgency_score": 2}).json(),
+        client.post("/api/todos", json={"title": "Q4", "future_score": -1, "urgency_score": 0}).json(),
+        client.post("/api/todos", json={"title": "Unscored"}).json(),
+    ]
+    after = client.get("/api/stats/quadrants").json()
+
+    assert len(after["grid"]) == 49
+    cell = _cell(after, 3, 2)
+    assert cell["quadrant"] == "q1" and cell["final_priority"] == 480
+    assert cell["total"] - _cell(before, 3, 2)["total"] == 2
+    assert cell["completed"] - _cell(before, 3, 2)["completed"] == 1
+    assert after["quadrants"]["q1"]["future_score_histogram"]["3"] - before["quadrants"]["q1"]["future_score_histogram"]["3"] == 2
+    assert after["quadrants"]["q4"]["total"] - before["quadrants"]["q4"]["total"] == 1
+    assert after["quadrants"]["unassigned"]["total"] - before["quadrants"]["unassigned"]["total"] == 1
+    assert after["total"] - before["total"] == 4
+    assert 0.0 <= after["completion_ratio"] <= 1.0
+
+    for todo in created:
+        client.delete(f"/api/todos/{todo['id']}")
+    assert client.get("/api/stats/quadrants").json()["total"] == before["total"]
+
+def test_score_groups_use_partial_covering_index():
+    with get_engine().connect() as conn:
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT future_score, urgency_score, completed, count(*) FROM todo_items "
+            "WHERE owner_id = 'default' AND deleted = 0 GROUP BY future_score, urgency_score, completed"))
+    assert "COVERING INDEX ix_todo_items_score_cells" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_top_todos_use_active_priority_index():
+    with get_engine().connect() as conn:
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM todo_items WHERE owner_id = 'default' AND deleted = 0 "
+            "ORDER BY final_priority DESC, id LIMIT 20"))
+    assert "ix_todo_items_active_priority" in plan
+    assert "TEMP B-TREE" not in plan
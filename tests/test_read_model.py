@@ -0,0 +1,65 @@
+import pytest
+from collections import OrderedDict
+from fastapi.testclient import TestClient
+from database import read_model as read_model_module
+from database.database import SessionLocal
+from database.data_version import bump_data_version
+from database.read_model import TodoReadModel
+from models.schemas import TodoSchema
+from main import app
+
+client = TestClient(app)
+
+def _todo(todo_id, future, urgency, priority):
+    return TodoSchema(id=todo_id, title=f"t{todo_id}", future_score=future, urgency_score=urgency,
+                      final_priority=priority)
+
+def test_sorted_index_and_buckets():
+    model = TodoReadModel()
+    model.load(1, [_todo(1, 2, 2, 464), _todo(2, 3, -1, 399), _todo(3, 1, 1, 432), _todo(4, None, None, 100)])
+    assert [todo.id for todo in model.top(2)] == [1, 3]
+    assert [todo.id for todo in model.top(10, "q2")] == [2]
+    assert [todo.id for todo in model.top(10, "unassigned")] == [4]
+
+    model.apply(2, upserts=[_todo(2, 3, 3, 496)], removals=[1])
+    assert [todo.id for todo in model.top(10)] == [2, 3, 4]
+    assert model.top(10, "q2") == []
+    assert model.version == 2
+
+def test_version_gap_invalidates():
+    model = TodoReadModel()
+    model.load(5, [_todo(1, 1, 1, 432)])
+    model.apply(7, upserts=[_todo(2, 1, 1, 432)])
+    assert not model.loaded
+    model.ensure_current(7, lambda: [_todo(1, 1, 1, 432), _todo(2, 1, 1, 432)])
+    assert model.version == 7 and len(model.get_all()) == 2
+
+@pytest.fixture
+def read_model(monkeypatch):
+    model = TodoReadModel()
+    monkeypatch.setattr(read_model_module, "READ_MODEL_ENABLED", True)
+    monkeypatch.setattr(read_model_module, "_read_models", OrderedDict(default=model))
+    return model
+
+def test_write_through_and_cross_process_invalidation(read_model):
+    created = client.post("/api/todos", json={"title": "Read Model", "future_score": 3, "urgency_score": 3}).json()
+    todos = client.get("/api/todos").json()
+    assert str(created["id"]) in todos
+    loads = read_model.loads
+
+    client.patch(f"/api/todos/{created['id']}", json={"future_score": -3})
+    top = client.get("/api/todos/top", params={"quadrant": "q3", "limit": 1000}).json()
+    assert created["id"] in [todo["id"] for todo in top]
+    assert read_model.loads == loads  # 本进程写入通过写穿更新，无需重新加载
+
+    # 模拟其他工作进程提交的写入
+    with SessionLocal() as session:
+        bump_data_version(session)
+        session.commit()
+    quadrants = client.get("/api/todos/quadrants").json()
+    assert created["id"] in [todo["id"] for todo in quadrants["q3"]]
+    assert read_model.loads == loads + 1
+
+    client.delete(f"/api/todos/{created['id']}")
+    assert str(created["id"]) not in client.get("/api/todos").json()
+    assert client.get("/api/todos/top", params={"quadrant": "q9"}).status_code == 400
@@ -0,0 +1,50 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database import db_storage
+from database.db_storage import DatabaseTodoStorage
+from database.orm_models import Base
+from database.recycle_purge import RecycleBinPurger
+
+NOW = datetime.datetime(2026, 3, 10, 12, 0, 0)
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'purge.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for todo_id in range(1, 8):
+            # 1-5 早已删除，6 刚删除，7 仍为活跃事项
+            conn.execute(text("INSERT INTO todo_items (id, title, completed, final_priority, deleted) "
+                              "VALUES (:id, :title, 0, 100, :deleted)"),
+                         {"id": todo_id, "title": f"t{todo_id}", "deleted": todo_id != 7})
+            if todo_id != 7:
+                deleted_at = "2026-01-01 00:00:00" if todo_id <= 5 else "2026-03-09 00:00:00"
+                conn.execute(text("INSERT INTO recycle_bin_items (original_id, deleted_at) VALUES (:id, :deleted_at)"),
+                             {"id": todo_id, "deleted_at": deleted_at})
+            conn.execute(text("INSERT INTO assignment_logs (todo_id, new_future_score, new_urgency_score) "
+                              "VALUES (:id, 1, 1)"), {"id": todo_id})
+    yield engine
+    engine.dispose()
+
+def _ids(engine, table, column):
+    with engine.connect() as conn:
+        return sorted(conn.execute(text(f"SELECT {column} FROM {table}")).scalars())
+
+def test_purge_expired_in_batches(engine):
+    purger = RecycleBinPurger(engine, ttl_days=30, batch_size=2, batch_pause_ms=0)
+    assert purger.purge_expired(now=NOW) == {"purged": 5, "batches": 3}
+    assert _ids(engine, "recycle_bin_items", "original_id") == [6]
+    assert _ids(engine, "todo_items", "id") == [6, 7]
+    # 分值变更日志随事项在同一事务中删除
+    assert _ids(engine, "assignment_logs", "todo_id") == [6, 7]
+    assert purger.purge_expired(now=NOW)["purged"] == 0
+
+def test_clear_recycle_bin_is_batched(engine, monkeypatch):
+    monkeypatch.setattr(db_storage, "RECYCLE_BIN_PURGE_BATCH_SIZE", 4)
+    with sessionmaker(bind=engine)() as session:
+        DatabaseTodoStorage(session).clear_recycle_bin()
+    assert _ids(engine, "recycle_bin_items", "original_id") == []
+    assert _ids(engine, "todo_items", "id") == [7]
+    assert _ids(engine, "assignment_logs", "todo_id") == [7]
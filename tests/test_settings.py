@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from database.orm_models import Base
+from main import app
+from services.setting_service import SettingService, get_settings_cache
+from utils.exceptions import PreconditionFailedException
+
+client = TestClient(app)
+# 独立租户，不受其他测试数据影响
+HEADERS = {"X-Tenant-ID": "settings-tests"}
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'settings.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
+
+def test_settings_are_cached_until_version_changes(db):
+    service = SettingService(db, "cache-tests")
+    cache = get_settings_cache()
+    assert service.get_settings().bg_blur == 20
+    hits = cache.hits
+    first = service.get_cached()
+    assert cache.hits == hits + 1
+
+    # 模拟另一个工作进程写入：修改数据并递增版本
+    other = SettingService(db, "cache-tests")
+    other.update_settings({"theme": "dark", "bg_blur": 35})
+    assert service.get_cached().etag != first.etag
+    assert service.get_settings().theme == "dark" and service.get_settings().bg_blur == 35
+
+    # 不合法的存量数据按默认值处理，其余项不受影响
+    db.execute(text("UPDATE system_settings SET value = '500' WHERE key = 'bg_blur'"))
+    db.execute(text("UPDATE data_versions SET version = version + 1"))
+    db.commit()
+    settings = service.get_settings()
+    assert settings.bg_blur == 20 and settings.theme == "dark"
+
+    service.update_settings({"theme": None})
+    assert service.get_settings().theme is None
+
+    with pytest.raises(PreconditionFailedException):
+        service.update_settings({"bg_blur": 1}, expected_etag=first.etag)
+    with pytest.raises(ValueError):
+        service.update_settings({"language": "en"})
+
+def test_settings_endpoints_with_etag():
+    response = client.get("/api/settings", headers=HEADERS)
+    assert response.status_code == 200 and response.json()["spotlight_type"] == "glow"
+    etag = response.headers["etag"]
+    assert client.get("/api/settings", headers={**HEADERS, "If-None-Match": etag}).status_code == 304
+
+    response = client.put("/api/settings", headers={**HEADERS, "If-Match": etag},
+                          json={"theme": "dark", "auto_trash": True})
+    assert response.status_code == 200
+    assert response.json()["theme"] == "dark" and response.json()["auto_trash"] is True
+    assert response.headers["etag"] != etag
+    assert client.get("/api/settings", headers={**HEADERS, "If-None-Match": etag}).json()["theme"] == "dark"
+
+    # 旧的 ETag 不能覆盖其他请求的修改
+    assert client.put("/api/settings", headers={**HEADERS, "If-Match": etag}, json={"theme": "light"}).status_code == 412
+    assert client.put("/api/settings", headers=HEADERS, json={"bg_opacity": 2}).status_code == 422
+
+def test_wallpaper_etag():
+    client.post("/api/settings/wallpaper", headers=HEADERS, files={"file": ("a.png", b"png-bytes", "image/png")})
+    assert client.get("/api/settings", headers=HEADERS).json()["has_wallpaper"] is True
+    response = client.get("/api/settings/wallpaper", headers=HEADERS)
+    assert response.content == b"png-bytes"
+    etag = response.headers["etag"]
+    assert client.get("/api/settings/wallpaper", headers={**HEADERS, "If-None-Match": etag}).status_code == 304
+
+    client.post("/api/settings/wallpaper", headers=HEADERS, files={"file": ("b.png", b"other", "image/png")})
+    assert client.get("/api/settings/wallpaper", headers={**HEADERS, "If-None-Match": etag}).content == b"other"
+    client.delete("/api/settings/wallpaper", headers=HEADERS)
+    assert client.get("/api/settings", headers=HEADERS).json()["has_wallpaper"] is False
+    assert client.get("/api/settings/wallpaper", headers=HEADERS).status_code == 404
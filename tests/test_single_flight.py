@@ -0,0 +1,58 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    executions = []
+
+    def compute():
+        executions.append(1)
+        started.set()
+        release.wait(5)
+        return b"payload"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", compute)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", compute))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    while flight.get_stats()["calls"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(executions) == 1
+    assert {result for result, _ in results} == {b"payload"}
+    assert all(shared for _, shared in results)
+    stats = flight.get_stats()
+    assert stats["executions"] == 1 and stats["shared"] == 4 and stats["coalescing_ratio"] == 0.8
+    # 计算完成后不保留结果，下一次调用重新执行
+    flight.do("key", compute)
+    assert len(executions) == 2
+
+def test_failed_call_is_not_kept():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.get_stats()["in_flight"] == 0
+
+def test_coalesced_routes_reflect_writes():
+    client = TestClient(app)
+    before = client.get("/api/stats").json()["total_active"]
+    client.post("/api/todos", json={"title": "合并测试"})
+    assert client.get("/api/stats").json()["total_active"] == before + 1
+    todos = client.get("/api/todos").json()
+    assert any(todo["title"] == "合并测试" for todo in todos.values())
+    assert client.get("/api/admin/single-flight").json()["calls"] >= 3
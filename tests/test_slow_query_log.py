@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from database.slow_query_log import SlowQueryRecorder
+from main import app
+
+client = TestClient(app)
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, score INTEGER)"))
+        conn.execute(text("CREATE INDEX ix_items_score ON items(score)"))
+    yield engine
+    engine.dispose()
+
+def test_records_full_scan_with_plan(engine):
+    recorder = SlowQueryRecorder(threshold_ms=0, capacity=10)
+    recorder.install(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT count(*) FROM items WHERE name = :name"), {"name": "a"}).scalar()
+
+    entry = recorder.get_entries()[0]
+    assert "FROM items" in entry["sql"]
+    assert entry["parameters"] == ["str"]
+    assert entry["plan"] and entry["full_scan"] is True
+
+def test_index_search_is_not_full_scan(engine):
+    recorder = SlowQueryRecorder(threshold_ms=0, capacity=10)
+    recorder.install(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT id FROM items WHERE score = :score"), {"score": 1}).all()
+
+    entry = recorder.get_entries()[0]
+    assert entry["parameters"] == ["int"]
+    assert entry["full_scan"] is False
+
+def test_ring_buffer_capacity_and_threshold(engine):
+    recorder = SlowQueryRecorder(threshold_ms=0, capacity=2)
+    recorder.install(engine)
+    with engine.connect() as conn:
+        for _ in range(5):
+            conn.execute(text("SELECT 1")).scalar()
+    assert len(recorder.get_entries()) == 2
+    assert recorder.get_summary()["total_recorded"] == 5
+
+    recorder.uninstall(engine)
+    slow_only = SlowQueryRecorder(threshold_ms=10_000, capacity=2)
+    slow_only.install(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1")).scalar()
+    assert slow_only.get_entries() == []
+
+def test_failed_statements_leave_no_state_on_connection(engine):
+    recorder = SlowQueryRecorder(threshold_ms=0, capacity=10)
+    recorder.install(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.rollback()
+        conn.execute(text("SELECT 1")).scalar()
+        assert "query_start_time" not in conn.info
+    assert [entry["sql"] for entry in recorder.get_entries()] == ["SELECT 1"]
+
+def test_slow_queries_endpoint():
+    response = client.get("/api/admin/slow-queries")
+    assert response.status_code == 200
+    data = response.json()
+    assert "threshold_ms" in data
+    assert isinstance(data["entries"], list)
+
+    response = client.delete("/api/admin/slow-queries")
+    assert response.status_code == 200
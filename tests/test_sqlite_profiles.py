@@ -0,0 +1,20 @@
+import pytest
+from database.database import create_database_engine
+from database.sqlite_profiles import get_profile, read_pragmas
+
+@pytest.mark.parametrize("profile, expected", [
+    ("durable", {"synchronous": 2, "mmap_size": 0, "page_size": 4096}),
+    ("throughput", {"synchronous": 1, "cache_spill": 0, "wal_autocheckpoint": 4000, "page_size": 8192}),
+    ("memory", {"cache_size": -2000, "mmap_size": 0, "temp_store": 1}),
+])
+def test_profile_is_applied_on_connect(tmp_path, profile, expected):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'profile.db'}", sqlite_profile=profile)
+    with engine.connect() as conn:
+        pragmas = read_pragmas(conn)
+    engine.dispose()
+    assert pragmas["journal_mode"] == "wal" and pragmas["auto_vacuum"] == 2
+    assert {name: pragmas[name] for name in expected} == expected
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        get_profile("turbo")
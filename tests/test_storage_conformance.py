@@ -0,0 +1,232 @@
+"""存储后端一致性测试：同一组用例分别在数据库存储和内存存储上运行"""
+import datetime
+import pytest
+from sqlalchemy.orm import Session
+from database.database import create_database_engine
+from database.db_storage import DatabaseTodoStorage
+from database.init_db import init_db
+from database.memory_storage import InMemoryStore, InMemoryTodoStorage
+from models.schemas import TodoSchema
+from services.todo_service import TodoService
+
+@pytest.fixture(params=["database", "memory"])
+def make_storage(request, tmp_path):
+    """返回 owner_id -> 存储实例 的工厂，同一测试中的实例共享同一份数据"""
+    if request.param == "memory":
+        store = InMemoryStore()
+        yield lambda owner_id="default": InMemoryTodoStorage(store, owner_id)
+        return
+
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'conformance.db'}")
+    init_db(backfills="inline", engine=engine)
+    sessions = []
+
+    def _make(owner_id="default"):
+        sessions.append(Session(engine, autoflush=False, expire_on_commit=False))
+        return DatabaseTodoStorage(sessions[-1], owner_id)
+
+    yield _make
+    for session in sessions:
+        session.close()
+    engine.dispose()
+
+@pytest.fixture
+def storage(make_storage):
+    return make_storage()
+
+def _add(storage, title, future=None, urgency=None, **fields):
+    return storage.add_todo(TodoSchema(title=title, future_score=future, urgency_score=urgency, **fields))
+
+def test_crud_and_priority(storage):
+    created = _add(storage, "A", 2, 2, description="d", start_time="09:00")
+    unassigned = _add(storage, "B")
+    assert created.id is not None and unassigned.id > created.id
+    assert (created.final_priority, unassigned.final_priority) == (464, 100)
+    assert storage.get_todo_by_id(created.id) == created
+
+    assert storage.update_todo(created.id, future_score=-1, completed=True)
+    updated = storage.get_todo_by_id(created.id)
+    assert (updated.future_score, updated.completed, updated.final_priority) == (-1, True, 266)
+    assert storage.update_todo(created.id, future_score=None)
+    assert storage.get_todo_by_id(created.id).final_priority == 100
+    assert storage.update_todo(created.id, title="A")  # 无变化也视为成功
+    assert not storage.update_todo(999999, title="x")
+    assert set(storage.get_all_todos()) == {created.id, unassigned.id}
+
+def test_recycle_bin_semantics(storage):
+    service = TodoService(storage)
+    ids = [_add(storage, f"t{i}", 1, 1).id for i in range(4)]
+    for todo_id in ids:
+        assert service.delete_todo(todo_id).id == todo_id
+    assert service.delete_todo(ids[0]) is None
+    assert storage.get_todo_by_id(ids[0]) is None
+    assert not storage.update_todo(ids[0], title="x")
+    assert set(storage.get_recycle_bin()) == set(ids)
+    assert storage.get_stats()["in_recycle_bin"] == 4
+
+    restored = storage.batch_restore_from_recycle_bin([ids[0], ids[0], 999999])
+    assert [todo.id for todo in restored] == [ids[0]]
+    assert storage.get_todo_by_id(ids[0]) is not None
+
+    assert storage.remove_from_recycle_bin(ids[1]).id == ids[1]
+    assert storage.remove_from_recycle_bin(ids[1]) is None
+    assert storage.batch_restore_from_recycle_bin([ids[1]]) == []
+
+    storage.clear_recycle_bin()
+    assert storage.get_recycle_bin() == {}
+    stats = storage.get_stats()
+    assert (stats["total_active"], stats["completed"], stats["pending"], stats["in_recycle_bin"]) == (1, 0, 1, 0)
+
+def test_top_todos_and_score_counts(storage):
+    todos = [_add(storage, "q1", 3, 3), _add(storage, "q2", 2, -1), _add(storage, "q1b", 1, 1),
+             _add(storage, "q4", -2, -2), _add(storage, "none"), _add(storage, "q2b", 2, -1)]
+    storage.update_todo(todos[1].id, completed=True)
+    storage.remove_todo(todos[2].id)
+
+    assert [todo.id for todo in storage.get_top_todos(3)] == [todos[0].id, todos[1].id, todos[5].id]
+    assert [todo.id for todo in storage.get_top_todos(10, "q2")] == [todos[1].id, todos[5].id]
+    assert [todo.id for todo in storage.get_top_todos(10, "unassigned")] == [todos[4].id]
+    assert storage.get_top_todos(10, "q3") == []
+    assert sorted(storage.get_score_counts(), key=str) == sorted(
+        [(3, 3, False, 1), (2, -1, True, 1), (2, -1, False, 1), (-2, -2, False, 1), (None, None, False, 1)],
+        key=str)
+
+def test_assignment_log_pagination(storage):
+    first = _add(storage, "A", 0, 0)
+    second = _add(storage, "B", 0, 0)
+    for score in (1, 2, 3):
+        storage.update_todo(first.id, future_score=score, operation_source="drag")
+    storage.update_todo(second.id, urgency_score=1, operation_source="form")
+    storage.update_todo(second.id, title="no score change")
+
+    page = storage.get_assignment_logs(limit=3)
+    assert [(log.todo_id, log.new_future_score, log.new_urgency_score) for log in page.items] == [
+        (second.id, 0, 1), (first.id, 3, 0), (first.id, 2, 0)]
+    rest = storage.get_assignment_logs(limit=3, cursor=page.next_cursor)
+    assert [(log.old_future_score, log.new_future_score) for log in rest.items] == [(0, 1)]
+    assert rest.next_cursor is None
+
+    assert len(storage.get_assignment_logs(todo_id=first.id).items) == 3
+    assert [log.source for log in storage.get_assignment_logs(sources=["form"]).items] == ["form"]
+
+def test_tenants_are_isolated(make_storage):
+    alice, bob = make_storage("alice"), make_storage("bob")
+    todo = _add(alice, "Alice", 1, 1)
+    alice.update_todo(todo.id, future_score=2)
+
+    assert bob.get_all_todos() == {} and bob.get_todo_by_id(todo.id) is None
+    assert not bob.update_todo(todo.id, title="x") and bob.remove_todo(todo.id) is None
+    assert bob.get_assignment_logs().items == [] and bob.get_top_todos(10) == []
+
+    alice.remove_todo(todo.id)
+    alice.add_to_recycle_bin(todo)
+    assert bob.get_recycle_bin() == {} and bob.batch_restore_from_recycle_bin([todo.id]) == []
+    bob.clear_recycle_bin()
+    assert set(alice.get_recycle_bin()) == {todo.id}
+
+def test_data_version_advances_on_writes_only(make_storage):
+    alice, bob = make_storage("alice"), make_storage("bob")
+    start = alice.get_data_version()
+    todo = _add(alice, "A", 1, 1)
+    after_add = alice.get_data_version()
+    assert after_add > start
+
+    alice.get_all_todos()
+    alice.get_stats()
+    _add(bob, "B")
+    assert alice.get_data_version() == after_add
+
+    alice.remove_todo(todo.id)
+    alice.add_to_recycle_bin(todo)
+    assert alice.get_data_version() > after_add
+
+def test_time_range_query(storage):
+    morning = _add(storage, "morning", start_time="09:00", end_time="10:00")
+    late = _add(storage, "late", start_time="09:30", end_time="12:00", completed=True)
+    _add(storage, "open", start_time="09:00")
+    _add(storage, "after", start_time="10:00", end_time="10:30")
+
+    in_range = storage.get_todos_in_time_range(9 * 60, 10 * 60)
+    assert [todo.id for todo in in_range] == [morning.id, late.id]
+    assert storage.get_todos_in_time_range(9 * 60, 10 * 60, include_completed=False) == [in_range[0]]
+
+    storage.update_todo(morning.id, start_time="10:15", end_time="11:00")
+    assert storage.get_todo_by_id(morning.id).start_time == "10:15"
+    assert [todo.title for todo in storage.get_todos_in_time_range(10 * 60 + 30, 11 * 60)] == ["late", "morning"]
+
+def test_date_range_query(storage):
+    march = _add(storage, "march", due_date=datetime.date(2026, 3, 5))
+    planned = _add(storage, "planned", 3, 3,
+                   scheduled_date=datetime.date(2026, 3, 1), due_date=datetime.date(2026, 5, 1))
+    _add(storage, "april", due_date=datetime.date(2026, 4, 1))
+
+    found = storage.get_todos_in_date_range(datetime.date(2026, 3, 1), datetime.date(2026, 3, 31))
+    assert [todo.id for todo in found] == [planned.id, march.id]
+    assert found[1].due_date == datetime.date(2026, 3, 5)
+
+    storage.remove_todo(march.id)
+    assert [todo.id for todo in storage.get_todos_in_date_range(datetime.date(2026, 3, 1),
+                                                                 datetime.date(2026, 3, 31))] == [planned.id]
+
+def test_manual_order_and_move(storage):
+    first, second, third = (_add(storage, title, 2, 2) for title in ("一", "二", "三"))
+    other = _add(storage, "其他象限", -2, -2)
+
+    def q1_titles():
+        return [todo.title for todo in storage.get_quadrant_todos("q1", 10)]
+
+    assert q1_titles() == ["一", "二", "三"]
+    before = storage.get_data_version()
+    moved = storage.move_todo(third.id, prev_id=None, next_id=first.id)
+    assert moved is not None and moved.sort_key < first.sort_key
+    assert q1_titles() == ["三", "一", "二"]
+    assert storage.get_data_version() == before + 1
+    storage.move_todo(third.id, prev_id=second.id)
+    assert q1_titles() == ["一", "二", "三"]
+    storage.move_todo(first.id, prev_id=second.id, next_id=third.id)
+    assert q1_titles() == ["二", "一", "三"]
+
+    # 反复插到同一位置，键变长但顺序始终正确
+    for _ in range(20):
+        storage.move_todo(third.id, prev_id=second.id, next_id=first.id)
+        storage.move_todo(first.id, prev_id=second.id, next_id=third.id)
+    assert q1_titles() == ["二", "一", "三"]
+
+    for bad in ({"prev_id": other.id}, {}, {"prev_id": third.id, "next_id": second.id}, {"next_id": first.id}):
+        with pytest.raises(ValueError):
+            storage.move_todo(first.id, **bad)
+    assert storage.move_todo(9999, prev_id=first.id) is None
+
+    # 分值变化换到其他象限时排在新象限的最后
+    storage.update_todo(second.id, future_score=-1, urgency_score=-1)
+    assert q1_titles() == ["一", "三"]
+    assert [todo.title for todo in storage.get_quadrant_todos("q4", 10)] == ["其他象限", "二"]
+
+def test_tags_filter_and_crud(storage):
+    both = _add(storage, "两个标签", tags=[" 学习", "工作", "工作"])
+    work = _add(storage, "只有工作", tags=["工作"])
+    _add(storage, "没有标签")
+    study = _add(storage, "只有学习", tags=["学习"])
+    assert both.tags == ["学习", "工作"] and storage.get_todo_by_id(work.id).tags == ["工作"]
+
+    assert list(storage.get_todos_by_tags(["工作", "学习"])) == [both.id, work.id, study.id]
+    assert list(storage.get_todos_by_tags(["工作", "学习"], match_all=True)) == [both.id]
+    assert storage.get_todos_by_tags(["不存在"]) == {}
+
+    storage.update_todo(work.id, tags=["学习", "生活"])
+    storage.remove_todo(study.id)
+    assert storage.get_todo_by_id(work.id).tags == ["学习", "生活"]
+    assert storage.get_tag_counts() == [("学习", 2), ("工作", 1), ("生活", 1)]
+    assert list(storage.get_todos_by_tags(["学习"])) == [both.id, work.id]
+
+    # 合并到已有标签，回收站中的事项同样改名
+    before = storage.get_data_version()
+    assert storage.rename_tag("学习", "工作") == 3
+    assert storage.get_data_version() > before
+    assert storage.get_tag_counts() == [("工作", 2), ("生活", 1)]
+    assert storage.get_todo_by_id(both.id).tags == ["工作"]
+    assert storage.rename_tag("不存在", "新") == 0
+
+    assert storage.delete_tag("生活") == 1
+    assert storage.get_todo_by_id(work.id).tags == ["工作"]
+    assert storage.delete_tag("生活") == 0
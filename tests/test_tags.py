@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+import database.db_storage as db_storage
+from database.db_storage import DatabaseTodoStorage
+from database.orm_models import Base
+from database.tag_index import TagBitmapCache
+from main import app
+from models.schemas import TodoSchema
+from utils.tags import bitmap_to_ids, ids_to_bitmap, normalize_tags
+
+client = TestClient(app)
+# 独立租户，不受其他测试数据影响
+HEADERS = {"X-Tenant-ID": "tag-tests"}
+
+def test_normalize_and_bitmaps():
+    assert normalize_tags([" b", "a", "b"]) == ["a", "b"]
+    for bad in (["  "], ["x" * 31], [str(index) for index in range(21)]):
+        with pytest.raises(ValueError):
+            normalize_tags(bad)
+    ids = [0, 3, 8, 9, 1000, 4097]
+    assert bitmap_to_ids(ids_to_bitmap(ids)) == ids
+    assert bitmap_to_ids(ids_to_bitmap([])) == []
+
+@pytest.fixture
+def storage(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tags.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        yield DatabaseTodoStorage(session, "tag-storage")
+    engine.dispose()
+
+def test_hot_tags_use_bitmaps(storage, monkeypatch):
+    cache = TagBitmapCache(max_entries=8, min_requests=2)
+    monkeypatch.setattr(db_storage, "TAG_BITMAP_CACHE_ENABLED", True)
+    monkeypatch.setattr(db_storage, "get_tag_bitmap_cache", lambda: cache)
+    ids = [storage.add_todo(TodoSchema(title=f"t{index}", tags=["a"] if index % 2 else ["a", "b"])).id
+           for index in range(6)]
+
+    # 第一次查询标签还不够热门，走SQL；之后生成位图并命中
+    for _ in range(3):
+        assert list(storage.get_todos_by_tags(["a", "b"], match_all=True)) == ids[::2]
+    assert cache.get_stats()["builds"] == 2 and cache.hits == 2
+
+    # 与标签无关的写入不会使位图失效
+    storage.update_todo(ids[0], title="改名", completed=True)
+    storage.remove_todo(ids[2])
+    assert list(storage.get_todos_by_tags(["a", "b"], match_all=True)) == [ids[0], ids[4]]
+    assert cache.hits == 4
+
+    storage.update_todo(ids[1], tags=["b"])
+    assert list(storage.get_todos_by_tags(["b"])) == [ids[0], ids[1], ids[4]]
+    assert cache.get_stats()["builds"] == 3
+
+def test_permanent_delete_removes_tag_rows(storage):
+    todo = storage.add_todo(TodoSchema(title="待清理", tags=["x", "y"]))
+    storage.remove_todo(todo.id)
+    storage.add_to_recycle_bin(todo)
+    storage.clear_recycle_bin()
+    assert storage.db.execute(text("SELECT COUNT(*) FROM todo_tags")).scalar() == 0
+
+def test_tag_endpoints():
+    created = [client.post("/api/todos", headers=HEADERS, json={"title": title, "tags": tags}).json()
+               for title, tags in (("报告", ["工作", "紧急"]), ("健身", ["生活"]), ("会议", ["工作"]))]
+    assert created[0]["tags"] == ["工作", "紧急"]
+
+    response = client.get("/api/todos", headers=HEADERS, params={"tags": ["工作", "紧急"], "tag_match": "all"})
+    assert [todo["title"] for todo in response.json().values()] == ["报告"]
+    response = client.get("/api/todos", headers=HEADERS, params={"tags": ["紧急", "生活"]})
+    assert [todo["title"] for todo in response.json().values()] == ["报告", "健身"]
+    assert client.get("/api/todos", headers=HEADERS, params={"tags": "工作", "tag_match": "some"}).status_code == 400
+
+    client.patch(f"/api/todos/{created[1]['id']}", headers=HEADERS, json={"tags": ["生活", "周末"]})
+    assert client.get("/api/tags", headers=HEADERS).json() == [
+        {"name": "周末", "count": 1}, {"name": "工作", "count": 2}, {"name": "生活", "count": 1}, {"name": "紧急", "count": 1}]
+
+    # 返回规范化后实际保存的标签名
+    response = client.patch("/api/tags/紧急", headers=HEADERS, json={"name": "  工作 "})
+    assert response.status_code == 200 and response.json()["affected"] == 1
+    assert response.json()["name"] == "工作"
+    assert client.delete("/api/tags/周末", headers=HEADERS).json()["affected"] == 1
+    assert [tag["name"] for tag in client.get("/api/tags", headers=HEADERS).json()] == ["工作", "生活"]
+    assert client.delete("/api/tags/周末", headers=HEADERS).status_code == 404
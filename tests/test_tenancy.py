@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from database import tenancy
+from database.tenancy import TenantEngineCache
+from main import app
+
+client = TestClient(app)
+
+ALICE = {"X-Tenant-ID": "alice"}
+BOB = {"X-Tenant-ID": "bob"}
+
+def test_tenants_only_see_their_own_todos():
+    todo = client.post("/api/todos", json={"title": "Alice Todo", "future_score": 2, "urgency_score": 2},
+                       headers=ALICE).json()
+    client.patch(f"/api/todos/{todo['id']}", json={"future_score": 3}, headers=ALICE)
+
+    assert str(todo["id"]) in client.get("/api/todos", headers=ALICE).json()
+    assert str(todo["id"]) not in client.get("/api/todos", headers=BOB).json()
+    assert str(todo["id"]) not in client.get("/api/todos").json()
+    assert todo["id"] not in [item["id"] for item in client.get("/api/todos/top", headers=BOB).json()]
+
+    # 其他租户既不能修改也不能删除
+    assert client.patch(f"/api/todos/{todo['id']}", json={"title": "x"}, headers=BOB).status_code == 404
+    assert client.delete(f"/api/todos/{todo['id']}", headers=BOB).status_code == 404
+    assert client.get(f"/api/todos/{todo['id']}/history", headers=ALICE).json()["items"]
+    assert all(item["todo_id"] != todo["id"]
+               for item in client.get("/api/assignment-logs", headers=BOB).json()["items"])
+
+    client.delete(f"/api/todos/{todo['id']}", headers=ALICE)
+    assert str(todo["id"]) in client.get("/api/recycle-bin", headers=ALICE).json()
+    assert str(todo["id"]) not in client.get("/api/recycle-bin", headers=BOB).json()
+    assert "alice" in client.get("/api/admin/tenants").json()["tenants"]
+
+def test_invalid_tenant_id_is_rejected():
+    assert client.get("/api/todos", headers={"X-Tenant-ID": "../etc"}).status_code == 400
+
+def test_database_per_tenant_mode_uses_lru_of_engines(tmp_path, monkeypatch):
+    cache = TenantEngineCache(max_engines=1, database_dir=str(tmp_path))
+    monkeypatch.setattr(tenancy, "TENANT_MODE", "database")
+    monkeypatch.setattr(tenancy, "_tenant_engines", cache)
+
+    alice = client.post("/api/todos", json={"title": "Alice"}, headers=ALICE).json()
+    client.post("/api/todos", json={"title": "Bob"}, headers=BOB)
+    assert (tmp_path / "alice.db").exists() and (tmp_path / "bob.db").exists()
+    assert cache.get_stats()["evictions"] == 1
+
+    # 被淘汰的租户再次访问时重新打开数据库，数据不受影响
+    todos = client.get("/api/todos", headers=ALICE).json()
+    assert [todo["title"] for todo in todos.values()] == ["Alice"]
+    assert str(alice["id"]) in todos
+    assert cache.get_stats()["open"] == 1
+    cache.dispose_all()
@@ -0,0 +1,103 @@
+import random
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from database.orm_models import Base
+from main import app
+from utils.time_of_day import find_overlaps
+
+client = TestClient(app)
+# 独立租户，不受其他测试数据影响
+HEADERS = {"X-Tenant-ID": "schedule-tests"}
+
+def test_sweep_line_matches_pairwise_comparison():
+    rng = random.Random(7)
+    intervals = []
+    for index in range(300):
+        start = rng.randrange(0, 1400)
+        intervals.append((start, start + rng.randrange(-10, 120), index))
+
+    expected = {
+        frozenset((a[2], b[2]))
+        for i, a in enumerate(intervals) for b in intervals[i + 1:]
+        if a[1] > a[0] and b[1] > b[0] and a[0] < b[1] and b[0] < a[1]
+    }
+    found = find_overlaps(intervals)
+    assert {frozenset((first, second)) for first, second, _, _ in found} == expected
+    assert len(found) == len(expected)
+    by_id = {index: (start, end) for start, end, index in intervals}
+    for first, second, overlap_start, overlap_end in found:
+        assert overlap_start == max(by_id[first][0], by_id[second][0])
+        assert overlap_end == min(by_id[first][1], by_id[second][1])
+
+def test_timeline_and_conflicts():
+    def create(title, start, end, completed=False):
+        response = client.post("/api/todos", headers=HEADERS, json={
+            "title": title, "start_time": start, "end_time": end, "completed": completed})
+        assert response.status_code == 201
+        return response.json()["id"]
+
+    standup = create("站会", "09:00", "09:30")
+    review = create("评审", "09:15", "10:30")
+    create("午饭", "12:00", "13:00")
+    create("紧接评审", "10:30", "11:00")
+    done = create("已完成", "09:00", "10:00", completed=True)
+    client.post("/api/todos", headers=HEADERS, json={"title": "未排期"})
+
+    timeline = client.get("/api/todos/timeline", headers=HEADERS, params={"start": "09:20", "end": "10:45"}).json()
+    assert [todo["title"] for todo in timeline] == ["站会", "已完成", "评审", "紧接评审"]
+    assert timeline[0]["start_time"] == "09:00" and timeline[0]["end_time"] == "09:30"
+
+    report = client.get("/api/todos/conflicts", headers=HEADERS).json()
+    assert report["scheduled"] == 4
+    assert [(c["first"]["id"], c["second"]["id"], c["overlap_start"], c["overlap_end"])
+            for c in report["conflicts"]] == [(standup, review, "09:15", "09:30")]
+
+    with_completed = client.get("/api/todos/conflicts", headers=HEADERS, params={"include_completed": True}).json()
+    assert len(with_completed["conflicts"]) == 3
+    assert any(done in (c["first"]["id"], c["second"]["id"]) for c in with_completed["conflicts"])
+
+    client.patch(f"/api/todos/{review}", headers=HEADERS, json={"start_time": "09:30"})
+    assert client.get("/api/todos/conflicts", headers=HEADERS).json()["conflicts"] == []
+
+    assert client.get("/api/todos/timeline", headers=HEADERS, params={"start": "11:00", "end": "10:00"}).status_code == 400
+    assert client.get("/api/todos/timeline", headers=HEADERS, params={"start": "9:00"}).status_code == 400
+
+def test_timeline_query_uses_schedule_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plan.db'}")
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        plan = conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM todo_items WHERE owner_id = 'default' AND deleted = 0 "
+            "AND start_minute < 600 AND end_minute > 540 AND end_minute > start_minute "
+            "ORDER BY start_minute, end_minute, id"
+        )).all()
+    engine.dispose()
+    assert "ix_todo_items_active_schedule" in " ".join(row[-1] for row in plan)
+
+def test_calendar_groups_due_and_scheduled_by_day():
+    headers = {"X-Tenant-ID": "calendar-tests"}
+
+    def create(title, **fields):
+        return client.post("/api/todos", headers=headers, json={"title": title, **fields}).json()["id"]
+
+    report = create("报告", due_date="2026-03-05", scheduled_date="2026-03-02", future_score=3, urgency_score=3)
+    invoice = create("发票", due_date="2026-03-05")
+    create("下个月", due_date="2026-04-01")
+    create("无日期")
+
+    calendar = client.get("/api/calendar", headers=headers, params={"from": "2026-03-01", "to": "2026-03-07"}).json()
+    assert [day["day"] for day in calendar["days"]][:2] == ["2026-03-01", "2026-03-02"]
+    assert len(calendar["days"]) == 7
+    days = {day["day"]: day for day in calendar["days"]}
+    assert [todo["id"] for todo in days["2026-03-05"]["due"]] == [report, invoice]
+    assert [todo["id"] for todo in days["2026-03-02"]["scheduled"]] == [report]
+    assert days["2026-03-01"] == {"day": "2026-03-01", "due": [], "scheduled": []}
+
+    client.patch(f"/api/todos/{invoice}", headers=headers, json={"due_date": "2026-04-01"})
+    client.patch(f"/api/todos/{report}/toggle", headers=headers)
+    calendar = client.get("/api/calendar", headers=headers,
+                          params={"from": "2026-03-01", "to": "2026-04-30", "include_completed": False}).json()
+    assert [(day["day"], len(day["due"])) for day in calendar["days"] if day["due"]] == [("2026-04-01", 2)]
+
+    assert client.get("/api/calendar", headers=headers, params={"from": "2026-03-07", "to": "2026-03-01"}).status_code == 400
+    assert client.get("/api/calendar", headers=headers, params={"from": "2026-01-01", "to": "2027-06-01"}).status_code == 400
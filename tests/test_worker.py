@@ -0,0 +1,30 @@
+import threading
+import pytest
+import serve
+from utils.worker import PrimaryElection
+
+def test_standby_takes_over_after_primary_resigns(tmp_path):
+    path = str(tmp_path / "primary.lock")
+    events = []
+    elected = threading.Event()
+
+    primary = PrimaryElection(path, poll_interval=0.01)
+    primary.start(lambda: events.append("primary started"), lambda: events.append("primary stopped"))
+    # 滚动重启时新进程先启动，拿不到锁时只等待，不运行后台任务
+    standby = PrimaryElection(path, poll_interval=0.01)
+    standby.start(lambda: (events.append("standby started"), elected.set()))
+    assert primary.is_primary and not standby.is_primary
+
+    primary.stop()
+    assert elected.wait(5)
+    assert standby.is_primary
+    assert events == ["primary started", "primary stopped", "standby started"]
+    standby.stop()
+
+def test_memory_backend_refuses_multiple_workers(monkeypatch):
+    monkeypatch.setattr(serve, "STORAGE_BACKEND", "memory")
+    monkeypatch.delenv("TODO_WORKERS", raising=False)
+    assert serve.default_workers() == 1
+    with pytest.raises(SystemExit):
+        serve.parse_args(["--workers", "2"])
+    assert serve.parse_args(["--workers", "1"]).workers == 1
@@ -0,0 +1,269 @@
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
+import asyncio
+import math
+import os
+import re
+import time
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 是否启用准入控制（负载过高时按路由类别排队或快速拒绝）
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") == "1"
+# 所有类别合计的最大并发请求数，应小于线程池大小（默认40），让排队发生在这里而不是线程池中
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+
+# 路由类别：(优先级, 最大并发, 最大排队数, 排队超时毫秒)；优先级越高，空出名额时越先被放行
+DEFAULT_LANES: Dict[str, Tuple[int, int, int, int]] = {
+    # 廉价写入：切换完成状态、修改、创建、删除、单条恢复
+    "write": (3, 16, 64, 2000),
+    # 廉价读取：Top-N、统计、单条详情、变更日志分页、读取设置
+    "read": (2, 16, 64, 1000),
+    # 大结果集读取和批量操作：完整列表、象限分组、回收站列表、批量恢复、清空回收站、重命名/删除标签
+    "bulk": (1, 4, 16, 1000),
+    # 壁纸下载：页面加载时每个标签页一次，未变化时返回304，不与上传共用名额
+    "download": (1, 8, 32, 5000),
+    # 壁纸上传（最大50MB）
+    "upload": (0, 1, 2, 5000),
+}
+
+# (方法, 路径正则, 类别)，按顺序匹配；未匹配的 /api 请求归入 read
+ROUTE_RULES: List[Tuple[str, str, str]] = [
+    ("POST", r"^/api/settings/wallpaper$", "upload"),
+    ("PUT", r"^/api/settings/wallpaper$", "upload"),
+    ("GET", r"^/api/settings/wallpaper$", "download"),
+    ("GET", r"^/api/todos$", "bulk"),
+    ("GET", r"^/api/todos/quadrants$", "bulk"),
+    ("GET", r"^/api/recycle-bin$", "bulk"),
+    ("DELETE", r"^/api/recycle-bin$", "bulk"),
+    ("POST", r"^/api/recycle-bin/batch-restore$", "bulk"),
+    ("PATCH", r"^/api/tags/[^/]+$", "bulk"),
+    ("DELETE", r"^/api/tags/[^/]+$", "bulk"),
+    ("POST", r"^/api/.*", "write"),
+    ("PATCH", r"^/api/.*", "write"),
+    ("PUT", r"^/api/.*", "write"),
+    ("DELETE", r"^/api/.*", "write"),
+]
+
+# 不受准入控制的路径：健康检查和管理接口在过载时也必须可用
+EXEMPT_PREFIXES = ("/health", "/api/admin/", "/docs", "/redoc", "/openapi.json")
+
+
+class AdmissionRejected(Exception):
+    """请求被拒绝：排队已满或排队超时"""
+
+    def __init__(self, lane: str, reason: str, retry_after: int) -> None:
+        super().__init__(f"{lane}: {reason}")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Lane:
+    def __init__(self, name: str, priority: int, limit: int, max_queue: int, timeout_ms: int) -> None:
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout_ms / 1000
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_wait_ms = 0.0
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.timeout))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority,
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "queue_timeout_ms": int(self.timeout * 1000),
+            "in_flight": self.active,
+            "waiting": len(self.waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+        }
+
+
+class AdmissionController:
+    """按路由类别限制并发的准入控制器
+
+    每个类别有自己的并发上限和有界等待队列，所有类别再共享一个总并发上限。
+    名额空出时按类别优先级依次唤醒等待者，因此过载时廉价写入先于大结果集读取得到处理；
+    队列已满的请求立即拒绝，排队超过期限的请求同样拒绝，调用方据此返回 503 和 Retry-After。
+    只在单个事件循环内使用，不需要加锁。
+    """
+
+    def __init__(self, lanes: Optional[Dict[str, Tuple[int, int, int, int]]] = None,
+                 max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+                 rules: Optional[List[Tuple[str, str, str]]] = None) -> None:
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.lanes: Dict[str, _Lane] = {
+            name: _Lane(name, *config) for name, config in (lanes or DEFAULT_LANES).items()
+        }
+        self._by_priority = sorted(self.lanes.values(), key=lambda lane: -lane.priority)
+        self._rules = [(method, re.compile(pattern), lane) for method, pattern, lane in (rules or ROUTE_RULES)]
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        """返回请求所属的类别，不受准入控制的请求返回 None"""
+        if not path.startswith("/api/") or path.startswith(EXEMPT_PREFIXES):
+            return None
+        for rule_method, pattern, lane in self._rules:
+            if rule_method in ("*", method) and pattern.match(path):
+                return lane
+        return "read"
+
+    def _has_capacity(self, lane: _Lane) -> bool:
+        return lane.active < lane.limit and self.active < self.max_concurrency
+
+    def _admit(self, lane: _Lane) -> None:
+        lane.active += 1
+        lane.admitted += 1
+        self.active += 1
+
+    def _dispatch(self) -> None:
+        """按优先级把空出的名额分配给等待中的请求"""
+        for lane in self._by_priority:
+            while lane.waiters and self._has_capacity(lane):
+                waiter = lane.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(lane)
+                waiter.set_result(None)
+            if self.active >= self.max_concurrency:
+                return
+
+    async def acquire(self, name: str) -> None:
+        """获取类别名额，必要时排队等待
+
+        Raises:
+            AdmissionRejected: 队列已满或排队超时
+        """
+        lane = self.lanes[name]
+        # 同类别已有等待者时不插队
+        if not lane.waiters and self._has_capacity(lane):
+            self._admit(lane)
+            return
+        if len(lane.waiters) >= lane.max_queue:
+            lane.rejected_queue_full += 1
+            raise AdmissionRejected(name, "queue_full", lane.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        lane.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), lane.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 超时与放行同时发生：名额已经分配，交还后再拒绝
+                self.release(name)
+            else:
+                waiter.cancel()
+                try:
+                    lane.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            lane.rejected_timeout += 1
+            raise AdmissionRejected(name, "queue_timeout", lane.retry_after)
+        finally:
+            lane.max_wait_ms = max(lane.max_wait_ms, (time.perf_counter() - started) * 1000)
+
+    def release(self, name: str) -> None:
+        lane = self.lanes[name]
+        lane.active -= 1
+        self.active -= 1
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": ADMISSION_CONTROL,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.active,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
+
+
+def _lanes_from_env() -> Dict[str, Tuple[int, int, int, int]]:
+    """读取 ADMISSION_<类别>_CONCURRENCY / _QUEUE / _TIMEOUT_MS 覆盖默认值"""
+    lanes = {}
+    for name, (priority, limit, max_queue, timeout_ms) in DEFAULT_LANES.items():
+        prefix = f"ADMISSION_{name.upper()}"
+        lanes[name] = (
+            priority,
+            int(os.getenv(f"{prefix}_CONCURRENCY", str(limit))),
+            int(os.getenv(f"{prefix}_QUEUE", str(max_queue))),
+            int(os.getenv(f"{prefix}_TIMEOUT_MS", str(timeout_ms))),
+        )
+    return lanes
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(_lanes_from_env())
+    return _controller
+
+
+class AdmissionControlMiddleware:
+    """ASGI中间件：请求进入路由前先获取所属类别的名额，被拒绝时直接返回 503"""
+
+    def __init__(self, app: Callable, controller: Optional[AdmissionController] = None) -> None:
+        self.app = app
+        self._controller = controller
+
+    @property
+    def controller(self) -> AdmissionController:
+        return self._controller or get_admission_controller()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+        controller = self.controller
+        lane = controller.classify(scope["method"], scope["path"])
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await controller.acquire(lane)
+        except AdmissionRejected as e:
+            logger.warning(f"准入控制拒绝请求: {scope['method']} {scope['path']} 类别={lane} 原因={e.reason}")
+            await _send_rejection(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(lane)
+
+
+async def _send_rejection(send, rejection: AdmissionRejected) -> None:
+    body = json.dumps({"detail": "服务器繁忙，请稍后重试", "lane": rejection.lane, "reason": rejection.reason},
+                      ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(rejection.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,121 @@
+from typing import Any, Callable, Dict, List, Optional
+import datetime
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """按固定间隔在守护线程中执行的后台任务
+
+    任务异常只记录日志，不会终止线程；stop() 会等待正在执行的一轮结束。
+    """
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], Any],
+                 initial_delay: Optional[float] = None) -> None:
+        """
+        Args:
+            name: 任务名称，同时用作线程名
+            interval_seconds: 两次执行之间的间隔（秒）
+            func: 每轮执行的函数，返回值作为最近一次结果保存
+            initial_delay: 启动后首次执行前的等待时间，默认等于间隔
+        """
+        self.name = name
+        self.interval = interval_seconds
+        self.func = func
+        self.initial_delay = interval_seconds if initial_delay is None else initial_delay
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_result: Any = None
+        self.last_run_at: Optional[str] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"后台任务 {self.name} 已启动，间隔 {self.interval}s")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def run_once(self) -> Any:
+        """立即执行一轮并记录结果"""
+        started = time.perf_counter()
+        self.last_run_at = datetime.datetime.now(datetime.UTC).isoformat()
+        try:
+            self.last_result = self.func()
+            self.last_error = None
+            return self.last_result
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            raise
+        finally:
+            self.runs += 1
+            self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def _loop(self) -> None:
+        delay = self.initial_delay
+        while not self._stop_event.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"后台任务 {self.name} 执行失败: {e}", exc_info=True)
+            delay = self.interval
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error,
+            "last_result": self.last_result,
+        }
+
+
+# 当前进程中注册的后台任务，由应用生命周期统一启动和停止
+_jobs: Dict[str, PeriodicJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def register_job(job: PeriodicJob) -> PeriodicJob:
+    """注册后台任务，同名任务只保留第一次注册的实例"""
+    with _jobs_lock:
+        return _jobs.setdefault(job.name, job)
+
+
+def get_job(name: str) -> Optional[PeriodicJob]:
+    return _jobs.get(name)
+
+
+def get_jobs() -> List[PeriodicJob]:
+    return list(_jobs.values())
+
+
+def start_jobs() -> None:
+    for job in get_jobs():
+        job.start()
+
+
+def stop_jobs() -> None:
+    for job in get_jobs():
+        job.stop()
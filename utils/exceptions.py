@@ -21,3 +21,8 @@ class DatabaseException(TodoAppException):
     """数据库操作失败异常"""
     def __init__(self, message: str = "数据库操作失败"):
         super().__init__(message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PreconditionFailedException(TodoAppException):
+    """条件请求的前提不成立（If-Match 与当前版本不一致）"""
+    def __init__(self, message: str = "数据已被修改，请刷新后重试"):
+        super().__init__(message, status_code=status.HTTP_412_PRECONDITION_FAILED)
@@ -0,0 +1,163 @@
+from typing import List, Optional
+
+# 排序键的字符集，按ASCII顺序排列，字符串比较即数值比较
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+
+# 整数部分的首字符表示整数的位数：a-z 为非负整数（"a" 后 1 位 ... "z" 后 26 位），
+# Z-A 为负整数（"Z" 后 1 位 ... "A" 后 26 位），大写字母排在小写字母之前，位数越多的负数越小
+_SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+
+
+def _integer_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"无效的排序键首字符: {head!r}")
+
+
+def _split(key: str) -> tuple:
+    """拆分为 (整数部分, 小数部分)，并校验键的格式"""
+    if not key or any(digit not in _VALUES for digit in key):
+        raise ValueError(f"无效的排序键: {key!r}")
+    length = _integer_length(key[0])
+    if length > len(key) or key == _SMALLEST_INTEGER:
+        raise ValueError(f"无效的排序键: {key!r}")
+    fraction = key[length:]
+    if fraction.endswith(DIGITS[0]):
+        raise ValueError(f"无效的排序键: {key!r}")
+    return key[:length], fraction
+
+
+def _increment_integer(integer: str) -> Optional[str]:
+    """整数部分加一，位数不够时换用下一个首字符；已是最大值时返回None"""
+    head, digits = integer[0], list(integer[1:])
+    for index in reversed(range(len(digits))):
+        value = _VALUES[digits[index]] + 1
+        if value < BASE:
+            digits[index] = DIGITS[value]
+            return head + "".join(digits)
+        digits[index] = DIGITS[0]
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement_integer(integer: str) -> Optional[str]:
+    """整数部分减一；已是最小值时返回None"""
+    head, digits = integer[0], list(integer[1:])
+    for index in reversed(range(len(digits))):
+        value = _VALUES[digits[index]] - 1
+        if value >= 0:
+            digits[index] = DIGITS[value]
+            return head + "".join(digits)
+        digits[index] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _midpoint(low: str, high: Optional[str]) -> str:
+    """low 与 high 之间的小数部分，low 为空表示 0，high 为None表示 1"""
+    if high is not None:
+        # 公共前缀原样保留（low 不足的位按 0 补齐）
+        prefix = 0
+        while prefix < len(high) and (low[prefix] if prefix < len(low) else "0") == high[prefix]:
+            prefix += 1
+        if prefix:
+            return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+    low_digit = _VALUES[low[0]] if low else 0
+    high_digit = _VALUES[high[0]] if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit + 1) // 2]
+    # 首位相邻：high 更长时取 high 的首位即可，否则在 low 的首位后继续取中点
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def key_between(before: Optional[str], after: Optional[str]) -> str:
+    """
+    生成严格位于 before 与 after 之间的排序键
+
+    键由变长整数部分和可选的 BASE 进制小数部分组成（小数部分不以 "0" 结尾）。
+    追加到最后/插入到最前时整数部分加一/减一，键长只随事项数按对数增长；
+    在两个键之间插入时取小数部分的中点，只需修改被移动的这一行。
+    反复在同一位置插入时小数部分大约每 6 次增加一位，由定期重排缩短。
+
+    参数:
+        before: 前一个键，为None表示插入到最前
+        after: 后一个键，为None表示插入到最后
+
+    返回:
+        key: 新的排序键
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"排序键必须递增: {before!r} >= {after!r}")
+    if before is None:
+        if after is None:
+            return "a" + DIGITS[0]
+        integer, fraction = _split(after)
+        if integer == _SMALLEST_INTEGER:
+            return integer + _midpoint("", fraction)
+        if integer < after:
+            return integer
+        previous = _decrement_integer(integer)
+        if previous is None:
+            raise ValueError("排序键已达到最小值")
+        return previous
+
+    integer, fraction = _split(before)
+    if after is None:
+        following = _increment_integer(integer)
+        return integer + _midpoint(fraction, None) if following is None else following
+
+    after_integer, after_fraction = _split(after)
+    if integer == after_integer:
+        return integer + _midpoint(fraction, after_fraction)
+    following = _increment_integer(integer)
+    if following is not None and following < after:
+        return following
+    return integer + _midpoint(fraction, None)
+
+
+def spread_keys(count: int) -> List[str]:
+    """生成 count 个递增且尽量短的排序键（连续的整数部分），用于重排"""
+    keys: List[str] = []
+    key: Optional[str] = "a" + DIGITS[0]
+    while len(keys) < count and key is not None:
+        keys.append(key)
+        key = _increment_integer(key)
+    return keys
+
+
+def integer_key(value: int, width: int) -> str:
+    """非负整数 value 的定长整数部分键（width 位，1 <= width <= 26），width 相同的键按数值排序"""
+    return chr(ord("a") + width - 1) + encode_fixed(value, width)
+
+
+def encode_fixed(value: int, width: int) -> str:
+    """非负整数的定长 BASE 进制表示，定长保证字符串顺序与数值顺序一致"""
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    if value:
+        raise ValueError(f"数值超出 {width} 位的表示范围")
+    return "".join(reversed(digits))
@@ -3,8 +3,15 @@ import sys
 import os
 from logging.handlers import RotatingFileHandler
 
+_configured = False
+
 def setup_logging():
-    """配置应用程序的日志系统"""
+    """配置应用程序的日志系统（重复调用不会重复添加处理器）"""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
     # 创建日志目录
     log_dir = "logs"
     if not os.path.exists(log_dir):
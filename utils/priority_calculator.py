@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Optional, Tuple
 
 def calculate_priority(importance: int, urgency: int) -> int:
     """
@@ -67,4 +67,23 @@ def get_quadrant_info(importance: int, urgency: int) -> Tuple[str, str]:
     elif importance <= 0 and urgency > 0:
         return "Q3 - 不重要但紧急", "#fff3e0"  # 浅橙色
     else:
-        return "Q4 - 不重要不紧急", "#f3e5f5"  # 浅紫色
\ No newline at end of file
+        return "Q4 - 不重要不紧急", "#f3e5f5"  # 浅紫色
+
+
+# 象限键，未设置分值的事项不属于任何象限
+QUADRANTS = ("q1", "q2", "q3", "q4")
+UNASSIGNED_QUADRANT = "unassigned"
+
+
+def get_quadrant(importance: Optional[int], urgency: Optional[int]) -> str:
+    """
+    获取象限键，与 get_quadrant_info 的划分规则一致
+
+    返回:
+        "q1" - "q4"，任一分值为空时返回 "unassigned"
+    """
+    if importance is None or urgency is None:
+        return UNASSIGNED_QUADRANT
+    if importance > 0:
+        return "q1" if urgency > 0 else "q2"
+    return "q3" if urgency > 0 else "q4"
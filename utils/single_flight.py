@@ -0,0 +1,103 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 是否合并相同的并发读请求
+SINGLE_FLIGHT_ENABLED = os.getenv("TODO_SINGLE_FLIGHT", "1") == "1"
+# 跟随者等待领头请求的最长时间（秒），超时后自行计算
+SINGLE_FLIGHT_WAIT_S = float(os.getenv("TODO_SINGLE_FLIGHT_WAIT_S", "30"))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """合并相同键的并发调用
+
+    同一时刻相同键只执行一次：第一个调用者（领头）执行计算，
+    其间到达的调用者等待并直接拿到同一个结果（或同一个异常）。
+    计算结束后立即移除该键，之后的调用会重新计算，因此不是缓存；
+    键中包含数据版本时，写入之后到达的请求不会拿到写入之前开始的计算结果。
+    """
+
+    def __init__(self, wait_timeout: float = SINGLE_FLIGHT_WAIT_S) -> None:
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+        self.wait_timeouts = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """执行或加入键为 key 的计算
+
+        Returns:
+            (结果, 是否与其他调用共享)
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executions += 1
+            else:
+                call.followers += 1
+                leader = False
+
+        if not leader:
+            if call.done.wait(self.wait_timeout):
+                with self._lock:
+                    self.shared += 1
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            # 领头请求长时间未完成（例如卡在数据库锁上），不再等待
+            logger.warning(f"等待合并的请求超时 ({self.wait_timeout}s)，改为单独执行: {key}")
+            with self._lock:
+                self.wait_timeouts += 1
+                self.executions += 1
+            return func(), False
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, call.followers > 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": SINGLE_FLIGHT_ENABLED,
+                "calls": self.calls,
+                "executions": self.executions,
+                "shared": self.shared,
+                "wait_timeouts": self.wait_timeouts,
+                "in_flight": len(self._calls),
+                # 被合并掉的调用占比：0 表示没有合并，接近 1 表示大多数调用共享了结果
+                "coalescing_ratio": round(self.shared / self.calls, 4) if self.calls else 0.0,
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """获取进程级的请求合并器（各接口的键互不相同，共用一个实例）"""
+    return _single_flight
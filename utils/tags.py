@@ -0,0 +1,49 @@
+from typing import Iterable, List, Optional
+
+# 单个标签的最大长度和每个事项的标签数上限
+MAX_TAG_LENGTH = 30
+MAX_TAGS_PER_TODO = 20
+
+
+def normalize_tag(value: str) -> str:
+    """去掉首尾空白并校验单个标签"""
+    if not isinstance(value, str):
+        raise ValueError('标签必须是字符串')
+    tag = value.strip()
+    if not tag:
+        raise ValueError('标签不能为空')
+    if len(tag) > MAX_TAG_LENGTH:
+        raise ValueError(f'标签长度不能超过{MAX_TAG_LENGTH}个字符')
+    return tag
+
+
+def normalize_tags(values: Optional[Iterable[str]]) -> List[str]:
+    """
+    规范化标签列表：去除空白、去重并排序
+
+    参数:
+        values: 原始标签，为None时视为空列表
+
+    返回:
+        tags: 按字符串顺序排列的不重复标签
+    """
+    tags = sorted({normalize_tag(value) for value in values or ()})
+    if len(tags) > MAX_TAGS_PER_TODO:
+        raise ValueError(f'每个事项最多{MAX_TAGS_PER_TODO}个标签')
+    return tags
+
+
+def ids_to_bitmap(ids: Iterable[int]) -> int:
+    """把非负整数ID集合编码为位图（第 id 位为1），先写入字节数组再一次转换为整数"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for todo_id in ids:
+        bits[todo_id >> 3] |= 1 << (todo_id & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitmap_to_ids(bitmap: int) -> List[int]:
+    """位图中为1的位，按升序返回"""
+    return [index for index, bit in enumerate(reversed(bin(bitmap)[2:])) if bit == "1"] if bitmap else []
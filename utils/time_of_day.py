@@ -0,0 +1,69 @@
+from typing import Any, Iterable, List, Optional, Tuple
+import heapq
+
+# 一天的分钟数，时刻取值范围为 [0, MINUTES_PER_DAY)
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(value: str) -> int:
+    """
+    将 "HH:MM" 解析为当天的分钟数
+
+    参数:
+        value: 时间字符串, 小时 00-23, 分钟 00-59
+
+    返回:
+        minutes: 从 00:00 起的分钟数 (范围 0-1439)
+    """
+    if len(value) != 5 or value[2] != ':' or not (value[:2].isdigit() and value[3:].isdigit()):
+        raise ValueError('时间格式必须是HH:MM')
+    hour, minute = int(value[:2]), int(value[3:])
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError('时间值无效')
+    return hour * 60 + minute
+
+
+def format_time(minutes: int) -> str:
+    """将当天的分钟数格式化为 "HH:MM" """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def to_minutes(value: Optional[str]) -> Optional[int]:
+    """可为空的 "HH:MM" -> 分钟数"""
+    return parse_time(value) if value else None
+
+
+def to_time(minutes: Optional[int]) -> Optional[str]:
+    """可为空的分钟数 -> "HH:MM" """
+    return format_time(minutes) if minutes is not None else None
+
+
+def find_overlaps(intervals: Iterable[Tuple[int, int, Any]]) -> List[Tuple[Any, Any, int, int]]:
+    """
+    扫描线算法找出所有相互重叠的时间段
+
+    区间为左闭右开 [start, end)，首尾相接（09:00-10:00 与 10:00-11:00）不算重叠，
+    end <= start 的区间被忽略。按开始时间排序后依次扫描，用按结束时间排序的最小堆维护
+    仍在进行中的区间：先弹出已结束的区间，堆中剩余的每个区间都与当前区间重叠。
+    复杂度 O(n log n + k)，k 为重叠对数，而不是两两比较的 O(n²)。
+
+    参数:
+        intervals: (开始分钟, 结束分钟, 关联对象) 序列
+
+    返回:
+        overlaps: (先开始的对象, 后开始的对象, 重叠开始分钟, 重叠结束分钟) 列表,
+                  按后开始区间的开始时间排序
+    """
+    ordered = sorted(
+        ((start, end, seq, item) for seq, (start, end, item) in enumerate(intervals) if end > start),
+        key=lambda interval: (interval[0], interval[1], interval[2]),
+    )
+    active: List[Tuple[int, int, int, Any]] = []  # (end, seq, start, item)
+    overlaps: List[Tuple[Any, Any, int, int]] = []
+    for start, end, seq, item in ordered:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for other_end, _, _, other in active:
+            overlaps.append((other, item, start, min(end, other_end)))
+        heapq.heappush(active, (end, seq, start, item))
+    return overlaps
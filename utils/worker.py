@@ -0,0 +1,156 @@
+from typing import Callable, Optional
+import hashlib
+import os
+import tempfile
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，按工作进程编号判断主进程
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 多进程部署时由 serve.py 为每个工作进程设置的编号
+WORKER_ID_ENV = "TODO_WORKER_ID"
+# 主工作进程选举使用的锁文件，默认放在 SQLite 数据库文件旁边
+PRIMARY_LOCK_ENV = "TODO_PRIMARY_LOCK_FILE"
+# 未取得锁的进程重新尝试的间隔（秒）
+PRIMARY_POLL_INTERVAL_S = float(os.getenv("TODO_PRIMARY_POLL_INTERVAL_S", "1"))
+
+
+def worker_id() -> int:
+    """当前工作进程编号，单进程运行时为0"""
+    try:
+        return int(os.getenv(WORKER_ID_ENV, "0"))
+    except ValueError:
+        return 0
+
+
+def primary_lock_path() -> str:
+    """主工作进程锁文件路径：SQLite 文件数据库为 <数据库文件>.primary.lock，否则按数据库地址放在临时目录"""
+    configured = os.getenv(PRIMARY_LOCK_ENV)
+    if configured:
+        return configured
+    from sqlalchemy.engine import make_url
+    from database.database import SQLALCHEMY_DATABASE_URL
+
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:" \
+            and "mode=memory" not in SQLALCHEMY_DATABASE_URL:
+        return os.path.abspath(url.database) + ".primary.lock"
+    digest = hashlib.sha1(SQLALCHEMY_DATABASE_URL.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"todo-primary-{digest}.lock")
+
+
+class PrimaryElection:
+    """基于文件锁（flock）的主工作进程选举
+
+    持有锁的进程为主工作进程，负责回填、清理等后台任务；进程退出（包括崩溃）时操作系统自动释放锁。
+    滚动重启时新进程先于旧进程启动，此时拿不到锁，在后台按间隔重试，
+    旧的主进程停止后台任务并释放锁之后才接管，任意时刻只有一个进程运行后台任务。
+    """
+
+    def __init__(self, path: str, poll_interval: float = PRIMARY_POLL_INTERVAL_S) -> None:
+        self.path = path
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._primary = False
+        self._on_resigned: Optional[Callable[[], None]] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_primary(self) -> bool:
+        return self._primary
+
+    def try_acquire(self) -> bool:
+        """尝试以非阻塞方式获取锁，成功后本进程成为主工作进程"""
+        if self._primary:
+            return True
+        if fcntl is None:
+            self._primary = worker_id() == 0
+            return self._primary
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        self._primary = True
+        return True
+
+    def start(self, on_elected: Callable[[], None], on_resigned: Optional[Callable[[], None]] = None) -> None:
+        """
+        参与选举：立即取得锁时同步调用 on_elected，否则在后台线程中重试，取得后再调用
+
+        参数:
+            on_elected: 成为主工作进程时执行（启动后台任务）
+            on_resigned: stop() 释放锁之前执行（停止后台任务）
+        """
+        self._on_resigned = on_resigned
+        if self.try_acquire():
+            logger.info(f"进程 {os.getpid()} 成为主工作进程")
+            on_elected()
+            return
+        if fcntl is None:
+            return
+        logger.info(f"主工作进程锁 {self.path} 已被占用，进程 {os.getpid()} 等待接管")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._wait, args=(on_elected,), name="primary-election", daemon=True)
+        self._thread.start()
+
+    def _wait(self, on_elected: Callable[[], None]) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            if self.try_acquire():
+                logger.info(f"原主工作进程已退出，进程 {os.getpid()} 接管后台任务")
+                on_elected()
+                return
+
+    def stop(self) -> None:
+        """停止重试；若为主工作进程，先执行 on_resigned 再释放锁"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._primary and self._on_resigned is not None:
+            self._on_resigned()
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._primary = False
+
+
+_election: Optional[PrimaryElection] = None
+
+
+def start_primary_election(on_elected: Callable[[], None], on_resigned: Optional[Callable[[], None]] = None) -> None:
+    """在当前进程中参与主工作进程选举（由应用生命周期调用）"""
+    global _election
+    stop_primary_election()
+    _election = PrimaryElection(primary_lock_path())
+    _election.start(on_elected, on_resigned)
+
+
+def stop_primary_election() -> None:
+    """退出选举并释放主工作进程锁"""
+    global _election
+    if _election is not None:
+        _election.stop()
+        _election = None
+
+
+def is_primary_worker() -> bool:
+    """是否为主工作进程
+
+    回填、清理等后台任务只在主工作进程中运行，避免多个进程重复执行。
+    参与选举后以是否持有锁为准，未参与选举时按工作进程编号判断。
+    """
+    if _election is not None:
+        return _election.is_primary
+    return worker_id() == 0